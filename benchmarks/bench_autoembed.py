@@ -0,0 +1,426 @@
+"""
+Load test of the auto-embed message listener
+
+Feeds synthetic `MessageCreate` events through `MessageListen.on_message_create`:
+mostly chatter, some messages from bots, opted out or from members without
+auto-embed, unsupported links, supported links, and bursts of the same link
+posted by several members at once. Providers are served from the recordings
+of `tests/fixtures/replay` by a `ReplayServer`, and replies go to a fake
+Discord sink answering after `--send-latency` seconds.
+
+Every message is traced, so the listener's stages (allowlist, link match,
+resolve, embed) and what they wait on (provider requests, cache, Discord)
+are timed from its spans. Reports messages per second, p50/p99 latency per
+stage and per outcome, then replays the same messages under `tracemalloc`
+to report peak memory.
+
+Run with `python benchmarks/bench_autoembed.py`
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Any
+
+from interactions.api.events import MessageCreate
+
+try:
+    from classes.cache import (MemoryLruBackend, SqliteBackend, TieredBackend,
+                               set_default_backend)
+    from classes.metrics import metrics
+    from classes.ratelimit import rate_limiter
+    from classes.replay import ReplayServer
+    from classes.session import session_manager
+    from classes.settings import autoembed_allowlist
+    from classes.tracing import Span, Tracer, span
+    from extensions.mediaautosend import MessageListen
+    from modules.i18n import fetch_language_data
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.cache import (MemoryLruBackend, SqliteBackend, TieredBackend,
+                               set_default_backend)
+    from classes.metrics import metrics
+    from classes.ratelimit import rate_limiter
+    from classes.replay import ReplayServer
+    from classes.session import session_manager
+    from classes.settings import autoembed_allowlist
+    from classes.tracing import Span, Tracer, span
+    from extensions.mediaautosend import MessageListen
+    from modules.i18n import fetch_language_data
+
+FIXTURES = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "tests", "fixtures", "replay"))
+"""Recorded provider responses"""
+
+BOT_ID = 1000
+"""Discord ID of the fake bot"""
+
+STAGES = ("allowlist", "link match", "resolve", "embed")
+"""Spans opened by the listener for each of its stages"""
+
+WORDS = (
+    "anyone", "watched", "the", "new", "episode", "yet", "lol", "that",
+    "ending", "was", "wild", "recommend", "me", "something", "cozy", "manga",
+    "art", "is", "so", "good", "season", "two", "when", "brb", "dinner", "gg",
+)
+"""Vocabulary of chatter"""
+
+SUPPORTED_LINKS = (
+    "https://myanimelist.net/anime/52991/Sousou_no_Frieren",
+    "https://anidb.net/anime/17617",
+    "https://anilist.co/manga/118586",
+)
+"""Links answered by the recordings"""
+
+UNSUPPORTED_LINKS = (
+    "https://www.youtube.com/watch?v=qgQ9JgTmNtY",
+    "https://twitter.com/Anime_Frieren/status/1",
+    "https://en.wikipedia.org/wiki/Frieren",
+)
+"""Links no route matches"""
+
+
+class SendSink:
+    """Fake Discord API, counting what the listener sends"""
+
+    def __init__(self, latency: float):
+        """
+        Args:
+            latency (float): Seconds Discord takes to answer
+        """
+        self.latency = latency
+        self.sent: Counter[str] = Counter()
+
+    async def deliver(self, content: str | None,
+                      kwargs: dict[str, Any]) -> None:
+        """
+        Send a message
+
+        Args:
+            content (str | None): Text of the message
+            kwargs (dict[str, Any]): Embeds and components of the message
+        """
+        async with span("discord send", "discord"):
+            await asyncio.sleep(self.latency)
+        embed = kwargs.get("embed") or kwargs.get("embeds")
+        self.sent["embed" if embed else "text"] += 1
+
+
+class FakeAuthor:
+    """Author of a synthetic message"""
+
+    __slots__ = ("id", "bot")
+
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+
+    @property
+    def mention(self) -> str:
+        """Mention of the author"""
+        return f"<@{self.id}>"
+
+
+class FakeMessage:
+    """Synthetic message, answering like `ipy.Message` in a DM"""
+
+    __slots__ = ("content", "author", "guild", "channel", "sink")
+
+    def __init__(self, content: str, author: FakeAuthor, sink: SendSink):
+        self.content = content
+        self.author = author
+        self.guild = None
+        self.channel = None
+        self.sink = sink
+
+    async def reply(self, content: str | None = None, **kwargs: Any) -> None:
+        """Reply to the message"""
+        await self.sink.deliver(content, kwargs)
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> None:
+        """Send to the channel of the message"""
+        await self.sink.deliver(content, kwargs)
+
+
+def synthetic_events(
+    count: int,
+    sink: SendSink,
+    members: list[int],
+    strangers: list[int],
+    burst_every: int,
+    burst_size: int,
+    seed: int,
+) -> list[MessageCreate]:
+    """
+    Build a stream of message events
+
+    Args:
+        count (int): Number of messages, bursts included
+        sink (SendSink): Where replies go
+        members (list[int]): Members who enabled auto-embed
+        strangers (list[int]): Members who did not
+        burst_every (int): Messages between bursts, 0 disables them
+        burst_size (int): Messages of a burst
+        seed (int): Seed of the generator
+
+    Returns:
+        list[MessageCreate]: The events
+    """
+    rng = random.Random(seed)
+    events: list[MessageCreate] = []
+
+    def chatter() -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(2, 18)))
+
+    while len(events) < count:
+        if burst_every and len(events) % burst_every == burst_every - 1:
+            link = rng.choice(SUPPORTED_LINKS)
+            for _ in range(min(burst_size, count - len(events))):
+                message = FakeMessage(
+                    f"{chatter()} {link}", FakeAuthor(rng.choice(members)),
+                    sink)
+                events.append(MessageCreate(message=message))
+            continue
+        roll = rng.random()
+        pool = members if rng.random() < 0.6 else strangers
+        author = FakeAuthor(rng.choice(pool))
+        if roll < 0.03:
+            author = FakeAuthor(rng.randint(1, 999), bot=True)
+            content = chatter()
+        elif roll < 0.05:
+            content = f"!! {chatter()}"
+        elif roll < 0.06:
+            content = f"<@{BOT_ID}> hi"
+        elif roll < 0.14:
+            content = f"{chatter()} {rng.choice(UNSUPPORTED_LINKS)}"
+        elif roll < 0.26:
+            content = f"{chatter()} {rng.choice(SUPPORTED_LINKS)} {chatter()}"
+        else:
+            content = chatter()
+        events.append(MessageCreate(message=FakeMessage(content, author, sink)))
+    return events
+
+
+def percentiles(values: list[float]) -> tuple[float, float]:
+    """
+    Get the median and 99th percentile of durations
+
+    Args:
+        values (list[float]): Durations, in seconds
+
+    Returns:
+        tuple[float, float]: p50 and p99, in milliseconds
+    """
+    if len(values) == 1:
+        return values[0] * 1000, values[0] * 1000
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def stage_of(item: Span) -> str:
+    """
+    Group a span under a stage of the report
+
+    Args:
+        item (Span): The span
+
+    Returns:
+        str: Name of the stage
+    """
+    if item.name in STAGES or item.kind in ("root", "cpu"):
+        return item.name
+    return {
+        "io": "provider request",
+        "cache": "cache",
+        "discord": "discord send",
+    }[item.kind]
+
+
+async def feed(
+    listener: MessageListen,
+    events: list[MessageCreate],
+    concurrency: int,
+) -> tuple[float, dict[str, list[float]]]:
+    """
+    Dispatch events to the listener, each in its own task like the gateway
+
+    Args:
+        listener (MessageListen): The listener
+        events (list[MessageCreate]): Events to dispatch
+        concurrency (int): Maximum number of messages handled at once
+
+    Returns:
+        tuple[float, dict[str, list[float]]]: Elapsed seconds, and span durations by stage
+    """
+    tracer = Tracer(1.0, float("inf"))
+    callback = MessageListen.on_message_create.callback
+    stages: dict[str, list[float]] = defaultdict(list)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def dispatch(event: MessageCreate) -> None:
+        async with slots:
+            root = tracer.start("message", force=True)
+            try:
+                await callback(listener, event)
+            finally:
+                await tracer.finish(root)  # type: ignore
+            for item in root.trace.spans:  # type: ignore
+                stages[stage_of(item)].append(item.duration)
+
+    # AniList warns on every call without a token, keep the output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        await asyncio.gather(*(asyncio.create_task(dispatch(event)) for event in events))
+        elapsed = time.perf_counter() - started
+    return elapsed, stages
+
+
+async def run(args: argparse.Namespace, directory: str) -> dict[str, Any]:
+    """
+    Load the listener with synthetic messages
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+        directory (str): Temporary folder holding the caches and the allowlist
+
+    Returns:
+        dict[str, Any]: The report
+    """
+    set_default_backend(TieredBackend(
+        MemoryLruBackend(),
+        SqliteBackend(os.path.join(directory, "cache", "cache.db"))))
+    rng = random.Random(args.seed)
+    members = rng.sample(range(10**17, 10**18), args.members)
+    strangers = rng.sample(range(10**17, 10**18), args.members)
+    os.makedirs("database", exist_ok=True)
+    autoembed_allowlist.members = set(members)
+    autoembed_allowlist.save()
+    listener = object.__new__(MessageListen)
+    listener.__init__(SimpleNamespace(user=SimpleNamespace(id=BOT_ID)))
+
+    sink = SendSink(args.send_latency)
+    events = synthetic_events(
+        args.messages, sink, members, strangers, args.burst_every,
+        args.burst_size, args.seed)
+    metrics.clear()
+    elapsed, stages = await feed(listener, events, args.concurrency)
+    outcomes = {labels[0]: (child.count, child.sum)
+                for labels, child in metrics.messages.items()}
+    sent = dict(sink.sent)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await feed(listener, events, args.concurrency)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    set_default_backend(None)
+
+    report: dict[str, Any] = {
+        "messages": len(events),
+        "messages_per_second": round(len(events) / elapsed, 1),
+        "sent": sent,
+        "peak_memory_kib": round(peak / 1024, 1),
+        "outcomes": {},
+        "stages": {},
+    }
+    for outcome, (count, total) in sorted(
+            outcomes.items(), key=lambda item: -item[1][0]):
+        report["outcomes"][outcome] = {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3),
+        }
+    for stage, durations in sorted(
+            stages.items(), key=lambda item: -len(item[1])):
+        p50, p99 = percentiles(durations)
+        report["stages"][stage] = {
+            "count": len(durations),
+            "p50_ms": round(p50, 3),
+            "p99_ms": round(p99, 3),
+        }
+    return report
+
+
+async def main() -> None:
+    """Run the load test and print the report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000,
+                        help="messages to send")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="messages handled at once")
+    parser.add_argument("--members", type=int, default=200,
+                        help="members with auto-embed, and as many without")
+    parser.add_argument(
+        "--burst-every", type=int, default=250,
+        help="messages between bursts of the same link, 0 disables them")
+    parser.add_argument("--burst-size", type=int, default=20,
+                        help="messages of a burst")
+    parser.add_argument("--send-latency", type=float, default=0.05,
+                        help="seconds Discord takes to answer")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="factor applied to recorded provider latencies")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="seed of the messages")
+    parser.add_argument("--output",
+                        help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    # Providers are stubbed, their rate limits would only measure the limiter
+    rate_limiter.limits.clear()
+    # Load the strings before leaving the repository
+    fetch_language_data("en_US")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # The listener caches and logs errors under relative paths
+        os.chdir(directory)
+        server = ReplayServer.from_directory(
+            FIXTURES, latency_scale=args.latency_scale)
+        # Rerouted providers share one host, give it everyone's connections
+        session_manager.limit_per_host *= len(server.recordings)
+        await session_manager.start()
+        try:
+            async with server:
+                report = await run(args, directory)
+                report["provider_requests"] = server.served
+                if server.misses:
+                    misses = sorted(set(server.misses))
+                    print(f"Requests without a recording: {misses}")
+        finally:
+            await session_manager.close()
+            os.chdir(cwd)
+
+    print(f"{report['messages']} messages, "
+          f"{report['messages_per_second']} messages/s, "
+          f"{report['provider_requests']} provider requests, "
+          f"sent {report['sent']}, "
+          f"peak memory {report['peak_memory_kib']} KiB")
+    print(f"\n{'outcome':>16} {'count':>7} {'mean ms':>9}")
+    for outcome, item in report["outcomes"].items():
+        print(f"{outcome:>16} {item['count']:7d} {item['mean_ms']:9.3f}")
+    print(f"\n{'stage':>24} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage, item in report["stages"].items():
+        print(f"{stage:>24} {item['count']:7d} "
+              f"{item['p50_ms']:9.3f} {item['p99_ms']:9.3f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+Benchmark of cache hits returning hydrated models
+
+Compares the cost of a cache hit on a popular title when the cached dict is
+decoded and converted to dataclasses on every read, as before, with reading
+the model kept by `Caching.aread_model`. Payloads are shaped like Jikan's
+`/anime/{id}/full` and SIMKL's IDs responses.
+
+Run with `python benchmarks/bench_hydration.py`
+"""
+
+import asyncio
+import copy
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+try:
+    from classes.cache import (Caching, MemoryLruBackend, SqliteBackend,
+                               TieredBackend)
+    from classes.jikan import JikanApi
+    from classes.simkl import Simkl
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.cache import (Caching, MemoryLruBackend, SqliteBackend,
+                               TieredBackend)
+    from classes.jikan import JikanApi
+    from classes.simkl import Simkl
+
+
+def image(path: str) -> dict[str, str]:
+    """Build the images of an entry"""
+    return {
+        "image_url": f"https://cdn.myanimelist.net/images/{path}.jpg",
+        "small_image_url": f"https://cdn.myanimelist.net/images/{path}t.jpg",
+        "large_image_url": f"https://cdn.myanimelist.net/images/{path}l.jpg",
+    }
+
+
+def other(mal_id: int, kind: str, name: str) -> dict[str, Any]:
+    """Build a producer, genre or related entry"""
+    return {
+        "mal_id": mal_id,
+        "type": kind,
+        "name": name,
+        "url": f"https://myanimelist.net/{kind}/{mal_id}",
+    }
+
+
+ANIME: dict[str, Any] = {
+    "mal_id": 52991,
+    "url": "https://myanimelist.net/anime/52991/Sousou_no_Frieren",
+    "images": {"jpg": image("anime/1015/138006"), "webp": image("anime/1015/138006w")},
+    "trailer": {
+        "youtube_id": "qgQ9JgTmNtY",
+        "url": "https://www.youtube.com/watch?v=qgQ9JgTmNtY",
+        "embed_url": "https://www.youtube.com/embed/qgQ9JgTmNtY",
+        "images": {"image_url": "https://img.youtube.com/vi/qgQ9JgTmNtY/default.jpg"},
+    },
+    "approved": True,
+    "titles": [
+        {"type": "Default", "title": "Sousou no Frieren"},
+        {"type": "Japanese", "title": "葬送のフリーレン"},
+        {"type": "English", "title": "Frieren: Beyond Journey's End"},
+    ],
+    "title": "Sousou no Frieren",
+    "title_english": "Frieren: Beyond Journey's End",
+    "title_japanese": "葬送のフリーレン",
+    "title_synonyms": ["Frieren at the Funeral"],
+    "type": "TV",
+    "source": "Manga",
+    "episodes": 28,
+    "status": "Finished Airing",
+    "airing": False,
+    "aired": {
+        "from": "2023-09-29T00:00:00+00:00",
+        "to": "2024-03-22T00:00:00+00:00",
+        "prop": {
+            "from": {"day": 29, "month": 9, "year": 2023},
+            "to": {"day": 22, "month": 3, "year": 2024},
+        },
+        "string": "Sep 29, 2023 to Mar 22, 2024",
+    },
+    "duration": "24 min per ep",
+    "rating": "PG-13 - Teens 13 or older",
+    "score": 9.31,
+    "scored_by": 500000,
+    "rank": 1,
+    "popularity": 150,
+    "members": 1000000,
+    "favorites": 60000,
+    "synopsis": "During their decade-long quest to defeat the Demon King... " * 8,
+    "background": "Sousou no Frieren won the Anime of the Year award.",
+    "season": "fall",
+    "year": 2023,
+    "broadcast": {"day": "Fridays", "time": "23:00", "timezone": "Asia/Tokyo", "string": "Fridays at 23:00 (JST)"},
+    "producers": [other(i, "anime/producer", f"Producer {i}") for i in range(8)],
+    "licensors": [other(1468, "anime/producer", "Crunchyroll")],
+    "studios": [other(11, "anime/producer", "Madhouse")],
+    "genres": [other(i, "anime/genre", f"Genre {i}") for i in range(3)],
+    "explicit_genres": [],
+    "themes": [],
+    "demographics": [other(27, "anime/genre", "Shounen")],
+    "relations": [
+        {"relation": "Adaptation", "entry": [other(126287, "manga", "Sousou no Frieren")]},
+        {"relation": "Sequel", "entry": [other(59978, "anime", "Sousou no Frieren 2nd Season")]},
+    ],
+    "theme": {"openings": ["\"Yuusha\" by YOASOBI"], "endings": ["\"Anytime Anywhere\" by milet"]},
+    "external": [{"name": f"Site {i}", "url": f"https://example.com/{i}"} for i in range(4)],
+    "streaming": [{"name": "Crunchyroll", "url": "https://www.crunchyroll.com/series/GG5H5XQX4"}],
+}
+"""Jikan anime, as cached"""
+
+SIMKL_IDS: dict[str, Any] = {
+    "title": "Sousou no Frieren", "simkl": 2206958, "slug": "sousou-no-frieren",
+    "poster": "19/1964123ebd4e", "fanart": "50/5077d8b3a3d", "anitype": "tv",
+    "type": "anime", "allcin": None, "anfo": None, "anidb": 17617,
+    "anilist": 154587, "animeplanet": "frieren-beyond-journeys-end",
+    "anisearch": 17968, "ann": 26284, "hulu": None, "imdb": "tt22248376",
+    "kitsu": 46474, "livechart": 11910, "mal": 52991, "netflix": None,
+    "offjp": None, "tmdb": 209867, "tvdb": 424536, "tvdbslug": None,
+    "tvdbmslug": "frieren-beyond-journeys-end", "wikien": None, "wikijp": None,
+}
+"""SIMKL IDs, as cached"""
+
+
+async def per_hit(func: Callable[[], Any], rounds: int = 20_000) -> float:
+    """
+    Measure the cost of a coroutine
+
+    Args:
+        func (Callable[[], Any]): Coroutine factory
+        rounds (int, optional): Number of runs. Defaults to 20_000.
+
+    Returns:
+        float: Microseconds per run
+    """
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+async def main() -> None:
+    """Run the benchmark and print the cost per hit"""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = TieredBackend(
+            MemoryLruBackend(),
+            SqliteBackend(os.path.join(directory, "cache.db")))
+        cache = Caching(
+            os.path.join(directory, "provider"), 3600, backend=backend)
+        cases = [
+            ("jikan anime", ANIME, JikanApi.anime_dict_to_dataclass),
+            # pylint: disable-next=protected-access
+            ("simkl ids", SIMKL_IDS, Simkl._to_relations),
+        ]
+        for name, payload, hydrate in cases:
+            path = cache.get_cache_path(f"{name.replace(' ', '/')}.json")
+            await cache.awrite_model(path, copy.deepcopy(payload), hydrate)
+
+            async def convert_every_hit(path=path, hydrate=hydrate):
+                return hydrate(await cache.aread_cache(path))
+
+            async def hydrated_hit(path=path, hydrate=hydrate):
+                return await cache.aread_model(path, hydrate)
+
+            before = await per_hit(convert_every_hit)
+            after = await per_hit(hydrated_hit)
+            print(f"{name:>12}: {before:8.2f} us/hit converted, "
+                  f"{after:6.2f} us/hit hydrated ({before / after:.0f}x)")
+        backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
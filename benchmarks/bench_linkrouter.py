@@ -0,0 +1,93 @@
+"""
+Benchmark of the auto-embed link router
+
+Compares the per-message cost of `classes.linkrouter.media_links` with the
+previous approach, searching every site pattern in sequence, over a corpus
+shaped like busy guild traffic: mostly chat, some unrelated links, and a few
+supported links.
+
+Run with `python benchmarks/bench_linkrouter.py`
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+try:
+    from classes.linkrouter import MEDIA_ROUTES, media_links
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.linkrouter import MEDIA_ROUTES, media_links
+
+CHAT = [
+    "good morning everyone",
+    "lol that episode was wild",
+    "anyone watching the new season? the OP slaps",
+    "brb, dinner",
+    "i think the manga is way better than the anime tbh, the pacing is so much tighter and the art holds up",
+    "ok",
+    "<@123456789012345678> did you finish it yet?",
+]
+UNRELATED = [
+    "check this https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://twitter.com/someone/status/1681234567890123456 lmao",
+    "docs are at https://docs.python.org/3/library/re.html",
+]
+SUPPORTED = [
+    "https://myanimelist.net/anime/21/One_Piece is peak",
+    "reading https://mangadex.org/title/a1c7c817-4e59-43b7-9365-09675a149a6f rn",
+    "https://anilist.co/anime/154587/Sousou-no-Frieren/",
+]
+
+
+def build_corpus(size: int = 10_000, seed: int = 42) -> list[str]:
+    """
+    Build a corpus of messages, 80% chat, 15% unrelated links, 5% supported links
+
+    Args:
+        size (int, optional): Number of messages. Defaults to 10_000.
+        seed (int, optional): Random seed. Defaults to 42.
+
+    Returns:
+        list[str]: Messages
+    """
+    rng = random.Random(seed)
+    pools = [CHAT, UNRELATED, SUPPORTED]
+    return [rng.choice(rng.choices(pools, weights=[80, 15, 5])[0])
+            for _ in range(size)]
+
+
+SEQUENTIAL = [
+    rf"(?:https?://)?(?:www\.)?{route.host}{route.path}" for route in MEDIA_ROUTES
+]
+"""Site patterns as they were searched before, one by one"""
+
+
+def sequential_first(text: str) -> str | None:
+    """Find the first matching pattern, the previous way"""
+    for pattern in SEQUENTIAL:
+        found = re.search(pattern, text)
+        if found is not None:
+            return found["mediaid"]
+    return None
+
+
+def main() -> None:
+    """Run the benchmark and print the cost per message"""
+    corpus = build_corpus()
+    for name, func in [("sequential", sequential_first),
+                       ("router", media_links.first)]:
+        runs = timeit.repeat(
+            lambda: [func(message) for message in corpus], number=1, repeat=5)
+        print(f"{name:>10}: {min(runs) / len(corpus) * 1e6:.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Memory benchmark of provider models
+
+Measures what a hydrated Jikan anime and a Jikan user with favorites and
+updates cost in memory with the slotted models of `classes.jikan`, against
+the same models rebuilt as plain dataclasses with a per-instance `__dict__`,
+as they were before.
+
+Run with `python benchmarks/bench_models.py`
+"""
+
+import copy
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import MISSING, field, fields, is_dataclass, make_dataclass
+from typing import Any, Callable, Iterator
+
+try:
+    from benchmarks.bench_hydration import ANIME, image
+    from classes import jikan
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from benchmarks.bench_hydration import ANIME, image
+    from classes import jikan
+
+
+def entry(mal_id: int, kind: str) -> dict[str, Any]:
+    """Build a favorite entry"""
+    return {
+        "mal_id": mal_id,
+        "url": f"https://myanimelist.net/{kind}/{mal_id}",
+        "images": {
+            "jpg": image(f"{kind}/{mal_id}"),
+            "webp": image(f"{kind}/{mal_id}w"),
+        },
+        "title": f"Title {mal_id}",
+        "type": "TV",
+        "start_year": 2020,
+    }
+
+
+def cast(mal_id: int, kind: str) -> dict[str, Any]:
+    """Build a favorite character or person"""
+    return {
+        "mal_id": mal_id,
+        "url": f"https://myanimelist.net/{kind}/{mal_id}",
+        "images": {
+            "jpg": image(f"{kind}/{mal_id}"),
+            "webp": image(f"{kind}/{mal_id}w"),
+        },
+        "name": f"Name {mal_id}",
+    }
+
+
+def update(mal_id: int, kind: str) -> dict[str, Any]:
+    """Build a list update"""
+    progress = {"episodes_seen": 3, "episodes_total": 12} if kind == "anime" \
+        else {"chapters_read": 3, "chapters_total": 12}
+    return {
+        "entry": entry(mal_id, kind),
+        "score": 8,
+        "status": "Watching" if kind == "anime" else "Reading",
+        "date": "2024-03-22T10:00:00+00:00",
+        **progress,
+    }
+
+
+def statistics(kind: str) -> dict[str, Any]:
+    """Build list statistics"""
+    if kind == "anime":
+        return {
+            "days_watched": 100.5, "mean_score": 7.9, "watching": 5,
+            "completed": 300, "on_hold": 4, "dropped": 10,
+            "plan_to_watch": 50, "total_entries": 369, "rewatched": 2,
+            "episodes_watched": 5000,
+        }
+    return {
+        "days_read": 50.5, "mean_score": 8.1, "reading": 5, "completed": 100,
+        "on_hold": 4, "dropped": 10, "plan_to_read": 50, "total_entries": 169,
+        "reread": 2, "chapters_read": 5000, "volumes_read": 300,
+    }
+
+
+USER: dict[str, Any] = {
+    "mal_id": 1,
+    "username": "nattadasu",
+    "url": "https://myanimelist.net/profile/nattadasu",
+    "images": {"jpg": image("userimages/1"), "webp": image("userimages/1w")},
+    "last_online": "2024-03-22T10:00:00+00:00",
+    "gender": None,
+    "birthday": None,
+    "location": None,
+    "joined": "2014-01-01T00:00:00+00:00",
+    "statistics": {"anime": statistics("anime"), "manga": statistics("manga")},
+    "favorites": {
+        "anime": [entry(i, "anime") for i in range(10)],
+        "manga": [entry(i, "manga") for i in range(10)],
+        "characters": [cast(i, "character") for i in range(10)],
+        "people": [cast(i, "people") for i in range(5)],
+    },
+    "updates": {
+        "anime": [update(i, "anime") for i in range(3)],
+        "manga": [update(i, "manga") for i in range(3)],
+    },
+    "about": None,
+    "external": [],
+}
+"""Jikan user, as cached"""
+
+
+def unslotted(cls: type) -> type:
+    """
+    Rebuild a model as a plain dataclass
+
+    Args:
+        cls (type): The slotted model
+
+    Returns:
+        type: A dataclass with the same fields and a per-instance __dict__
+    """
+    specs = []
+    for item in fields(cls):
+        if item.default is not MISSING:
+            specs.append((item.name, item.type, field(default=item.default)))
+        elif item.default_factory is not MISSING:
+            default = field(default_factory=item.default_factory)
+            specs.append((item.name, item.type, default))
+        else:
+            specs.append((item.name, item.type))
+    return make_dataclass(cls.__name__, specs)
+
+
+@contextmanager
+def plain_models() -> Iterator[None]:
+    """Swap every model of classes.jikan with a plain dataclass"""
+    models = {
+        name: value for name, value in vars(jikan).items()
+        if isinstance(value, type) and is_dataclass(value)
+    }
+    for name, model in models.items():
+        setattr(jikan, name, unslotted(model))
+    try:
+        yield
+    finally:
+        for name, model in models.items():
+            setattr(jikan, name, model)
+
+
+def allocated(hydrate: Callable[[Any], Any],
+              payload: dict[str, Any]) -> tuple[int, int]:
+    """
+    Measure the memory kept by a hydrated model
+
+    Args:
+        hydrate (Callable[[Any], Any]): Converter from the payload to the model
+        payload (dict[str, Any]): Payload, copied before conversion
+
+    Returns:
+        tuple[int, int]: Bytes kept alive by the model, and number of model objects
+    """
+    # Warm up caches filled on first use, such as strptime's compiled formats
+    hydrate(copy.deepcopy(payload))
+    data = copy.deepcopy(payload)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    model = hydrate(data)
+    del data
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, count(model)
+
+
+def count(obj: Any) -> int:
+    """Count the model objects reachable from a model"""
+    if is_dataclass(obj):
+        return 1 + sum(count(getattr(obj, item.name)) for item in fields(obj))
+    if isinstance(obj, list):
+        return sum(count(item) for item in obj)
+    return 0
+
+
+def main() -> None:
+    """Run the benchmark and print the memory kept per cached entry"""
+    cases = [
+        ("jikan anime", jikan.JikanApi.anime_dict_to_dataclass, ANIME),
+        ("jikan user", jikan.JikanApi.user_dict_to_dataclass, USER),
+    ]
+    for name, hydrate, payload in cases:
+        with plain_models():
+            plain, objects = allocated(hydrate, payload)
+        slotted, _ = allocated(hydrate, payload)
+        print(
+            f"{name:>12}: {objects} objects, {plain:,} B plain, "
+            f"{slotted:,} B slotted, "
+            f"{(plain - slotted) / objects:.0f} B saved per object "
+            f"({1 - slotted / plain:.0%} per entry)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Benchmark of provider wrappers, the cache and embed generators, offline
+
+Serves the recordings of `tests/fixtures/replay` from a `ReplayServer`, then
+measures the throughput and p50/p99 latency of `JikanApi`, `AniList`,
+`Simkl`, `AnimeApi`, `Caching` and the `generate_mal`, `generate_anilist`
+and `create_simkl_embed` embed generators.
+
+Cold runs drop the cache before every call, so each one goes through the
+replay server and its recorded latency, one call at a time. Warm runs are
+answered by the cache, `--concurrency` calls at a time. Provider rate limits
+are lifted so the numbers measure the bot, pass `--paced` to keep them.
+
+Results are written to `benchmarks/results/<commit>.json`, pass `--compare`
+with the file of another commit to print the difference.
+
+Run with `python benchmarks/bench_providers.py`
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+try:
+    from classes.anilist import AniList
+    from classes.animeapi import AnimeApi
+    from classes.cache import (Caching, MemoryLruBackend, SqliteBackend,
+                               TieredBackend, get_default_objects,
+                               set_default_backend)
+    from classes.jikan import JikanApi
+    from classes.ratelimit import rate_limiter
+    from classes.replay import ReplayServer
+    from classes.session import session_manager
+    from classes.simkl import Simkl
+    from modules.anilist import generate_anilist
+    from modules.myanimelist import generate_mal
+    from modules.simkl import create_simkl_embed
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.anilist import AniList
+    from classes.animeapi import AnimeApi
+    from classes.cache import (Caching, MemoryLruBackend, SqliteBackend,
+                               TieredBackend, get_default_objects,
+                               set_default_backend)
+    from classes.jikan import JikanApi
+    from classes.ratelimit import rate_limiter
+    from classes.replay import ReplayServer
+    from classes.session import session_manager
+    from classes.simkl import Simkl
+    from modules.anilist import generate_anilist
+    from modules.myanimelist import generate_mal
+    from modules.simkl import create_simkl_embed
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+"""Root of the repository"""
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "replay")
+"""Recorded provider responses"""
+
+RESULTS = os.path.join(ROOT, "benchmarks", "results")
+"""Folder of the results, one file per commit"""
+
+
+@dataclass
+class Result:
+    """Measurements of a benchmark case"""
+
+    name: str
+    """Measured call"""
+    mode: str
+    """How the call was run, such as cold or warm"""
+    rounds: int
+    """Number of calls"""
+    concurrency: int
+    """Number of calls running at once"""
+    throughput: float
+    """Calls per second"""
+    p50_ms: float
+    """Median latency, in milliseconds"""
+    p99_ms: float
+    """99th percentile latency, in milliseconds"""
+    mean_ms: float
+    """Mean latency, in milliseconds"""
+
+
+async def measure(
+    name: str,
+    mode: str,
+    call: Callable[[], Awaitable[Any]],
+    rounds: int,
+    concurrency: int = 1,
+    reset: Callable[[], None] | None = None,
+) -> Result:
+    """
+    Measure the latency and throughput of a coroutine
+
+    Args:
+        name (str): Measured call
+        mode (str): How the call is run
+        call (Callable[[], Awaitable[Any]]): Coroutine factory
+        rounds (int): Number of calls
+        concurrency (int, optional): Number of calls running at once, 1 if reset. Defaults to 1.
+        reset (Callable[[], None] | None, optional): Run before every call, untimed. Defaults to None.
+
+    Returns:
+        Result: The measurements
+    """
+    if reset is not None:
+        concurrency = 1
+    latencies: list[float] = []
+    remaining = iter(range(rounds))
+
+    async def worker() -> None:
+        for _ in remaining:
+            if reset is not None:
+                reset()
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    # AniList warns on every call without a token, keep the output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        await call()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    if reset is not None:
+        elapsed = sum(latencies)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return Result(
+        name=name,
+        mode=mode,
+        rounds=rounds,
+        concurrency=concurrency,
+        throughput=round(rounds / elapsed, 2),
+        p50_ms=round(cuts[49] * 1000, 3),
+        p99_ms=round(cuts[98] * 1000, 3),
+        mean_ms=round(statistics.fmean(latencies) * 1000, 3),
+    )
+
+
+async def jikan_anime() -> Any:
+    """Get an anime from Jikan"""
+    async with JikanApi() as jikan:
+        return await jikan.get_anime_data(52991)
+
+
+async def anilist_anime() -> Any:
+    """Get an anime from AniList"""
+    async with AniList() as anilist:
+        return await anilist.anime(154587)
+
+
+async def simkl_anime() -> Any:
+    """Find an anime by its MAL ID on SIMKL, then get it"""
+    async with Simkl("replay") as simkl:
+        found = await simkl.search_by_id(simkl.Provider.MYANIMELIST, 52991)
+        return await simkl.get_anime(found[0]["ids"]["simkl"])
+
+
+async def animeapi_relation() -> Any:
+    """Get the relations of an anime from AnimeAPI"""
+    async with AnimeApi() as aniapi:
+        return await aniapi.get_relation(52991, "myanimelist")
+
+
+async def mal_embed() -> Any:
+    """Generate the embed of an anime"""
+    return await generate_mal(52991, True)
+
+
+async def anilist_embed() -> Any:
+    """Generate the embed of a manga"""
+    return await generate_anilist(118586, True)
+
+
+async def run_cases(args: argparse.Namespace, directory: str) -> list[Result]:
+    """
+    Measure every case against the replay server
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+        directory (str): Temporary folder holding the caches
+
+    Returns:
+        list[Result]: Measurements of every case
+    """
+    backend = TieredBackend(
+        MemoryLruBackend(),
+        SqliteBackend(os.path.join(directory, "cache", "cache.db")))
+    set_default_backend(backend)
+
+    def forget() -> None:
+        backend.purge("cache", -1)
+        get_default_objects().clear()
+
+    results: list[Result] = []
+    providers = [
+        ("jikan anime", jikan_anime),
+        ("anilist anime", anilist_anime),
+        ("simkl anime", simkl_anime),
+        ("animeapi relation", animeapi_relation),
+        ("generate_mal", mal_embed),
+        ("generate_anilist", anilist_embed),
+    ]
+    for name, call in providers:
+        results.append(await measure(name, "cold", call, args.rounds, reset=forget))
+        results.append(await measure(
+            name, "warm", call, args.rounds * 10, args.concurrency))
+
+    simkl_data = await simkl_anime()
+
+    async def simkl_embed() -> Any:
+        return create_simkl_embed(simkl_data, "tv", True, False)
+
+    results.append(await measure(
+        "create_simkl_embed", "render", simkl_embed, args.rounds * 10))
+
+    cache = Caching(
+        os.path.join(directory, "cache", "bench"), 3600,
+        backend=SqliteBackend(os.path.join(directory, "bench.db")))
+    with open(os.path.join(FIXTURES, "api.jikan.moe.json"), encoding="utf-8") as file:
+        exchanges = json.load(file)["exchanges"]
+    payload = exchanges[0]["responses"][0]["json"]["data"]
+    path = cache.get_cache_path("anime/52991.json")
+
+    async def cache_write() -> Any:
+        return await cache.awrite_cache(path, payload)
+
+    async def cache_read() -> Any:
+        return await cache.aread_cache(path)
+
+    async def cache_hit() -> Any:
+        return await cache.aread_model(path, JikanApi.anime_dict_to_dataclass)
+
+    results.append(await measure(
+        "Caching", "write", cache_write, args.rounds * 10, args.concurrency))
+    results.append(await measure(
+        "Caching", "read", cache_read, args.rounds * 10, args.concurrency))
+    results.append(await measure(
+        "Caching", "model hit", cache_hit, args.rounds * 100, args.concurrency))
+    cache.backend.close()
+    set_default_backend(None)
+    return results
+
+
+def git_commit() -> tuple[str, bool]:
+    """
+    Get the checked out commit
+
+    Returns:
+        tuple[str, bool]: Short hash, or "unknown", and whether the tree has changes
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status)
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str) -> None:
+    """
+    Print the change of every case against the results of another commit
+
+    Args:
+        results (list[dict[str, Any]]): Current results
+        baseline_path (str): Results file of the other commit
+    """
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    before = {
+        (item["name"], item["mode"]): item for item in baseline["results"]}
+    print(f"\nAgainst {baseline['commit']}:")
+    for item in results:
+        old = before.get((item["name"], item["mode"]))
+        if old is None:
+            continue
+        changes = [
+            f"{key.removesuffix('_ms')} {(item[key] - old[key]) / old[key]:+7.1%}"
+            for key in ("throughput", "p50_ms", "p99_ms") if old[key]
+        ]
+        print(f"{item['name']:>20} {item['mode']:<9} {', '.join(changes)}")
+
+
+async def main() -> None:
+    """Run the benchmark, print and save the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rounds", type=int, default=50,
+        help="cold calls per case, warm cases run 10 times more")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="calls running at once in warm cases")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="factor applied to recorded latencies")
+    parser.add_argument("--paced", action="store_true",
+                        help="keep the rate limits of providers")
+    parser.add_argument(
+        "--output", help="results file, defaults to results/<commit>.json")
+    parser.add_argument("--compare", help="results file of another commit")
+    args = parser.parse_args()
+
+    if not args.paced:
+        rate_limiter.limits.clear()
+    commit, dirty = git_commit()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # Providers cache under relative paths, keep them in the temporary dir
+        os.chdir(directory)
+        await session_manager.start()
+        try:
+            async with ReplayServer.from_directory(
+                    FIXTURES, latency_scale=args.latency_scale) as server:
+                results = await run_cases(args, directory)
+                if server.misses:
+                    print(f"Requests without a recording: {server.misses}")
+        finally:
+            await session_manager.close()
+            os.chdir(cwd)
+
+    print(f"{'case':>20} {'mode':<9} {'calls/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for result in results:
+        print(f"{result.name:>20} {result.mode:<9} {result.throughput:10.1f} "
+              f"{result.p50_ms:9.3f} {result.p99_ms:9.3f}")
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "compare")},
+        "results": [asdict(result) for result in results],
+    }
+    output = args.output or os.path.join(RESULTS, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
+    print(f"\nSaved to {os.path.relpath(output, cwd)}")
+    if args.compare:
+        compare(report["results"], args.compare)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark of cache payload encodings
+
+Compares the JSON text previously stored for each entry with every codec
+and compression installed, on payloads shaped like the largest cached
+responses: a full Jikan anime, the whole usrbg list, and a Spotify album.
+Reports write (encode) and read (decode) time per entry, and stored bytes.
+
+Run with `python benchmarks/bench_serializer.py`
+"""
+
+import json
+import os
+import sys
+import timeit
+from typing import Any, Callable
+
+try:
+    from benchmarks.bench_hydration import ANIME
+    from classes.serializer import (Serializer, available_codecs,
+                                    available_compressions)
+except ImportError:
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from benchmarks.bench_hydration import ANIME
+    from classes.serializer import (Serializer, available_codecs,
+                                    available_compressions)
+
+MARKETS = [
+    "AD", "AE", "AR", "AT", "AU", "BE", "BG", "BR", "CA", "CH", "CL", "CO",
+    "CZ", "DE", "DK", "ES", "FI", "FR", "GB", "HK", "ID", "IE", "IN", "IT",
+    "JP", "KR", "MX", "MY", "NL", "NO", "NZ", "PH", "PL", "PT", "SE", "SG",
+    "TH", "TR", "TW", "US", "VN", "ZA",
+]
+
+USRBG: list[dict[str, Any]] = [
+    {
+        "_id": f"{index:024x}",
+        "uid": str(100000000000000000 + index * 7919),
+        "img": f"https://i.imgur.com/{index:07d}.png",
+        "orientation": "center",
+    }
+    for index in range(8000)
+]
+"""usrbg list, as cached"""
+
+SPOTIFY_ALBUM: dict[str, Any] = {
+    "album_type": "album",
+    "id": "4yP0hdKOZPNshxUOjY0cZj",
+    "name": "After Hours",
+    "release_date": "2020-03-20",
+    "available_markets": MARKETS,
+    "artists": [{"id": "1Xyo4u8uXC1ZmMpatF05PJ", "name": "The Weeknd", "type": "artist"}],
+    "images": [{"url": f"https://i.scdn.co/image/{size}", "height": size, "width": size}
+               for size in (640, 300, 64)],
+    "tracks": {
+        "items": [
+            {
+                "id": f"track{number:018d}",
+                "name": f"Track {number}",
+                "track_number": number,
+                "duration_ms": 200000 + number * 1000,
+                "explicit": number % 3 == 0,
+                "available_markets": MARKETS,
+                "artists": [{"id": "1Xyo4u8uXC1ZmMpatF05PJ", "name": "The Weeknd"}],
+                "preview_url": f"https://p.scdn.co/mp3-preview/{number:040d}",
+            }
+            for number in range(1, 15)
+        ]
+    },
+}
+"""Spotify album, as cached"""
+
+
+def per_run(func: Callable[[], Any], number: int) -> float:
+    """Best time of a function over a few repeats, in microseconds per run"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print the cost per entry"""
+    payloads = [("jikan anime", ANIME, 2000), ("usrbg", USRBG, 10),
+                ("spotify album", SPOTIFY_ALBUM, 1000)]
+    configurations: list[tuple[str, Callable[[Any], Any], Callable[[Any], Any]]] = [
+        ("legacy json", json.dumps, json.loads)]
+    for codec in available_codecs():
+        for compression in available_compressions():
+            serializer = Serializer(codec, compression)  # type: ignore
+            configurations.append(
+                (f"{codec}+{compression}", serializer.dumps, serializer.loads))
+    for name, payload, number in payloads:
+        print(name)
+        for label, dumps, loads in configurations:
+            stored = dumps(payload)
+            write = per_run(lambda dumps=dumps: dumps(payload), number)
+            read = per_run(
+                lambda loads=loads, stored=stored: loads(stored), number)
+            raw = stored.encode("utf-8") if isinstance(stored, str) else stored
+            print(f"  {label:>16}: write {write:9.1f} us, "
+                  f"read {read:9.1f} us, {len(raw):>9,} B")
+
+
+if __name__ == "__main__":
+    main()
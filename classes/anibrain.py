@@ -11,9 +11,8 @@ from enum import Enum
 from time import time
 from typing import Dict, List, Literal
 
-import aiohttp
-
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 today = datetime.now().year
@@ -88,7 +87,7 @@ class AniBrainAI:
         self.headers = {
             "User-Agent": USER_AGENT,
         }
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
@@ -4,17 +4,17 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Literal
 
-from aiohttp import ClientSession
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
+from classes.singleflight import flights
 from modules.const import (ANILIST_ACCESS_TOKEN, ANILIST_OAUTH_EXPIRY,
                            USER_AGENT)
 
 Cache = Caching(cache_directory="cache/anilist", cache_expiration_time=86400)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListTitleStruct:
     """AniList title dataclass"""
 
@@ -26,7 +26,7 @@ class AniListTitleStruct:
     """Native title"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListDateStruct:
     """AniList date dataclass"""
 
@@ -38,7 +38,7 @@ class AniListDateStruct:
     """Day"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListImageStruct:
     """AniList image dataclass"""
 
@@ -53,7 +53,7 @@ class AniListImageStruct:
     """Average HEX ("#RRGGBB") color of the image"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListTagsStruct:
     """AniList tags dataclass"""
 
@@ -70,7 +70,7 @@ class AniListTagsStruct:
     """Whether the tag is only for adult 18+ media"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListTrailerStruct:
     """AniList trailer dataclass"""
 
@@ -81,7 +81,7 @@ class AniListTrailerStruct:
     """Trailer site, commonly "youtube" or "dailymotion"."""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListMediaStruct:
     """AniList media dataclass"""
 
@@ -159,7 +159,7 @@ class AniListMediaStruct:
     """Anime episode duration in minutes"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListStatusBase:
     """Base AniList status dataclass"""
 
@@ -171,7 +171,7 @@ class AniListStatusBase:
     """Status count"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListStatisticBase:
     """Base AniList statistic dataclass"""
 
@@ -184,7 +184,7 @@ class AniListStatisticBase:
     """Statistic statuses"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListAnimeStatistic(AniListStatisticBase):
     """AniList anime statistic dataclass"""
 
@@ -196,7 +196,7 @@ class AniListAnimeStatistic(AniListStatisticBase):
     """Episodes watched"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListMangaStatistic(AniListStatisticBase):
     """AniList manga statistic dataclass"""
 
@@ -208,7 +208,7 @@ class AniListMangaStatistic(AniListStatisticBase):
     """Volumes read"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListUserStatisticStruct:
     """AniList user statistic dataclass"""
 
@@ -218,14 +218,14 @@ class AniListUserStatisticStruct:
     """Manga statistic object"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListUserMediaNode:
     """AniList user media node dataclass"""
 
     nodes: list[AniListMediaStruct] | None = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListUserFavoriteStruct:
     """AniList user favorite dataclass"""
 
@@ -241,7 +241,7 @@ class AniListUserFavoriteStruct:
     """Studio favorites"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AniListUserStruct:
     """AniList user dataclass"""
 
@@ -280,7 +280,7 @@ class AniList:
     def __init__(self):
         """Initialize the AniList API Wrapper"""
         self.base_url = "https://graphql.anilist.co"
-        self.session = ClientSession()
+        self.session = create_session()
         self.headers = None
         self.access_token = ANILIST_ACCESS_TOKEN
 
@@ -429,7 +429,7 @@ class AniList:
         cache_file_path = Cache.get_cache_file_path(
             f"nsfw/{media.lower()}/{media_id}.json"
         )
-        cached_data = Cache.read_cached_data(
+        cached_data = await Cache.aread_cache(
             cache_file_path, override_expiration_time=604800)
         if cached_data is not None:
             return cached_data
@@ -454,15 +454,33 @@ class AniList:
                     ]
                 )
                 raise ProviderHttpError(err_strings, response.status)
-            Cache.write_data_to_cache(
-                data["data"]["Media"]["isAdult"],
-                cache_file_path)
+            await Cache.awrite_cache(
+                cache_file_path, data["data"]["Media"]["isAdult"], ttl=604800)
             return data["data"]["Media"]["isAdult"]
 
+    async def _read_media_cache(
+        self, cache_file_path: str
+    ) -> AniListMediaStruct | None:
+        """
+        Read media information from cache
+
+        Args:
+            cache_file_path (str): The cache file path
+
+        Returns:
+            AniListMediaStruct | None: The media information, or None if not cached
+        """
+        cached_data = await Cache.aread_cache(cache_file_path)
+        if cached_data is not None:
+            return self._media_dict_to_dataclass(cached_data)
+        return None
+
     async def anime(self, media_id: int) -> AniListMediaStruct:
         """
         Get anime information by its ID
 
+        Concurrent lookups of the same anime share a single upstream request
+
         Args:
             media_id (int): The ID of the anime
 
@@ -473,9 +491,28 @@ class AniList:
             AniListMediaStruct: The anime information
         """
         cache_file_path = Cache.get_cache_file_path(f"anime/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
-        if cached_data is not None:
-            return self._media_dict_to_dataclass(cached_data)
+        return await flights.do(
+            ("anilist", "anime", media_id),
+            lambda: self._fetch_anime(media_id, cache_file_path),
+            lambda: self._read_media_cache(cache_file_path),
+        )
+
+    async def _fetch_anime(
+        self, media_id: int, cache_file_path: str
+    ) -> AniListMediaStruct:
+        """
+        Fetch anime information from AniList, then cache it
+
+        Args:
+            media_id (int): The ID of the anime
+            cache_file_path (str): The cache file path
+
+        Raises:
+            ProviderHttpError: Raised when the HTTP request fails
+
+        Returns:
+            AniListMediaStruct: The anime information
+        """
         gqlquery = f"""query {{
     Media(id: {media_id}, type: ANIME) {{
         id
@@ -545,15 +582,16 @@ class AniList:
                     ]
                 )
                 raise ProviderHttpError(err_strings, response.status)
-            Cache.write_data_to_cache(
-                data["data"]["Media"],
-                cache_file_path)
+            await Cache.awrite_cache(
+                cache_file_path, data["data"]["Media"])
             return self._media_dict_to_dataclass(data["data"]["Media"])
 
     async def manga(self, media_id: int, from_mal: bool = False) -> AniListMediaStruct:
         """
         Get manga information by its ID
 
+        Concurrent lookups of the same manga share a single upstream request
+
         Args:
             media_id (int): The ID of the manga
             from_mal (bool, optional): Whether the ID is from MyAnimeList or not. Defaults to False.
@@ -562,9 +600,29 @@ class AniList:
             AniListMediaStruct: The manga information
         """
         cache_file_path = Cache.get_cache_file_path(f"manga/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
-        if cached_data is not None:
-            return self._media_dict_to_dataclass(cached_data)
+        return await flights.do(
+            ("anilist", "manga", media_id, from_mal),
+            lambda: self._fetch_manga(media_id, from_mal, cache_file_path),
+            lambda: self._read_media_cache(cache_file_path),
+        )
+
+    async def _fetch_manga(
+        self, media_id: int, from_mal: bool, cache_file_path: str
+    ) -> AniListMediaStruct:
+        """
+        Fetch manga information from AniList, then cache it
+
+        Args:
+            media_id (int): The ID of the manga
+            from_mal (bool): Whether the ID is from MyAnimeList or not
+            cache_file_path (str): The cache file path
+
+        Raises:
+            ProviderHttpError: Raised when the HTTP request fails
+
+        Returns:
+            AniListMediaStruct: The manga information
+        """
         gqlquery = f"""query {{
     Media(id: {media_id}, type: MANGA) {{
         id
@@ -637,9 +695,8 @@ class AniList:
                     ]
                 )
                 raise ProviderHttpError(err_strings, response.status)
-            Cache.write_data_to_cache(
-                data["data"]["Media"],
-                cache_file_path)
+            await Cache.awrite_cache(
+                cache_file_path, data["data"]["Media"])
             return self._media_dict_to_dataclass(data["data"]["Media"])
 
     async def user(self, username: str, return_id: bool = False) -> AniListUserStruct:
@@ -657,7 +714,7 @@ class AniList:
             AniListUserStruct: The user information
         """
         cache_file_path = Cache.get_cache_file_path(f"user/{username}.json")
-        cached_data = Cache.read_cached_data(cache_file_path, 43200)
+        cached_data = await Cache.aread_cache(cache_file_path, 43200)
         if cached_data is not None and not return_id:
             formatted_data = self._user_dict_to_dataclass(cached_data)
             return formatted_data
@@ -748,7 +805,7 @@ class AniList:
                 raise ProviderHttpError(err_strings, response.status)
             user_data = data["data"]["User"]
             if not return_id:
-                Cache.write_data_to_cache(user_data, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, user_data)
                 formatted_data = self._user_dict_to_dataclass(user_data)
             else:
                 formatted_data = AniListUserStruct(
@@ -1,18 +1,24 @@
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime as dt
 from enum import Enum
 from typing import Literal
 
-from aiohttp import ClientSession
-
 from classes.cache import Caching
+from classes.excepts import ProviderHttpError
+from classes.idgraph import id_graph
+from classes.relationindex import INDEXED_PLATFORMS, RelationIndex
+from classes.session import create_session
+from classes.singleflight import flights
 from modules.const import USER_AGENT
 
 Cache = Caching(cache_directory="cache/animeapi", cache_expiration_time=86400)
 
+DATABASE_DUMP = "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/animeapi.json"
+"""Full AnimeAPI database, as a list of anime"""
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AnimeApiAnime:
     """AnimeAPI Anime Dataclass"""
 
@@ -64,6 +70,11 @@ class AnimeApiAnime:
         return asdict(self)
 
 
+relation_index = RelationIndex(
+    "cache/animeapi.db", columns=[field.name for field in fields(AnimeApiAnime)])
+"""Offline copy of AnimeAPI, answering relations before the HTTP API is tried"""
+
+
 class AnimeApi:
     """AnimeAPI API Wrapper"""
 
@@ -74,7 +85,7 @@ class AnimeApi:
 
     async def __aenter__(self):
         """Create the session with aiohttp"""
-        self.session = ClientSession(headers={"User-Agent": USER_AGENT})
+        self.session = create_session(headers={"User-Agent": USER_AGENT})
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
@@ -112,7 +123,7 @@ class AnimeApi:
             datetime: The last update time of AniAPI's database
         """
         cache_file_path = Cache.get_cache_file_path("updated")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             cached_data = dt.fromtimestamp(cached_data["timestamp"])
             return cached_data
@@ -123,14 +134,49 @@ class AnimeApi:
                 text = text.replace("Updated on ", "")
                 text = text.replace(" UTC", "+00:00")
                 final = dt.strptime(text, "%m/%d/%Y %H:%M:%S%z").timestamp()
-                Cache.write_data_to_cache(
-                    {"timestamp": final}, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, {"timestamp": final})
             return dt.fromtimestamp(final)
         except BaseException as e:
             raise Exception(
                 "Failed to get the last update time of AnimeAPI's database, reason: " +
                 str(e))
 
+    async def get_database(self) -> list[dict]:
+        """
+        Get every anime of AnimeAPI's database
+
+        Returns:
+            list[dict]: Anime relations, as returned by AnimeAPI
+
+        Raises:
+            ProviderHttpError: The dump can't be downloaded
+        """
+        async with self.session.get(DATABASE_DUMP) as resp:
+            if resp.status != 200:
+                raise ProviderHttpError(await resp.text(), resp.status)
+            data = await resp.json(content_type=None)
+        if isinstance(data, dict):
+            data = list(data.values())
+        return data
+
+    async def update_relation_index(self, force: bool = False) -> bool:
+        """
+        Rebuild the offline relation index if AnimeAPI's database changed
+
+        Args:
+            force (bool, optional): Rebuild even if the index is up to date. Defaults to False.
+
+        Returns:
+            bool: True if the index was rebuilt, False if it was up to date
+        """
+        upstream = (await self.get_update_time()).timestamp()
+        local = await relation_index.updated()
+        if not force and local is not None and local >= upstream:
+            return False
+        records = await self.get_database()
+        await relation_index.rebuild(records, upstream)
+        return True
+
     async def get_relation(
         self,
         media_id: str | int,
@@ -156,6 +202,10 @@ class AnimeApi:
         """
         Get a relation between anime and other platform via Natsu's AniAPI
 
+        Relations are answered from the offline index first. Only IDs missing
+        from it are requested, and concurrent lookups of the same ID share a
+        single upstream request
+
         Args:
             media_id (str | int): Anime ID
             platform (AnimeApiPlatforms | Literal["anisearch", "anidb", "anilist", "animeplanet", "annict", "kaize", "kitsu", "livechart", "myanimelist", "notify", "otakotaku", "shikimori", "shoboi", "silveryasha", "trakt" ]): Platform to get the relation
@@ -165,21 +215,62 @@ class AnimeApi:
         """
         if isinstance(platform, self.AnimeApiPlatforms):
             platform = platform.value
+        indexed = await relation_index.lookup(platform, media_id)
+        if indexed is not None:
+            return AnimeApiAnime(**indexed)
         cache_file_path = Cache.get_cache_file_path(
             f"{platform}/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        return await flights.do(
+            ("animeapi", platform, str(media_id)),
+            lambda: self._fetch_relation(media_id, platform, cache_file_path),
+            lambda: self._read_relation_cache(cache_file_path),
+        )
+
+    @staticmethod
+    async def _read_relation_cache(cache_file_path: str) -> AnimeApiAnime | None:
+        """
+        Read a relation from cache
+
+        Args:
+            cache_file_path (str): Cache file path
+
+        Returns:
+            AnimeApiAnime | None: Relation, or None if not cached
+        """
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return AnimeApiAnime(**cached_data)
+        return None
+
+    async def _fetch_relation(
+        self,
+        media_id: str | int,
+        platform: str,
+        cache_file_path: str,
+    ) -> AnimeApiAnime:
+        """
+        Fetch a relation from AnimeAPI, then cache it
+
+        Args:
+            media_id (str | int): Anime ID
+            platform (str): Platform of the ID
+            cache_file_path (str): Cache file path
+
+        Returns:
+            AnimeApiAnime: Relation between anime and other platform
+        """
         try:
             async with self.session.get(
                 f"https://aniapi.nattadasu.my.id/{platform}/{media_id}"
             ) as resp:
                 jsonText = await resp.text()
                 jsonText = json.loads(jsonText)
-                Cache.write_data_to_cache(jsonText, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, jsonText)
+            id_graph.record("anime", platform, {
+                key: jsonText.get(key) for key in (*INDEXED_PLATFORMS, "imdb")})
             return AnimeApiAnime(**jsonText)
         except BaseException:
             return AnimeApiAnime()
 
 
-__all__ = ["AnimeApi", "AnimeApiAnime"]
+__all__ = ["AnimeApi", "AnimeApiAnime", "relation_index"]
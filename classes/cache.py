@@ -1,8 +1,40 @@
+"""
+Caching layer for data received from 3rd party APIs
+
+Every wrapper talks to `Caching`, which stores entries on a pluggable
+`CacheBackend`. By default, entries are kept in a size-bounded in-memory LRU
+tier in front of a single-file SQLite store, so a hot entry costs a dict
+lookup and a cold entry costs one indexed query instead of a file open.
+Both tiers encode entries with `classes.serializer`, and the SQLite store
+compresses large ones.
+"""
+
+import asyncio
 import json
 import os
+import sqlite3
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
-from typing import Any
+from typing import Any, Callable, TypeVar
+
+from classes.metrics import metrics
+from classes.serializer import Serializer, UnsupportedPayloadError
+from classes.tracing import span
+from modules.const import (CACHE_BACKEND, CACHE_COMPRESS_THRESHOLD,
+                           CACHE_COMPRESSION, CACHE_MEMORY_BYTES,
+                           CACHE_MEMORY_ENTRIES, CACHE_SERIALIZER)
+
+T = TypeVar("T")
+
+LEGACY_LIFETIME = 86400.0
+"""Lifetime in seconds given to entries stored before their expiry was recorded"""
+
+_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-io")
+"""Bounded executor running blocking cache I/O and (de)serialization off the event loop"""
 
 
 @dataclass
@@ -15,17 +47,662 @@ class CacheModel:
     """The data in the cache file"""
 
 
+def _normalize_key(cache_path: str) -> str:
+    """
+    Normalize a cache path so it can be used as a backend key
+
+    Args:
+        cache_path (str): The cache file path
+
+    Returns:
+        str: Normalized key
+    """
+    return os.path.normpath(cache_path)
+
+
+_default_serializer: Serializer | None = None
+
+
+def get_default_serializer() -> Serializer:
+    """
+    Get the serializer configured by `CACHE_SERIALIZER`, `CACHE_COMPRESSION`
+    and `CACHE_COMPRESS_THRESHOLD`
+
+    Returns:
+        Serializer: The shared serializer
+    """
+    global _default_serializer  # pylint: disable=global-statement
+    if _default_serializer is None:
+        _default_serializer = Serializer(
+            str(CACHE_SERIALIZER).lower(),  # type: ignore
+            str(CACHE_COMPRESSION).lower(),  # type: ignore
+            int(CACHE_COMPRESS_THRESHOLD),
+        )
+    return _default_serializer
+
+
+class CacheBackend:
+    """Base class of a cache storage backend"""
+
+    def get(self, key: str) -> CacheModel | None:
+        """
+        Get an entry from the backend
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            CacheModel | None: The entry, or None if it does not exist
+        """
+        raise NotImplementedError
+
+    def peek(self, key: str) -> CacheModel | None:
+        """
+        Get an entry only if it can be served without blocking I/O
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            CacheModel | None: The entry, or None if it is not held in memory
+        """
+        return None
+
+    def set(self, key: str, model: CacheModel,
+            ttl: float | None = None) -> None:
+        """
+        Store an entry on the backend
+
+        Args:
+            key (str): The cache key
+            model (CacheModel): The entry to store
+            ttl (float | None, optional): Lifetime hint of the entry, in seconds. Defaults to None.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """
+        Delete an entry from the backend
+
+        Args:
+            key (str): The cache key
+        """
+        raise NotImplementedError
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        """
+        Delete entries under a prefix that are older than max_age
+
+        Args:
+            prefix (str): Key prefix, usually a cache directory
+            max_age (float): Maximum age of an entry, in seconds
+
+        Returns:
+            int: Number of deleted entries
+        """
+        raise NotImplementedError
+
+    def sweep(self, now: float, limit: int) -> list[tuple[str, int]] | None:
+        """
+        Delete a batch of entries whose lifetime ended
+
+        Args:
+            now (float): Current POSIX timestamp
+            limit (int): Maximum number of entries to delete
+
+        Returns:
+            list[tuple[str, int]] | None: Key and stored size of every deleted entry, or None if the backend keeps no expiry index
+        """
+        return None
+
+    def close(self) -> None:
+        """Release resources held by the backend"""
+
+
+class JsonFileBackend(CacheBackend):
+    """Legacy backend, stores every entry as its own JSON file"""
+
+    def get(self, key: str) -> CacheModel | None:
+        if not os.path.exists(key):
+            return None
+        with open(key, "r", encoding="utf-8") as file:
+            return CacheModel(**json.load(file))
+
+    def set(self, key: str, model: CacheModel,
+            ttl: float | None = None) -> None:
+        directory = os.path.dirname(key) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Write to a sibling temporary file then rename it over the entry, so
+        # a crash mid-write never leaves a truncated JSON behind
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(asdict(model), file)
+            os.replace(temp_path, key)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        if os.path.exists(key):
+            os.remove(key)
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        deleted = 0
+        current_time = time.time()
+        for root, _, files in os.walk(prefix):
+            for file_name in files:
+                if not file_name.endswith(".json"):
+                    continue
+                file_path = os.path.join(root, file_name)
+                if current_time - os.path.getmtime(file_path) > max_age:
+                    os.remove(file_path)
+                    deleted += 1
+        return deleted
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Single-file SQLite backend, keyed by normalized cache path
+
+    Entries written as JSON text by older versions are still read, and are
+    re-encoded the next time they are written.
+    """
+
+    def __init__(self, database_path: str = "cache/cache.db",
+                 serializer: Serializer | None = None):
+        """
+        Args:
+            database_path (str, optional): Path to the SQLite database. Defaults to "cache/cache.db".
+            serializer (Serializer | None, optional): Encoder of the payloads. Defaults to the configured one.
+        """
+        self.database_path = database_path
+        self.serializer = serializer or get_default_serializer()
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            database_path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                data TEXT NOT NULL,
+                expires_at REAL,
+                size INTEGER
+            ) WITHOUT ROWID"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        if "expires_at" not in columns:
+            # Entries written before the expiry index get the default lifetime
+            self._conn.execute("ALTER TABLE cache ADD COLUMN expires_at REAL")
+            self._conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER")
+            self._conn.execute(
+                "UPDATE cache SET expires_at = timestamp + ?, size = length(data)",
+                (LEGACY_LIFETIME,),
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self._legacy = JsonFileBackend()
+
+    def get(self, key: str) -> CacheModel | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp, data FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None:
+            try:
+                return CacheModel(timestamp=row[0], data=self.serializer.loads(row[1]))
+            except UnsupportedPayloadError:
+                # Written by an installation with more codecs, refetch it
+                return None
+        # Entries written by the JSON file backend are imported on first read
+        legacy = self._legacy.get(key)
+        if legacy is not None:
+            self.set(key, legacy)
+            self._legacy.delete(key)
+        return legacy
+
+    def set(self, key: str, model: CacheModel,
+            ttl: float | None = None) -> None:
+        payload = self.serializer.dumps(model.data)
+        expires_at = model.timestamp + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, timestamp, data, expires_at, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model.timestamp, payload, expires_at, len(payload)),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._legacy.delete(key)
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        prefix = _normalize_key(prefix) + os.sep
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE substr(key, 1, ?) = ? AND timestamp < ?",
+                (len(prefix), prefix, time.time() - max_age),
+            )
+        return cursor.rowcount + self._legacy.purge(prefix, max_age)
+
+    def sweep(self, now: float, limit: int) -> list[tuple[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, size FROM cache WHERE expires_at <= ? "
+                "ORDER BY expires_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"DELETE FROM cache WHERE key IN ({', '.join('?' * len(rows))})",
+                    [row[0] for row in rows],
+                )
+        return [(key, size or 0) for key, size in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryLruBackend(CacheBackend):
+    """
+    In-process, size-bounded and TTL-aware LRU tier
+
+    Entries are kept encoded, so callers that mutate the returned data (for
+    example when converting it to dataclasses) never corrupt the tier. They
+    are not compressed, as the tier trades memory for speed. Only entries up
+    to `inline_bytes` are decoded by `peek` on the event loop, larger ones are
+    left to `get` in the I/O executor.
+    """
+
+    def __init__(self, max_entries: int = 2048,
+                 serializer: Serializer | None = None,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 inline_bytes: int = 64 * 1024):
+        """
+        Args:
+            max_entries (int, optional): Maximum number of entries kept in memory. Defaults to 2048.
+            serializer (Serializer | None, optional): Encoder of the entries. Defaults to the configured codec, uncompressed.
+            max_bytes (int, optional): Size cap of the encoded entries, an eighth per entry. Defaults to 64 MiB.
+            inline_bytes (int, optional): Largest entry decoded by `peek`. Defaults to 64 KiB.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.inline_bytes = inline_bytes
+        self.serializer = serializer or Serializer(
+            get_default_serializer().codec, "none")  # type: ignore
+        self._entries: OrderedDict[str,
+                                   tuple[float, bytes, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _payload(self, key: str, max_size: float) -> tuple[float, bytes] | None:
+        """Get the timestamp and encoded data of a fresh entry up to a size"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, payload, expires_at = entry
+            if expires_at <= time.time():
+                self._pop(key)
+                return None
+            if len(payload) > max_size:
+                return None
+            self._entries.move_to_end(key)
+        return timestamp, payload
+
+    def _pop(self, key: str) -> None:
+        """Forget an entry, the lock must be held"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def get(self, key: str) -> CacheModel | None:
+        found = self._payload(key, float("inf"))
+        if found is None:
+            return None
+        return CacheModel(timestamp=found[0], data=self.serializer.loads(found[1]))
+
+    def peek(self, key: str) -> CacheModel | None:
+        found = self._payload(key, self.inline_bytes)
+        if found is None:
+            return None
+        return CacheModel(timestamp=found[0], data=self.serializer.loads(found[1]))
+
+    def set(self, key: str, model: CacheModel,
+            ttl: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = model.timestamp + ttl if ttl is not None else float("inf")
+        payload = self.serializer.dumps(model.data)
+        with self._lock:
+            self._pop(key)
+            # Large datasets would flush the whole tier, they stay on the store
+            if len(payload) > self.max_bytes // 8:
+                return
+            self._entries[key] = (model.timestamp, payload, expires_at)
+            self._bytes += len(payload)
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        prefix = _normalize_key(prefix) + os.sep
+        threshold = time.time() - max_age
+        with self._lock:
+            stale = [
+                key for key, (timestamp, _, _) in self._entries.items()
+                if key.startswith(prefix) and timestamp < threshold
+            ]
+            for key in stale:
+                self._pop(key)
+        return len(stale)
+
+    def sweep(self, now: float, limit: int) -> list[tuple[str, int]]:
+        with self._lock:
+            expired = [
+                (key, len(payload))
+                for key, (_, payload, expires_at) in self._entries.items()
+                if expires_at <= now
+            ][:limit]
+            for key, _ in expired:
+                self._pop(key)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TieredBackend(CacheBackend):
+    """Read-through/write-through combination of a memory tier and a store"""
+
+    def __init__(self, memory: MemoryLruBackend, store: CacheBackend):
+        """
+        Args:
+            memory (MemoryLruBackend): The in-process tier
+            store (CacheBackend): The persistent tier
+        """
+        self.memory = memory
+        self.store = store
+
+    def get(self, key: str) -> CacheModel | None:
+        model = self.memory.get(key)
+        if model is not None:
+            return model
+        model = self.store.get(key)
+        if model is not None:
+            self.memory.set(key, model)
+        return model
+
+    def peek(self, key: str) -> CacheModel | None:
+        return self.memory.peek(key)
+
+    def set(self, key: str, model: CacheModel,
+            ttl: float | None = None) -> None:
+        self.store.set(key, model, ttl)
+        self.memory.set(key, model, ttl)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.store.delete(key)
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        self.memory.purge(prefix, max_age)
+        return self.store.purge(prefix, max_age)
+
+    def sweep(self, now: float, limit: int) -> list[tuple[str, int]] | None:
+        self.memory.sweep(now, limit)
+        return self.store.sweep(now, limit)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class ObjectLruTier:
+    """
+    In-process, size-bounded LRU of models hydrated from cache entries
+
+    Unlike `MemoryLruBackend`, objects are shared as-is with every caller, so
+    a hit skips both decoding and the dict to dataclass conversion. Callers
+    must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        """
+        Args:
+            max_entries (int, optional): Maximum number of objects kept in memory. Defaults to 2048.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, expiration_time: float) -> Any:
+        """
+        Get an object if its entry is not expired
+
+        Args:
+            key (str): The cache key
+            expiration_time (float): The time in seconds before the entry is considered expired
+
+        Returns:
+            Any: The object, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, obj = entry
+            if time.time() - timestamp >= expiration_time:
+                return None
+            self._entries.move_to_end(key)
+        return obj
+
+    def set(self, key: str, timestamp: float, obj: Any) -> None:
+        """
+        Keep an object hydrated from an entry
+
+        Args:
+            key (str): The cache key
+            timestamp (float): The timestamp of the entry
+            obj (Any): The hydrated object
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (timestamp, obj)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """
+        Forget an object
+
+        Args:
+            key (str): The cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge(self, prefix: str, max_age: float) -> int:
+        """
+        Forget objects under a prefix whose entries are older than max_age
+
+        Args:
+            prefix (str): Key prefix, usually a cache directory
+            max_age (float): Maximum age of an entry, in seconds
+
+        Returns:
+            int: Number of forgotten objects
+        """
+        prefix = _normalize_key(prefix) + os.sep
+        threshold = time.time() - max_age
+        with self._lock:
+            stale = [
+                key for key, (timestamp, _) in self._entries.items()
+                if key.startswith(prefix) and timestamp < threshold
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Forget every object"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_backend: CacheBackend | None = None
+_default_backend_lock = threading.Lock()
+
+_default_objects = ObjectLruTier(int(CACHE_MEMORY_ENTRIES))
+"""Hydrated objects of entries stored on the shared backend"""
+
+
+def get_default_backend() -> CacheBackend:
+    """
+    Get the backend shared by every `Caching` instance that did not receive one
+
+    The backend is chosen by `CACHE_BACKEND` (`sqlite` or `json`) and fronted by
+    a memory tier holding up to `CACHE_MEMORY_ENTRIES` entries.
+
+    Returns:
+        CacheBackend: The shared backend
+    """
+    global _default_backend  # pylint: disable=global-statement
+    with _default_backend_lock:
+        if _default_backend is None:
+            store: CacheBackend
+            if str(CACHE_BACKEND).lower() == "json":
+                store = JsonFileBackend()
+            else:
+                store = SqliteBackend("cache/cache.db")
+            _default_backend = TieredBackend(
+                MemoryLruBackend(int(CACHE_MEMORY_ENTRIES),
+                                 max_bytes=int(CACHE_MEMORY_BYTES)), store
+            )
+        return _default_backend
+
+
+def set_default_backend(backend: CacheBackend | None) -> None:
+    """
+    Replace the shared backend, closing the previous one
+
+    Args:
+        backend (CacheBackend | None): New backend, or None to rebuild it lazily
+    """
+    global _default_backend  # pylint: disable=global-statement
+    with _default_backend_lock:
+        if _default_backend is not None and _default_backend is not backend:
+            _default_backend.close()
+        _default_backend = backend
+        _default_objects.clear()
+
+
+def get_default_objects() -> ObjectLruTier:
+    """
+    Get the hydrated objects of entries stored on the shared backend
+
+    Returns:
+        ObjectLruTier: The shared object tier
+    """
+    return _default_objects
+
+
+@dataclass
+class SweepReport:
+    """Entries removed from a provider's cache by a sweep"""
+
+    entries: int = 0
+    """Number of entries removed"""
+    bytes: int = 0
+    """Stored size of the removed entries"""
+
+
+def _provider_of(key: str) -> str:
+    """
+    Get the provider owning a cache key
+
+    Args:
+        key (str): Normalized cache path, such as cache/jikan/anime/1.json
+
+    Returns:
+        str: Directory right below the cache root, such as jikan
+    """
+    parts = key.split(os.sep)
+    if "cache" in parts[:-2]:
+        return parts[parts.index("cache") + 1]
+    return parts[-2] if len(parts) > 1 else ""
+
+
+async def sweep_expired(
+        backend: CacheBackend | None = None,
+        batch_size: int = 500,
+        max_batches: int = 50) -> dict[str, SweepReport] | None:
+    """
+    Delete expired entries in small batches, using the backend's expiry index
+
+    Each batch runs on the cache executor, and the event loop gets a turn
+    between batches, so a large backlog never stalls command handling.
+    Entries left over once `max_batches` is reached are removed by the next
+    sweep.
+
+    Args:
+        backend (CacheBackend | None, optional): Backend to sweep. Defaults to the shared backend.
+        batch_size (int, optional): Entries deleted per batch. Defaults to 500.
+        max_batches (int, optional): Batches run per sweep. Defaults to 50.
+
+    Returns:
+        dict[str, SweepReport] | None: Removed entries per provider, or None if the backend keeps no expiry index
+    """
+    backend = backend or get_default_backend()
+    loop = asyncio.get_running_loop()
+    reports: dict[str, SweepReport] = {}
+    now = time.time()
+    for _ in range(max_batches):
+        swept = await loop.run_in_executor(
+            _io_executor, backend.sweep, now, batch_size)
+        if swept is None:
+            return None
+        for key, size in swept:
+            _default_objects.delete(key)
+            report = reports.setdefault(_provider_of(key), SweepReport())
+            report.entries += 1
+            report.bytes += size
+        if len(swept) < batch_size:
+            break
+        await asyncio.sleep(0)
+    return reports
+
+
 class Caching:
     """Interface to cache data received from 3rd party APIs"""
 
     def __init__(
             self,
             cache_directory: str,
-            cache_expiration_time: int | float):
+            cache_expiration_time: int | float,
+            backend: CacheBackend | None = None):
         """
         Args:
             cache_directory (str): The directory to store cache files
             cache_expiration_time (int | float): The time in seconds before a cache file is considered expired
+            backend (CacheBackend | None, optional): Storage backend, defaults to the shared backend
         """
         self.cache_directory = cache_directory
         if not os.path.exists(cache_directory):
@@ -33,6 +710,21 @@ class Caching:
         if isinstance(cache_expiration_time, int):
             cache_expiration_time = float(cache_expiration_time)
         self.cache_expiration_time = cache_expiration_time
+        self._backend = backend
+        self._objects = None if backend is None else ObjectLruTier(
+            int(CACHE_MEMORY_ENTRIES))
+        self.provider = os.path.basename(os.path.normpath(cache_directory))
+        """Name of the provider in the metrics"""
+
+    @property
+    def backend(self) -> CacheBackend:
+        """The storage backend used by this instance"""
+        return self._backend or get_default_backend()
+
+    @property
+    def objects(self) -> ObjectLruTier:
+        """The hydrated objects of entries stored on the backend"""
+        return _default_objects if self._objects is None else self._objects
 
     def get_cache_path(self, cache_name: str) -> str:
         """
@@ -64,23 +756,73 @@ class Caching:
             expirate_time = self.cache_expiration_time
         else:
             expirate_time = override_expiration_time
-        if os.path.exists(cache_path):
-            with open(cache_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                model = CacheModel(**data)
-                age = time.time() - model.timestamp
-                if age < expirate_time:
-                    return model.data
-        return None
+        model = self.backend.get(_normalize_key(cache_path))
+        return self._fresh_data(model, expirate_time, self.provider)
+
+    async def aread_cache(
+            self,
+            cache_path: str,
+            override_expiration_time: int | float | None = None) -> Any:
+        """
+        Read a cache file without blocking the event loop
+
+        Entries held in memory are returned directly, otherwise the lookup and
+        deserialization run on a bounded executor.
+
+        Args:
+            cache_path (str): The cache file path
+            override_expiration_time (int | float | None, optional): Override the expiration time. Defaults to None.
+
+        Returns:
+            any: The data in the cache file
+            None: The cache file does not exist or is expired
+        """
+        if override_expiration_time is None:
+            expirate_time = self.cache_expiration_time
+        else:
+            expirate_time = override_expiration_time
+        key = _normalize_key(cache_path)
+        model = self.backend.peek(key)
+        if model is None:
+            loop = asyncio.get_running_loop()
+            with span(f"cache read {self.provider}", "cache"):
+                model = await loop.run_in_executor(
+                    _io_executor, self.backend.get, key)
+        return self._fresh_data(model, expirate_time, self.provider)
 
     @staticmethod
-    def write_cache(cache_path: str, data: Any) -> None:
+    def _fresh_data(model: CacheModel | None, expiration_time: float,
+                    provider: str | None = None) -> Any:
+        """
+        Return the data of an entry if it is not expired
+
+        Args:
+            model (CacheModel | None): The entry
+            expiration_time (float): The time in seconds before the entry is considered expired
+            provider (str | None, optional): Provider the read is counted for in the metrics. Defaults to not counting it.
+
+        Returns:
+            any: The data of the entry, or None if missing or expired
+        """
+        if model is None:
+            result, data = "miss", None
+        elif time.time() - model.timestamp < expiration_time:
+            result, data = "hit", model.data
+        else:
+            result, data = "expired", None
+        if provider is not None:
+            metrics.cache_reads.labels(provider, result).inc()
+        return data
+
+    def write_cache(self, cache_path: str, data: Any,
+                    ttl: float | None = None) -> None:
         """
         Write data to a cache file
 
         Args:
             cache_path (str): The cache file path
             data (any): The data to write
+            ttl (float | None, optional): Seconds before the entry is swept, for entries read with a longer expiration. Defaults to the expiration time.
 
         Raises:
             Exception: Failed to write data to cache file
@@ -88,13 +830,31 @@ class Caching:
         Returns:
             None: None
         """
-        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
         model = CacheModel(time.time(), data)
-        with open(cache_path, "w", encoding="utf-8") as f:
-            json.dump(asdict(model), f)
+        key = _normalize_key(cache_path)
+        self.objects.delete(key)
+        self.backend.set(
+            key, model, self.cache_expiration_time if ttl is None else ttl)
 
-    @staticmethod
-    def drop_cache(cache_path: str) -> None:
+    async def awrite_cache(self, cache_path: str, data: Any,
+                           ttl: float | None = None) -> None:
+        """
+        Write data to a cache file without blocking the event loop
+
+        Args:
+            cache_path (str): The cache file path
+            data (any): The data to write
+            ttl (float | None, optional): Seconds before the entry is swept, for entries read with a longer expiration. Defaults to the expiration time.
+
+        Returns:
+            None: None
+        """
+        loop = asyncio.get_running_loop()
+        with span(f"cache write {self.provider}", "cache"):
+            await loop.run_in_executor(
+                _io_executor, self.write_cache, cache_path, data, ttl)
+
+    def drop_cache(self, cache_path: str) -> None:
         """
         Delete a cache file
 
@@ -104,8 +864,75 @@ class Caching:
         Returns:
             None: None
         """
-        if os.path.exists(cache_path):
-            os.remove(cache_path)
+        key = _normalize_key(cache_path)
+        self.objects.delete(key)
+        self.backend.delete(key)
+
+    async def aread_model(
+            self,
+            cache_path: str,
+            hydrate: Callable[[Any], T],
+            override_expiration_time: int | float | None = None) -> T | None:
+        """
+        Read a cache file as a model, converting its data once per write
+
+        The converted model is kept in memory and shared by later reads, until
+        the entry expires, is written again or dropped. A cache path must
+        always be read with the same hydrate function.
+
+        Args:
+            cache_path (str): The cache file path
+            hydrate (Callable[[Any], T]): Converter from cached data to the model, may consume its input
+            override_expiration_time (int | float | None, optional): Override the expiration time. Defaults to None.
+
+        Returns:
+            T | None: The model, or None if the cache file does not exist or is expired
+        """
+        if override_expiration_time is None:
+            expirate_time = self.cache_expiration_time
+        else:
+            expirate_time = override_expiration_time
+        key = _normalize_key(cache_path)
+        obj = self.objects.get(key, expirate_time)
+        if obj is not None:
+            metrics.cache_reads.labels(self.provider, "hit").inc()
+            return obj
+        model = self.backend.peek(key)
+        if model is None:
+            loop = asyncio.get_running_loop()
+            with span(f"cache read {self.provider}", "cache"):
+                model = await loop.run_in_executor(
+                    _io_executor, self.backend.get, key)
+        data = self._fresh_data(model, expirate_time, self.provider)
+        if data is None:
+            return None
+        obj = hydrate(data)
+        self.objects.set(key, model.timestamp, obj)  # type: ignore
+        return obj
+
+    async def awrite_model(
+            self,
+            cache_path: str,
+            data: Any,
+            hydrate: Callable[[Any], T],
+            ttl: float | None = None) -> T:
+        """
+        Write data to a cache file, then keep its converted model in memory
+
+        Args:
+            cache_path (str): The cache file path
+            data (any): The data to write
+            hydrate (Callable[[Any], T]): Converter from the data to the model, may consume its input
+            ttl (float | None, optional): Seconds before the entry is swept, for entries read with a longer expiration. Defaults to the expiration time.
+
+        Returns:
+            T: The model
+        """
+        timestamp = time.time()
+        await self.awrite_cache(cache_path, data, ttl)
+        obj = hydrate(data)
+        self.objects.set(_normalize_key(cache_path), timestamp, obj)
+        return obj
 
     # Aliases
     get_cache_file_path = get_cache_path
@@ -130,4 +957,18 @@ class Caching:
         self.write_cache(cache_path, data)
 
 
-__all__ = ["Caching"]
+__all__ = [
+    "Caching",
+    "CacheBackend",
+    "JsonFileBackend",
+    "MemoryLruBackend",
+    "ObjectLruTier",
+    "SqliteBackend",
+    "SweepReport",
+    "TieredBackend",
+    "get_default_backend",
+    "get_default_objects",
+    "get_default_serializer",
+    "set_default_backend",
+    "sweep_expired",
+]
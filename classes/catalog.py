@@ -0,0 +1,254 @@
+"""
+Preloaded catalog of translated strings
+
+Every language file in `i18n/` is parsed once, merged over English so a
+missing key falls back to the English string, and frozen into read-only
+mappings shared by every shard. Strings can also be looked up by dotted key,
+such as `strings.utilities.title`, from a flat index built at load time.
+
+`modules/oobe/i18nBuild.py` writes `i18n/_index.json` last, so the catalog
+reloads itself when that file changes on disk.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+FALLBACK_LANGUAGE = "en_US"
+"""Language used for keys missing from a translation"""
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Recursively make parsed JSON read-only
+
+    Args:
+        value (Any): Parsed JSON value
+
+    Returns:
+        Any: Dicts as read-only mappings, lists as tuples, other values as is
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
+    """
+    Recursively merge a translation over the fallback language
+
+    Args:
+        base (dict[str, Any]): Fallback language data
+        override (dict[str, Any]): Translated data
+
+    Returns:
+        dict[str, Any]: Merged data, a new dict
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        elif value is not None:
+            merged[key] = value
+    return merged
+
+
+def _flatten(value: Any, prefix: str, into: dict[str, Any]) -> None:
+    """
+    Index every nested value of a language by dotted key
+
+    Args:
+        value (Any): Value to index
+        prefix (str): Dotted key of the value
+        into (dict[str, Any]): Flat index to fill
+    """
+    if prefix:
+        into[prefix] = value
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}" if prefix else key, into)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable state of the catalog, swapped as a whole on reload"""
+
+    languages: Mapping[str, Mapping[str, Any]] = field(
+        default_factory=lambda: MappingProxyType({}))
+    """Language data keyed by language code"""
+    flat: Mapping[str, Mapping[str, Any]] = field(
+        default_factory=lambda: MappingProxyType({}))
+    """Values keyed by language code, then by dotted key"""
+    index: tuple[Mapping[str, str], ...] = ()
+    """Content of `i18n/_index.json`"""
+    mtime: float | None = None
+    """Modification time of `i18n/_index.json` when loaded"""
+
+
+class I18nCatalog:
+    """Read-only, memoized catalog of every language"""
+
+    def __init__(self, directory: str = "i18n", check_interval: float = 5.0):
+        """
+        Args:
+            directory (str, optional): Directory holding the language files. Defaults to "i18n".
+            check_interval (float, optional): Minimum time between checks for a rebuild on disk, in seconds. Defaults to 5.0.
+        """
+        self.directory = directory
+        self.check_interval = check_interval
+        self._snapshot: CatalogSnapshot | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self) -> str:
+        """Path to the language index"""
+        return os.path.join(self.directory, "_index.json")
+
+    def _stat(self) -> float | None:
+        """
+        Get the modification time of the language index
+
+        Returns:
+            float | None: Modification time, or None if the index doesn't exist
+        """
+        try:
+            return os.stat(self._index_path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _read(self, code: str) -> dict[str, Any] | None:
+        """
+        Parse a language file
+
+        Args:
+            code (str): Language code
+
+        Returns:
+            dict[str, Any] | None: Language data, or None if the file doesn't exist
+        """
+        try:
+            with open(os.path.join(self.directory, f"{code}.json"), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> CatalogSnapshot:
+        """
+        Parse every language file, replacing the current snapshot
+
+        Returns:
+            CatalogSnapshot: The new snapshot
+        """
+        mtime = self._stat()
+        index: list[dict[str, str]] = []
+        if mtime is not None:
+            with open(self._index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+        fallback = self._read(FALLBACK_LANGUAGE) or {}
+        languages: dict[str, Mapping[str, Any]] = {}
+        flat: dict[str, Mapping[str, Any]] = {}
+        codes = [lang["code"] for lang in index]
+        if FALLBACK_LANGUAGE not in codes:
+            codes.append(FALLBACK_LANGUAGE)
+        for code in codes:
+            data = fallback if code == FALLBACK_LANGUAGE else self._read(code)
+            if data is None:
+                continue
+            frozen = _freeze(_merge(fallback, data))
+            languages[code] = frozen
+            keys: dict[str, Any] = {}
+            _flatten(frozen, "", keys)
+            flat[code] = MappingProxyType(keys)
+        snapshot = CatalogSnapshot(
+            languages=MappingProxyType(languages),
+            flat=MappingProxyType(flat),
+            index=_freeze(index),
+            mtime=mtime,
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def reload(self) -> CatalogSnapshot:
+        """
+        Force parsing every language file again
+
+        Returns:
+            CatalogSnapshot: The new snapshot
+        """
+        return self.load()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot, loaded on startup or first use and reloaded after a rebuild"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load()
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self._stat() != snapshot.mtime:
+                return self.load()
+        return snapshot
+
+    @property
+    def index(self) -> tuple[Mapping[str, str], ...]:
+        """Available languages, with their code, name, native name and dialect"""
+        return self.snapshot.index
+
+    def has(self, code: str) -> bool:
+        """
+        Check if a language is available
+
+        Args:
+            code (str): Language code
+
+        Returns:
+            bool: Whether the language exists or not
+        """
+        return code in self.snapshot.languages
+
+    def language(self, code: str) -> Mapping[str, Any] | None:
+        """
+        Get the data of a language
+
+        Args:
+            code (str): Language code
+
+        Returns:
+            Mapping[str, Any] | None: Read-only language data, or None if the language doesn't exist
+        """
+        return self.snapshot.languages.get(code)
+
+    def get(self, code: str, key: str, default: Any = None) -> Any:
+        """
+        Get a value by dotted key, falling back to English
+
+        Args:
+            code (str): Language code
+            key (str): Dotted key, such as `strings.utilities.title`
+            default (Any, optional): Value returned if the key doesn't exist. Defaults to None.
+
+        Returns:
+            Any: The value
+        """
+        flat = self.snapshot.flat
+        keys = flat.get(code)
+        if keys is not None and key in keys:
+            return keys[key]
+        return flat.get(FALLBACK_LANGUAGE, {}).get(key, default)
+
+
+catalog = I18nCatalog()
+"""Catalog shared by every shard"""
+
+
+__all__ = ["FALLBACK_LANGUAGE", "CatalogSnapshot", "I18nCatalog", "catalog"]
@@ -1,14 +1,65 @@
+"""
+Registered users database
+
+Users are stored in a single-file SQLite database keyed by their Discord ID,
+so a profile lookup is one indexed query instead of reading the whole file.
+Every query runs on a dedicated thread to keep the event loop responsive.
+
+The tab-separated `database.csv` used by older versions is imported once, the
+first time the database is opened, then renamed to `database.csv.bak`.
+"""
+
+import asyncio
+import csv
 import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Literal, Optional
+from typing import Any, Callable, Literal, Optional, TypeVar
 
-import pandas as pd
 from interactions.models import Snowflake
 
+from classes.settings import autoembed_allowlist, language_settings
 from modules.const import DATABASE_PATH, EMOJI_UNEXPECTED_ERROR
 from modules.jikan import check_club_membership
 
+T = TypeVar("T")
+
+DATABASE_COLUMNS: dict[str, str] = {
+    "discordId": "TEXT PRIMARY KEY",
+    "discordUsername": "TEXT NOT NULL",
+    "discordJoined": "INTEGER",
+    "malUsername": "TEXT",
+    "malId": "INTEGER NOT NULL",
+    "malJoined": "INTEGER",
+    "registeredAt": "INTEGER",
+    "registeredGuildId": "TEXT",
+    "registeredBy": "TEXT",
+    "registeredGuildName": "TEXT",
+    "anilistUsername": "TEXT",
+    "anilistId": "INTEGER",
+    "lastfmUsername": "TEXT",
+    "shikimoriId": "INTEGER",
+    "shikimoriUsername": "TEXT",
+}
+"""Columns of the users table, in the order of the legacy TSV header"""
+
+UPDATABLE_COLUMNS = frozenset([
+    "anilistId",
+    "anilistUsername",
+    "lastfmUsername",
+    "shikimoriId",
+    "shikimoriUsername",
+])
+"""Columns that can be modified with `UserDatabase.update_user`"""
+
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="userdb")
+"""Dedicated thread owning every database connection, serializing all queries"""
+_connections: dict[str, sqlite3.Connection] = {}
+"""Open connections keyed by database path, only touched from `_db_executor`"""
+
 
 @dataclass
 class UserDatabaseClass:
@@ -47,13 +98,20 @@ class UserDatabaseClass:
 class UserDatabase:
     """User Database Wrapper"""
 
-    def __init__(self, database_path: str = DATABASE_PATH):
+    def __init__(
+        self,
+        database_path: str = DATABASE_PATH,
+        legacy_path: str | None = None,
+    ):
         """Initialize the database
 
         Args:
-            database_path (str, optional): Path to the database. Defaults to database.
+            database_path (str, optional): Path to the SQLite database. Defaults to database.
+            legacy_path (str | None, optional): Path to the legacy TSV database to import. Defaults to the database path with a `.csv` extension.
         """
         self.database_path = database_path
+        self.legacy_path = (
+            legacy_path or os.path.splitext(database_path)[0] + ".csv")
 
     async def __aenter__(self):
         """Async context manager entry point"""
@@ -66,6 +124,101 @@ class UserDatabase:
     async def close(self):
         """Close the database"""
 
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get the connection to the database, creating and migrating it if needed
+
+        Only call this from the database thread
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        conn = _connections.get(self.database_path)
+        if conn is not None:
+            return conn
+        os.makedirs(os.path.dirname(self.database_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.database_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(
+            f"{name} {kind}" for name, kind in DATABASE_COLUMNS.items())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS users ({columns})")
+        self._migrate_legacy(conn)
+        _connections[self.database_path] = conn
+        return conn
+
+    def _migrate_legacy(self, conn: sqlite3.Connection) -> int:
+        """
+        Import users from the legacy TSV database, then rename it to `.bak`
+
+        Args:
+            conn (sqlite3.Connection): The connection
+
+        Returns:
+            int: Number of imported users
+        """
+        if not os.path.exists(self.legacy_path):
+            return 0
+        with open(self.legacy_path, "r", encoding="utf-8", newline="") as file:
+            reader = csv.DictReader(file, delimiter="\t")
+            rows = [
+                tuple(
+                    None if row.get(name) in (None, "", '""') else row[name]
+                    for name in DATABASE_COLUMNS
+                )
+                for row in reader
+                if row.get("discordId")
+            ]
+        placeholders = ", ".join("?" for _ in DATABASE_COLUMNS)
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO users VALUES ({placeholders})", rows)
+        os.replace(self.legacy_path, f"{self.legacy_path}.bak")
+        return len(rows)
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Run a query on the database thread
+
+        Args:
+            func (Callable[..., T]): Function receiving the connection, then args
+            *args (Any): Arguments passed to func
+
+        Returns:
+            T: Result of func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _db_executor, lambda: func(self._connect(), *args))
+
+    async def _fetch_user(self, discord_id: Snowflake | int) -> dict[str, Any]:
+        """
+        Get the raw row of a user
+
+        Args:
+            discord_id (Snowflake | int): Discord ID of the user
+
+        Returns:
+            dict[str, Any]: The row, keyed by column name
+
+        Raises:
+            DatabaseException: User is not registered
+        """
+
+        def query(conn: sqlite3.Connection) -> sqlite3.Row | None:
+            return conn.execute(
+                "SELECT * FROM users WHERE discordId = ?", (str(discord_id),)
+            ).fetchone()
+
+        row = await self._run(query)
+        if row is None:
+            raise DatabaseException(
+                f"{EMOJI_UNEXPECTED_ERROR} User may not be registered to the bot, or there's unknown error"
+            )
+        return dict(row)
+
     async def check_if_registered(self, discord_id: Snowflake) -> bool:
         """
         Check if user is registered on Database
@@ -76,11 +229,13 @@ class UserDatabase:
         Returns:
             bool: True if user is registered, False if not
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        val = False
-        if str(discord_id) in df["discordId"].values:
-            val = True
-        return val
+
+        def query(conn: sqlite3.Connection) -> bool:
+            return conn.execute(
+                "SELECT 1 FROM users WHERE discordId = ?", (str(discord_id),)
+            ).fetchone() is not None
+
+        return await self._run(query)
 
     async def save_to_database(self, user_data: UserDatabaseClass):
         """
@@ -113,17 +268,14 @@ class UserDatabase:
                 data[k] = str(int(v.timestamp()))
             elif isinstance(v, float):
                 data[k] = str(int(v))
-            elif v is None:
-                data[k] = '""'
-        df = pd.DataFrame(data, index=[0])
-        df = df[data.keys()]
-        df.to_csv(
-            self.database_path,
-            sep="\t",
-            index=False,
-            header=not self._database_exists(),
-            mode="a",
-        )
+        placeholders = ", ".join("?" for _ in DATABASE_COLUMNS)
+        values = tuple(data[name] for name in DATABASE_COLUMNS)
+
+        def query(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                f"INSERT OR REPLACE INTO users VALUES ({placeholders})", values)
+
+        await self._run(query)
 
     async def update_user(
         self,
@@ -148,10 +300,20 @@ class UserDatabase:
         Returns:
             bool: True if user is updated, False if not
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        df.loc[df["discordId"] == str(discord_id), row] = modified_input
-        df.to_csv(self.database_path, sep="\t", index=False)
-        return True
+        if row not in UPDATABLE_COLUMNS:
+            raise DatabaseException(
+                f"{EMOJI_UNEXPECTED_ERROR} `{row}` can not be modified")
+        if modified_input == "":
+            modified_input = None
+
+        def query(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                f"UPDATE users SET {row} = ? WHERE discordId = ?",
+                (modified_input, str(discord_id)),
+            )
+            return cursor.rowcount > 0
+
+        return await self._run(query)
 
     async def drop_user(self, discord_id: Snowflake) -> bool:
         """
@@ -163,13 +325,15 @@ class UserDatabase:
         Returns:
             bool: True if user is dropped, False if not
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        df.drop(df[df["discordId"] == str(discord_id)].index, inplace=True)
-        df.to_csv(self.database_path, sep="\t", index=False)
+
+        def query(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM users WHERE discordId = ?", (str(discord_id),))
+
+        await self._run(query)
         # drop from member settings
-        df2 = pd.read_csv("database/member.csv", sep="\t", dtype=str)
-        df2.drop(df2[df2["discordId"] == str(discord_id)].index, inplace=True)
-        df2.to_csv("database/member.csv", sep="\t", index=False)
+        language_settings.drop_member(discord_id)
+        autoembed_allowlist.discard(discord_id)
         # verify if its success
         verify = await self.check_if_registered(discord_id)
         return not verify
@@ -184,15 +348,8 @@ class UserDatabase:
         Returns:
             bool: True if user is verified, False if not
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        row = df[df["discordId"] == str(discord_id)]
-        if row.empty:
-            raise DatabaseException(
-                f"{EMOJI_UNEXPECTED_ERROR} User may not be registered to the bot, or there's unknown error"
-            )
-
-        username = row.iloc[0]["malUsername"]
-        verified = await check_club_membership(username)
+        data = await self._fetch_user(discord_id)
+        verified = await check_club_membership(data["malUsername"])
         return verified
 
     async def get_user_data(self, discord_id: Snowflake) -> UserDatabaseClass:
@@ -205,14 +362,7 @@ class UserDatabase:
         Returns:
             UserDatabaseClass: Dataclass contains information about an user
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        df.fillna("", inplace=True)
-        row = df[df["discordId"] == str(discord_id)]
-        if row.empty:
-            raise DatabaseException(
-                f"{EMOJI_UNEXPECTED_ERROR} User may not be registered to the bot, or there's unknown error"
-            )
-        data = row.to_dict(orient="records")[0]
+        data = await self._fetch_user(discord_id)
         return UserDatabaseClass(
             discord_id=Snowflake(data["discordId"]),
             discord_username=data["discordUsername"],
@@ -220,22 +370,17 @@ class UserDatabase:
             mal_username=data["malUsername"],
             mal_joined=datetime.fromtimestamp(
                 int(data["malJoined"]), tz=timezone.utc),
-            anilist_id=data["anilistId"] if data["anilistId"] else None,
-            anilist_username=data["anilistUsername"]
-            if data["anilistUsername"]
-            else None,
-            lastfm_username=data["lastfmUsername"] if data["lastfmUsername"] else None,
+            anilist_id=int(data["anilistId"]) if data["anilistId"] else None,
+            anilist_username=data["anilistUsername"] or None,
+            lastfm_username=data["lastfmUsername"] or None,
             registered_at=datetime.fromtimestamp(
                 int(data["registeredAt"]), tz=timezone.utc
             ),
             registered_guild_id=Snowflake(data["registeredGuildId"]),
-            registered_guild_name=data["registeredGuildName"],
+            registered_guild_name=data["registeredGuildName"] or "",
             registered_by=Snowflake(data["registeredBy"]),
-            shikimori_id=id(data["shikimoriId"]
-                            ) if data["shikimoriId"] else None,
-            shikimori_username=data["shikimoriUsername"]
-            if data["shikimoriUsername"]
-            else None,
+            shikimori_id=int(data["shikimoriId"]) if data["shikimoriId"] else None,
+            shikimori_username=data["shikimoriUsername"] or None,
         )
 
     async def export_user_data(self, discord_id: int) -> str:
@@ -248,25 +393,11 @@ class UserDatabase:
         Returns:
             str: JSON string of the user data
         """
-        df = pd.read_csv(self.database_path, sep="\t", dtype=str)
-        df.fillna("", inplace=True)
-        row = df[df["discordId"] == str(discord_id)]
-        if row.empty:
-            raise DatabaseException(
-                f"{EMOJI_UNEXPECTED_ERROR} User may not be registered to the bot, or there's unknown error"
-            )
-        data = row.to_dict(orient="records")[0]
-        try:
-            df2 = pd.read_csv("database/member.csv", sep="\t", dtype=str)
-            df2.fillna("", inplace=True)
-            row2 = df2[df2["discordId"] == str(discord_id)]
-            data2 = row2.to_dict(orient="records")[0]
-            data2.pop("discordId")
-            data2 = {f"settings_{key}": value for key, value in data2.items()}
-            data["has_user_settings"] = True
-            data.update(data2)
-        except IndexError:
-            data["has_user_settings"] = False
+        data = await self._fetch_user(discord_id)
+        language = language_settings.get_member(discord_id)
+        data["has_user_settings"] = language is not None
+        if language is not None:
+            data["settings_language"] = language
         for key, value in data.items():
             value = str(value)
             if value.isdigit():
@@ -275,21 +406,12 @@ class UserDatabase:
                 data[key] = True
             elif value.lower() == "false":
                 data[key] = False
-            elif value.lower() in ["null", "", "None"]:
+            elif value.lower() in ["null", "", "none"]:
                 data[key] = None
             else:
                 data[key] = str(value)
         return json.dumps(data)
 
-    def _database_exists(self) -> bool:
-        """Check if database exists"""
-        try:
-            pd.read_csv(self.database_path, sep="\t", dtype=str, nrows=0)
-        except pd.errors.EmptyDataError:
-            return False
-        else:
-            return True
-
     __all__ = [
         "check_if_registered",
         "save_to_database",
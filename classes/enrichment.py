@@ -0,0 +1,374 @@
+"""
+Concurrent enrichment of command responses
+
+A command usually needs one primary lookup and several secondary ones, such
+as extra posters or IDs from other sites. `EnrichmentPlan` starts every
+lookup as soon as the lookups it depends on are done, so independent round
+trips overlap instead of adding up.
+
+Optional lookups have a deadline: once it passes, the plan stops waiting and
+uses their default, so the embed ships on time with whatever arrived. Late
+lookups are not cancelled, they finish in the background and still fill the
+cache for the next command.
+
+`Resolver` covers lookups whose order depends on what the user gave: each
+node declares the facts it requires and the facts it produces, and the
+resolver keeps starting every node whose requirements are known, until
+nothing new can be learned or the deadline passes.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+_background: set[asyncio.Task] = set()
+"""Lookups still running after their plan returned, kept alive until done"""
+
+
+def _forget(task: asyncio.Task) -> None:
+    """
+    Drop a finished lookup, marking its outcome as retrieved
+
+    Args:
+        task (asyncio.Task): The finished lookup
+    """
+    _background.discard(task)
+    if not task.cancelled():
+        task.exception()
+
+
+@dataclass
+class EnrichmentStep:
+    """A lookup of an enrichment plan"""
+
+    name: str
+    """Name of the step, used as key of the results"""
+    func: Callable[..., Awaitable[Any]]
+    """Coroutine factory, receiving the results of `after` as positional arguments"""
+    after: list[str] = field(default_factory=list)
+    """Steps whose results are needed first"""
+    optional: bool = False
+    """Whether the step may fail or be dropped at the deadline"""
+    default: Any = None
+    """Result used when an optional step fails or is dropped"""
+
+
+class EnrichmentPlan:
+    """Run dependent lookups concurrently, within a latency budget"""
+
+    def __init__(self, deadline: float | None = None):
+        """
+        Args:
+            deadline (float | None, optional): Seconds optional steps may take, counted from the start of the plan. Defaults to no deadline.
+        """
+        self.deadline = deadline
+        self.steps: dict[str, EnrichmentStep] = {}
+        self.dropped: set[str] = set()
+        """Optional steps that failed or missed the deadline"""
+        self.durations: dict[str, float] = {}
+        """Time spent by each finished step, in seconds"""
+        self._deadline_at: float | None = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        after: list[str] | None = None,
+        optional: bool = False,
+        default: Any = None,
+    ) -> "EnrichmentPlan":
+        """
+        Add a step to the plan
+
+        Args:
+            name (str): Name of the step
+            func (Callable[..., Awaitable[Any]]): Coroutine factory, receiving the results of `after`
+            after (list[str] | None, optional): Steps to wait for. Defaults to None.
+            optional (bool, optional): Whether the step may be dropped. Defaults to False.
+            default (Any, optional): Result of a dropped step. Defaults to None.
+
+        Returns:
+            EnrichmentPlan: The plan, for chaining
+
+        Raises:
+            ValueError: The name is taken, or a dependency is not added yet
+        """
+        after = after or []
+        if name in self.steps:
+            raise ValueError(f"Step {name} is already in the plan")
+        if missing := [dep for dep in after if dep not in self.steps]:
+            raise ValueError(f"Step {name} depends on unknown steps: {missing}")
+        self.steps[name] = EnrichmentStep(name, func, after, optional, default)
+        return self
+
+    def provide(self, name: str, value: Any) -> "EnrichmentPlan":
+        """
+        Add a step whose result is already known
+
+        Args:
+            name (str): Name of the step
+            value (Any): The result
+
+        Returns:
+            EnrichmentPlan: The plan, for chaining
+        """
+
+        async def known() -> Any:
+            return value
+
+        return self.add(name, known)
+
+    async def _result(self, name: str, tasks: dict[str, asyncio.Task]) -> Any:
+        """
+        Wait for the result of a step
+
+        Args:
+            name (str): Name of the step
+            tasks (dict[str, asyncio.Task]): Running steps
+
+        Returns:
+            Any: The result, or the default of an optional step that failed or is late
+        """
+        step = self.steps[name]
+        task = tasks[name]
+        if not step.optional:
+            return await asyncio.shield(task)
+        if not task.done():
+            timeout = None
+            if self._deadline_at is not None:
+                now = asyncio.get_running_loop().time()
+                timeout = max(self._deadline_at - now, 0)
+            await asyncio.wait({task}, timeout=timeout)
+        if not task.done() or task.cancelled() or task.exception() is not None:
+            self.dropped.add(name)
+            return step.default
+        return task.result()
+
+    async def _run_step(self, step: EnrichmentStep,
+                        tasks: dict[str, asyncio.Task]) -> Any:
+        """
+        Run a step once its dependencies are done
+
+        Args:
+            step (EnrichmentStep): The step
+            tasks (dict[str, asyncio.Task]): Running steps
+
+        Returns:
+            Any: Result of the step
+        """
+        args = [await self._result(dep, tasks) for dep in step.after]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            return await step.func(*args)
+        finally:
+            self.durations[step.name] = loop.time() - started
+
+    async def run(self) -> dict[str, Any]:
+        """
+        Run every step
+
+        Returns:
+            dict[str, Any]: Results keyed by step name
+
+        Raises:
+            Exception: Any error of a required step
+        """
+        loop = asyncio.get_running_loop()
+        if self.deadline is not None:
+            self._deadline_at = loop.time() + self.deadline
+        tasks: dict[str, asyncio.Task] = {}
+        for step in self.steps.values():
+            task = loop.create_task(self._run_step(step, tasks))
+            _background.add(task)
+            task.add_done_callback(_forget)
+            tasks[step.name] = task
+        return {name: await self._result(name, tasks) for name in self.steps}
+
+
+@dataclass
+class ResolverNode:
+    """A lookup of a resolver"""
+
+    name: str
+    """Unique name of the node"""
+    func: Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]]
+    """Coroutine factory, receiving every known fact and returning new facts"""
+    requires: tuple[str, ...] = ()
+    """Facts that must be known before the node runs"""
+    produces: tuple[str, ...] = ()
+    """Facts the node is expected to find, it is skipped once they are all known"""
+    fallback: bool = False
+    """Whether the node only runs once nothing else can, one fallback at a time"""
+
+
+@dataclass
+class Resolution:
+    """Outcome of a resolver run"""
+
+    facts: dict[str, Any] = field(default_factory=dict)
+    """Every known fact, given or found"""
+    ran: list[str] = field(default_factory=list)
+    """Nodes that finished, in order"""
+    errors: dict[str, BaseException] = field(default_factory=dict)
+    """Errors raised by nodes, keyed by node name"""
+    pending: set[str] = field(default_factory=set)
+    """Nodes still running when the deadline passed"""
+    durations: dict[str, float] = field(default_factory=dict)
+    """Time spent by each finished node, in seconds"""
+
+
+class Resolver:
+    """Find facts by running lookups as soon as their inputs are known"""
+
+    def __init__(self, deadline: float | None = None):
+        """
+        Args:
+            deadline (float | None, optional): Seconds a run may take. Defaults to no deadline.
+        """
+        self.deadline = deadline
+        self.nodes: dict[str, ResolverNode] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]],
+        requires: Iterable[str] = (),
+        produces: Iterable[str] = (),
+        fallback: bool = False,
+    ) -> "Resolver":
+        """
+        Add a node, nodes added first are preferred when several produce the same facts
+
+        Args:
+            name (str): Name of the node
+            func (Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]]): Coroutine factory, receiving the known facts
+            requires (Iterable[str], optional): Facts needed to run. Defaults to none.
+            produces (Iterable[str], optional): Facts expected from the node. Defaults to none.
+            fallback (bool, optional): Whether the node waits until nothing else can run. Defaults to False.
+
+        Returns:
+            Resolver: The resolver, for chaining
+
+        Raises:
+            ValueError: The name is taken
+        """
+        if name in self.nodes:
+            raise ValueError(f"Node {name} is already in the resolver")
+        self.nodes[name] = ResolverNode(
+            name, func, tuple(requires), tuple(produces), fallback)
+        return self
+
+    @staticmethod
+    def _runnable(node: ResolverNode, facts: Mapping[str, Any],
+                  claimed: set[str]) -> bool:
+        """
+        Check if a node can find something new
+
+        Args:
+            node (ResolverNode): The node
+            facts (Mapping[str, Any]): Known facts
+            claimed (set[str]): Facts already expected from running nodes
+
+        Returns:
+            bool: Whether the node should start
+        """
+        if any(name not in facts for name in node.requires):
+            return False
+        return any(name not in facts and name not in claimed
+                   for name in node.produces)
+
+    async def _run_node(self, node: ResolverNode, facts: Mapping[str, Any],
+                        resolution: Resolution) -> dict[str, Any]:
+        """
+        Run a node on a snapshot of the facts
+
+        Args:
+            node (ResolverNode): The node
+            facts (Mapping[str, Any]): Known facts
+            resolution (Resolution): Resolution receiving the duration
+
+        Returns:
+            dict[str, Any]: Facts found by the node
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            return await node.func(facts)
+        finally:
+            resolution.durations[node.name] = loop.time() - started
+
+    async def resolve(self, known: Mapping[str, Any]) -> Resolution:
+        """
+        Run nodes until no node can find anything new, or the deadline passes
+
+        A node error is recorded and does not stop the other nodes
+
+        Args:
+            known (Mapping[str, Any]): Facts known beforehand, None values are ignored
+
+        Returns:
+            Resolution: Found facts and what happened to each node
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = None if self.deadline is None else loop.time() + self.deadline
+        resolution = Resolution({
+            name: value for name, value in known.items() if value is not None})
+        facts = resolution.facts
+        started: set[str] = set()
+        running: dict[asyncio.Task, ResolverNode] = {}
+
+        def start(node: ResolverNode) -> None:
+            task = loop.create_task(
+                self._run_node(node, dict(facts), resolution))
+            _background.add(task)
+            task.add_done_callback(_forget)
+            running[task] = node
+            started.add(node.name)
+
+        while True:
+            claimed = {name for node in running.values()
+                       for name in node.produces}
+            for node in self.nodes.values():
+                if node.fallback or node.name in started:
+                    continue
+                if self._runnable(node, facts, claimed):
+                    start(node)
+                    claimed.update(node.produces)
+            if not running:
+                for node in self.nodes.values():
+                    if node.fallback and node.name not in started \
+                            and self._runnable(node, facts, claimed):
+                        start(node)
+                        break
+            if not running:
+                break
+            timeout = None
+            if deadline_at is not None:
+                timeout = max(deadline_at - loop.time(), 0)
+            done, _ = await asyncio.wait(
+                running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                resolution.pending = {node.name for node in running.values()}
+                break
+            for task in done:
+                node = running.pop(task)
+                if task.cancelled():
+                    resolution.errors[node.name] = asyncio.CancelledError()
+                elif task.exception() is not None:
+                    resolution.errors[node.name] = task.exception()
+                else:
+                    resolution.ran.append(node.name)
+                    for name, value in (task.result() or {}).items():
+                        if value is not None and name not in facts:
+                            facts[name] = value
+        return resolution
+
+
+__all__ = [
+    "EnrichmentPlan",
+    "EnrichmentStep",
+    "Resolution",
+    "Resolver",
+    "ResolverNode",
+]
@@ -0,0 +1,308 @@
+"""
+Buffered sink for command errors
+
+Errors used to be formatted and written to a new text file each, on the
+event loop, so a provider outage produced thousands of files per hour.
+`ErrorLog.record` only enqueues the error. A background writer formats the
+traceback, groups identical tracebacks by fingerprint, and appends one
+JSON line per fingerprint and flush to a gzip-compressed segment under
+`errors/`. Segments are rotated by size, and only the newest ones are kept.
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from typing import Any
+
+SEGMENT_PREFIX = "errors-"
+"""File name prefix of log segments"""
+SEGMENT_SUFFIX = ".jsonl.gz"
+"""File name suffix of log segments"""
+
+_STOP = object()
+"""Queue item asking the writer to exit"""
+
+
+@dataclass(slots=True, frozen=True)
+class ErrorRecord:
+    """Occurrences of one traceback"""
+
+    fingerprint: str
+    """Hash of the exception type and the frames it went through"""
+    command: str
+    """Command or task the error was raised in"""
+    user_id: int | None
+    """Discord ID of the last user who hit the error"""
+    error_type: str
+    """Exception class name"""
+    message: str
+    """Exception message of the last occurrence"""
+    traceback: str
+    """Formatted traceback of the first occurrence"""
+    first_seen: float
+    """POSIX timestamp of the first occurrence"""
+    last_seen: float
+    """POSIX timestamp of the last occurrence"""
+    count: int = 1
+    """Number of occurrences"""
+
+
+def fingerprint(command: str, error: BaseException) -> str:
+    """
+    Identify a traceback regardless of its message, which often holds IDs
+
+    Args:
+        command (str): Command or task the error was raised in
+        error (BaseException): The error
+
+    Returns:
+        str: Hex digest of the command, exception type and frame locations
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    digest.update(f"{command}\0{type(error).__module__}.{type(error).__qualname__}".encode())
+    for frame in traceback.extract_tb(error.__traceback__):
+        digest.update(f"\0{frame.filename}:{frame.name}:{frame.lineno}".encode())
+    return digest.hexdigest()
+
+
+class ErrorLog:
+    """Deduplicating error sink written by a background thread"""
+
+    def __init__(
+        self,
+        directory: str = "errors",
+        segment_bytes: int = 1048576,
+        max_segments: int = 8,
+        flush_interval: float = 5.0,
+        max_records: int = 512,
+    ):
+        """
+        Args:
+            directory (str, optional): Folder holding the log segments. Defaults to "errors".
+            segment_bytes (int, optional): Compressed size from which a new segment is started. Defaults to 1 MiB.
+            max_segments (int, optional): Number of segments kept, the oldest are deleted. Defaults to 8.
+            flush_interval (float, optional): Seconds between writes of pending occurrences. Defaults to 5.
+            max_records (int, optional): Number of fingerprints kept in memory for `recent`. Defaults to 512.
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self.max_records = max_records
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._records: OrderedDict[str, ErrorRecord] = OrderedDict()
+        """Every fingerprint seen, most recent last"""
+        self._pending: dict[str, ErrorRecord] = {}
+        """Occurrences not written yet, per fingerprint"""
+        self._segment: str | None = None
+        self._written: set[str] = set()
+        """Fingerprints whose traceback is in the current segment"""
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def record(self, command: str, user_id: int | None, error: BaseException) -> None:
+        """
+        Queue an error without formatting or writing it
+
+        Args:
+            command (str): Command or task the error was raised in
+            user_id (int | None): Discord ID of the user who hit the error
+            error (BaseException): The error
+        """
+        self._start()
+        self._queue.put((time.time(), command, user_id, error))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Write every queued error now
+
+        Args:
+            timeout (float | None, optional): Seconds to wait for the writer. Defaults to no limit.
+
+        Returns:
+            bool: Whether the writer finished in time
+        """
+        self._start()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write every queued error and stop the writer"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def recent(self, command: str | None = None, limit: int = 10) -> list[ErrorRecord]:
+        """
+        Get the errors raised most recently since the bot started
+
+        Args:
+            command (str | None, optional): Only return errors of this command. Defaults to every command.
+            limit (int, optional): Maximum number of records. Defaults to 10.
+
+        Returns:
+            list[ErrorRecord]: One record per fingerprint, most recent first
+        """
+        with self._lock:
+            records = list(reversed(self._records.values()))
+        if command is not None:
+            records = [item for item in records if item.command == command]
+        return records[:limit]
+
+    def segments(self) -> list[str]:
+        """
+        List the log segments
+
+        Returns:
+            list[str]: Segment paths, oldest first
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    @staticmethod
+    def read_segment(path: str) -> list[dict[str, Any]]:
+        """
+        Read the lines written to a segment
+
+        Args:
+            path (str): Segment path
+
+        Returns:
+            list[dict[str, Any]]: One entry per fingerprint and flush
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def _start(self) -> None:
+        """Start the writer on first use"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="error-log", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Absorb queued errors, writing them at most once per flush interval"""
+        flushed_at = time.monotonic()
+        while True:
+            timeout = max(0.0, flushed_at + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP or isinstance(item, threading.Event):
+                self._write_pending()
+                if item is _STOP:
+                    return
+                item.set()  # type: ignore
+                flushed_at = time.monotonic()
+                continue
+            if item is not None:
+                try:
+                    self._absorb(*item)
+                # pylint: disable-next=broad-except
+                except Exception as error:
+                    print(f"[Err] Failed to record an error: {error}")
+            if time.monotonic() - flushed_at >= self.flush_interval:
+                self._write_pending()
+                flushed_at = time.monotonic()
+
+    def _absorb(self, timestamp: float, command: str,
+                user_id: int | None, error: BaseException) -> None:
+        """
+        Count an occurrence of an error
+
+        Args:
+            timestamp (float): When the error was recorded
+            command (str): Command or task the error was raised in
+            user_id (int | None): Discord ID of the user who hit the error
+            error (BaseException): The error
+        """
+        key = fingerprint(command, error)
+        with self._lock:
+            known = self._records.get(key)
+        if known is None:
+            formatted = "".join(
+                traceback.format_exception(type(error), error, error.__traceback__))
+            known = ErrorRecord(
+                fingerprint=key, command=command, user_id=user_id,
+                error_type=type(error).__name__, message=str(error),
+                traceback=formatted, first_seen=timestamp, last_seen=timestamp,
+                count=0)
+        updated = replace(known, user_id=user_id, message=str(error),
+                          last_seen=timestamp, count=known.count + 1)
+        pending = self._pending.get(key)
+        self._pending[key] = replace(
+            updated, first_seen=timestamp if pending is None else pending.first_seen,
+            count=1 if pending is None else pending.count + 1)
+        with self._lock:
+            self._records[key] = updated
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+
+    def _write_pending(self) -> None:
+        """Append one line per pending fingerprint to the current segment"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            path = self._current_segment()
+            lines = []
+            for key, item in pending.items():
+                line = asdict(item)
+                if key in self._written:
+                    # The traceback is already in this segment
+                    del line["traceback"]
+                self._written.add(key)
+                lines.append(json.dumps(line, ensure_ascii=False))
+            with gzip.open(path, "at", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+        except OSError as error:
+            print(f"[Err] Failed to write the error log: {error}")
+
+    def _current_segment(self) -> str:
+        """
+        Get the segment to append to, starting a new one once full
+
+        Returns:
+            str: Segment path
+        """
+        if self._segment is not None and os.path.exists(self._segment) \
+                and os.path.getsize(self._segment) < self.segment_bytes:
+            return self._segment
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d-%H%M%S-%f")
+        self._segment = os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{stamp}{SEGMENT_SUFFIX}")
+        self._written = set()
+        for old in self.segments()[:-self.max_segments + 1 or None]:
+            os.remove(old)
+        return self._segment
+
+
+error_log = ErrorLog()
+"""Error sink shared by every command"""
+atexit.register(error_log.close)
+
+
+__all__ = ["ErrorLog", "ErrorRecord", "error_log", "fingerprint"]
@@ -17,10 +17,9 @@ Example:
 from dataclasses import dataclass
 from typing import Literal
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import EXCHANGERATE_API_KEY, USER_AGENT
 
 accepted_currencies = Literal[
@@ -98,7 +97,7 @@ class ExchangeRateAPI:
 
     async def __aenter__(self) -> "ExchangeRateAPI":
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
@@ -150,7 +149,7 @@ class ExchangeRateAPI:
         async with self.session.get(f"{self.base_url}/{self.api_key}/latest/{base_currency}") as resp:
             cache_file_path = Cache.get_cache_file_path(
                 f"{base_currency}.json")
-            cached_data = Cache.read_cached_data(cache_file_path)
+            cached_data = await Cache.aread_cache(cache_file_path)
             if cached_data is not None:
                 return SingleExchangeRate(**cached_data)
             if resp.status != 200:
@@ -164,7 +163,7 @@ class ExchangeRateAPI:
             if data["result"] == "error":
                 err_type = self._define_error_message(data["error-type"])
                 raise ProviderHttpError(err_type, resp.status)
-            Cache.write_data_to_cache(data, cache_file_path)
+            await Cache.awrite_cache(cache_file_path, data)
             return SingleExchangeRate(**data)
 
     async def get_exchange_rate(self, base_currency: accepted_currencies, target_currency: accepted_currencies, amount: float) -> PairConversionExchangeRate:
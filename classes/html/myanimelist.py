@@ -9,11 +9,12 @@ Can be easily broken if MAL changes their HTML structure
 import re
 from datetime import datetime, timedelta, timezone
 
-import aiohttp
 from bs4 import BeautifulSoup
 
 from classes.excepts import ProviderHttpError
 from classes.jikan import JikanImages, JikanImageStruct, JikanUserStruct
+from classes.session import create_session
+from classes.tracing import span
 from modules.const import USER_AGENT
 
 
@@ -30,7 +31,7 @@ class HtmlMyAnimeList:
     async def __aenter__(self):
         """Create a new session"""
         self.headers["User-Agent"] = self.user_agent
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -58,7 +59,8 @@ class HtmlMyAnimeList:
             if resp.status != 200:
                 raise ProviderHttpError(resp.reason, resp.status)
             html = await resp.text()
-        soup = BeautifulSoup(html, "html5lib")
+        with span("parse myanimelist profile", "cpu"):
+            soup = BeautifulSoup(html, "html5lib")
         report_link = soup.find(
             "a", {"class": "header-right mt4 mr0"}).get("href")
         user_id = re.search(r"id=(\d+)", report_link).group(1)
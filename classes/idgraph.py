@@ -0,0 +1,264 @@
+"""
+Persistent graph of IDs known to point to the same title
+
+Provider responses often carry the IDs of a title on other sites: SIMKL
+lists about 25 of them, Trakt has IMDb, TMDB and TVDB, Kitsu has mappings,
+and MangaDex links MyAnimeList, AniList and Kitsu. Wrappers record every set
+of equivalent IDs they see in `id_graph`, so later "which X ID is this Y ID"
+questions can be answered locally before any request is made.
+
+Each set is stored as a cluster owned by the ID the response was about, so a
+provider listing other IDs for it later replaces the earlier ones, and when
+clusters disagree the owner's own one wins. Clusters not seen again for
+`max_age` are ignored, then dropped.
+
+IDs are grouped by the kind of title they identify (`anime`, `manga`, `show`
+or `movie`), as sites reuse numbers across media types. A single site ID may
+map to several titles elsewhere, such as one TVDB show split into several
+MyAnimeList seasons; such ambiguous questions get no answer, and the caller
+asks the provider as before.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal
+
+IdKind = Literal["anime", "manga", "show", "movie"]
+"""Kind of title an ID belongs to"""
+
+_graph_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idgraph")
+"""Dedicated thread owning the graph connection, serializing writes and reads"""
+
+
+def _forget(future: asyncio.Future) -> None:
+    """
+    Mark the outcome of a background write as retrieved
+
+    Args:
+        future (asyncio.Future): The finished write
+    """
+    if not future.cancelled():
+        future.exception()
+
+
+class IdGraph:
+    """Store of equivalent (platform, ID) pairs"""
+
+    def __init__(self, database_path: str = "cache/idgraph.db",
+                 max_age: float = 90 * 86400):
+        """
+        Args:
+            database_path (str, optional): Path to the SQLite database. Defaults to "cache/idgraph.db".
+            max_age (float, optional): Seconds a cluster is trusted once recorded. Defaults to 90 days.
+        """
+        self.database_path = database_path
+        self.max_age = max_age
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get the connection to the graph, creating it if needed
+
+        Only call this from the graph thread
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(os.path.dirname(self.database_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.database_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Pairwise links of older versions can't tell remapped IDs apart
+        conn.execute("DROP TABLE IF EXISTS links")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS members ("
+            "kind TEXT, owner TEXT, owner_id TEXT, platform TEXT, platform_id TEXT, "
+            "seen_at REAL, "
+            "PRIMARY KEY (kind, owner, owner_id, platform)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS members_by_id "
+            "ON members (kind, platform, platform_id)"
+        )
+        conn.execute(
+            "DELETE FROM members WHERE seen_at < ?", (time.time() - self.max_age,))
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _normalize(ids: dict[str, Any]) -> dict[str, str]:
+        """
+        Drop empty IDs and turn the rest into strings
+
+        Args:
+            ids (dict[str, Any]): IDs keyed by platform
+
+        Returns:
+            dict[str, str]: Usable IDs keyed by platform
+        """
+        return {
+            platform: str(value).strip()
+            for platform, value in ids.items()
+            if isinstance(value, (int, str)) and not isinstance(value, bool)
+            and str(value).strip() not in ("", "0")
+        }
+
+    def _record(self, kind: IdKind, source: str, ids: dict[str, Any]) -> int:
+        """
+        Save a set of equivalent IDs, replacing the ones its owner had before
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the ID owning the set
+            ids (dict[str, Any]): IDs of the title, keyed by platform
+
+        Returns:
+            int: Number of IDs saved
+        """
+        found = self._normalize(ids)
+        if source not in found or len(found) < 2:
+            return 0
+        owner_id = found[source]
+        now = time.time()
+        rows = [
+            (kind, source, owner_id, platform, platform_id, now)
+            for platform, platform_id in found.items()
+        ]
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "DELETE FROM members WHERE kind = ? AND owner = ? AND owner_id = ?",
+                (kind, source, owner_id))
+            conn.executemany(
+                "INSERT INTO members VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def _get(self, kind: IdKind, source: str, source_id: str, target: str) -> str | None:
+        """
+        Find the ID of a title on another platform
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the known ID
+            source_id (str): The known ID
+            target (str): Platform of the wanted ID
+
+        Returns:
+            str | None: The ID, or None if unknown or ambiguous
+        """
+        return self._equivalents(kind, source, source_id).get(target)
+
+    def _equivalents(self, kind: IdKind, source: str, source_id: str) -> dict[str, str]:
+        """
+        Find every known ID of a title
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the known ID
+            source_id (str): The known ID
+
+        Returns:
+            dict[str, str]: Unambiguous IDs keyed by platform including the known one, empty if none is known
+        """
+        rows = self._connect().execute(
+            "SELECT other.owner, other.owner_id, other.platform, other.platform_id "
+            "FROM members AS known JOIN members AS other "
+            "ON other.kind = known.kind AND other.owner = known.owner "
+            "AND other.owner_id = known.owner_id "
+            "WHERE known.kind = ? AND known.platform = ? AND known.platform_id = ? "
+            "AND known.seen_at >= ?",
+            (kind, source, source_id, time.time() - self.max_age),
+        ).fetchall()
+        owned: dict[str, str] = {}
+        candidates: dict[str, set[str]] = {}
+        for owner, owner_id, platform, platform_id in rows:
+            if (owner, owner_id) == (source, source_id):
+                owned[platform] = platform_id
+            else:
+                candidates.setdefault(platform, set()).add(platform_id)
+        found = {
+            platform: next(iter(values))
+            for platform, values in candidates.items()
+            if len(values) == 1
+        }
+        # The set listed by the known ID itself is authoritative
+        found.update(owned)
+        found.pop(source, None)
+        if not found:
+            return {}
+        return {source: source_id, **found}
+
+    def record(self, kind: IdKind, source: str, ids: dict[str, Any]) -> None:
+        """
+        Remember that IDs point to the same title, without waiting for the write
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the ID the response was about, its earlier set is replaced
+            ids (dict[str, Any]): IDs of the title keyed by platform, empty ones are skipped
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            _graph_executor, self._record, kind, source, dict(ids))
+        future.add_done_callback(_forget)
+
+    async def get(
+        self, kind: IdKind, source: str, source_id: str | int, target: str
+    ) -> str | None:
+        """
+        Find the ID of a title on another platform, without touching the network
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the known ID
+            source_id (str | int): The known ID
+            target (str): Platform of the wanted ID
+
+        Returns:
+            str | None: The ID, or None if unknown or ambiguous
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _graph_executor, self._get, kind, source, str(source_id).strip(), target)
+
+    async def equivalents(
+        self, kind: IdKind, source: str, source_id: str | int
+    ) -> dict[str, str]:
+        """
+        Find every known ID of a title, without touching the network
+
+        Args:
+            kind (IdKind): Kind of the title
+            source (str): Platform of the known ID
+            source_id (str | int): The known ID
+
+        Returns:
+            dict[str, str]: Unambiguous IDs keyed by platform, empty if none is known
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _graph_executor, self._equivalents, kind, source, str(source_id).strip())
+
+    def _close(self) -> None:
+        """Close the connection, if any"""
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+
+    async def close(self) -> None:
+        """Close the connection, after pending writes"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_graph_executor, self._close)
+
+
+id_graph = IdGraph()
+"""ID graph shared by every provider wrapper"""
+
+
+__all__ = ["IdGraph", "IdKind", "id_graph"]
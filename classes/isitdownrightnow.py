@@ -7,6 +7,9 @@ import validators
 from bs4 import BeautifulSoup
 from fake_useragent import FakeUserAgent as UserAgent
 
+from classes.session import create_session
+from classes.tracing import span
+
 
 @dataclass
 class WebsiteStatus:
@@ -36,7 +39,7 @@ class WebsiteChecker:
     async def __aenter__(self):
         """Enter the async context manager."""
         self.headers: dict = {"User-Agent": self._get_random_user_agent()}
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -89,7 +92,8 @@ class WebsiteChecker:
 
             html_response = await resp.text()
 
-            soup = BeautifulSoup(html_response, "html5lib")
+            with span("parse isitdownrightnow page", "cpu"):
+                soup = BeautifulSoup(html_response, "html5lib")
 
             div_elements = soup.find_all(
                 "div", class_=lambda x: x in ["tabletr", "tabletrsimple"]
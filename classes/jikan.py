@@ -6,9 +6,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Literal
 
-from aiohttp import ClientSession
-
 from classes.cache import Caching
+from classes.ratelimit import backoff
+from classes.session import create_session
+from classes.singleflight import flights
 from modules.const import USER_AGENT
 
 Cache = Caching(cache_directory="cache/jikan", cache_expiration_time=86400)
@@ -27,7 +28,7 @@ class JikanException(Exception):
         return f"JikanException [{self.status_code}]: {self.message}"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanImageStruct:
     """Jikan Image Struct"""
 
@@ -43,7 +44,7 @@ class JikanImageStruct:
     """Maximum size image url (usually used for backgrounds)"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanImages:
     """Jikan Images Type"""
 
@@ -53,7 +54,7 @@ class JikanImages:
     """WebP image"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanTrailerStruct:
     """Jikan Trailer Struct"""
 
@@ -67,7 +68,7 @@ class JikanTrailerStruct:
     """Images of the trailer"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanTitlesStruct:
     """Jikan Titles Struct"""
 
@@ -91,7 +92,7 @@ class JikanTitlesStruct:
     """Title"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanPropStruct:
     """Jikan Date Property Struct"""
 
@@ -103,7 +104,7 @@ class JikanPropStruct:
     """Year"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanPropParentStruct:
     """Jikan Date Property Parent Struct"""
 
@@ -114,7 +115,7 @@ class JikanPropParentStruct:
     """Properties of the end date"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanDateStruct:
     """Jikan Date Struct"""
 
@@ -129,7 +130,7 @@ class JikanDateStruct:
     """Date as a string"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanBroadcastStruct:
     """Jikan Broadcast Struct"""
 
@@ -151,7 +152,7 @@ class JikanBroadcastStruct:
     """Broadcast as a string"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanOtherStruct:
     """Jikan Other Struct"""
 
@@ -165,7 +166,7 @@ class JikanOtherStruct:
     """URL of the entry"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanRelationStruct:
     """Jikan Relation Struct"""
 
@@ -175,7 +176,7 @@ class JikanRelationStruct:
     """Entry"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanThemeSongStruct:
     """Jikan Theme Song Struct"""
 
@@ -185,7 +186,7 @@ class JikanThemeSongStruct:
     """List of ending songs"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanExternalStruct:
     """Jikan External Struct"""
 
@@ -195,7 +196,7 @@ class JikanExternalStruct:
     """URL of the external site"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanAnimeStruct:
     """Jikan Anime Struct"""
 
@@ -301,7 +302,7 @@ class JikanAnimeStruct:
     """List of streaming sites"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanStatisticsStruct:
     """Jikan Statistics Struct"""
 
@@ -317,7 +318,7 @@ class JikanStatisticsStruct:
     """Total number of entries listed"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanAnimeStatisticStruct(JikanStatisticsStruct):
     """Jikan Anime Statistics Struct"""
 
@@ -333,7 +334,7 @@ class JikanAnimeStatisticStruct(JikanStatisticsStruct):
     """Number of episodes watched"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanMangaStatisticStruct(JikanStatisticsStruct):
     """Jikan Manga Statistics Struct"""
 
@@ -351,7 +352,7 @@ class JikanMangaStatisticStruct(JikanStatisticsStruct):
     """Number of volumes read"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanStatistics:
     """Jikan Statistics"""
 
@@ -361,7 +362,7 @@ class JikanStatistics:
     """Manga statistics"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserTitleStruct:
     """Jikan User Title Struct"""
 
@@ -373,7 +374,7 @@ class JikanUserTitleStruct:
     """Images of the entry"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserAniMangaStruct(JikanUserTitleStruct):
     """Jikan User Anime/Manga Struct"""
 
@@ -385,7 +386,7 @@ class JikanUserAniMangaStruct(JikanUserTitleStruct):
     """Start year of the entry"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserCastStruct(JikanUserTitleStruct):
     """Jikan User Cast Struct"""
 
@@ -393,7 +394,7 @@ class JikanUserCastStruct(JikanUserTitleStruct):
     """Name of the person/character"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUpdateEntry:
     """Jikan Update Entry"""
 
@@ -407,7 +408,7 @@ class JikanUpdateEntry:
     """Date of the update"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanAnimeUpdateEntry(JikanUpdateEntry):
     """Jikan Anime Update Entry"""
 
@@ -417,7 +418,7 @@ class JikanAnimeUpdateEntry(JikanUpdateEntry):
     """Total number of episodes"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanMangaUpdateEntry(JikanUpdateEntry):
     """Jikan Manga Update Entry"""
 
@@ -427,7 +428,7 @@ class JikanMangaUpdateEntry(JikanUpdateEntry):
     """Total number of chapters"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserFavorite:
     """Jikan User Favorite"""
 
@@ -441,7 +442,7 @@ class JikanUserFavorite:
     """List of favorite people"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserStatus:
     """Jikan User Status"""
 
@@ -451,7 +452,7 @@ class JikanUserStatus:
     """List of manga updates"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JikanUserStruct:
     """Jikan User Struct"""
 
@@ -544,7 +545,7 @@ class JikanApi:
 
     async def __aenter__(self):
         """Enter the session"""
-        self.session = ClientSession(headers={"User-Agent": USER_AGENT})
+        self.session = create_session(headers={"User-Agent": USER_AGENT})
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -871,7 +872,6 @@ class JikanApi:
                         if resp.status in [200, 304]:
                             respd2: dict = await resp.json()
                             clubs.extend(respd2["data"])
-                            await asyncio.sleep(2)
                         else:
                             define_jikan_exception(resp.status, resp.reason)
             return clubs
@@ -887,22 +887,24 @@ class JikanApi:
             username (str): MyAnimeList username
 
         Actions:
-            If Jikan took too long to respond, it will try again in multiples of 3 seconds for exponential backoff
+            If Jikan took too long to respond, it will try again with a jittered exponential backoff
 
         Returns:
             dict: User data
         """
         cache_file_path = Cache.get_cache_file_path(f"user/{username}.json")
-        cached_file = Cache.read_cached_data(cache_file_path, 43200)
+        cached_file = await Cache.aread_model(
+            cache_file_path, self.user_dict_to_dataclass, 43200)
         if cached_file:
-            return self.user_dict_to_dataclass(cached_file)
+            return cached_file
 
         retries = 0
         res = {}
         while retries < 3:
             try:
                 async with self.session.get(
-                    f"{self.base_url}/users/{username}/full"
+                    f"{self.base_url}/users/{username}/full",
+                    trace_request_ctx={"retry": retries},
                 ) as resp:
                     res = await resp.json()
                     status_code = res.get("status", 200)
@@ -911,8 +913,8 @@ class JikanApi:
                             res.get("message", "Unknown error"), status_code
                         )
                     res: dict = res["data"]
-                Cache.write_data_to_cache(res, cache_file_path)
-                return self.user_dict_to_dataclass(res)
+                return await Cache.awrite_model(
+                    cache_file_path, res, self.user_dict_to_dataclass)
             except JikanException as error:
                 retries += 1
                 if retries == 3:
@@ -922,8 +924,7 @@ class JikanApi:
                         error, "message") else error
                     define_jikan_exception(errcode, errmsg)
                 else:
-                    backoff_time = 3**retries
-                    await asyncio.sleep(backoff_time)
+                    await asyncio.sleep(backoff(retries, base=3))
 
     async def get_user_by_id(self, user_id: int) -> JikanUserStruct:
         """
@@ -933,7 +934,7 @@ class JikanApi:
             user_id (int): MyAnimeList user ID
 
         Actions:
-            If Jikan took too long to respond, it will try again in multiples of 3 seconds for exponential backoff
+            If Jikan took too long to respond, it will try again with a jittered exponential backoff
 
         Returns:
             JikanUserStruct: User data
@@ -954,6 +955,8 @@ class JikanApi:
         """
         Get anime data
 
+        Concurrent lookups of the same anime share a single upstream request
+
         Args:
             anime_id (int): MyAnimeList anime ID
 
@@ -961,9 +964,38 @@ class JikanApi:
             dict: Anime data
         """
         cache_file_path = Cache.get_cache_file_path(f"anime/{anime_id}.json")
-        cached_file = Cache.read_cached_data(cache_file_path)
-        if cached_file:
-            return self.anime_dict_to_dataclass(cached_file)
+        return await flights.do(
+            ("jikan", "anime", anime_id),
+            lambda: self._fetch_anime_data(anime_id, cache_file_path),
+            lambda: self._read_anime_cache(cache_file_path),
+        )
+
+    async def _read_anime_cache(
+            self, cache_file_path: str) -> JikanAnimeStruct | None:
+        """
+        Read anime data from cache
+
+        Args:
+            cache_file_path (str): Cache file path
+
+        Returns:
+            JikanAnimeStruct | None: Anime data, or None if not cached
+        """
+        return await Cache.aread_model(
+            cache_file_path, self.anime_dict_to_dataclass)
+
+    async def _fetch_anime_data(
+            self, anime_id: int, cache_file_path: str) -> JikanAnimeStruct:
+        """
+        Fetch anime data from Jikan, then cache it
+
+        Args:
+            anime_id (int): MyAnimeList anime ID
+            cache_file_path (str): Cache file path
+
+        Returns:
+            JikanAnimeStruct: Anime data
+        """
         try:
             async with self.session.get(
                 f"{self.base_url}/anime/{anime_id}/full"
@@ -975,8 +1007,8 @@ class JikanApi:
                         res.get("message", "Unknown error"), status_code
                     )
                 res: dict = res["data"]
-            Cache.write_data_to_cache(res, cache_file_path)
-            return self.anime_dict_to_dataclass(res)
+            return await Cache.awrite_model(
+                cache_file_path, res, self.anime_dict_to_dataclass)
         # pylint: disable-next=broad-except
         except Exception as error:
             errcode: int = error.status_code if hasattr(
@@ -1,14 +1,25 @@
 import json
 from enum import Enum
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError
+from classes.idgraph import id_graph
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 Cache = Caching(cache_directory="cache/kitsu", cache_expiration_time=86400)
 
+MAPPING_SITES: dict[str, str] = {
+    "anidb": "anidb",
+    "anilist/anime": "anilist",
+    "anilist/manga": "anilist",
+    "animenewsnetwork": "ann",
+    "mangaupdates": "mangaupdates",
+    "myanimelist/anime": "myanimelist",
+    "myanimelist/manga": "myanimelist",
+}
+"""External sites of Kitsu mappings, and their platform name in the ID graph"""
+
 
 class Kitsu:
     """Kitsu API wrapper"""
@@ -21,7 +32,7 @@ class Kitsu:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={
                 "User-Agent": USER_AGENT,
                 "Accept": "application/vnd.api+json",
@@ -65,7 +76,7 @@ class Kitsu:
             media_type = self.MediaType(media_type)
         cache_file_path = Cache.get_cache_path(
             f"{media_type.value}/{anime_id}.json")
-        cached_data = Cache.read_cache(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         url = f"{self.base_url}{media_type.value}/{anime_id}"
@@ -74,7 +85,7 @@ class Kitsu:
                 raise ProviderHttpError(resp.text(), resp.status)
             jsonText = await resp.text()
             jsonFinal = json.loads(jsonText)
-        Cache.write_cache(cache_file_path, jsonFinal)
+        await Cache.awrite_cache(cache_file_path, jsonFinal)
         return jsonFinal
 
     async def resolve_slug(
@@ -94,7 +105,7 @@ class Kitsu:
             media_type = self.MediaType(media_type)
         cache_file_path = Cache.get_cache_path(
             f"{media_type.value}/slug/{slug}.json")
-        cached_data = Cache.read_cache(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         url = f"{self.base_url}{media_type.value}/?filter[slug]={slug}"
@@ -103,5 +114,47 @@ class Kitsu:
                 raise ProviderHttpError(resp.text(), resp.status)
             jsonText = await resp.text()
             jsonFinal = json.loads(jsonText)
-        Cache.write_cache(cache_file_path, jsonFinal)
+        await Cache.awrite_cache(cache_file_path, jsonFinal)
+        if jsonFinal.get("data"):
+            id_graph.record(media_type.value, "kitsu_slug", {
+                "kitsu": jsonFinal["data"][0]["id"],
+                "kitsu_slug": slug,
+            })
         return jsonFinal
+
+    async def get_mappings(
+        self, media_id: int | str, media_type: MediaType | str = MediaType.ANIME
+    ) -> dict[str, str]:
+        """
+        Get the IDs of a title on other sites
+
+        Args:
+            media_id (int | str): The Kitsu ID
+            media_type (MediaType | str, optional): The media type. Defaults to MediaType.ANIME.
+
+        Returns:
+            dict[str, str]: IDs keyed by platform, as named in the ID graph
+
+        Raises:
+            ProviderHttpError: If the HTTP request fails
+        """
+        if isinstance(media_type, str):
+            media_type = self.MediaType(media_type)
+        cache_file_path = Cache.get_cache_path(
+            f"{media_type.value}/mappings/{media_id}.json")
+        cached_data = await Cache.aread_cache(cache_file_path)
+        if cached_data is not None:
+            return cached_data
+        url = f"{self.base_url}{media_type.value}/{media_id}/mappings"
+        async with self.session.get(url, params=self.params) as resp:
+            if resp.status != 200:
+                raise ProviderHttpError(await resp.text(), resp.status)
+            jsonFinal = json.loads(await resp.text())
+        mappings = {"kitsu": str(media_id)}
+        for mapping in jsonFinal.get("data", []):
+            site = MAPPING_SITES.get(mapping["attributes"]["externalSite"])
+            if site is not None:
+                mappings.setdefault(site, str(mapping["attributes"]["externalId"]))
+        await Cache.awrite_cache(cache_file_path, mappings)
+        id_graph.record(media_type.value, "kitsu", mappings)
+        return mappings
@@ -4,9 +4,8 @@ from dataclasses import dataclass
 from json import loads
 from typing import Any, Literal
 
-from aiohttp import ClientSession
-
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import LASTFM_API_KEY, USER_AGENT
 
 
@@ -121,7 +120,7 @@ class LastFM:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = ClientSession(headers={"User-Agent": USER_AGENT})
+        self.session = create_session(headers={"User-Agent": USER_AGENT})
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
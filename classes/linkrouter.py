@@ -0,0 +1,237 @@
+"""
+Route links of supported sites found in a message
+
+Every route is compiled into a single host regex with one named group per
+site, plus a small table of path regexes per site. A message is scanned once:
+each host hit is dispatched to the path regexes of that site only, so the
+cost of a message does not grow with the number of supported sites. Messages
+containing none of the host names are skipped with plain substring checks,
+without running the regex at all.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+
+@dataclass(frozen=True)
+class LinkRoute:
+    """A supported link, and where its embed is generated"""
+
+    name: str
+    """Unique name of the route"""
+    host: str
+    """Regex of the host name"""
+    path: str
+    """Regex of the path, with a `mediaid` named group"""
+    send_to: Literal["anilist", "mal", "simkl", "rawg"]
+    """Command generating the embed"""
+    send_type: Literal["anime", "manga", "game", "movie", "tv"]
+    """Media type"""
+    source: str
+    """Site the ID belongs to"""
+
+
+@dataclass(frozen=True)
+class LinkMatch:
+    """A link found in a message"""
+
+    route: LinkRoute
+    """Route of the link"""
+    media_id: str
+    """ID extracted from the link"""
+    start: int
+    """Position of the host name in the message"""
+
+
+MEDIA_ROUTES: list[LinkRoute] = [
+    LinkRoute("anilist_anime", r"anilist\.co",
+              r"/anime/(?P<mediaid>\d+)", "mal", "anime", "anilist"),
+    LinkRoute("anilist_manga", r"anilist\.co",
+              r"/manga/(?P<mediaid>\d+)", "anilist", "manga", "anilist"),
+    LinkRoute("anidb_anime", r"anidb\.net",
+              r"/(?:anime/|a)(?P<mediaid>\d+)", "mal", "anime", "anidb"),
+    LinkRoute("animeplanet_anime", r"anime-planet\.com",
+              r"/anime/(?P<mediaid>[\w\-]+)", "mal", "anime", "animeplanet"),
+    LinkRoute("anisearch_anime", r"anisearch\.com",
+              r"/anime/(?P<mediaid>\d+)", "mal", "anime", "anisearch"),
+    LinkRoute("annict_anime", r"annict\.com",
+              r"/works/(?P<mediaid>\d+)", "mal", "anime", "annict"),
+    LinkRoute("kaize_anime", r"kaize\.io",
+              r"/anime/(?P<mediaid>[\w\-]+)", "mal", "anime", "kaize"),
+    LinkRoute("kitsu_anime", r"kitsu\.io",
+              r"/anime/(?P<mediaid>[\w\-]+)", "mal", "anime", "kitsu"),
+    LinkRoute("kitsu_manga", r"kitsu\.io",
+              r"/manga/(?P<mediaid>[\w\-]+)", "anilist", "manga", "anilist"),
+    LinkRoute("livechart_anime", r"livechart\.me",
+              r"/anime/(?P<mediaid>[\w\-]+)", "mal", "anime", "livechart"),
+    LinkRoute("myanimelist_anime", r"myanimelist\.net",
+              r"/anime/(?P<mediaid>\d+)", "mal", "anime", "myanimelist"),
+    LinkRoute("myanimelist_manga", r"myanimelist\.net",
+              r"/manga/(?P<mediaid>\d+)", "anilist", "manga", "myanimelist"),
+    LinkRoute("notify_anime", r"notify\.moe",
+              r"/anime/(?P<mediaid>[\w\-_]+)", "mal", "anime", "notify"),
+    LinkRoute("otakotaku_anime", r"otakotaku\.com",
+              r"/anime/view/(?P<mediaid>[\w\-]+)", "mal", "anime", "otakotaku"),
+    LinkRoute("rawg_game", r"rawg\.io",
+              r"/games/(?P<mediaid>[\w\-]+)", "rawg", "game", "rawg"),
+    LinkRoute("shikimori_anime", r"shikimori\.(?:one|me|org)",
+              r"/animes/(?P<mediaid>\d+)", "mal", "anime", "myanimelist"),
+    LinkRoute("shikimori_ranobe", r"shikimori\.(?:one|me|org)",
+              r"/ranobe/(?P<mediaid>\d+)", "anilist", "manga", "myanimelist"),
+    LinkRoute("shikimori_manga", r"shikimori\.(?:one|me|org)",
+              r"/mangas/(?P<mediaid>\d+)", "anilist", "manga", "myanimelist"),
+    LinkRoute("silveryasha_anime", r"db\.silveryasha\.web\.id",
+              r"/anime/(?P<mediaid>[\w\-]+)", "mal", "anime", "silveryasha"),
+    LinkRoute("simkl_anime", r"simkl\.com",
+              r"/anime/(?P<mediaid>\d+)", "mal", "anime", "myanimelist"),
+    LinkRoute("simkl_movie", r"simkl\.com",
+              r"/movies/(?P<mediaid>\d+)", "simkl", "movie", "simkl"),
+    LinkRoute("simkl_tv", r"simkl\.com",
+              r"/tv/(?P<mediaid>\d+)", "simkl", "tv", "simkl"),
+    LinkRoute("mangadex_title", r"mangadex\.org",
+              r"/title/(?P<mediaid>[\w\-]+)", "anilist", "manga", "mangadex"),
+    LinkRoute("mangadex_chapter", r"mangadex\.org",
+              r"/chapter/(?P<mediaid>[\w\-]+)", "anilist", "manga", "mangadex"),
+]
+"""Links supported by the auto-embed listener, checked in order for a single host"""
+
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    Get the plain text every match of a regex starts with
+
+    Args:
+        pattern (str): The regex, such as a host name with escaped dots
+
+    Returns:
+        str: The literal prefix, empty if the regex starts with a special character or has top-level alternatives
+    """
+    depth = 0
+    for index, char in enumerate(pattern):
+        if pattern[index - 1:index] == "\\":
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if char == "|" and depth == 0:
+            return ""
+    prefix = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        escaped = pattern[index + 1:index + 2]
+        if char == "\\" and escaped and not escaped.isalnum():
+            prefix.append(escaped)
+            index += 2
+        elif char.isalnum() or char in "-_":
+            prefix.append(char)
+            index += 1
+        else:
+            break
+    # A quantifier may apply to the last character
+    if index < len(pattern) and pattern[index] in "?*{":
+        prefix = prefix[:-1]
+    return "".join(prefix)
+
+
+class LinkRouter:
+    """Find links matching a set of routes in a text, in one pass"""
+
+    def __init__(self, routes: list[LinkRoute]):
+        """
+        Args:
+            routes (list[LinkRoute]): Routes to match, routes sharing a host are tried in order
+        """
+        self.routes = routes
+        hosts: dict[str, list[tuple[re.Pattern[str], LinkRoute]]] = {}
+        for route in routes:
+            hosts.setdefault(route.host, []).append(
+                (re.compile(route.path), route))
+        self._paths = list(hosts.values())
+        needles = {_literal_prefix(host) for host in hosts}
+        self._needles = None if "" in needles else tuple(sorted(needles))
+        """Plain text of the host names, None if a host has no literal prefix"""
+        self._hosts = re.compile(
+            "|".join(f"(?P<h{index}>{host})"
+                     for index, host in enumerate(hosts)))
+
+    def _may_contain(self, text: str) -> bool:
+        """
+        Cheaply check whether a text may contain a supported link
+
+        Args:
+            text (str): The text
+
+        Returns:
+            bool: False if no host name can be found in the text
+        """
+        if self._needles is None:
+            # A link needs at least a dot in its host name
+            return "." in text
+        return any(needle in text for needle in self._needles)
+
+    def _dispatch(self, host: re.Match[str]) -> LinkMatch | None:
+        """
+        Match the path following a host name
+
+        Args:
+            host (re.Match[str]): Host name found in the text
+
+        Returns:
+            LinkMatch | None: The link, or None if the path is not supported
+        """
+        text = host.string
+        for path, route in self._paths[int(host.lastgroup[1:])]:  # type: ignore
+            found = path.match(text, host.end())
+            if found is not None:
+                return LinkMatch(route, found["mediaid"], host.start())
+        return None
+
+    def find_all(self, text: str) -> list[LinkMatch]:
+        """
+        Find every supported link in a text
+
+        Args:
+            text (str): The text, such as a message content
+
+        Returns:
+            list[LinkMatch]: Links, in the order they appear
+        """
+        if not self._may_contain(text):
+            return []
+        links = []
+        for host in self._hosts.finditer(text):
+            link = self._dispatch(host)
+            if link is not None:
+                links.append(link)
+        return links
+
+    def first(self, text: str) -> LinkMatch | None:
+        """
+        Find the first supported link in a text
+
+        Args:
+            text (str): The text, such as a message content
+
+        Returns:
+            LinkMatch | None: The first link, or None if there is none
+        """
+        if not self._may_contain(text):
+            return None
+        for host in self._hosts.finditer(text):
+            link = self._dispatch(host)
+            if link is not None:
+                return link
+        return None
+
+
+media_links = LinkRouter(MEDIA_ROUTES)
+"""Router of the links supported by the auto-embed listener"""
+
+
+__all__ = [
+    "LinkMatch",
+    "LinkRoute",
+    "LinkRouter",
+    "MEDIA_ROUTES",
+    "media_links",
+]
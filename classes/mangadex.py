@@ -1,22 +1,29 @@
 """Mangadex API Handler for extensions/mediaautosend.py"""
-from asyncio import sleep
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Literal
 
-import aiohttp
 from dacite import Config, from_dict
 
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError
+from classes.idgraph import id_graph
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 cache_ = Caching(cache_directory="cache/mangadex", cache_expiration_time=86400)
 
+DACITE_CONFIG = Config(
+    type_hooks={
+        datetime: datetime.fromisoformat
+    }
+)
+"""dacite configuration to parse MangaDex responses, built once"""
+
 # pylint: disable=invalid-name
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DatabaseLinks:
     """Links to external databases"""
 
@@ -44,7 +51,7 @@ class DatabaseLinks:
     """Raw"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TagAttributes:
     """Tag Attributes Dataclass"""
     name: dict[
@@ -70,7 +77,7 @@ class TagAttributes:
     """Tag version"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Tag:
     """Tag Dataclass"""
     id: str
@@ -83,7 +90,7 @@ class Tag:
     """Tag relationships"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MangaAttributes:
     """Manga Attributes Dataclass"""
 
@@ -155,7 +162,7 @@ class MangaAttributes:
     """Manga available translated languages"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Manga:
     """Manga Dataclass"""
 
@@ -169,7 +176,7 @@ class Manga:
     """Manga relationships"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DataResponse:
     """Data Response Dataclass"""
 
@@ -191,7 +198,7 @@ class Mangadex:
         }
 
     async def __aenter__(self) -> "Mangadex":
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback) -> None:
@@ -213,27 +220,45 @@ class Mangadex:
     async def get_manga(self, manga_id: str) -> Manga:
         """Get a manga by its ID"""
         cache_file_path = cache_.get_cache_path(f"manga/{manga_id}.json")
-        cached_data = cache_.read_cache(cache_file_path)
-        dacite_config = Config(
-            type_hooks={
-                datetime: lambda value: datetime.fromisoformat(value)
-            }
-        )
+        cached_data = await cache_.aread_model(cache_file_path, self._to_manga)
         if cached_data:
-            return from_dict(Manga, cached_data, config=dacite_config)
+            return cached_data
         data = await self._request(f"https://api.mangadex.org/manga/{manga_id}")
-        cache_.write_cache(cache_file_path, data["data"])
-        return from_dict(Manga, data["data"], config=dacite_config)
+        manga = await cache_.awrite_model(
+            cache_file_path, data["data"], self._to_manga)
+        links = data["data"]["attributes"].get("links") or {}
+        kitsu = links.get("kt") or ""
+        id_graph.record("manga", "mangadex", {
+            "mangadex": manga_id,
+            "myanimelist": links.get("mal"),
+            "anilist": links.get("al"),
+            # Older entries link Kitsu by slug
+            "kitsu" if kitsu.isdigit() else "kitsu_slug": kitsu,
+            "mangaupdates": links.get("mu"),
+        })
+        return manga
+
+    @staticmethod
+    def _to_manga(data: dict[str, Any]) -> Manga:
+        """
+        Convert a manga dict to dataclass
+
+        Args:
+            data (dict[str, Any]): Manga dict
+
+        Returns:
+            Manga: Manga dataclass
+        """
+        return from_dict(Manga, data, config=DACITE_CONFIG)
 
     async def get_manga_from_chapter(self, chapter_id: str) -> Manga:
         """Get manga from a chapter ID"""
         cache_file_path = cache_.get_cache_path(f"chapter/{chapter_id}.json")
-        cached_data = cache_.read_cache(cache_file_path)
+        cached_data = await cache_.aread_cache(cache_file_path)
         if not cached_data:
             raw = await self._request(f"https://api.mangadex.org/chapter/{chapter_id}")
             data = raw["data"]
-            cache_.write_cache(cache_file_path, data)
-            sleep(0.5)
+            await cache_.awrite_cache(cache_file_path, data)
         else:
             data = cached_data
         # find manga id in data.data.relationships[*].type == "manga"
@@ -0,0 +1,693 @@
+"""
+In-process metrics, exposed in the Prometheus text format
+
+`metrics` holds every counter, gauge and histogram the bot updates at its
+chokepoints: slash command and component callbacks, provider HTTP requests
+and their rate limiter, coalesced provider lookups, `Caching` reads and the
+auto-embed message listener. `MetricsServer` serves
+them on a local HTTP endpoint for Prometheus to scrape, and the host-only
+`/hostsettings metrics` command summarizes them.
+"""
+
+import bisect
+import math
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+from aiohttp import (ClientSession, TraceConfig, TraceRequestEndParams,
+                     TraceRequestExceptionParams, TraceRequestStartParams, web)
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Upper bounds, in seconds, of latency histogram buckets"""
+
+DISCORD_EPOCH = 1420070400000
+"""First millisecond of 2015, the origin of Discord snowflakes"""
+
+
+def snowflake_time(snowflake: int | str) -> float:
+    """
+    Get the creation time of a Discord snowflake
+
+    Args:
+        snowflake (int | str): The snowflake
+
+    Returns:
+        float: POSIX timestamp, with millisecond precision
+    """
+    return ((int(snowflake) >> 22) + DISCORD_EPOCH) / 1000
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value for the Prometheus text format
+
+    Args:
+        value (str): Label value
+
+    Returns:
+        str: Escaped value
+    """
+    value = value.replace("\\", "\\\\").replace("\"", "\\\"")
+    return value.replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...],
+                   extra: str = "") -> str:
+    """
+    Format a label set
+
+    Args:
+        names (tuple[str, ...]): Label names
+        values (tuple[str, ...]): Label values, in the same order
+        extra (str, optional): Already formatted label appended last. Defaults to "".
+
+    Returns:
+        str: Label set in braces, or an empty string if there are no labels
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """
+    Format a sample value
+
+    Args:
+        value (float): The value
+
+    Returns:
+        str: The value, with infinities spelled the Prometheus way
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class CounterChild:
+    """Counter of one label set"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increase the counter
+
+        Args:
+            amount (float, optional): Increment. Defaults to 1.
+        """
+        with self._lock:
+            self.value += amount
+
+
+class GaugeChild(CounterChild):
+    """Gauge of one label set"""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        """
+        Decrease the gauge
+
+        Args:
+            amount (float, optional): Decrement. Defaults to 1.
+        """
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        """
+        Replace the value of the gauge
+
+        Args:
+            value (float): New value
+        """
+        with self._lock:
+            self.value = value
+
+
+class HistogramChild:
+    """Histogram of one label set"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        """Observations per bucket, not cumulative, the last one is +Inf"""
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation
+
+        Args:
+            value (float): Observed value
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, interpolating inside its bucket like Prometheus does
+
+        Args:
+            q (float): Quantile, between 0 and 1
+
+        Returns:
+            float: Estimated value, or NaN if nothing was observed
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return math.nan
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+def merge(children: list[HistogramChild]) -> HistogramChild:
+    """
+    Combine histograms sharing the same buckets
+
+    Args:
+        children (list[HistogramChild]): Histograms to combine, at least one
+
+    Returns:
+        HistogramChild: A histogram holding every observation
+    """
+    merged = HistogramChild(children[0].buckets)
+    for child in children:
+        with child._lock:  # pylint: disable=protected-access
+            merged.counts = [a + b for a, b in zip(merged.counts, child.counts)]
+            merged.sum += child.sum
+            merged.count += child.count
+    return merged
+
+
+def _seconds(value: float) -> str:
+    """Format a latency for humans"""
+    if math.isnan(value):
+        return "-"
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.1f} s"
+
+
+class MetricFamily:
+    """Metric split by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str,
+                 labels: tuple[str, ...] = ()):
+        """
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple[str, ...], optional): Label names. Defaults to no labels.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> Any:
+        """Create the metric of a new label set"""
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """
+        Get the metric of a label set
+
+        Args:
+            *values (Any): Label values, in the order of the label names
+
+        Returns:
+            Any: The metric of the label set
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(
+                    f"{self.name} expects labels {self.label_names}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def items(self) -> list[tuple[tuple[str, ...], Any]]:
+        """
+        List the label sets and their metrics
+
+        Returns:
+            list[tuple[tuple[str, ...], Any]]: Label values and metric, sorted by label values
+        """
+        with self._lock:
+            return sorted(self._children.items())
+
+    def clear(self) -> None:
+        """Forget every label set"""
+        with self._lock:
+            self._children.clear()
+
+    def render(self) -> Iterator[str]:
+        """
+        Render the metric in the Prometheus text format
+
+        Yields:
+            str: Lines of the exposition
+        """
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(MetricFamily):
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in self.items():
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(MetricFamily):
+    """Distribution of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple[str, ...], optional): Label names. Defaults to no labels.
+            buckets (tuple[float, ...], optional): Sorted bucket upper bounds. Defaults to LATENCY_BUCKETS.
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in self.items():
+            with child._lock:  # pylint: disable=protected-access
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, observed in zip(self.buckets + (math.inf,), counts):
+                cumulative += observed
+                labels = _format_labels(
+                    self.label_names, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Every metric exposed by the bot"""
+
+    def __init__(self):
+        """Declare the metrics of every chokepoint"""
+        self._families: dict[str, MetricFamily] = {}
+        self._trace_config: TraceConfig | None = None
+        self.commands = self.histogram(
+            "ryuuzaki_command_duration_seconds",
+            "Time from the interaction being created to its callback returning",
+            ("kind", "command", "outcome"))
+        self.provider_requests = self.histogram(
+            "ryuuzaki_provider_request_duration_seconds",
+            "Time from a provider request being sent to its response headers",
+            ("host", "status", "retry"))
+        self.cache_reads = self.counter(
+            "ryuuzaki_cache_reads_total",
+            "Cache reads by provider and result (hit, miss or expired)",
+            ("provider", "result"))
+        self.messages = self.histogram(
+            "ryuuzaki_messages_duration_seconds",
+            "Time the auto-embed listener spent on a message, by outcome",
+            ("outcome",), (0.0005, 0.001, 0.0025) + LATENCY_BUCKETS)
+        self.ratelimit_queue = self.gauge(
+            "ryuuzaki_ratelimit_queue_depth",
+            "Provider requests waiting for the rate limiter of their host",
+            ("host",))
+        self.ratelimit_wait = self.histogram(
+            "ryuuzaki_ratelimit_wait_seconds",
+            "Time a provider request waited for the rate limiter of its host",
+            ("host",), (0.001,) + LATENCY_BUCKETS)
+        self.ratelimit_throttled = self.counter(
+            "ryuuzaki_ratelimit_throttled_total",
+            "Provider responses asking to slow down, by host and status",
+            ("host", "status"))
+        self.flight_lookups = self.counter(
+            "ryuuzaki_singleflight_lookups_total",
+            "Coalesced provider lookups by provider and result "
+            "(hit, miss or coalesced)",
+            ("provider", "result"))
+        self.flights_in_flight = self.gauge(
+            "ryuuzaki_singleflight_in_flight",
+            "Upstream provider lookups currently in flight")
+
+    def counter(self, name: str, documentation: str,
+                labels: tuple[str, ...] = ()) -> Counter:
+        """
+        Declare a counter
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple[str, ...], optional): Label names. Defaults to no labels.
+
+        Returns:
+            Counter: The counter
+        """
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str,
+              labels: tuple[str, ...] = ()) -> Gauge:
+        """
+        Declare a gauge
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple[str, ...], optional): Label names. Defaults to no labels.
+
+        Returns:
+            Gauge: The gauge
+        """
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str,
+                  labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """
+        Declare a histogram
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple[str, ...], optional): Label names. Defaults to no labels.
+            buckets (tuple[float, ...], optional): Bucket upper bounds. Defaults to LATENCY_BUCKETS.
+
+        Returns:
+            Histogram: The histogram
+        """
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def _register(self, family: Any) -> Any:
+        """
+        Add a metric to the registry
+
+        Args:
+            family (Any): The metric
+
+        Returns:
+            Any: The same metric
+
+        Raises:
+            ValueError: A metric with the same name already exists
+        """
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} is already registered")
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format
+
+        Returns:
+            str: The exposition
+        """
+        lines = [line for family in self._families.values()
+                 for line in family.render()]
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Reset every metric"""
+        for family in self._families.values():
+            family.clear()
+
+    def summary(self, limit: int = 8) -> dict[str, list[str]]:
+        """
+        Summarize the metrics for humans
+
+        Args:
+            limit (int, optional): Maximum number of lines per section. Defaults to 8.
+
+        Returns:
+            dict[str, list[str]]: Lines per section, busiest first
+        """
+        commands: dict[str, list[tuple[str, HistogramChild]]] = {}
+        for (kind, command, outcome), child in self.commands.items():
+            name = f"/{command}" if kind == "command" else f"{kind}:{command}"
+            commands.setdefault(name, []).append((outcome, child))
+        command_lines = []
+        for name, children in commands.items():
+            total = merge([child for _, child in children])
+            errors = sum(child.count for outcome, child in children
+                         if outcome != "ok")
+            command_lines.append((total.count, (
+                f"`{name}` {total.count:,} runs, {errors:,} failed, "
+                f"p50 {_seconds(total.quantile(0.5))}, "
+                f"p95 {_seconds(total.quantile(0.95))}")))
+
+        hosts: dict[str, list[tuple[str, str, HistogramChild]]] = {}
+        for (host, status, retry), child in self.provider_requests.items():
+            hosts.setdefault(host, []).append((status, retry, child))
+        host_lines = []
+        for host, children in hosts.items():
+            total = merge([child for _, _, child in children])
+            failed = sum(child.count for status, _, child in children
+                         if not status.isdigit() or int(status) >= 400)
+            retried = sum(child.count for _, retry, child in children
+                          if retry != "0")
+            host_lines.append((total.count, (
+                f"`{host}` {total.count:,} requests, {failed:,} failed, "
+                f"{retried:,} retries, p95 {_seconds(total.quantile(0.95))}")))
+
+        reads: dict[str, dict[str, float]] = {}
+        for (provider, result), child in self.cache_reads.items():
+            reads.setdefault(provider, {})[result] = child.value
+        cache_lines = []
+        for provider, results in reads.items():
+            total = sum(results.values())
+            hits = results.get("hit", 0)
+            cache_lines.append((total, (
+                f"`{provider}` {hits / total:.0%} hits of {total:,.0f} reads, "
+                f"{results.get('expired', 0):,.0f} expired")))
+
+        message_lines = [
+            (child.count,
+             f"`{outcome}` {child.count:,} messages, p95 {_seconds(child.quantile(0.95))}")
+            for (outcome,), child in self.messages.items()
+        ]
+
+        throttled: dict[str, float] = {}
+        for (host, _), child in self.ratelimit_throttled.items():
+            throttled[host] = throttled.get(host, 0) + child.value
+        queued = {host: child.value
+                  for (host,), child in self.ratelimit_queue.items()}
+        limit_lines = [
+            (child.count, (
+                f"`{host}` {throttled.get(host, 0):,.0f} throttled, "
+                f"{queued.get(host, 0):,.0f} queued, "
+                f"p95 wait {_seconds(child.quantile(0.95))}"))
+            for (host,), child in self.ratelimit_wait.items()
+        ]
+
+        lookups: dict[str, dict[str, float]] = {}
+        for (provider, result), child in self.flight_lookups.items():
+            lookups.setdefault(provider, {})[result] = child.value
+        flight_lines = []
+        for provider, results in lookups.items():
+            total = sum(results.values())
+            coalesced = results.get("coalesced", 0)
+            upstream = results.get("miss", 0)
+            flight_lines.append((total, (
+                f"`{provider}` {coalesced:,.0f} coalesced, "
+                f"{upstream:,.0f} upstream of {total:,.0f} lookups")))
+
+        return {
+            title: [line for _, line in sorted(lines, key=lambda item: -item[0])[:limit]]
+            for title, lines in (
+                ("Commands", command_lines),
+                ("Providers", host_lines),
+                ("Cache", cache_lines),
+                ("Rate limits", limit_lines),
+                ("Coalescing", flight_lines),
+                ("Auto-embed", message_lines),
+            )
+        }
+
+    async def _on_request_start(
+        self,
+        _session: ClientSession,
+        context: SimpleNamespace,
+        _params: TraceRequestStartParams,
+    ) -> None:
+        """aiohttp hook, notes when the request is sent"""
+        context.metrics_started = time.perf_counter()
+
+    def _observe_request(self, context: SimpleNamespace, host: str | None,
+                         status: int | str) -> None:
+        """
+        Record the latency of a finished provider request
+
+        Args:
+            context (SimpleNamespace): aiohttp trace context of the request
+            host (str | None): Host name
+            status (int | str): HTTP status code, or "error" if no response came
+        """
+        started = getattr(context, "metrics_started", None)
+        if started is None:
+            return
+        request_ctx = context.trace_request_ctx
+        retry = 0
+        if isinstance(request_ctx, dict):
+            retry = request_ctx.get("retry", 0)
+        self.provider_requests.labels(host or "", status, retry).observe(
+            time.perf_counter() - started)
+
+    async def _on_request_end(
+        self,
+        _session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ) -> None:
+        """aiohttp hook, records the response status and latency"""
+        self._observe_request(context, params.url.host, params.response.status)
+
+    async def _on_request_exception(
+        self,
+        _session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ) -> None:
+        """aiohttp hook, records requests that got no response"""
+        self._observe_request(context, params.url.host, "error")
+
+    def trace_config(self) -> TraceConfig:
+        """
+        Get the aiohttp trace config recording provider requests of a session
+
+        Pass `trace_request_ctx={"retry": n}` to a request to label retries.
+
+        Returns:
+            TraceConfig: The trace config
+        """
+        if self._trace_config is None:
+            trace_config = TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_request_end.append(self._on_request_end)
+            trace_config.on_request_exception.append(self._on_request_exception)
+            self._trace_config = trace_config
+        return self._trace_config
+
+
+metrics = MetricsRegistry()
+"""Metrics shared by the whole bot"""
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving the metrics to Prometheus"""
+
+    def __init__(self, registry: MetricsRegistry = metrics,
+                 host: str = "127.0.0.1", port: int = 9464):
+        """
+        Args:
+            registry (MetricsRegistry, optional): Metrics to serve. Defaults to the shared registry.
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, 0 disables the endpoint. Defaults to 9464.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def _serve(self, _request: web.Request) -> web.Response:
+        """Handle a scrape"""
+        return web.Response(
+            text=self.registry.render(),
+            content_type="text/plain",
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def start(self) -> None:
+        """Start listening, a port already in use only disables the endpoint"""
+        if self.port == 0 or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._serve)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as error:
+            await runner.cleanup()
+            print(f"[Sys] Metrics endpoint is disabled: {error}")
+            return
+        self._runner = runner
+        print(
+            f"[Sys] Metrics endpoint : http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        """Stop listening"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._runner = None
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "LATENCY_BUCKETS",
+    "MetricsRegistry",
+    "MetricsServer",
+    "metrics",
+    "snowflake_time",
+]
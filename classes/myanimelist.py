@@ -1,8 +1,8 @@
 """MyAnimeList Asynchronous API Wrapper Class"""
 
-import aiohttp
 
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
 from modules.const import MYANIMELIST_CLIENT_ID, USER_AGENT
 
 
@@ -48,7 +48,7 @@ class MyAnimeList:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
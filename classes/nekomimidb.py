@@ -2,9 +2,7 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Literal
 
-import pandas as pd
-
-from modules.commons import get_random_seed
+from classes.randompick import nekomimi_images
 from modules.platforms import Platform
 
 
@@ -66,29 +64,22 @@ class NekomimiDb:
             self.gender = gender.value
         else:
             self.gender = gender
-        self.seed = get_random_seed()
-        self.nmDb = pd.read_csv("database/nekomimiDb.tsv", sep="\t").fillna("")
 
     def get_random_nekomimi(self) -> NekomimiDbStruct:
         """
         Get a random nekomimi image from the database
 
         Returns:
-            Series: a random row from the database
+            NekomimiDbStruct: a random row from the database
         """
-        if self.gender is not None:
-            query = self.nmDb[self.nmDb["girlOrBoy"] == self.gender]
-        else:
-            query = self.nmDb
-        # get a random row from the query
-        row = query.sample(n=1, random_state=self.seed)
+        row = nekomimi_images.pick(self.gender)
         return NekomimiDbStruct(
-            id=row["id"].values[0],
-            imageUrl=row["imageUrl"].values[0],
-            artist=row["artist"].values[0],
-            artistUrl=row["artistUrl"].values[0],
-            platform=Platform(row["platform"].values[0]),
-            imageSourceUrl=row["imageSourceUrl"].values[0],
-            mediaSource=row["mediaSource"].values[0],
-            girlOrBoy=NekomimiGender(row["girlOrBoy"].values[0]),
+            id=int(row["id"]),
+            imageUrl=row["imageUrl"],
+            artist=row["artist"],
+            artistUrl=row["artistUrl"],
+            platform=Platform(row["platform"]),
+            imageSourceUrl=row["imageSourceUrl"],
+            mediaSource=row["mediaSource"],
+            girlOrBoy=NekomimiGender(row["girlOrBoy"]),
         )
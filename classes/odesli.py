@@ -1,9 +1,8 @@
 from dataclasses import dataclass
 from typing import Literal
 
-import aiohttp
-
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 platforms = Literal[
@@ -158,7 +157,7 @@ class Odesli:
         self.headers = None
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = create_session()
         self.headers = {"User-Agent": USER_AGENT}
         return self
 
@@ -4,6 +4,7 @@ from enum import Enum
 import aiohttp
 
 from classes.cache import Caching
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 Cache = Caching(cache_directory="cache/pronoundb",
@@ -84,7 +85,7 @@ class PronounDB:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
@@ -123,7 +124,7 @@ class PronounDB:
         params = {"platform": platform.value, "id": user_id}
         cache_file_path = Cache.get_cache_file_path(
             f"{platform.value}/{user_id}.json")
-        cached_file = Cache.read_cached_data(cache_file_path)
+        cached_file = await Cache.aread_cache(cache_file_path)
         if cached_file:
             cached_file["pronouns"] = Pronouns(cached_file["pronouns"])
             return PronounData(**cached_file)
@@ -131,7 +132,7 @@ class PronounDB:
             "https://pronoundb.org/api/v1/lookup", params=params
         ) as r:
             data = await r.json()
-            Cache.write_data_to_cache(data, cache_file_path)
+            await Cache.awrite_cache(cache_file_path, data)
             data["pronouns"] = Pronouns(data["pronouns"])
             return PronounData(**data)
 
@@ -2,9 +2,8 @@
 
 from enum import Enum
 
-import aiohttp
-
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 
@@ -52,7 +51,7 @@ class RandomOrg:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": USER_AGENT})
         return self
 
@@ -0,0 +1,280 @@
+"""
+Random picks from datasets kept in memory
+
+`/anime random` and `/nekomimi` pick one row of a tab-separated dataset.
+Each dataset is read once into compact arrays, rows are pre-partitioned by a
+column where needed, and a pick is a single random index. The files are
+preloaded when their extension is set up and watched afterwards; a changed
+file is read again in the default executor, and the new snapshot is swapped
+in once it is ready.
+"""
+
+import asyncio
+import csv
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_rng = random.Random()
+"""Generator shared by every pool, seeded from the OS"""
+
+
+def _forget(future: asyncio.Future) -> None:
+    """
+    Mark the outcome of a background reload as retrieved
+
+    Args:
+        future (asyncio.Future): The finished reload
+    """
+    if not future.cancelled():
+        future.exception()
+
+
+@dataclass(frozen=True)
+class RowSnapshot:
+    """Rows of a dataset, as loaded at a given time"""
+
+    columns: tuple[str, ...] = ()
+    """Column names"""
+    rows: list[tuple[str, ...]] = field(default_factory=list)
+    """Rows, with empty cells as empty strings"""
+    partitions: dict[str, array] = field(default_factory=dict)
+    """Indexes of the rows, keyed by the value of the partition column"""
+
+
+class _WatchedFile(ABC, Generic[T]):
+    """Dataset file loaded once, and reloaded when it changes on disk"""
+
+    def __init__(self, path: str, check_interval: float = 60.0):
+        """
+        Args:
+            path (str): Path to the tab-separated file
+            check_interval (float, optional): Minimum time between checks for changes on disk, in seconds. Defaults to 60.0.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: T | None = None
+        self._mtime: float | None = None
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self) -> T:
+        """
+        Read the file
+
+        Returns:
+            T: The snapshot of the file
+        """
+
+    def _stat(self) -> float | None:
+        """
+        Get the modification time of the file
+
+        Returns:
+            float | None: Modification time, or None if the file doesn't exist
+        """
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def reload(self) -> None:
+        """Read the file again, and swap the snapshot in"""
+        with self._lock:
+            mtime = self._stat()
+            self._snapshot = self._load()
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+
+    async def areload(self) -> None:
+        """Read the file again in the default executor, and swap the snapshot in"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.reload)
+
+    def preload(self) -> None:
+        """Read the file now if it exists, so the first pick doesn't have to"""
+        if self._snapshot is None and self._stat() is not None:
+            self.reload()
+
+    def _refresh(self) -> None:
+        """Read the file again if it changed on disk"""
+        if self._stat() != self._mtime:
+            self.reload()
+
+    def snapshot(self) -> T:
+        """
+        Get the loaded snapshot, reloading it if the file changed
+
+        Inside an event loop, a changed file is read in the default executor
+        and the current snapshot is served until the new one is swapped in.
+
+        Returns:
+            T: The snapshot
+        """
+        if self._snapshot is None:
+            self.reload()
+        elif time.monotonic() - (self._checked_at or 0) >= self.check_interval:
+            self._checked_at = time.monotonic()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._refresh()
+            else:
+                current = self._snapshot
+                future = loop.run_in_executor(None, self._refresh)
+                future.add_done_callback(_forget)
+                return current
+        return self._snapshot  # type: ignore
+
+
+class RandomIdPool(_WatchedFile[array]):
+    """Integer column of a dataset, to pick random IDs from"""
+
+    def __init__(self, path: str, column: str, check_interval: float = 60.0):
+        """
+        Args:
+            path (str): Path to the tab-separated file
+            column (str): Name of the ID column
+            check_interval (float, optional): Minimum time between checks for changes on disk, in seconds. Defaults to 60.0.
+        """
+        super().__init__(path, check_interval)
+        self.column = column
+
+    def _load(self) -> array:
+        """
+        Read the ID column of the file
+
+        Returns:
+            array: The IDs
+        """
+        ids = array("q")
+        with open(self.path, "r", encoding="utf-8", newline="") as file:
+            reader = csv.DictReader(file, delimiter="\t")
+            for row in reader:
+                value = (row.get(self.column) or "").strip()
+                if value.isdigit():
+                    ids.append(int(value))
+        return ids
+
+    def __len__(self) -> int:
+        """Number of IDs"""
+        return len(self.snapshot())
+
+    def pick(self) -> int:
+        """
+        Pick a random ID
+
+        Returns:
+            int: The ID
+
+        Raises:
+            ValueError: The dataset is empty
+        """
+        ids = self.snapshot()
+        if not ids:
+            raise ValueError(f"No rows to pick from in {self.path}")
+        return ids[_rng.randrange(len(ids))]
+
+
+class RandomRowPool(_WatchedFile[RowSnapshot]):
+    """Rows of a dataset partitioned by a column, to pick random rows from"""
+
+    def __init__(self, path: str, partition_column: str, check_interval: float = 60.0):
+        """
+        Args:
+            path (str): Path to the tab-separated file
+            partition_column (str): Name of the column rows are grouped by
+            check_interval (float, optional): Minimum time between checks for changes on disk, in seconds. Defaults to 60.0.
+        """
+        super().__init__(path, check_interval)
+        self.partition_column = partition_column
+
+    def _load(self) -> RowSnapshot:
+        """
+        Read and partition the rows of the file
+
+        Returns:
+            RowSnapshot: The rows
+        """
+        with open(self.path, "r", encoding="utf-8", newline="") as file:
+            reader = csv.reader(file, delimiter="\t")
+            columns = tuple(next(reader, ()))
+            width = len(columns)
+            rows = [
+                tuple(row[:width]) + ("",) * (width - len(row))
+                for row in reader
+                if row
+            ]
+        partitions: dict[str, array] = {}
+        key = columns.index(self.partition_column)
+        for index, row in enumerate(rows):
+            partitions.setdefault(row[key], array("I")).append(index)
+        return RowSnapshot(columns, rows, partitions)
+
+    def __len__(self) -> int:
+        """Number of rows"""
+        return len(self.snapshot().rows)
+
+    def pick(self, partition: str | None = None) -> dict[str, str]:
+        """
+        Pick a random row
+
+        Args:
+            partition (str | None, optional): Value of the partition column to pick from. Defaults to any row.
+
+        Returns:
+            dict[str, str]: The row, keyed by column name
+
+        Raises:
+            ValueError: No row matches
+        """
+        snapshot = self.snapshot()
+        if partition is None:
+            if not snapshot.rows:
+                raise ValueError(f"No rows to pick from in {self.path}")
+            index = _rng.randrange(len(snapshot.rows))
+        else:
+            indexes = snapshot.partitions.get(partition)
+            if not indexes:
+                raise ValueError(f"No rows with {self.partition_column}={partition} in {self.path}")
+            index = indexes[_rng.randrange(len(indexes))]
+        return dict(zip(snapshot.columns, snapshot.rows[index]))
+
+
+def write_atomic(path: str, content: str) -> None:
+    """
+    Replace a dataset file without readers ever seeing it half written
+
+    Args:
+        path (str): Path to the file
+        content (str): New content
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+random_anime = RandomIdPool("database/mal.csv", "mal_id")
+"""MyAnimeList IDs indexed from AnimeAPI, for /anime random"""
+
+nekomimi_images = RandomRowPool("database/nekomimiDb.tsv", "girlOrBoy")
+"""nattadasu/nekomimiDb images, partitioned by gender, for /nekomimi"""
+
+
+__all__ = [
+    "RandomIdPool",
+    "RandomRowPool",
+    "RowSnapshot",
+    "nekomimi_images",
+    "random_anime",
+    "write_atomic",
+]
@@ -0,0 +1,404 @@
+"""
+Per-provider rate limiting for outgoing HTTP requests
+
+Each known provider host gets one or more token buckets matching its
+published limits. Requests to the host queue in FIFO order until a token is
+available. `Retry-After` and `X-RateLimit-*` response headers pause the whole
+host until the provider allows requests again, and the throttled request is
+sent once more after the pause. Queue depth, waiting time and throttled
+responses are exported through `classes.metrics`.
+
+The limiter hooks into aiohttp through `RateLimiter.trace_config` and
+`RateLimiter.retry_middleware`, which `classes.session.create_session`
+attaches to every session.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import Any, Mapping
+
+from aiohttp import (ClientHandlerType, ClientRequest, ClientResponse,
+                     ClientSession, TraceConfig, TraceRequestStartParams)
+
+from classes.metrics import metrics
+
+DEFAULT_LIMITS: dict[str, list[tuple[int, float]]] = {
+    "api.jikan.moe": [(3, 1), (60, 60)],
+    "graphql.anilist.co": [(90, 60)],
+    "api.simkl.com": [(5, 1)],
+    "api.trakt.tv": [(1000, 300)],
+    "api.mangadex.org": [(5, 1)],
+}
+"""Published limits per host, as a list of (requests, per seconds)"""
+
+MAX_RETRY_WAIT = 10.0
+"""Longest pause, in seconds, a throttled request waits for before its retry"""
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Compute an exponential backoff delay with full jitter
+
+    Args:
+        attempt (int): Retry attempt, starting from 1
+        base (float, optional): Delay of the first attempt, in seconds. Defaults to 1.0.
+        cap (float, optional): Maximum delay, in seconds. Defaults to 30.0.
+
+    Returns:
+        float: Delay in seconds, between 0 and min(cap, base * 2^(attempt - 1))
+    """
+    return random.uniform(0, min(cap, base * 2 ** max(attempt - 1, 0)))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value (str | None): Either a number of seconds or an HTTP date
+
+    Returns:
+        float | None: Seconds to wait, or None if the value can't be parsed
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests every `per` seconds"""
+
+    def __init__(self, rate: int, per: float):
+        """
+        Args:
+            rate (int): Number of requests allowed per window
+            per (float): Window length, in seconds
+        """
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add tokens earned since the last refill"""
+        now = time.monotonic()
+        earned = (now - self.updated_at) * self.rate / self.per
+        self.tokens = min(float(self.rate), self.tokens + earned)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """
+        Get the time to wait before a token is available
+
+        Returns:
+            float: Seconds to wait, 0 if a token is available now
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def consume(self) -> None:
+        """Take a token"""
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self) -> None:
+        """Empty the bucket, the provider told us we are out of quota"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+@dataclass
+class HostLimiterStats:
+    """Metrics of a host limiter"""
+
+    requests: int = 0
+    """Requests that went through the limiter"""
+    delayed: int = 0
+    """Requests that had to wait for a token"""
+    queue_depth: int = 0
+    """Requests currently waiting for a token"""
+    max_queue_depth: int = 0
+    """Highest number of requests waiting at once"""
+    total_wait: float = 0.0
+    """Accumulated waiting time, in seconds"""
+    max_wait: float = 0.0
+    """Longest wait of a single request, in seconds"""
+    throttled: int = 0
+    """Responses telling us to slow down (429, or 503 with Retry-After)"""
+
+
+class HostLimiter:
+    """Queue and pace requests to a single host"""
+
+    def __init__(self, host: str, limits: list[tuple[int, float]]):
+        """
+        Args:
+            host (str): Host name
+            limits (list[tuple[int, float]]): List of (requests, per seconds)
+        """
+        self.host = host
+        self.buckets = [TokenBucket(rate, per) for rate, per in limits]
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.stats = HostLimiterStats()
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        """
+        Get the queue lock of the running event loop
+
+        Returns:
+            asyncio.Lock: The lock
+        """
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _delay(self) -> float:
+        """
+        Get the time to wait before the next request may be sent
+
+        Returns:
+            float: Seconds to wait
+        """
+        blocked = self.blocked_until - time.monotonic()
+        return max([blocked] + [bucket.delay() for bucket in self.buckets])
+
+    async def acquire(self) -> float:
+        """
+        Wait for the host to accept a request, in FIFO order
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        started = time.monotonic()
+        queue = metrics.ratelimit_queue.labels(self.host)
+        self.stats.queue_depth += 1
+        self.stats.max_queue_depth = max(
+            self.stats.max_queue_depth, self.stats.queue_depth)
+        queue.inc()
+        try:
+            async with self._get_lock():
+                while (delay := self._delay()) > 0:
+                    await asyncio.sleep(delay)
+                for bucket in self.buckets:
+                    bucket.consume()
+        finally:
+            self.stats.queue_depth -= 1
+            queue.dec()
+        waited = time.monotonic() - started
+        metrics.ratelimit_wait.labels(self.host).observe(waited)
+        self.stats.requests += 1
+        if waited > 0.001:
+            self.stats.delayed += 1
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+        return waited
+
+    def block_for(self, seconds: float) -> None:
+        """
+        Pause the host for a while
+
+        Args:
+            seconds (float): Time to pause, in seconds
+        """
+        self.blocked_until = max(
+            self.blocked_until, time.monotonic() + seconds)
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> bool:
+        """
+        Adjust pacing from a response
+
+        Args:
+            status (int): HTTP status code
+            headers (Mapping[str, str]): Response headers
+
+        Returns:
+            bool: Whether the response asked to slow down
+        """
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if status == 429 or (status == 503 and retry_after is not None):
+            self.stats.throttled += 1
+            metrics.ratelimit_throttled.labels(self.host, status).inc()
+            self.consecutive_throttles += 1
+            for bucket in self.buckets:
+                bucket.drain()
+            if retry_after is None:
+                retry_after = backoff(self.consecutive_throttles)
+            self.block_for(retry_after)
+            return True
+        self.consecutive_throttles = 0
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None or not remaining.strip().isdigit() or int(remaining) > 0:
+            return False
+        for bucket in self.buckets:
+            bucket.drain()
+        reset = headers.get("X-RateLimit-Reset")
+        try:
+            reset_at = float(reset) if reset else 0.0
+        except ValueError:
+            return False
+        # Some providers send an epoch timestamp, others a delta in seconds
+        if reset_at > 1e9:
+            reset_at -= time.time()
+        if reset_at > 0:
+            self.block_for(reset_at)
+        return False
+
+
+class RateLimiter:
+    """Registry of host limiters"""
+
+    def __init__(self, limits: dict[str, list[tuple[int, float]]] | None = None):
+        """
+        Args:
+            limits (dict[str, list[tuple[int, float]]] | None, optional): Limits per host. Defaults to DEFAULT_LIMITS.
+        """
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._hosts: dict[str, HostLimiter] = {}
+        self._trace_config: TraceConfig | None = None
+
+    def for_host(self, host: str | None) -> HostLimiter | None:
+        """
+        Get the limiter of a host
+
+        Args:
+            host (str | None): Host name
+
+        Returns:
+            HostLimiter | None: The limiter, or None if the host has no known limit
+        """
+        if host is None:
+            return None
+        limiter = self._hosts.get(host)
+        if limiter is None and host in self.limits:
+            limiter = self._hosts[host] = HostLimiter(host, self.limits[host])
+        return limiter
+
+    async def acquire(self, host: str | None) -> float:
+        """
+        Wait until a request to the host may be sent
+
+        Args:
+            host (str | None): Host name
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        limiter = self.for_host(host)
+        if limiter is None:
+            return 0.0
+        return await limiter.acquire()
+
+    def observe(self, host: str | None, status: int,
+                headers: Mapping[str, str]) -> bool:
+        """
+        Adjust pacing of a host from a response
+
+        Args:
+            host (str | None): Host name
+            status (int): HTTP status code
+            headers (Mapping[str, str]): Response headers
+
+        Returns:
+            bool: Whether the response asked to slow down
+        """
+        limiter = self.for_host(host)
+        if limiter is None:
+            return False
+        return limiter.observe(status, headers)
+
+    async def retry_middleware(self, request: ClientRequest,
+                               handler: ClientHandlerType) -> ClientResponse:
+        """
+        aiohttp client middleware, reads rate limit headers of the response
+        and sends a throttled request once more
+
+        The throttled response pauses the host, so the retry waits for the
+        pause like any other request. Pauses longer than MAX_RETRY_WAIT return
+        the throttled response instead.
+
+        Args:
+            request (ClientRequest): The request
+            handler (ClientHandlerType): Next handler of the chain
+
+        Returns:
+            ClientResponse: The response
+        """
+        response = await handler(request)
+        limiter = self.for_host(request.url.host)
+        if limiter is None:
+            return response
+        if not limiter.observe(response.status, response.headers):
+            return response
+        if limiter.blocked_until - time.monotonic() > MAX_RETRY_WAIT:
+            return response
+        response.release()
+        await limiter.acquire()
+        response = await handler(request)
+        limiter.observe(response.status, response.headers)
+        return response
+
+    async def _on_request_start(
+        self,
+        _session: ClientSession,
+        _context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ) -> None:
+        """aiohttp hook, waits for the host before the request is sent"""
+        await self.acquire(params.url.host)
+
+    def trace_config(self) -> TraceConfig:
+        """
+        Get the aiohttp trace config pacing the requests of a session
+
+        Returns:
+            TraceConfig: The trace config
+        """
+        if self._trace_config is None:
+            trace_config = TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            self._trace_config = trace_config
+        return self._trace_config
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Get a snapshot of the metrics, for monitoring
+
+        Returns:
+            dict[str, dict[str, Any]]: Metrics keyed by host
+        """
+        return {host: asdict(limiter.stats)
+                for host, limiter in self._hosts.items()}
+
+
+rate_limiter = RateLimiter()
+"""Rate limiter shared by every provider wrapper"""
+
+
+__all__ = [
+    "DEFAULT_LIMITS",
+    "HostLimiter",
+    "MAX_RETRY_WAIT",
+    "RateLimiter",
+    "TokenBucket",
+    "backoff",
+    "parse_retry_after",
+    "rate_limiter",
+]
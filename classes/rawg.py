@@ -5,14 +5,13 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Literal
 
-from aiohttp import ClientSession
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
 from modules.const import RAWG_API_KEY, USER_AGENT
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RawgBaseData:
     """Rawg base data class"""
 
@@ -25,7 +24,7 @@ class RawgBaseData:
     """Name"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EsrbRating:
     """ESRB rating data class"""
 
@@ -46,7 +45,7 @@ class EsrbRating:
     """Name"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PlatformData:
     """Each platform data class"""
 
@@ -69,7 +68,7 @@ class PlatformData:
     """Image background"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StoreData(RawgBaseData):
     """Store data class"""
 
@@ -81,7 +80,7 @@ class StoreData(RawgBaseData):
     """Image background"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StudioData(RawgBaseData):
     """Studio (developer, publisher) data class"""
 
@@ -91,7 +90,7 @@ class StudioData(RawgBaseData):
     """Image background"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GenreData(RawgBaseData):
     """Genre data class"""
 
@@ -101,7 +100,7 @@ class GenreData(RawgBaseData):
     """Image background"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TagData(RawgBaseData):
     """Tag data class"""
 
@@ -113,7 +112,7 @@ class TagData(RawgBaseData):
     """Language"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Stores:
     """Stores data class"""
 
@@ -126,7 +125,7 @@ class Stores:
     """URL"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ParentPlatform:
     """Parent platform data class"""
 
@@ -134,7 +133,7 @@ class ParentPlatform:
     """Platform"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MetacriticPlatformData:
     """Metacritic platform data class"""
 
@@ -146,7 +145,7 @@ class MetacriticPlatformData:
     """Slug"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Requirements:
     """Requirements data class"""
 
@@ -156,7 +155,7 @@ class Requirements:
     """Recommended"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Platforms:
     """Platforms data class"""
 
@@ -168,7 +167,7 @@ class Platforms:
     """Requirements"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MetacriticPlatforms:
     """Metacritic platforms data class"""
 
@@ -179,7 +178,7 @@ class MetacriticPlatforms:
     platform: MetacriticPlatformData | None = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Ratings:
     """Ratings data class"""
 
@@ -194,7 +193,7 @@ class Ratings:
     """Percent"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AddedByStatus:
     """Added by status data class"""
 
@@ -212,7 +211,7 @@ class AddedByStatus:
     """Playing"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RawgGameData(RawgBaseData):
     """Rawg game data class"""
 
@@ -339,7 +338,7 @@ class RawgApi:
             raise ProviderHttpError("No API key provided", 401)
         self.base_url = "https://api.rawg.io/api"
         self.params = {"key": key}
-        self.session = ClientSession(headers={"User-Agent": USER_AGENT})
+        self.session = create_session(headers={"User-Agent": USER_AGENT})
 
     async def __aenter__(self):
         """Enter the async context manager"""
@@ -468,7 +467,7 @@ class RawgApi:
             RawgGameData: Game data
         """
         cache_file_path = Cache.get_cache_file_path(f"{slug}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return self._convert(cached_data)
         async with self.session.get(
@@ -476,7 +475,7 @@ class RawgApi:
         ) as resp:
             if resp.status == 200:
                 rawg_resp = await resp.json()
-                Cache.write_data_to_cache(rawg_resp, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, rawg_resp)
             else:
                 raise ProviderHttpError(
                     f"RAWG API returned {resp.status}. Reason: {resp.text()}",
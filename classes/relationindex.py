@@ -0,0 +1,241 @@
+"""
+Offline index of anime relations across sites
+
+AnimeAPI publishes its whole database as a single dump. `RelationIndex` keeps
+it in a read-only SQLite file: one row per anime, plus a table mapping every
+`(platform, id)` pair to its row, so resolving a relation is one indexed
+query on memory-mapped pages instead of a round trip to AnimeAPI.
+
+The index is rebuilt into a temporary file next to the current one, then
+swapped in with an atomic rename, so lookups never see a half-built index.
+"""
+
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+INDEXED_PLATFORMS: tuple[str, ...] = (
+    "anidb",
+    "anilist",
+    "animeplanet",
+    "anisearch",
+    "annict",
+    "kaize",
+    "kitsu",
+    "livechart",
+    "myanimelist",
+    "notify",
+    "otakotaku",
+    "shikimori",
+    "shoboi",
+    "silveryasha",
+)
+"""Platforms whose IDs are indexed. Trakt is looked up by slug and season, so it is not"""
+
+_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relindex")
+"""Dedicated thread owning the read connection of every index"""
+
+
+class RelationIndex:
+    """Read-only relation index stored in a SQLite file"""
+
+    def __init__(
+        self,
+        path: str,
+        columns: Iterable[str],
+        platforms: Iterable[str] = INDEXED_PLATFORMS,
+        mmap_size: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path (str): Path to the index file
+            columns (Iterable[str]): Fields kept for each anime
+            platforms (Iterable[str], optional): Fields whose values are indexed as IDs. Defaults to INDEXED_PLATFORMS.
+            mmap_size (int, optional): Bytes of the file mapped in memory. Defaults to 64 MiB.
+        """
+        self.path = path
+        self.columns = list(columns)
+        self.platforms = frozenset(platforms) & frozenset(self.columns)
+        self.mmap_size = mmap_size
+        self._conn: sqlite3.Connection | None = None
+        self._mtime: float | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """
+        Get the read connection, opening the index if it was (re)built
+
+        Only call this from the index thread
+
+        Returns:
+            sqlite3.Connection | None: The connection, or None if there is no index yet
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            self._close()
+            return None
+        if self._conn is not None and mtime == self._mtime:
+            return self._conn
+        self._close()
+        conn = sqlite3.connect(
+            f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        self._conn = conn
+        self._mtime = mtime
+        return conn
+
+    def _close(self) -> None:
+        """Close the read connection, if any"""
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._mtime = None
+
+    def _lookup(self, platform: str, media_id: str) -> dict[str, Any] | None:
+        """
+        Find the anime having an ID on a platform
+
+        Args:
+            platform (str): Platform of the ID
+            media_id (str): The ID
+
+        Returns:
+            dict[str, Any] | None: Fields of the anime, or None if not indexed
+        """
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT anime.* FROM ids JOIN anime ON anime.rowid = ids.anime "
+            "WHERE ids.platform = ? AND ids.id = ?",
+            (platform, media_id),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(self.columns, row))
+
+    def _updated(self) -> float | None:
+        """
+        Get the update time of the dump the index was built from
+
+        Returns:
+            float | None: POSIX timestamp, or None if there is no index yet
+        """
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT value FROM meta WHERE key = 'updated'").fetchone()
+        return float(row[0]) if row is not None else None
+
+    def _swap(self, built_path: str) -> None:
+        """
+        Replace the index with a freshly built file
+
+        Args:
+            built_path (str): Path to the new index
+        """
+        self._close()
+        os.replace(built_path, self.path)
+
+    def build(self, records: Iterable[dict[str, Any]], updated: float) -> str:
+        """
+        Write records to a new index file, next to the current one
+
+        Args:
+            records (Iterable[dict[str, Any]]): Anime from the dump
+            updated (float): Update time of the dump, as POSIX timestamp
+
+        Returns:
+            str: Path to the new index, swapped in by `rebuild`
+        """
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        built_path = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.exists(built_path):
+            os.remove(built_path)
+        conn = sqlite3.connect(built_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            columns = ", ".join(self.columns)
+            conn.execute(f"CREATE TABLE anime ({columns})")
+            conn.execute(
+                "CREATE TABLE ids (platform TEXT, id TEXT, anime INTEGER, "
+                "PRIMARY KEY (platform, id)) WITHOUT ROWID")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+            placeholders = ", ".join("?" for _ in self.columns)
+            conn.execute("BEGIN")
+            for record in records:
+                cursor = conn.execute(
+                    f"INSERT INTO anime VALUES ({placeholders})",
+                    [record.get(column) for column in self.columns],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO ids VALUES (?, ?, ?)",
+                    [
+                        (platform, str(record[platform]), cursor.lastrowid)
+                        for platform in self.platforms
+                        if record.get(platform) not in (None, "")
+                    ],
+                )
+            conn.execute(
+                "INSERT INTO meta VALUES ('updated', ?)", (float(updated),))
+            conn.execute("COMMIT")
+            conn.execute("VACUUM")
+        except BaseException:
+            conn.close()
+            os.remove(built_path)
+            raise
+        conn.close()
+        return built_path
+
+    async def lookup(self, platform: str, media_id: str | int) -> dict[str, Any] | None:
+        """
+        Find the anime having an ID on a platform, without touching the network
+
+        Args:
+            platform (str): Platform of the ID
+            media_id (str | int): The ID
+
+        Returns:
+            dict[str, Any] | None: Fields of the anime, or None if the ID is unknown
+        """
+        if platform not in self.platforms:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _index_executor, self._lookup, platform, str(media_id).strip())
+
+    async def updated(self) -> float | None:
+        """
+        Get the update time of the dump the index was built from
+
+        Returns:
+            float | None: POSIX timestamp, or None if there is no index yet
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_index_executor, self._updated)
+
+    async def rebuild(self, records: Iterable[dict[str, Any]], updated: float) -> None:
+        """
+        Build a new index in the background, then swap it in
+
+        Lookups keep being served from the current index until the swap
+
+        Args:
+            records (Iterable[dict[str, Any]]): Anime from the dump
+            updated (float): Update time of the dump, as POSIX timestamp
+        """
+        loop = asyncio.get_running_loop()
+        built_path = await loop.run_in_executor(None, self.build, records, updated)
+        await loop.run_in_executor(_index_executor, self._swap, built_path)
+
+    async def close(self) -> None:
+        """Close the read connection"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_index_executor, self._close)
+
+
+__all__ = ["INDEXED_PLATFORMS", "RelationIndex"]
@@ -0,0 +1,497 @@
+"""
+Record and replay of provider responses
+
+`ReplayServer` is a local aiohttp server answering provider requests from
+recorded exchanges, so wrappers can be tested and benchmarked without the
+network. While it runs, every session made by `classes.session.create_session`
+sends its requests to the server instead: `https://api.jikan.moe/v4/anime/1`
+is sent to `http://127.0.0.1:<port>/api.jikan.moe/v4/anime/1`. Rate limits,
+metrics and spans still see the provider's URL.
+
+Recordings are JSON files, one per provider host:
+
+```json
+{
+  "host": "api.jikan.moe",
+  "exchanges": [
+    {
+      "method": "GET",
+      "path": "/v4/users/nattadasu/full",
+      "query": {"page": "1"},
+      "body": "Media(id: 1",
+      "responses": [
+        {"status": 429, "headers": {"Retry-After": "1"}, "json": {"status": 429}},
+        {"status": 200, "latency": 0.25, "json": {"data": {}}},
+        {"error": "disconnect"}
+      ]
+    }
+  ]
+}
+```
+
+`query` only lists parameters the request must have, and `body` a text the
+request body must contain. Responses are served in order, the last one
+repeating: `latency` delays it by that many seconds, `json` or `text` is its
+body, and `"error": "disconnect"` drops the connection instead of answering.
+
+In record mode, requests are forwarded to their provider over HTTPS and
+their responses appended to the recordings, then written with `save`.
+Credentials are not recorded: request headers are dropped, and so are
+query parameters named in `SECRET_PARAMS`.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Literal
+
+from aiohttp import ClientRequest, ClientSession, web
+from multidict import CIMultiDict
+from yarl import URL
+
+from classes.session import session_manager
+
+SECRET_PARAMS: frozenset[str] = frozenset({
+    "access_token", "api_key", "apikey", "client_id", "client_secret", "key",
+    "token",
+})
+"""Query parameters left out of recordings"""
+
+RECORDED_HEADERS: tuple[str, ...] = (
+    "Content-Type", "ETag", "Last-Modified", "Location", "Retry-After")
+"""Response headers kept in recordings, along with any rate limit header"""
+
+
+@dataclass(slots=True)
+class ReplayResponse:
+    """A recorded response"""
+
+    status: int = 200
+    """HTTP status code"""
+    headers: dict[str, str] = field(default_factory=dict)
+    """Response headers"""
+    data: Any = None
+    """JSON body, stored as `json`"""
+    text: str | None = None
+    """Text body, used when there is no JSON body"""
+    latency: float = 0.0
+    """Seconds to wait before answering"""
+    error: Literal["disconnect"] | None = None
+    """Failure to simulate instead of answering"""
+
+    @classmethod
+    def from_dict(cls, entry: dict[str, Any]) -> "ReplayResponse":
+        """
+        Read a response from its recorded form
+
+        Args:
+            entry (dict[str, Any]): The recorded response
+
+        Returns:
+            ReplayResponse: The response
+        """
+        return cls(
+            status=entry.get("status", 200),
+            headers=entry.get("headers", {}),
+            data=entry.get("json"),
+            text=entry.get("text"),
+            latency=entry.get("latency", 0.0),
+            error=entry.get("error"),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get the recorded form of the response
+
+        Returns:
+            dict[str, Any]: The recorded response
+        """
+        entry: dict[str, Any] = {"status": self.status}
+        if self.headers:
+            entry["headers"] = self.headers
+        if self.latency:
+            entry["latency"] = round(self.latency, 4)
+        if self.error is not None:
+            entry["error"] = self.error
+        elif self.data is not None:
+            entry["json"] = self.data
+        elif self.text is not None:
+            entry["text"] = self.text
+        return entry
+
+    def body(self) -> tuple[bytes, str]:
+        """
+        Encode the body of the response
+
+        Returns:
+            tuple[bytes, str]: The body and its default content type
+        """
+        if self.data is not None:
+            return json.dumps(self.data).encode(), "application/json"
+        return (self.text or "").encode(), "text/plain"
+
+
+@dataclass(slots=True)
+class Exchange:
+    """A request and the responses recorded for it"""
+
+    method: str
+    """HTTP method"""
+    path: str
+    """Path of the URL, percent-encoded"""
+    query: dict[str, str] = field(default_factory=dict)
+    """Query parameters the request must have"""
+    body: str | None = None
+    """Text the request body must contain"""
+    responses: list[ReplayResponse] = field(default_factory=list)
+    """Responses, served in order"""
+    served: int = 0
+    """Number of requests answered"""
+
+    @classmethod
+    def from_dict(cls, entry: dict[str, Any]) -> "Exchange":
+        """
+        Read an exchange from its recorded form
+
+        Args:
+            entry (dict[str, Any]): The recorded exchange
+
+        Returns:
+            Exchange: The exchange
+        """
+        return cls(
+            method=entry.get("method", "GET").upper(),
+            path=entry["path"],
+            query={key: str(value) for key, value in entry.get("query", {}).items()},
+            body=entry.get("body"),
+            responses=[ReplayResponse.from_dict(response)
+                       for response in entry["responses"]],
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Get the recorded form of the exchange
+
+        Returns:
+            dict[str, Any]: The recorded exchange
+        """
+        entry: dict[str, Any] = {"method": self.method, "path": self.path}
+        if self.query:
+            entry["query"] = self.query
+        if self.body is not None:
+            entry["body"] = self.body
+        entry["responses"] = [response.to_dict() for response in self.responses]
+        return entry
+
+    def matches(self, query: dict[str, str], body: str | None) -> bool:
+        """
+        Check if a request is answered by this exchange
+
+        Args:
+            query (dict[str, str]): Query parameters of the request
+            body (str | None): Body of the request, None if not read
+
+        Returns:
+            bool: Whether the exchange answers the request
+        """
+        if any(query.get(key) != value for key, value in self.query.items()):
+            return False
+        return self.body is None or (body is not None and self.body in body)
+
+    def next_response(self) -> ReplayResponse:
+        """
+        Get the response to serve next
+
+        Returns:
+            ReplayResponse: The response, the last one once all were served
+        """
+        response = self.responses[min(self.served, len(self.responses) - 1)]
+        self.served += 1
+        return response
+
+
+@dataclass(slots=True)
+class Recording:
+    """Exchanges recorded with a provider host"""
+
+    host: str
+    """Host of the provider, with its port if not the default"""
+    exchanges: list[Exchange] = field(default_factory=list)
+    """Recorded exchanges"""
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """
+        Read a recording file
+
+        Args:
+            path (str): Path of the file
+
+        Returns:
+            Recording: The recording
+        """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(
+            host=data["host"],
+            exchanges=[Exchange.from_dict(entry) for entry in data["exchanges"]],
+        )
+
+    def dump(self, path: str) -> None:
+        """
+        Write the recording to a file
+
+        Args:
+            path (str): Path of the file
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"host": self.host,
+                 "exchanges": [exchange.to_dict() for exchange in self.exchanges]},
+                file, ensure_ascii=False, indent=2)
+            file.write("\n")
+
+
+def _rate_limit_header(name: str) -> bool:
+    """Check if a response header is a rate limit header"""
+    lowered = name.lower()
+    return lowered.startswith("x-ratelimit") or lowered.startswith("ratelimit")
+
+
+class ReplayServer:
+    """Local HTTP server answering provider requests from recordings"""
+
+    def __init__(
+        self,
+        recordings: Iterable[Recording] = (),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_scale: float = 1.0,
+        record: bool = False,
+        upstream_scheme: str = "https",
+    ):
+        """
+        Args:
+            recordings (Iterable[Recording], optional): Exchanges to serve. Defaults to none.
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, 0 picks a free one. Defaults to 0.
+            latency_scale (float, optional): Factor applied to recorded latencies, 0 answers at once. Defaults to 1.0.
+            record (bool, optional): Forward requests to providers and record their responses. Defaults to False.
+            upstream_scheme (str, optional): Scheme of forwarded requests. Defaults to "https".
+        """
+        self.recordings: dict[str, Recording] = {
+            recording.host: recording for recording in recordings}
+        self.host = host
+        self.port = port
+        self.latency_scale = latency_scale
+        self.record = record
+        self.upstream_scheme = upstream_scheme
+        self.misses: list[str] = []
+        """Requests no exchange answered, as `METHOD host/path?query`"""
+        self._runner: web.AppRunner | None = None
+        self._upstream: ClientSession | None = None
+        self._previous_request_class: type[ClientRequest] | None = None
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs: Any) -> "ReplayServer":
+        """
+        Create a server replaying every recording of a directory
+
+        Args:
+            directory (str): Folder holding `*.json` recordings
+            **kwargs: Keyword arguments passed to `ReplayServer`
+
+        Returns:
+            ReplayServer: The server, not started
+        """
+        recordings = [
+            Recording.load(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.endswith(".json")
+        ]
+        return cls(recordings, **kwargs)
+
+    @property
+    def origin(self) -> URL:
+        """Base URL of the server"""
+        return URL.build(scheme="http", host=self.host, port=self.port)
+
+    @property
+    def served(self) -> int:
+        """Number of requests answered from recordings"""
+        return sum(exchange.served for recording in self.recordings.values()
+                   for exchange in recording.exchanges)
+
+    def request_class(self) -> type[ClientRequest]:
+        """
+        Get a request class sending provider requests to this server
+
+        Returns:
+            type[ClientRequest]: The request class
+        """
+        origin = self.origin
+
+        class ReplayRequest(ClientRequest):
+            """Request sent to the replay server instead of its provider"""
+
+            def __init__(self, method: str, url: URL, **kwargs: Any):
+                if url.host_port_subcomponent != origin.host_port_subcomponent:
+                    url = URL.build(
+                        scheme=origin.scheme,
+                        host=origin.host,
+                        port=origin.port,
+                        path=f"/{url.host_port_subcomponent}{url.raw_path}",
+                        query_string=url.raw_query_string,
+                        encoded=True,
+                    )
+                super().__init__(method, url, **kwargs)
+
+        return ReplayRequest
+
+    def _find(
+        self, method: str, host: str, path: str,
+        query: dict[str, str], body: str | None,
+    ) -> Exchange | None:
+        """Find the exchange answering a request"""
+        recording = self.recordings.get(host)
+        if recording is None:
+            return None
+        for exchange in recording.exchanges:
+            if (exchange.method == method and exchange.path == path
+                    and exchange.matches(query, body)):
+                return exchange
+        return None
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Answer a rerouted request"""
+        host, _, path = request.rel_url.raw_path[1:].partition("/")
+        path = f"/{path}"
+        query = dict(request.query)
+        body = await request.text() if request.can_read_body else None
+        if self.record:
+            return await self._forward(request, host, path, query, body)
+        exchange = self._find(request.method, host, path, query, body)
+        if exchange is None:
+            miss = f"{request.method} {host}{request.rel_url.raw_path_qs[len(host) + 1:]}"
+            self.misses.append(miss)
+            return web.Response(status=501, text=f"No recorded exchange for {miss}")
+        response = exchange.next_response()
+        if response.latency:
+            await asyncio.sleep(response.latency * self.latency_scale)
+        if response.error == "disconnect":
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response()
+        return self._respond(response)
+
+    @staticmethod
+    def _respond(response: ReplayResponse) -> web.Response:
+        """Build the answer of a recorded response"""
+        payload, content_type = response.body()
+        headers = CIMultiDict(response.headers)
+        headers.setdefault("Content-Type", content_type)
+        return web.Response(status=response.status, body=payload, headers=headers)
+
+    async def _forward(
+        self, request: web.Request, host: str, path: str,
+        query: dict[str, str], body: str | None,
+    ) -> web.Response:
+        """Send a request to its provider, then record the response"""
+        if self._upstream is None:
+            self._upstream = ClientSession(auto_decompress=True)
+        headers = {key: value for key, value in request.headers.items()
+                   if key.lower() not in ("host", "content-length", "accept-encoding")}
+        started = time.perf_counter()
+        async with self._upstream.request(
+            request.method,
+            URL(f"{self.upstream_scheme}://{host}{request.rel_url.raw_path_qs[len(host) + 1:]}",
+                encoded=True),
+            headers=headers,
+            data=body.encode() if body is not None else None,
+            allow_redirects=False,
+        ) as upstream:
+            payload = await upstream.read()
+            latency = time.perf_counter() - started
+            kept = {key: value for key, value in upstream.headers.items()
+                    if key in RECORDED_HEADERS or _rate_limit_header(key)}
+            response = ReplayResponse(
+                status=upstream.status, headers=kept, latency=latency)
+            try:
+                response.data = json.loads(payload)
+            except ValueError:
+                response.text = payload.decode(upstream.charset or "utf-8", "replace")
+        query = {key: value for key, value in query.items()
+                 if key.lower() not in SECRET_PARAMS}
+        recording = self.recordings.setdefault(host, Recording(host))
+        exchange = next(
+            (item for item in recording.exchanges
+             if item.method == request.method and item.path == path
+             and item.query == query and item.body == body), None)
+        if exchange is None:
+            exchange = Exchange(request.method, path, query, body)
+            recording.exchanges.append(exchange)
+        exchange.responses.append(response)
+        exchange.served += 1
+        return self._respond(response)
+
+    def save(self, directory: str) -> list[str]:
+        """
+        Write every recording to a directory, one file per host
+
+        Args:
+            directory (str): Folder to write to
+
+        Returns:
+            list[str]: Paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for host, recording in self.recordings.items():
+            path = os.path.join(directory, f"{host.replace(':', '_')}.json")
+            recording.dump(path)
+            paths.append(path)
+        return paths
+
+    async def start(self) -> None:
+        """Start listening, then send provider requests of new sessions here"""
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        self._runner = runner
+        self.port = runner.addresses[0][1]
+        self._previous_request_class = session_manager.request_class
+        session_manager.request_class = self.request_class()
+
+    async def close(self) -> None:
+        """Stop sending requests here, then stop listening"""
+        if self._runner is None:
+            return
+        session_manager.request_class = self._previous_request_class
+        if self._upstream is not None:
+            await self._upstream.close()
+        self._upstream = None
+        await self._runner.cleanup()
+        self._runner = None
+
+    async def __aenter__(self) -> "ReplayServer":
+        """Start the server"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop the server"""
+        await self.close()
+
+
+__all__ = [
+    "Exchange",
+    "Recording",
+    "ReplayResponse",
+    "ReplayServer",
+    "SECRET_PARAMS",
+]
@@ -28,11 +28,11 @@ from datetime import datetime
 from enum import Enum
 from typing import Literal
 
-import aiohttp
 import defusedxml.ElementTree as ET
 from fake_useragent import FakeUserAgent
 
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 
 user_agent = FakeUserAgent(browsers=['chrome', 'firefox', "opera"]).random
 
@@ -97,7 +97,7 @@ class MyAnimeListRss:
 
     async def __aenter__(self):
         """Create a new session"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": self.user_agent})
         return self
 
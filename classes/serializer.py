@@ -0,0 +1,226 @@
+"""
+Binary encoding of cache payloads
+
+Cache entries used to be stored as JSON text, so reading a large payload,
+such as a full Jikan anime or the whole usrbg list, meant parsing the whole
+text blob. `Serializer` encodes payloads with MessagePack when `msgpack` is
+installed, falling back to compact JSON, and compresses payloads above a
+size threshold with zstd when `zstandard` is installed, falling back to
+zlib.
+
+Every encoded payload starts with a short header naming its format version,
+codec and compression, so a payload written by another configuration is
+still decoded, and anything without the header is read as legacy JSON text.
+"""
+
+import json
+import zlib
+from typing import Any, Literal
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"RC"
+"""First bytes of every encoded payload"""
+VERSION = 1
+"""Version of the header layout"""
+
+CodecName = Literal["auto", "json", "msgpack"]
+"""Encoding of the payload"""
+CompressionName = Literal["auto", "none", "zlib", "zstd"]
+"""Compression of the encoded payload"""
+
+_CODECS: dict[str, int] = {"json": 0, "msgpack": 1}
+_COMPRESSIONS: dict[str, int] = {"none": 0, "zlib": 1, "zstd": 2}
+
+
+class UnsupportedPayloadError(ValueError):
+    """The payload can't be decoded by this installation"""
+
+
+def available_codecs() -> list[str]:
+    """
+    List the codecs usable in this installation
+
+    Returns:
+        list[str]: Codec names, best first
+    """
+    return (["msgpack"] if msgpack is not None else []) + ["json"]
+
+
+def available_compressions() -> list[str]:
+    """
+    List the compressions usable in this installation
+
+    Returns:
+        list[str]: Compression names, best first
+    """
+    return (["zstd"] if zstandard is not None else []) + ["zlib", "none"]
+
+
+class Serializer:
+    """Encode and decode cache payloads"""
+
+    def __init__(
+        self,
+        codec: CodecName = "auto",
+        compression: CompressionName = "auto",
+        threshold: int = 4096,
+        level: int = 3,
+    ):
+        """
+        Args:
+            codec (CodecName, optional): Encoding of new payloads, "auto" picks the best installed. Defaults to "auto".
+            compression (CompressionName, optional): Compression of new payloads, "auto" picks the best installed. Defaults to "auto".
+            threshold (int, optional): Encoded size in bytes from which payloads are compressed. Defaults to 4096.
+            level (int, optional): Compression level. Defaults to 3.
+
+        Raises:
+            UnsupportedPayloadError: The codec or compression is unknown or not installed
+        """
+        if codec == "auto":
+            codec = available_codecs()[0]  # type: ignore
+        if compression == "auto":
+            compression = available_compressions()[0]  # type: ignore
+        if codec not in available_codecs():
+            raise UnsupportedPayloadError(f"Codec {codec} is not available")
+        if compression not in available_compressions():
+            raise UnsupportedPayloadError(f"Compression {compression} is not available")
+        self.codec = codec
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+
+    @staticmethod
+    def _encode(codec: str, data: Any) -> bytes:
+        """
+        Encode data with a codec
+
+        Args:
+            codec (str): Codec name
+            data (Any): JSON-compatible data
+
+        Returns:
+            bytes: Encoded data
+        """
+        if codec == "msgpack":
+            return msgpack.packb(data, use_bin_type=True)  # type: ignore
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _decode(codec: int, body: bytes) -> Any:
+        """
+        Decode data with a codec
+
+        Args:
+            codec (int): Codec identifier from the header
+            body (bytes): Encoded data
+
+        Returns:
+            Any: Decoded data
+
+        Raises:
+            UnsupportedPayloadError: The codec is unknown or not installed
+        """
+        if codec == _CODECS["json"]:
+            return json.loads(body)
+        if codec == _CODECS["msgpack"] and msgpack is not None:
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        raise UnsupportedPayloadError(f"Codec {codec} is not available")
+
+    def _compress(self, body: bytes) -> tuple[str, bytes]:
+        """
+        Compress encoded data if it is large enough
+
+        Args:
+            body (bytes): Encoded data
+
+        Returns:
+            tuple[str, bytes]: Compression used, and the possibly compressed data
+        """
+        if self.compression == "none" or len(body) < self.threshold:
+            return "none", body
+        if self.compression == "zstd":
+            packed = zstandard.ZstdCompressor(level=self.level).compress(body)  # type: ignore
+        else:
+            packed = zlib.compress(body, self.level)
+        if len(packed) >= len(body):
+            return "none", body
+        return self.compression, packed
+
+    @staticmethod
+    def _decompress(compression: int, body: bytes) -> bytes:
+        """
+        Decompress encoded data
+
+        Args:
+            compression (int): Compression identifier from the header
+            body (bytes): Possibly compressed data
+
+        Returns:
+            bytes: Encoded data
+
+        Raises:
+            UnsupportedPayloadError: The compression is unknown or not installed
+        """
+        if compression == _COMPRESSIONS["none"]:
+            return body
+        if compression == _COMPRESSIONS["zlib"]:
+            return zlib.decompress(body)
+        if compression == _COMPRESSIONS["zstd"] and zstandard is not None:
+            return zstandard.ZstdDecompressor().decompress(body)
+        raise UnsupportedPayloadError(f"Compression {compression} is not available")
+
+    def dumps(self, data: Any) -> bytes:
+        """
+        Encode a payload
+
+        Args:
+            data (Any): JSON-compatible data
+
+        Returns:
+            bytes: Header followed by the encoded, possibly compressed, data
+        """
+        compression, body = self._compress(self._encode(self.codec, data))
+        header = MAGIC + bytes(
+            (VERSION, _CODECS[self.codec], _COMPRESSIONS[compression]))
+        return header + body
+
+    def loads(self, payload: bytes | str) -> Any:
+        """
+        Decode a payload written by any configuration, or legacy JSON text
+
+        Args:
+            payload (bytes | str): Encoded payload
+
+        Returns:
+            Any: Decoded data
+
+        Raises:
+            UnsupportedPayloadError: The payload needs a newer header version, or a codec or compression that is not installed
+        """
+        if isinstance(payload, str):
+            return json.loads(payload)
+        if not payload.startswith(MAGIC):
+            return json.loads(payload)
+        if len(payload) < 5:
+            raise UnsupportedPayloadError("Payload header is truncated")
+        version, codec, compression = payload[2:5]
+        if version != VERSION:
+            raise UnsupportedPayloadError(f"Payload version {version} is not supported")
+        return self._decode(codec, self._decompress(compression, payload[5:]))
+
+
+__all__ = [
+    "Serializer",
+    "UnsupportedPayloadError",
+    "available_codecs",
+    "available_compressions",
+]
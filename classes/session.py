@@ -0,0 +1,131 @@
+"""
+Shared HTTP connection pool for provider wrappers
+
+The bot starts a single `SessionManager` on startup. Every wrapper then
+builds its lightweight `ClientSession` on top of the shared connector, so
+TCP+TLS connections, keep-alive and the DNS cache survive across commands
+instead of being torn down with each wrapper. Every session is also paced by
+the shared rate limiter of `classes.ratelimit`, which retries throttled
+requests once, and its requests are timed by `classes.metrics` and traced by
+`classes.tracing`. While a
+`classes.replay.ReplayServer` is active, requests are sent to it instead.
+
+Outside the bot (scripts, tests), or before the manager is started,
+`create_session` falls back to a standalone session owning its connector.
+"""
+
+import asyncio
+from typing import Any
+
+from aiohttp import ClientRequest, ClientSession, ClientTimeout, TCPConnector
+
+from classes.metrics import metrics
+from classes.ratelimit import rate_limiter
+from classes.tracing import tracer
+
+
+class SessionManager:
+    """Bot-wide owner of the shared aiohttp connector"""
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 8,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        timeout: ClientTimeout | None = None,
+    ):
+        """
+        Args:
+            limit (int, optional): Maximum number of simultaneous connections. Defaults to 100.
+            limit_per_host (int, optional): Maximum number of simultaneous connections to a single host. Defaults to 8.
+            dns_cache_ttl (int, optional): Time in seconds DNS lookups are cached. Defaults to 300.
+            keepalive_timeout (float, optional): Time in seconds idle connections are kept open. Defaults to 30.
+            timeout (ClientTimeout | None, optional): Default request timeout. Defaults to 60s total, 10s to connect.
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout or ClientTimeout(
+            total=60, connect=10, sock_read=30)
+        self.connector: TCPConnector | None = None
+        self.request_class: type[ClientRequest] | None = None
+        """Request class of new sessions, set to reroute their requests"""
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        """Create the shared connector on the running event loop"""
+        if self.started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.connector = TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+
+    async def close(self) -> None:
+        """Close the shared connector and every pooled connection"""
+        if self.connector is not None:
+            await self.connector.close()
+        self.connector = None
+        self._loop = None
+
+    @property
+    def started(self) -> bool:
+        """Whether the shared connector can be borrowed from the running loop"""
+        if self.connector is None or self.connector.closed:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def create_session(self, **kwargs: Any) -> ClientSession:
+        """
+        Create a session borrowing the shared connector
+
+        Args:
+            **kwargs: Keyword arguments passed to `aiohttp.ClientSession`, such as headers
+
+        Returns:
+            ClientSession: The session, closing it leaves the shared connector open
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        trace_configs = list(kwargs.pop("trace_configs", None) or [])
+        trace_configs.append(rate_limiter.trace_config())
+        # After the limiter, so its wait is not counted as provider latency
+        trace_configs.append(metrics.trace_config())
+        trace_configs.append(tracer.trace_config())
+        kwargs["trace_configs"] = trace_configs
+        kwargs["middlewares"] = (
+            *kwargs.pop("middlewares", ()), rate_limiter.retry_middleware)
+        if self.request_class is not None:
+            kwargs.setdefault("request_class", self.request_class)
+        if self.started:
+            return ClientSession(
+                connector=self.connector, connector_owner=False, **kwargs
+            )
+        return ClientSession(**kwargs)
+
+
+session_manager = SessionManager()
+"""Connection pool shared by every provider wrapper, started in main.py"""
+
+
+def create_session(**kwargs: Any) -> ClientSession:
+    """
+    Create a session on the bot-wide connection pool
+
+    Args:
+        **kwargs: Keyword arguments passed to `aiohttp.ClientSession`, such as headers
+
+    Returns:
+        ClientSession: The session
+    """
+    return session_manager.create_session(**kwargs)
+
+
+__all__ = ["SessionManager", "create_session", "session_manager"]
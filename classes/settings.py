@@ -0,0 +1,337 @@
+"""
+In-memory index of member and server settings
+
+`database/member.csv` and `database/server.csv` are loaded once into dicts
+keyed by snowflake, so resolving the language of a command is a couple of
+dict lookups instead of parsing both files with pandas. Changes are written
+through to disk, and the files are reloaded when they are modified by
+something else, such as a maintainer editing them by hand.
+
+Members who opted in to auto-embed are kept in a set loaded at startup, as
+it is checked for every message the bot can see.
+"""
+
+import csv
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Iterable
+
+from modules.const import LANGUAGE_CODE
+
+
+def _write_rows(path: str, header: list[str], rows: Iterable[Iterable[Any]]) -> None:
+    """
+    Write a tab-separated file atomically
+
+    Args:
+        path (str): Path to the file
+        header (list[str]): Column names
+        rows (Iterable[Iterable[Any]]): Rows to write
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file, delimiter="\t", lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SettingsFile:
+    """Two-column tab-separated settings file, mirrored in a dict"""
+
+    def __init__(self, path: str, key_column: str):
+        """
+        Args:
+            path (str): Path to the settings file
+            key_column (str): Name of the snowflake column, used when creating the file
+        """
+        self.path = path
+        self.key_column = key_column
+        self.values: dict[int, str] = {}
+        self._mtime: float | None = None
+
+    def _stat(self) -> float | None:
+        """
+        Get the modification time of the file
+
+        Returns:
+            float | None: Modification time, or None if the file doesn't exist
+        """
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> None:
+        """Read the file into memory"""
+        values: dict[int, str] = {}
+        mtime = self._stat()
+        if mtime is not None:
+            with open(self.path, "r", encoding="utf-8", newline="") as file:
+                reader = csv.reader(file, delimiter="\t")
+                header = next(reader, None)
+                if header is not None and header[0] != self.key_column:
+                    # Older versions wrote the server file with another key name
+                    self.key_column = header[0]
+                for row in reader:
+                    if len(row) >= 2 and row[0].strip().isdigit() and row[1]:
+                        values[int(row[0])] = row[1]
+        self.values = values
+        self._mtime = mtime
+
+    def is_stale(self) -> bool:
+        """
+        Check if the file changed on disk since it was loaded
+
+        Returns:
+            bool: Whether the file should be reloaded
+        """
+        return self._stat() != self._mtime
+
+    def save(self) -> None:
+        """Write the dict back to the file atomically"""
+        _write_rows(self.path, [self.key_column, "language"], self.values.items())
+        self._mtime = self._stat()
+
+
+class LanguageSettings:
+    """Resolve language preferences of members and servers"""
+
+    def __init__(
+        self,
+        member_path: str = "database/member.csv",
+        server_path: str = "database/server.csv",
+        check_interval: float = 5.0,
+    ):
+        """
+        Args:
+            member_path (str, optional): Path to the member settings. Defaults to "database/member.csv".
+            server_path (str, optional): Path to the server settings. Defaults to "database/server.csv".
+            check_interval (float, optional): Minimum time between checks for changes on disk, in seconds. Defaults to 5.0.
+        """
+        self.members = SettingsFile(member_path, "discordId")
+        self.servers = SettingsFile(server_path, "guildId")
+        self.check_interval = check_interval
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """Load the files on first use, and reload them if they changed on disk"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            for settings in (self.members, self.servers):
+                if self._checked_at is None or settings.is_stale():
+                    settings.load()
+            self._checked_at = now
+
+    def reload(self) -> None:
+        """Force reading both files again"""
+        with self._lock:
+            self.members.load()
+            self.servers.load()
+            self._checked_at = time.monotonic()
+
+    def get_member(self, user_id: int) -> str | None:
+        """
+        Get the language preference of a member
+
+        Args:
+            user_id (int): Discord ID of the member
+
+        Returns:
+            str | None: Language code, or None if not set
+        """
+        self._refresh()
+        return self.members.values.get(int(user_id))
+
+    def get_server(self, guild_id: int) -> str | None:
+        """
+        Get the language preference of a server
+
+        Args:
+            guild_id (int): Discord ID of the server
+
+        Returns:
+            str | None: Language code, or None if not set
+        """
+        self._refresh()
+        return self.servers.values.get(int(guild_id))
+
+    def resolve(self, user_id: int | None, guild_id: int | None = None) -> str:
+        """
+        Resolve the language to use, from member, then server, then bot default
+
+        Args:
+            user_id (int | None): Discord ID of the member
+            guild_id (int | None, optional): Discord ID of the server. Defaults to None.
+
+        Returns:
+            str: Language code
+        """
+        self._refresh()
+        if user_id is not None and (code := self.members.values.get(int(user_id))):
+            return code
+        if guild_id is not None and (code := self.servers.values.get(int(guild_id))):
+            return code
+        return LANGUAGE_CODE
+
+    def set_member(self, user_id: int, code: str) -> None:
+        """
+        Set the language preference of a member, and save it to disk
+
+        Args:
+            user_id (int): Discord ID of the member
+            code (str): Language code
+        """
+        self._refresh()
+        with self._lock:
+            self.members.values[int(user_id)] = code
+            self.members.save()
+
+    def set_server(self, guild_id: int, code: str) -> None:
+        """
+        Set the language preference of a server, and save it to disk
+
+        Args:
+            guild_id (int): Discord ID of the server
+            code (str): Language code
+        """
+        self._refresh()
+        with self._lock:
+            self.servers.values[int(guild_id)] = code
+            self.servers.save()
+
+    def drop_member(self, user_id: int) -> bool:
+        """
+        Remove the settings of a member, and save it to disk
+
+        Args:
+            user_id (int): Discord ID of the member
+
+        Returns:
+            bool: True if the member had settings, False if not
+        """
+        self._refresh()
+        with self._lock:
+            if self.members.values.pop(int(user_id), None) is None:
+                return False
+            self.members.save()
+            return True
+
+
+class MemberAllowlist:
+    """Members who opted in to a feature, kept in memory and saved to a file"""
+
+    def __init__(self, path: str, legacy_directory: str | None = None):
+        """
+        Args:
+            path (str): Path to the allowlist, one Discord ID per row
+            legacy_directory (str | None, optional): Directory holding one empty file per member, imported if the allowlist doesn't exist yet. Defaults to None.
+        """
+        self.path = path
+        self.legacy_directory = legacy_directory
+        self.members: set[int] = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read the allowlist into memory"""
+        members: set[int] = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8", newline="") as file:
+                reader = csv.reader(file, delimiter="\t")
+                next(reader, None)
+                members = {int(row[0]) for row in reader if row and row[0].strip().isdigit()}
+            self.members = members
+            self._loaded = True
+            return
+        if self.legacy_directory is not None and os.path.isdir(self.legacy_directory):
+            members = {int(name) for name in os.listdir(self.legacy_directory) if name.isdigit()}
+        with self._lock:
+            self.members = members
+            self._loaded = True
+            if members:
+                self.save()
+
+    def save(self) -> None:
+        """Write the allowlist to the file atomically"""
+        _write_rows(self.path, ["discordId"], ([member] for member in sorted(self.members)))
+
+    def __contains__(self, user_id: object) -> bool:
+        """
+        Check if a member opted in, without touching the disk once loaded
+
+        Args:
+            user_id (object): Discord ID of the member
+
+        Returns:
+            bool: Whether the member opted in
+        """
+        if not self._loaded:
+            self.load()
+        return user_id in self.members
+
+    def add(self, user_id: int) -> bool:
+        """
+        Opt a member in, and save it to disk
+
+        Args:
+            user_id (int): Discord ID of the member
+
+        Returns:
+            bool: True if the member was added, False if already allowed
+        """
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            if int(user_id) in self.members:
+                return False
+            self.members.add(int(user_id))
+            self.save()
+            return True
+
+    def discard(self, user_id: int) -> bool:
+        """
+        Opt a member out, and save it to disk
+
+        Args:
+            user_id (int): Discord ID of the member
+
+        Returns:
+            bool: True if the member was removed, False if not allowed
+        """
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            if int(user_id) not in self.members:
+                return False
+            self.members.discard(int(user_id))
+            self.save()
+            return True
+
+
+language_settings = LanguageSettings()
+"""Language settings shared by every command"""
+
+autoembed_allowlist = MemberAllowlist(
+    "database/autoembed.csv", legacy_directory="database/allowlist_autoembed")
+"""Members who enabled auto-embed of supported links"""
+
+
+__all__ = [
+    "LanguageSettings",
+    "MemberAllowlist",
+    "SettingsFile",
+    "autoembed_allowlist",
+    "language_settings",
+]
@@ -3,10 +3,9 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import Literal
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import (SHIKIMORI_APPLICATION_NAME, SHIKIMORI_CLIENT_ID,
                            USER_AGENT)
 
@@ -223,7 +222,7 @@ class Shikimori:
 
     async def __aenter__(self):
         """Async enter"""
-        self.session = aiohttp.ClientSession()
+        self.session = create_session()
         self.headers = {
             "User-Agent": USER_AGENT.replace(
                 "RyuuzakiRyuusei", SHIKIMORI_APPLICATION_NAME
@@ -333,7 +332,7 @@ class Shikimori:
             ShikimoriUserStruct: User information
         """
         cache_file_path = Cache.get_cache_file_path(f"user/{user_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             formatted_data = self._user_dict_to_dataclass(cached_data)
             return formatted_data
@@ -350,6 +349,6 @@ class Shikimori:
             favs,
         )
         data["favourites"] = favourites
-        Cache.write_data_to_cache(data=data, cache_path=cache_file_path)
+        await Cache.awrite_cache(cache_file_path, data)
         user = self._user_dict_to_dataclass(data)
         return user
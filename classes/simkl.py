@@ -5,21 +5,42 @@ This module is a wrapper for Simkl API, which is used to search for anime, shows
 """
 
 from copy import deepcopy
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 from enum import Enum
 from typing import Any, List, Literal
 from urllib.parse import quote
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError, SimklTypeError
+from classes.idgraph import id_graph
+from classes.session import create_session
 from modules.const import SIMKL_CLIENT_ID, USER_AGENT
 
 Cache = Caching("cache/simkl", 86400)
 
-
-@dataclass
+GRAPH_PLATFORMS: dict[str, str] = {
+    "allcin": "allcin",
+    "anfo": "anfo",
+    "anidb": "anidb",
+    "anilist": "anilist",
+    "animeplanet": "animeplanet",
+    "anisearch": "anisearch",
+    "ann": "ann",
+    "hulu": "hulu",
+    "imdb": "imdb",
+    "kitsu": "kitsu",
+    "livechart": "livechart",
+    "mal": "myanimelist",
+    "netflix": "netflix",
+    "offjp": "offjp",
+    "simkl": "simkl",
+    "tmdb": "tmdb",
+    "tvdb": "tvdb",
+}
+"""SIMKL ID fields recorded in the ID graph, and their platform name there"""
+
+
+@dataclass(slots=True, frozen=True)
 class SimklRelations:
     """Simkl Relations dataclass"""
 
@@ -83,6 +104,10 @@ class SimklRelations:
         return asdict(self)
 
 
+RELATION_FIELDS: tuple[str, ...] = tuple(item.name for item in fields(SimklRelations))
+"""Fields of SimklRelations, in declaration order"""
+
+
 class SimklMediaGenre(Enum):
     """Simkl Media Genre enum"""
 
@@ -246,7 +271,7 @@ class Simkl:
                 "Unauthorized, please fill Client ID before using this module", 401)
         self.base_url = "https://api.simkl.com"
         self.params = {"client_id": self.client_id}
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": USER_AGENT})
 
     async def __aenter__(self):
@@ -379,7 +404,7 @@ class Simkl:
             dict: Response from Simkl API
         """
         cache_file_path = Cache.get_cache_file_path(f"show/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         params = deepcopy(self.params)
@@ -389,7 +414,7 @@ class Simkl:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, data)
                 return data
             error_message = await response.text()
             raise ProviderHttpError(error_message, response.status)
@@ -409,7 +434,7 @@ class Simkl:
             dict: Response from Simkl API
         """
         cache_file_path = Cache.get_cache_file_path(f"movie/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         params = deepcopy(self.params)
@@ -419,7 +444,7 @@ class Simkl:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, data)
                 return data
             error_message = await response.text()
             raise ProviderHttpError(error_message, response.status)
@@ -439,7 +464,7 @@ class Simkl:
             dict: Response from Simkl API
         """
         cache_file_path = Cache.get_cache_file_path(f"anime/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         params = deepcopy(self.params)
@@ -449,7 +474,7 @@ class Simkl:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, data)
                 return data
             error_message = await response.text()
             raise ProviderHttpError(error_message, response.status)
@@ -546,47 +571,15 @@ class Simkl:
             media_type = media_type.value
         cache_file_path = Cache.get_cache_file_path(
             f"ids/{media_type}/{media_id}.json")
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_model(cache_file_path, self._to_relations)
         if cached_data is not None:
-            cached_data = SimklRelations(
-                title=cached_data["title"],
-                slug=cached_data["slug"],
-                poster=cached_data["poster"],
-                fanart=cached_data["fanart"],
-                anitype=cached_data["anitype"],
-                type=cached_data["type"],
-                allcin=cached_data["allcin"],
-                anfo=cached_data["anfo"],
-                anidb=cached_data["anidb"],
-                anilist=cached_data["anilist"],
-                animeplanet=cached_data["animeplanet"],
-                anisearch=cached_data["anisearch"],
-                ann=cached_data["ann"],
-                hulu=cached_data["hulu"],
-                imdb=cached_data["imdb"],
-                kitsu=cached_data["kitsu"],
-                livechart=cached_data["livechart"],
-                mal=cached_data["mal"],
-                netflix=cached_data["netflix"],
-                offjp=cached_data["offjp"],
-                simkl=cached_data["simkl"],
-                tmdb=cached_data["tmdb"],
-                tvdb=cached_data["tvdb"],
-                tvdbslug=cached_data["tvdbslug"],
-                tvdbmslug=cached_data["tvdbmslug"],
-                wikien=cached_data["wikien"],
-                wikijp=cached_data["wikijp"],
-            )
             return cached_data
         if media_type == "anime":
-            async with Simkl(self.client_id) as simkl:
-                data = await simkl.get_anime(media_id)
+            data = await self.get_anime(media_id)
         elif media_type == "movie":
-            async with Simkl(self.client_id) as simkl:
-                data = await simkl.get_movie(media_id)
+            data = await self.get_movie(media_id)
         elif media_type == "tv":
-            async with Simkl(self.client_id) as simkl:
-                data = await simkl.get_show(media_id)
+            data = await self.get_show(media_id)
         else:
             raise SimklTypeError(
                 "You've might entered false media_type", SimklMediaTypes
@@ -617,37 +610,29 @@ class Simkl:
                 mids["anitype"] = data.get(key, None)
                 continue
             mids[key] = data.get(key, None)
-        Cache.write_data_to_cache(mids, cache_file_path)
-        relations = SimklRelations(
-            title=mids["title"],
-            slug=mids["slug"],
-            poster=mids["poster"],
-            fanart=mids["fanart"],
-            anitype=mids["anitype"],
-            type=mids["type"],
-            allcin=mids["allcin"],
-            anfo=mids["anfo"],
-            anidb=mids["anidb"],
-            anilist=mids["anilist"],
-            animeplanet=mids["animeplanet"],
-            anisearch=mids["anisearch"],
-            ann=mids["ann"],
-            hulu=mids["hulu"],
-            imdb=mids["imdb"],
-            kitsu=mids["kitsu"],
-            livechart=mids["livechart"],
-            mal=mids["mal"],
-            netflix=mids["netflix"],
-            offjp=mids["offjp"],
-            simkl=mids["simkl"],
-            tmdb=mids["tmdb"],
-            tvdb=mids["tvdb"],
-            tvdbmslug=mids["tvdbmslug"],
-            tvdbslug=mids["tvdbslug"],
-            wikien=mids["wikien"],
-            wikijp=mids["wikijp"],
-        )
+        relations = await Cache.awrite_model(
+            cache_file_path, mids, self._to_relations)
+        kind = {"anime": "anime", "movie": "movie"}.get(media_type, "show")
+        id_graph.record(kind, "simkl", {
+            platform: mids.get(field)
+            for field, platform in GRAPH_PLATFORMS.items()
+            # TMDB IDs of anime may be either movies or shows
+            if not (kind == "anime" and platform == "tmdb")
+        })
         return relations
 
+    @staticmethod
+    def _to_relations(data: dict[str, Any]) -> SimklRelations:
+        """
+        Convert cached IDs to dataclass
+
+        Args:
+            data (dict[str, Any]): IDs of the title, keyed by field name
+
+        Returns:
+            SimklRelations: IDs dataclass
+        """
+        return SimklRelations(**{name: data.get(name) for name in RELATION_FIELDS})
+
 
 __all__ = ["Simkl"]
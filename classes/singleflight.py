@@ -0,0 +1,136 @@
+"""
+Request coalescing (single-flight) for provider lookups
+
+When several coroutines ask for the same (provider, endpoint, id) at once,
+only the first one goes upstream; the others await its result instead of
+firing identical requests against rate-limited APIs. The counters are
+exported through `classes.metrics`.
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from classes.metrics import metrics
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters of a single-flight group, per provider"""
+
+    hits: int = 0
+    """Lookups answered by the cache, without going upstream"""
+    misses: int = 0
+    """Lookups that went upstream"""
+    coalesced: int = 0
+    """Lookups that awaited an identical in-flight upstream request"""
+
+
+class _LeaderCancelled(Exception):
+    """The caller running a flight was cancelled, a follower must take over"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing the same key into a single call"""
+
+    def __init__(self):
+        """Initialize the group"""
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._stats: dict[str, SingleFlightStats] = {}
+
+    def _stats_for(self, key: Hashable) -> tuple[str, SingleFlightStats]:
+        """
+        Get the counters of the provider owning a key
+
+        Args:
+            key (Hashable): The flight key, its first item is the provider name
+
+        Returns:
+            tuple[str, SingleFlightStats]: The provider name and its counters
+        """
+        provider = str(key[0]) if isinstance(key, tuple) else str(key)
+        return provider, self._stats.setdefault(provider, SingleFlightStats())
+
+    async def do(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[T]],
+        lookup: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> T:
+        """
+        Run fetch once for every concurrent caller sharing the same key
+
+        Args:
+            key (Hashable): The flight key, usually (provider, endpoint, id)
+            fetch (Callable[[], Awaitable[T]]): Coroutine factory going upstream
+            lookup (Callable[[], Awaitable[T | None]] | None, optional): Coroutine factory reading the cache, a non-None result skips fetch. Defaults to None.
+
+        Returns:
+            T: The result of lookup or fetch, shared between coalesced callers
+        """
+        provider, stats = self._stats_for(key)
+        if lookup is not None:
+            cached = await lookup()
+            if cached is not None:
+                stats.hits += 1
+                metrics.flight_lookups.labels(provider, "hit").inc()
+                return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            stats.coalesced += 1
+            metrics.flight_lookups.labels(provider, "coalesced").inc()
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # Only the leader was cancelled: join whoever took over, or lead
+                future = self._inflight.get(key)
+
+        stats.misses += 1
+        metrics.flight_lookups.labels(provider, "miss").inc()
+        in_flight = metrics.flights_in_flight.labels()
+        in_flight.inc()
+        future = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved, even if nobody joined the flight
+        future.add_done_callback(
+            lambda fut: fut.cancelled() or fut.exception())
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+            in_flight.dec()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of upstream requests currently in flight"""
+        return len(self._inflight)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Get a snapshot of the counters, for monitoring
+
+        Returns:
+            dict[str, dict[str, int]]: Counters keyed by provider name
+        """
+        return {provider: asdict(stats)
+                for provider, stats in self._stats.items()}
+
+
+flights = SingleFlight()
+"""Single-flight group shared by every provider wrapper"""
+
+
+__all__ = ["SingleFlight", "SingleFlightStats", "flights"]
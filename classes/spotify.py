@@ -4,10 +4,9 @@ import base64 as b64
 from enum import Enum
 from typing import List, Union
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.session import create_session
 from modules.const import SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, USER_AGENT
 
 Cache = Caching("cache/spotify", 1209600)
@@ -36,7 +35,7 @@ class SpotifyApi:
 
     async def __aenter__(self):
         """Enter the session"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": USER_AGENT})
         return self
 
@@ -51,7 +50,7 @@ class SpotifyApi:
     async def authorize_client(self):
         """Authorize client without requiring user resource access"""
         auth = Cache.get_cache_file_path("auth.json")
-        cached = Cache.read_cached_data(auth, 3600)
+        cached = await Cache.aread_cache(auth, 3600)
         if cached is not None:
             self.token = cached["access_token"]
         basic = b64.b64encode(
@@ -65,7 +64,7 @@ class SpotifyApi:
             if response.status == 200:
                 data = await response.json()
                 self.token = data["access_token"]
-                Cache.write_data_to_cache(data, auth)
+                await Cache.awrite_cache(auth, data)
             else:
                 raise ProviderHttpError(response.reason, response.status)
 
@@ -127,7 +126,7 @@ class SpotifyApi:
         """
         await self.authorize_client()
         cache = Cache.get_cache_file_path(f"tracks/{track_id}.json")
-        cached = Cache.read_cached_data(cache)
+        cached = await Cache.aread_cache(cache)
         if cached is not None:
             return cached
         async with self.session.get(
@@ -136,7 +135,7 @@ class SpotifyApi:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache)
+                await Cache.awrite_cache(cache, data)
                 return data
             raise ProviderHttpError(response.reason, response.status)
 
@@ -152,7 +151,7 @@ class SpotifyApi:
         """
         await self.authorize_client()
         cache = Cache.get_cache_file_path(f"albums/{album_id}.json")
-        cached = Cache.read_cached_data(cache)
+        cached = await Cache.aread_cache(cache)
         if cached is not None:
             return cached
         async with self.session.get(
@@ -161,7 +160,7 @@ class SpotifyApi:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache)
+                await Cache.awrite_cache(cache, data)
                 return data
             raise ProviderHttpError(response.reason, response.status)
 
@@ -177,7 +176,7 @@ class SpotifyApi:
         """
         await self.authorize_client()
         cache = Cache.get_cache_file_path(f"artists/{artist_id}.json")
-        cached = Cache.read_cached_data(cache)
+        cached = await Cache.aread_cache(cache)
         if cached is not None:
             return cached
         async with self.session.get(
@@ -186,6 +185,6 @@ class SpotifyApi:
         ) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache)
+                await Cache.awrite_cache(cache, data)
                 return data
             raise ProviderHttpError(response.reason, response.status)
@@ -4,9 +4,9 @@
 A lite wrapper for the top.gg API.
 """
 
-import aiohttp
 
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import BOT_CLIENT_ID, TOPGG_API_TOKEN
 
 
@@ -32,7 +32,7 @@ class TopGG:
 
     async def __aenter__(self):
         """Enter async context"""
-        self.session = aiohttp.ClientSession()
+        self.session = create_session()
         self.headers = {"Authorization": self.token}
         return self
 
@@ -1,9 +1,8 @@
 from dataclasses import dataclass
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
 from modules.const import USER_AGENT
 
 Cache = Caching("cache/thecolorapi", 604800)
@@ -238,7 +237,7 @@ class TheColorApi:
 
     async def __aenter__(self):
         """Create a session if class invoked with `with` statement"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": USER_AGENT})
         return self
 
@@ -294,14 +293,14 @@ class TheColorApi:
             color["hex"] = color["hex"][1:]
         filename = "-".join([f"{k}_{v}" for k, v in color.items()]) + ".json"
         cache_file_path = Cache.get_cache_file_path(filename)
-        cached_data = Cache.read_cached_data(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return self.dict_to_dataclass(cached_data)
 
         async with self.session.get(f"{self.base_url}/id", params=color) as response:
             if response.status == 200:
                 data = await response.json()
-                Cache.write_data_to_cache(data, cache_file_path)
+                await Cache.awrite_cache(cache_file_path, data)
                 return self.dict_to_dataclass(data)
             error_message = await response.text()
             raise ProviderHttpError(error_message, response.status)
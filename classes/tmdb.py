@@ -2,10 +2,9 @@ import json
 from enum import Enum
 from typing import Literal
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderTypeError
+from classes.session import create_session
 from modules.const import TMDB_API_KEY, USER_AGENT
 
 Cache = Caching(cache_directory="cache/tmdb", cache_expiration_time=2592000)
@@ -31,7 +30,7 @@ class TheMovieDb:
 
     async def __aenter__(self):
         """Enter the async context manager"""
-        self.session = aiohttp.ClientSession(
+        self.session = create_session(
             headers={"User-Agent": USER_AGENT})
         return self
 
@@ -68,7 +67,7 @@ class TheMovieDb:
             media_type = media_type.value
         cache_file_path = Cache.get_cache_path(
             f"{media_type}/{media_id}.json")
-        cached_data = Cache.read_cache(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return cached_data
         if media_type in ["tv", "movie"]:
@@ -81,7 +80,7 @@ class TheMovieDb:
                 return False
             jsonText = await resp.text()
             jsonFinal = json.loads(jsonText)
-            Cache.write_cache(cache_file_path, jsonFinal["adult"])
+            await Cache.awrite_cache(cache_file_path, jsonFinal["adult"])
             return jsonFinal["adult"]
 
 
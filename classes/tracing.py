@@ -0,0 +1,471 @@
+"""
+Lightweight span tracing of interactions
+
+A sampled slash command or component callback gets a root span. Provider
+requests, cache reads, HTML parsing, pandas reads and Discord API calls made
+while it runs open child spans, which nest through a context variable, so
+spans opened by tasks the command spawns end up in the same tree.
+
+Finished traces can be exported as JSON lines to a local file or posted to
+a collector. Traces slower than a threshold are printed as a waterfall that
+flags provider calls running one after another, which could often run
+concurrently instead.
+
+Outside a sampled interaction, `span` does nothing beyond reading the
+context variable.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from contextvars import ContextVar, Token
+from types import SimpleNamespace
+from typing import Any, Callable, Literal
+
+from aiohttp import (ClientSession, TraceConfig, TraceRequestEndParams,
+                     TraceRequestExceptionParams, TraceRequestStartParams)
+
+from modules.const import TRACE_EXPORT, TRACE_SAMPLE_RATE, TRACE_SLOW_SECONDS
+
+SpanKind = Literal["root", "io", "cache", "cpu", "discord"]
+"""What a span waits on"""
+
+MAX_SPANS = 512
+"""Spans kept per trace, later ones are dropped"""
+
+
+class Span:
+    """Timed section of a trace"""
+
+    __slots__ = ("trace", "span_id", "parent", "name", "kind", "attributes",
+                 "start", "end", "error")
+
+    def __init__(self, trace: "Trace", parent: "Span | None", name: str,
+                 kind: SpanKind, attributes: dict[str, Any]):
+        """
+        Args:
+            trace (Trace): Trace owning the span
+            parent (Span | None): Enclosing span, None for the root
+            name (str): What the span covers
+            kind (SpanKind): What the span waits on
+            attributes (dict[str, Any]): Extra details, exported as is
+        """
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.error: str | None = None
+
+    def finish(self, error: BaseException | type[BaseException] | None = None) -> None:
+        """
+        Close the span
+
+        Args:
+            error (BaseException | type[BaseException] | None, optional): Error that ended the span. Defaults to None.
+        """
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = error.__name__ if isinstance(error, type) else type(error).__name__
+
+    @property
+    def duration(self) -> float:
+        """Seconds the span lasted, so far if still open"""
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Export the span
+
+        Returns:
+            dict[str, Any]: Span with its start relative to the trace, in seconds
+        """
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start - self.trace.root.start, 6),
+            "duration": round(self.duration, 6),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans of one interaction"""
+
+    def __init__(self, name: str, attributes: dict[str, Any]):
+        """
+        Args:
+            name (str): What the trace covers, such as a command name
+            attributes (dict[str, Any]): Extra details of the root span
+        """
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self.root = self.open(None, name, "root", attributes)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the root span is finished"""
+        return self.root.end is not None
+
+    def open(self, parent: Span | None, name: str, kind: SpanKind,
+             attributes: dict[str, Any]) -> Span:
+        """
+        Start a span
+
+        Args:
+            parent (Span | None): Enclosing span
+            name (str): What the span covers
+            kind (SpanKind): What the span waits on
+            attributes (dict[str, Any]): Extra details
+
+        Returns:
+            Span: The span, not kept if the trace is full
+        """
+        item = Span(self, parent, name, kind, attributes)
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(item)
+        else:
+            self.dropped += 1
+        return item
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Export the trace
+
+        Returns:
+            dict[str, Any]: Trace with every span
+        """
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "started_at": self.started_at,
+            "duration": round(self.root.duration, 6),
+            "dropped": self.dropped,
+            "spans": [item.to_dict() for item in self.spans],
+        }
+
+
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+"""Innermost open span of the running task"""
+
+
+def current_span() -> Span | None:
+    """
+    Get the innermost open span
+
+    Returns:
+        Span | None: The span, or None outside a sampled trace
+    """
+    item = _current.get()
+    if item is None or item.trace.closed:
+        return None
+    return item
+
+
+class span:  # pylint: disable=invalid-name
+    """
+    Time a section as a child of the current span, with `with` or `async with`
+
+    Does nothing outside a sampled trace.
+    """
+
+    __slots__ = ("name", "kind", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, kind: SpanKind = "io", **attributes: Any):
+        """
+        Args:
+            name (str): What the section covers
+            kind (SpanKind, optional): What the section waits on. Defaults to "io".
+            **attributes (Any): Extra details
+        """
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self._span: Span | None = None
+        self._token: Token | None = None
+
+    def __enter__(self) -> Span | None:
+        parent = current_span()
+        if parent is None:
+            return None
+        self._span = parent.trace.open(parent, self.name, self.kind, self.attributes)
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._span is None:
+            return
+        _current.reset(self._token)  # type: ignore
+        self._span.finish(exc_type)
+
+    async def __aenter__(self) -> Span | None:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.__exit__(exc_type, exc_value, traceback)
+
+
+def _label(item: Span, width: int = 48) -> str:
+    """Shorten a span name for the waterfall"""
+    return item.name if len(item.name) <= width else item.name[:width - 1] + "…"
+
+
+def render_waterfall(trace: Trace, width: int = 32) -> str:
+    """
+    Draw a trace as a waterfall
+
+    Provider calls that started only after a sibling call finished are marked
+    as serial, as they may not depend on each other.
+
+    Args:
+        trace (Trace): The trace
+        width (int, optional): Characters of the timeline. Defaults to 32.
+
+    Returns:
+        str: One line per span, in start order
+    """
+    origin = trace.root.start
+    total = max(trace.root.duration, 1e-9)
+    depth: dict[str, int] = {}
+    lines = [f"[Trc] {trace.root.name} took {total * 1000:,.0f} ms "
+             f"(trace {trace.trace_id[:12]}, {len(trace.spans)} spans)"]
+    previous_io: dict[str | None, Span] = {}
+    for item in sorted(trace.spans, key=lambda value: value.start):
+        parent_id = item.parent.span_id if item.parent else None
+        depth[item.span_id] = depth.get(parent_id, -1) + 1 if parent_id else 0
+        offset = item.start - origin
+        begin = int(offset / total * width)
+        length = max(1, int(item.duration / total * width))
+        bar = " " * begin + "█" * min(length, width - begin)
+        note = ""
+        if item.kind == "io":
+            earlier = previous_io.get(parent_id)
+            if earlier is not None and earlier.end is not None and earlier.end <= item.start:
+                note = f"  ← serial after {_label(earlier, 32)}"
+            previous_io[parent_id] = item
+        if item.error:
+            note += f"  ✗ {item.error}"
+        name = "  " * depth[item.span_id] + _label(item)
+        lines.append(
+            f"      {offset * 1000:7,.0f} ms {item.duration * 1000:7,.0f} ms "
+            f"{item.kind:<7} |{bar:<{width}}| {name}{note}")
+    if trace.dropped:
+        lines.append(f"      … {trace.dropped} more spans were dropped")
+    return "\n".join(lines)
+
+
+class FileExporter:
+    """Append finished traces to a JSON lines file"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): File receiving one trace per line
+        """
+        self.path = path
+
+    def _write(self, line: str) -> None:
+        """Append a line to the file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+    async def export(self, trace: Trace) -> None:
+        """
+        Write a trace off the event loop
+
+        Args:
+            trace (Trace): The trace
+        """
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, line)
+
+
+class HttpExporter:
+    """Post finished traces as JSON to a collector"""
+
+    def __init__(self, url: str):
+        """
+        Args:
+            url (str): Collector endpoint
+        """
+        self.url = url
+
+    async def export(self, trace: Trace) -> None:
+        """
+        Post a trace
+
+        Args:
+            trace (Trace): The trace
+        """
+        # Imported here, as sessions are themselves traced by this module
+        from classes.session import \
+            create_session  # pylint: disable=import-outside-toplevel
+        async with create_session() as session:
+            async with session.post(self.url, json=trace.to_dict()) as response:
+                response.raise_for_status()
+
+
+def exporter_for(target: str) -> FileExporter | HttpExporter | None:
+    """
+    Pick the exporter of a target
+
+    Args:
+        target (str): http(s) URL of a collector, path of a file, or empty to disable exports
+
+    Returns:
+        FileExporter | HttpExporter | None: The exporter
+    """
+    if not target:
+        return None
+    if target.startswith(("http://", "https://")):
+        return HttpExporter(target)
+    return FileExporter(target)
+
+
+class Tracer:
+    """Sampler and sink of interaction traces"""
+
+    def __init__(
+        self,
+        sample_rate: float = 0.1,
+        slow_seconds: float = 3.0,
+        exporter: FileExporter | HttpExporter | None = None,
+        printer: Callable[[str], None] = print,
+    ):
+        """
+        Args:
+            sample_rate (float, optional): Share of interactions traced, from 0 to 1. Defaults to 0.1.
+            slow_seconds (float, optional): Duration from which a trace is printed as a waterfall. Defaults to 3.
+            exporter (FileExporter | HttpExporter | None, optional): Sink of every sampled trace. Defaults to None.
+            printer (Callable[[str], None], optional): Output of slow trace waterfalls. Defaults to print.
+        """
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.exporter = exporter
+        self.printer = printer
+        self._trace_config: TraceConfig | None = None
+
+    def start(self, name: str, force: bool = False, **attributes: Any) -> Span | None:
+        """
+        Start a trace in the running task, if it is sampled
+
+        Args:
+            name (str): What the trace covers
+            force (bool, optional): Trace regardless of the sample rate. Defaults to False.
+            **attributes (Any): Extra details of the root span
+
+        Returns:
+            Span | None: The root span, or None if the trace is not sampled
+        """
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        root = Trace(name, attributes).root
+        _current.set(root)
+        return root
+
+    async def finish(self, root: Span, error: BaseException | None = None) -> None:
+        """
+        Close a trace, print it if slow and export it
+
+        Args:
+            root (Span): Root span returned by `start`
+            error (BaseException | None, optional): Error that ended the trace. Defaults to None.
+        """
+        root.finish(error)
+        trace = root.trace
+        if trace.root.duration >= self.slow_seconds:
+            self.printer(render_waterfall(trace))
+        if self.exporter is not None:
+            try:
+                await self.exporter.export(trace)
+            # pylint: disable-next=broad-except
+            except Exception as err:
+                print(f"[Trc] Failed to export trace {trace.trace_id}: {err}")
+
+    @staticmethod
+    async def _on_request_start(
+        _session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ) -> None:
+        """aiohttp hook, opens a span for the request"""
+        parent = current_span()
+        if parent is None:
+            context.span = None
+            return
+        request_ctx = context.trace_request_ctx
+        attributes = {"url": str(params.url)}
+        if isinstance(request_ctx, dict) and "retry" in request_ctx:
+            attributes["retry"] = request_ctx["retry"]
+        context.span = parent.trace.open(
+            parent, f"{params.method} {params.url.host}{params.url.path}", "io", attributes)
+
+    @staticmethod
+    async def _on_request_end(
+        _session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ) -> None:
+        """aiohttp hook, closes the span of the request"""
+        item: Span | None = getattr(context, "span", None)
+        if item is not None:
+            item.attributes["status"] = params.response.status
+            item.finish()
+
+    @staticmethod
+    async def _on_request_exception(
+        _session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ) -> None:
+        """aiohttp hook, closes the span of a request that got no response"""
+        item: Span | None = getattr(context, "span", None)
+        if item is not None:
+            item.finish(params.exception)
+
+    def trace_config(self) -> TraceConfig:
+        """
+        Get the aiohttp trace config opening a span per provider request
+
+        Returns:
+            TraceConfig: The trace config
+        """
+        if self._trace_config is None:
+            trace_config = TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_request_end.append(self._on_request_end)
+            trace_config.on_request_exception.append(self._on_request_exception)
+            self._trace_config = trace_config
+        return self._trace_config
+
+
+tracer = Tracer(TRACE_SAMPLE_RATE, TRACE_SLOW_SECONDS, exporter_for(TRACE_EXPORT))
+"""Tracer shared by the whole bot"""
+
+
+__all__ = [
+    "FileExporter",
+    "HttpExporter",
+    "Span",
+    "Trace",
+    "Tracer",
+    "current_span",
+    "exporter_for",
+    "render_waterfall",
+    "span",
+    "tracer",
+]
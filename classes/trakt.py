@@ -3,16 +3,16 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Literal
 
-import aiohttp
-
 from classes.cache import Caching
 from classes.excepts import ProviderHttpError, ProviderTypeError
+from classes.idgraph import id_graph
+from classes.session import create_session
 from modules.const import USER_AGENT, traktHeader
 
 Cache = Caching("cache/trakt", 86400)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktIdsStruct:
     """Trakt IDs dataclass"""
 
@@ -30,7 +30,7 @@ class TraktIdsStruct:
     """TVRage ID"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktMediaStruct:
     """Trakt Media dataclass"""
 
@@ -42,7 +42,7 @@ class TraktMediaStruct:
     """Media IDs"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktLookupStruct:
     """Trakt Lookup dataclass"""
 
@@ -56,7 +56,7 @@ class TraktLookupStruct:
     """Show data"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktAirStruct:
     """Trakt Air dataclass"""
 
@@ -68,7 +68,7 @@ class TraktAirStruct:
     """Timezone"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktExtendedShowStruct(TraktMediaStruct):
     """Trakt Extended Show dataclass"""
 
@@ -118,7 +118,7 @@ class TraktExtendedShowStruct(TraktMediaStruct):
     """Show aired episodes"""
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TraktExtendedMovieStruct(TraktMediaStruct):
     """Trakt Extended Movie dataclass"""
 
@@ -177,7 +177,7 @@ class Trakt:
         else:
             self.headers = headers
         self.headers["User-Agent"] = USER_AGENT
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.session = create_session(headers=self.headers)
 
     async def __aenter__(self):
         """Enter the async context manager"""
@@ -203,6 +203,23 @@ class Trakt:
         TV = SHOW = SHOWS = ONA = "shows"
         MOVIE = MOVIES = "movies"
 
+    @staticmethod
+    def _record_ids(ids: dict, media_type: Literal["movie", "show"]) -> None:
+        """
+        Record the IDs of a title in the ID graph
+
+        Args:
+            ids (dict): Raw `ids` object of a Trakt title
+            media_type (Literal["movie", "show"]): Type of the title
+        """
+        id_graph.record(media_type, "trakt", {
+            "trakt": ids.get("trakt"),
+            "trakt_slug": ids.get("slug"),
+            "imdb": ids.get("imdb"),
+            "tmdb": ids.get("tmdb"),
+            "tvdb": ids.get("tvdb"),
+        })
+
     @staticmethod
     def ids_dict_to_dataclass(
         data: list[
@@ -287,7 +304,7 @@ class Trakt:
         cache_file_path = Cache.get_cache_path(
             f"lookup/{platform.value}/{media_type.value}/{media_id}.json"
         )
-        cached_data = Cache.read_cache(cache_file_path, 2592000)
+        cached_data = await Cache.aread_cache(cache_file_path, 2592000)
         if cached_data is not None:
             ids = self.ids_dict_to_dataclass(cached_data)
             return ids[0]
@@ -301,7 +318,10 @@ class Trakt:
                 raise ProviderHttpError(resp.text(), resp.status)
             jsonText = await resp.text()
             jsonFinal = json.loads(jsonText)
-        Cache.write_cache(cache_file_path, jsonFinal)
+        await Cache.awrite_cache(cache_file_path, jsonFinal, ttl=2592000)
+        for result in jsonFinal:
+            if result.get(result.get("type")):
+                self._record_ids(result[result["type"]]["ids"], result["type"])
         ids = self.ids_dict_to_dataclass(jsonFinal)
         return ids[0]
 
@@ -323,7 +343,7 @@ class Trakt:
         """
         cache_file_path = Cache.get_cache_path(
             f"{media_type.value}/{media_id}.json")
-        cached_data = Cache.read_cache(cache_file_path)
+        cached_data = await Cache.aread_cache(cache_file_path)
         if cached_data is not None:
             return self.extended_dict_to_dataclass(cached_data, media_type)
         url = f"{self.base_url}{media_type.value}/{media_id}"
@@ -333,7 +353,10 @@ class Trakt:
                 raise ProviderHttpError(resp.text(), resp.status)
             jsonText = await resp.text()
             jsonFinal = json.loads(jsonText)
-        Cache.write_cache(cache_file_path, jsonFinal)
+        await Cache.awrite_cache(cache_file_path, jsonFinal)
+        self._record_ids(
+            jsonFinal.get("ids", {}),
+            "movie" if media_type == self.MediaType.MOVIE else "show")
         return self.extended_dict_to_dataclass(jsonFinal, media_type)
 
 
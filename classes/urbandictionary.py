@@ -3,10 +3,11 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-import aiohttp
 from bs4 import BeautifulSoup
 
 from classes.excepts import ProviderHttpError
+from classes.session import create_session
+from classes.tracing import span
 from modules.const import USER_AGENT
 
 
@@ -47,7 +48,7 @@ class UrbanDictionary:
 
     async def __aenter__(self):
         """Async enter"""
-        self.session = aiohttp.ClientSession()
+        self.session = create_session()
         self.header = {"User-Agent": USER_AGENT}
         return self
 
@@ -120,7 +121,8 @@ class UrbanDictionary:
         Returns:
             BeautifulSoup: Parsed HTML
         """
-        soup = BeautifulSoup(html, "html5lib")
+        with span("parse urbandictionary page", "cpu"):
+            soup = BeautifulSoup(html, "html5lib")
         word_element = soup.find("h1", class_="flex-1")
         if word_element:
             word = word_element.text.strip()
@@ -1,17 +1,34 @@
+"""
+usrbg wrapper
+
+The usrbg dataset lists tens of thousands of banners in a single JSON file.
+It is kept in memory as a dict keyed by Discord ID, so a lookup no longer
+reads and scans the whole list. The dataset is revalidated in the background
+with a conditional GET, so an unchanged file is never downloaded or parsed
+again.
+"""
+
+import asyncio
 import json
+import time
 from dataclasses import dataclass
+from typing import Any
 
-import aiohttp
 from fake_useragent import FakeUserAgent
 from interactions import Snowflake
 
 from classes.cache import Caching
+from classes.session import create_session
+from classes.singleflight import flights
 
 USER_AGENT = FakeUserAgent(browsers=["chrome", "edge", "opera"]).random
 Cache = Caching(cache_directory="cache/usrbg", cache_expiration_time=216000)
 
+RAW_URL = "https://raw.githubusercontent.com/Discord-Custom-Covers/usrbg/master/dist/usrbg.json"
+"""Location of the usrbg dataset"""
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class UserBackgroundStruct:
     """A dataclass to represent user background."""
 
@@ -25,68 +42,172 @@ class UserBackgroundStruct:
     """Image orientation"""
 
 
-class UserBackground:
-    """usrbg wrapper"""
-
-    def __init__(self):
-        """Initialize the UserBackground class."""
-        self.raw_url = "https://raw.githubusercontent.com/Discord-Custom-Covers/usrbg/master/dist/usrbg.json"
-        self.session = None
-        self.headers = None
+def _forget(task: asyncio.Task) -> None:
+    """
+    Mark the outcome of a background refresh as retrieved
 
-    async def __aenter__(self):
-        """Enter the async context manager."""
-        self.headers = {"User-Agent": USER_AGENT}
-        self.session = aiohttp.ClientSession(headers=self.headers)
-        return self
+    Args:
+        task (asyncio.Task): The finished refresh
+    """
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[usrbg] Failed to refresh the dataset: {task.exception()}")
 
-    async def __aexit__(self, exc_type, exc_value, traceback):
-        """Exit the async context manager."""
-        await self.close()
 
-    async def close(self):
-        """Close the aiohttp session."""
-        await self.session.close()
+class UsrbgIndex:
+    """usrbg dataset kept in memory, keyed by Discord ID"""
 
-    async def _fetch_background(self) -> dict:
+    def __init__(
+        self,
+        url: str = RAW_URL,
+        cache_name: str = "usrbg.json",
+        refresh_interval: float = 21600.0,
+    ):
+        """
+        Args:
+            url (str, optional): Location of the dataset. Defaults to RAW_URL.
+            cache_name (str, optional): Name of the cache entry holding the dataset. Defaults to "usrbg.json".
+            refresh_interval (float, optional): Seconds between revalidations of the dataset. Defaults to 6 hours.
+        """
+        self.url = url
+        self.cache_path = Cache.get_cache_path(cache_name)
+        self.refresh_interval = refresh_interval
+        self.entries: dict[str, tuple[str, str, str]] = {}
+        """Entry ID, image URL and orientation, keyed by Discord ID"""
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.loaded = False
+        self._checked_at: float | None = None
+        self._refresh: asyncio.Task | None = None
+
+    def load(self, dataset: dict[str, Any] | list[dict[str, Any]]) -> None:
         """
-        Fetch the background from the GitHub repository.
+        Replace the index with a dataset
 
-        Returns:
-            dict: The background data.
+        Args:
+            dataset (dict[str, Any] | list[dict[str, Any]]): Cached dataset with its validators, or a bare list of entries
         """
-        print("Fetching usrbg from GitHub...")
-        async with self.session.get(self.raw_url) as response:
-            resp = await response.text()
-            data = json.loads(resp)
-            return data
-
-    @staticmethod
-    async def _find_user(user_id: Snowflake, data: dict) -> UserBackgroundStruct | None:
+        if isinstance(dataset, list):
+            dataset = {"entries": dataset}
+        self.entries = {
+            str(item["uid"]): (item["_id"], item["img"], item["orientation"])
+            for item in dataset.get("entries") or []
+            if item.get("uid") and item.get("img")
+        }
+        self.etag = dataset.get("etag")
+        self.last_modified = dataset.get("last_modified")
+        self.loaded = True
+
+    def lookup(self, user_id: Snowflake | int | str) -> UserBackgroundStruct | None:
         """
-        Find user on the dict, then return datastruct
+        Find the banner of a user in memory
 
         Args:
-            user_id (Snowflake): User's Discord ID
-            data: usrbg's dict
+            user_id (Snowflake | int | str): User's Discord ID
 
-        Return:
-            UserBackgroundStruct: Datastruct
-            None: If user can't be found
+        Returns:
+            UserBackgroundStruct | None: The banner, or None if the user has none
         """
-        # Find user
-        user = next(
-            (item for item in data if item["uid"] == str(user_id)),
-            None)
-        if user is None:
+        entry = self.entries.get(str(user_id))
+        if entry is None:
             return None
-        # Create datastruct
         return UserBackgroundStruct(
-            _id=user["_id"],
-            uid=user["uid"],
-            img=user["img"],
-            orientation=user["orientation"],
-        )
+            _id=entry[0], uid=str(user_id), img=entry[1], orientation=entry[2])
+
+    async def revalidate(self) -> bool:
+        """
+        Download the dataset if it changed since it was loaded
+
+        Returns:
+            bool: Whether a new dataset was loaded
+        """
+        headers = {"User-Agent": USER_AGENT}
+        if self.loaded and self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.loaded and self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        self._checked_at = time.monotonic()
+        async with create_session(headers=headers) as session:
+            async with session.get(self.url) as response:
+                if response.status == 304:
+                    return False
+                response.raise_for_status()
+                body = await response.read()
+                entries = await asyncio.get_running_loop().run_in_executor(
+                    None, json.loads, body)
+                dataset = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "entries": entries,
+                }
+        print("[usrbg] Loaded a new dataset from GitHub")
+        # Revalidated instead of expired, so the sweeper must keep it
+        await Cache.awrite_cache(self.cache_path, dataset, ttl=float("inf"))
+        self.load(dataset)
+        return True
+
+    async def _restore(self) -> None:
+        """Load the cached dataset, or download it if there is none"""
+        if self.loaded:
+            return
+        # The cached copy is revalidated instead of expired
+        dataset = await Cache.aread_cache(self.cache_path, float("inf"))
+        if dataset:
+            self.load(dataset)
+            # Changes made while the bot was offline are checked right away
+            self._checked_at = None
+        else:
+            await self.revalidate()
+
+    async def ensure(self) -> None:
+        """Load the index on first use, and revalidate it in the background once stale"""
+        if not self.loaded:
+            await flights.do(("usrbg", "dataset"), self._restore)
+        stale = self._checked_at is None \
+            or time.monotonic() - self._checked_at >= self.refresh_interval
+        if stale and (self._refresh is None or self._refresh.done()):
+            self._refresh = asyncio.get_running_loop().create_task(self.revalidate())
+            self._refresh.add_done_callback(_forget)
+
+    async def get(self, user_id: Snowflake | int | str) -> UserBackgroundStruct | None:
+        """
+        Get the banner of a user
+
+        Args:
+            user_id (Snowflake | int | str): User's Discord ID
+
+        Returns:
+            UserBackgroundStruct | None: The banner, or None if the user has none
+        """
+        await self.ensure()
+        return self.lookup(user_id)
+
+
+usrbg_index = UsrbgIndex()
+"""usrbg dataset shared by every lookup"""
+
+
+class UserBackground:
+    """usrbg wrapper"""
+
+    def __init__(self, index: UsrbgIndex = usrbg_index):
+        """
+        Initialize the UserBackground class.
+
+        Args:
+            index (UsrbgIndex, optional): Dataset to look banners up in. Defaults to the shared index.
+        """
+        self.index = index
+
+    async def __aenter__(self):
+        """Enter the async context manager."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Exit the async context manager."""
+        await self.close()
+
+    async def close(self):
+        """Nothing to release, the dataset is shared"""
 
     async def get_background(self, user_id: Snowflake) -> UserBackgroundStruct | None:
         """
@@ -99,14 +220,7 @@ class UserBackground:
             UserBackgroundStruct: The user background.
             None: If user can't be found
         """
-        # Get cache path
-        cache_path = Cache.get_cache_path("usrbg.json")
-        # Read cache
-        data = Cache.read_cache(cache_path)
-        # If cache is expired, fetch from GitHub
-        if data is None:
-            data = await self._fetch_background()
-            Cache.write_cache(cache_path, data)
-        # Find user
-        user = await self._find_user(user_id, data)
-        return user
+        return await self.index.get(user_id)
+
+
+__all__ = ["UserBackground", "UserBackgroundStruct", "UsrbgIndex", "usrbg_index"]
@@ -282,10 +282,11 @@ Use `/platform link` to link, or `/profile anilist anilist_username:<anilist_use
                 ani_fav_list = ""
                 if ani_favs:
                     for index, fav in enumerate(ani_favs):
-                        if len(fav.title.romaji) >= 100:
-                            fav.title.romaji = fav.title.romaji[:97] + "..."
+                        fav_title = fav.title.romaji
+                        if len(fav_title) >= 100:
+                            fav_title = fav_title[:97] + "..."
                         ani_fav_list += (
-                            f"{index + 1}. [{fav.title.romaji}]({fav.siteUrl})\n"
+                            f"{index + 1}. [{fav_title}]({fav.siteUrl})\n"
                         )
                 embed.add_field(
                     name="🌟 Top 5 Favorite Anime",
@@ -316,10 +317,11 @@ Use `/platform link` to link, or `/profile anilist anilist_username:<anilist_use
                 manga_fav_list = ""
                 if manga_favs:
                     for index, fav in enumerate(manga_favs):
-                        if len(fav.title.romaji) >= 100:
-                            fav.title.romaji = fav.title.romaji[:97] + "..."
+                        fav_title = fav.title.romaji
+                        if len(fav_title) >= 100:
+                            fav_title = fav_title[:97] + "..."
                         manga_fav_list += (
-                            f"{index + 1}. [{fav.title.romaji}]({fav.siteUrl})\n"
+                            f"{index + 1}. [{fav_title}]({fav.siteUrl})\n"
                         )
                 embed.add_field(
                     name="🌟 Top 5 Favorite Manga",
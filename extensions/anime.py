@@ -2,6 +2,7 @@ from typing import Any, Literal
 
 import interactions as ipy
 
+from classes.randompick import random_anime
 from modules.anilist import search_al_anime
 from modules.commons import (generate_search_embed, sanitize_markdown,
                              save_traceback_to_file)
@@ -14,6 +15,11 @@ from modules.myanimelist import (lookup_random_anime, mal_submit,
 class Anime(ipy.Extension):
     """Anime commands"""
 
+    def __init__(self, bot: ipy.Client | ipy.AutoShardedClient):
+        """Load the random anime pool before the first pick."""
+        self.bot = bot
+        random_anime.preload()
+
     anime_head = ipy.SlashCommand(
         name="anime",
         description="Get anime information from MyAnimeList via Jikan and AniList",
@@ -1,4 +1,3 @@
-import csv
 import re
 from datetime import datetime as dtime
 from datetime import timezone as tz
@@ -8,9 +7,10 @@ from typing import Any
 import interactions as ipy
 from aiohttp import __version__ as aiohttp_version
 
+from classes.database import UserDatabase
 from modules.const import (AUTHOR_USERNAME, BOT_CLIENT_ID, BOT_SUPPORT_SERVER,
-                           DATABASE_PATH, EMOJI_SUCCESS, USER_AGENT, gittyHash,
-                           gtHsh, ownerUserUrl)
+                           EMOJI_SUCCESS, USER_AGENT, gittyHash, gtHsh,
+                           ownerUserUrl)
 from modules.i18n import fetch_language_data, read_user_language
 
 
@@ -119,9 +119,8 @@ class CommonCommands(ipy.Extension):
             ),
         ]
         readLat_start = pc()
-        with open(DATABASE_PATH, "r", encoding="utf-8") as f:
-            # skipcq: PYL-W0612
-            reader = csv.reader(f, delimiter="\t")  # pyright: ignore
+        async with UserDatabase() as udb:
+            await udb.check_if_registered(ctx.author.id)
         readLat_end = pc()
         fields += [
             ipy.EmbedField(
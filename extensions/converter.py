@@ -8,6 +8,7 @@ from fuzzywuzzy import fuzz
 from classes.converter import Length, Mass, Temperature, Time, Volume
 from classes.excepts import ProviderHttpError
 from classes.exchangerateapi import ExchangeRateAPI, accepted_currencies
+from classes.tracing import span
 from modules.commons import (PlatformErrType, platform_exception_embed,
                              save_traceback_to_file)
 from modules.const import EMOJI_SUCCESS, EMOJI_UNEXPECTED_ERROR
@@ -106,8 +107,9 @@ def search_currency(query: str) -> list[dict[str, str]]:
     Returns:
         list[dict[str, str]]: The list of currencies that match the query
     """
-    currencies = pd.read_csv(
-        "database/supported_currencies.tsv", delimiter="\t")
+    with span("pandas read supported_currencies.tsv", "cpu"):
+        currencies = pd.read_csv(
+            "database/supported_currencies.tsv", delimiter="\t")
     results = []
     for _, currency in currencies.iterrows():
         code_ratio = fuzz.token_set_ratio(query, currency["Currency Code"])
@@ -2,17 +2,107 @@ import re
 from time import time
 
 import interactions as ipy
-from interactions.api.events import CommandError
+from interactions.api.events import (CommandCompletion, CommandError,
+                                     ComponentCompletion, ComponentError)
 
+from classes.metrics import metrics, snowflake_time
+from classes.tracing import Span, span, tracer
 from modules.const import EMOJI_FORBIDDEN
 
+_ORIGINALS = "_untraced_callbacks"
+"""Client attribute keeping the callbacks as they were before tracing"""
+
 
 class BotEvents(ipy.Extension):
     """Bot events"""
 
+    def __init__(self, bot: ipy.Client | ipy.AutoShardedClient):
+        """Initialize the extension"""
+        self.bot = bot
+        self._failed: set[int] = set()
+        """Interactions whose callback raised, until their completion is recorded"""
+        self._traces: dict[int, Span] = {}
+        """Root spans of sampled interactions, until their completion is recorded"""
+        originals = getattr(bot, _ORIGINALS, None)
+        if originals is None:
+            # Kept on the client, so reloading the extension never wraps twice
+            originals = {
+                "pre_run_callback": bot.pre_run_callback,
+                "request": bot.http.request,
+            }
+            setattr(bot, _ORIGINALS, originals)
+        self._pre_run = originals["pre_run_callback"]
+        """Pre-run callback set before the extension, run after starting a trace"""
+        request = originals["request"]
+
+        async def traced_request(route, *args, **kwargs):
+            async with span(f"discord {route.method} {route.path}", "discord"):
+                return await request(route, *args, **kwargs)
+
+        bot.pre_run_callback = self._start_trace
+        bot.http.request = traced_request
+
+    def drop(self) -> None:
+        """Restore the callbacks wrapped by the extension"""
+        originals = getattr(self.bot, _ORIGINALS, None)
+        if originals is not None:
+            self.bot.pre_run_callback = originals["pre_run_callback"]
+            self.bot.http.request = originals["request"]
+            delattr(self.bot, _ORIGINALS)
+        super().drop()
+
+    async def _start_trace(self, ctx: ipy.BaseContext, **kwargs) -> None:
+        """
+        Start tracing a command or component callback, if sampled
+
+        Runs in the task of the callback, so spans it opens nest under the root.
+
+        Args:
+            ctx (ipy.BaseContext): The context
+        """
+        root = tracer.start(ctx.invoke_target, interaction_id=str(ctx.id))
+        if root is not None:
+            self._traces[int(ctx.id)] = root
+        if self._pre_run:
+            await self._pre_run(ctx, **kwargs)
+
+    async def _observe(self, kind: str, ctx: ipy.BaseContext) -> None:
+        """
+        Record the latency of a finished command or component callback
+
+        Args:
+            kind (str): "command" or "component"
+            ctx (ipy.BaseContext): The context
+        """
+        interaction_id = int(ctx.id)
+        outcome = "error" if interaction_id in self._failed else "ok"
+        self._failed.discard(interaction_id)
+        metrics.commands.labels(kind, ctx.invoke_target, outcome).observe(
+            max(0.0, time() - snowflake_time(interaction_id)))
+        root = self._traces.pop(interaction_id, None)
+        if root is not None:
+            root.attributes["outcome"] = outcome
+            await tracer.finish(root)
+
+    @ipy.listen(CommandCompletion)
+    async def on_command_completion(self, event: CommandCompletion):
+        """Record command latency and trace"""
+        await self._observe("command", event.ctx)
+
+    @ipy.listen(ComponentCompletion)
+    async def on_component_completion(self, event: ComponentCompletion):
+        """Record component callback latency and trace"""
+        await self._observe("component", event.ctx)
+
+    @ipy.listen(ComponentError)
+    async def on_component_error(self, event: ComponentError):
+        """Mark the component callback as failed"""
+        self._failed.add(int(event.ctx.id))
+
     @ipy.listen(disable_default_listeners=True)
     async def on_command_error(self, event: CommandError):
         """Handle command errors"""
+        self._failed.add(int(event.ctx.id))
         if isinstance(event.error, ipy.errors.CommandOnCooldown):
             emoji_id = re.search(r"<a?:\w+:(\d+)>", EMOJI_FORBIDDEN).group(1)
             now = time()
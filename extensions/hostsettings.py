@@ -1,6 +1,7 @@
 import interactions as ipy
 
 from classes.database import UserDatabase
+from classes.metrics import metrics
 from modules.const import AUTHOR_USERID, VERIFICATION_SERVER, VERIFIED_ROLE
 from modules.discord import format_username
 
@@ -18,6 +19,27 @@ class HostSettings(ipy.Extension):
         dm_permission=False,
     )
 
+    @hostsettings_head.subcommand(
+        sub_cmd_name="metrics",
+        sub_cmd_description="Summarize command, provider and cache metrics since the bot started",
+    )
+    async def hostsettings_metrics(self, ctx: ipy.SlashContext):
+        if int(ctx.author.id) != int(AUTHOR_USERID):
+            await ctx.send("This command can only be used by the bot host!", ephemeral=True)
+            return
+        embed = ipy.Embed(
+            title="Metrics",
+            description="Since the bot started. Prometheus can scrape the full metrics locally.",
+            color=0x996422,
+        )
+        for title, lines in metrics.summary().items():
+            embed.add_field(
+                name=title,
+                value="\n".join(lines)[:1024] if lines else "Nothing recorded yet",
+                inline=False,
+            )
+        await ctx.send(embed=embed, ephemeral=True)
+
     member = hostsettings_head.group(
         name="member",
         description="Manage member settings, for self-hosted bot only")
@@ -2,27 +2,35 @@
 Automatically send a media (anime, manga, games, movie, tv) embed info
 to a channel when a message is sent with a link to a supported site.
 """
-import os
 import re
+import time
 from typing import Literal
 
-import aiohttp
 import interactions as ipy
-import regex_spm
 from interactions.api.events import MessageCreate
 
 from classes.anilist import AniList
 from classes.animeapi import AnimeApi
+from classes.excepts import ProviderHttpError
+from classes.idgraph import id_graph
+from classes.kitsu import Kitsu
+from classes.linkrouter import media_links
 from classes.mangadex import Manga, Mangadex
+from classes.metrics import metrics
+from classes.settings import autoembed_allowlist
 from classes.simkl import Simkl
+from classes.tracing import span
 from modules.anilist import anilist_submit
 from modules.commons import save_traceback_to_file
 from modules.myanimelist import mal_submit
 from modules.rawg import rawg_submit
 from modules.simkl import simkl_submit
 
+NO_BOT = re.compile(r"no bot", re.IGNORECASE)
+"""Opt-out phrase of a message, checked before any link"""
 
-def intepret_mdx(data: Manga) -> tuple[str, str, str, str]:
+
+async def intepret_mdx(data: Manga) -> tuple[str, str, str, str]:
     """Get the media ID and source from a MangaDex manga object"""
     mal_id = data.attributes.links.mal
     al_id = data.attributes.links.al
@@ -35,13 +43,13 @@ def intepret_mdx(data: Manga) -> tuple[str, str, str, str]:
         media_id = al_id
         source = "anilist"
     elif kt_id:
-        mal_id = kitsu_id_to_other_id(kt_id, "manga", "anilist")
-        if mal_id is None:
+        al_id = await kitsu_id_to_other_id(kt_id, "manga", "anilist")
+        if al_id is None:
             return None, None, None, None
         send_to = "anilist"
         send_type = "manga"
-        media_id = mal_id
-        source = "myanimelist"
+        media_id = al_id
+        source = "anilist"
     else:
         send_to = "anilist"
         send_type = "manga"
@@ -50,48 +58,96 @@ def intepret_mdx(data: Manga) -> tuple[str, str, str, str]:
     return send_to, send_type, media_id, source
 
 
+async def mangadex_id_to_other_id(manga_id: str) -> tuple[str | None, str | None]:
+    """Find the AniList or MyAnimeList ID of a MangaDex title in the ID graph"""
+    al_id = await id_graph.get("manga", "mangadex", manga_id, "anilist")
+    if al_id is not None:
+        return al_id, "anilist"
+    mal_id = await id_graph.get("manga", "mangadex", manga_id, "myanimelist")
+    if mal_id is not None:
+        return mal_id, "myanimelist"
+    return None, None
+
+
+async def kitsu_slug_to_id(
+    slug: str,
+    media_kind: Literal["anime", "manga"],
+) -> str | None:
+    """Resolve a Kitsu slug to its ID, from the ID graph first"""
+    kitsu_id = await id_graph.get(media_kind, "kitsu_slug", slug, "kitsu")
+    if kitsu_id is not None:
+        return kitsu_id
+    try:
+        async with Kitsu() as kitsu:
+            data = await kitsu.resolve_slug(slug, media_kind)
+    except ProviderHttpError:
+        return None
+    if not data.get("data"):
+        return None
+    return data["data"][0]["id"]
+
+
 async def kitsu_id_to_other_id(
     kitsu_id: str,
     media_kind: Literal["anime", "manga"],
     destination: Literal["anilist", "myanimelist"]
 ) -> str | None:
-    """Convert a Kitsu ID to another ID"""
+    """Convert a Kitsu ID to another ID, from the ID graph first"""
     if not kitsu_id.isdigit():
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://kitsu.io/api/edge/{media_kind}?filter[slug]={kitsu_id}") as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
-                kitsu_id = data["data"][0]["id"]
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"https://kitsu.io/api/edge/{media_kind}/{kitsu_id}/mappings") as resp:
-            if resp.status != 200:
-                return
-            data = await resp.json()
-            # find for anilist/manga on data.data[*].attributes.externalSite
-            for mapping in data["data"]:
-                if mapping["attributes"]["externalSite"] == f"{destination}/{media_kind}":
-                    return mapping["attributes"]["externalId"]
-    return None
+        kitsu_id = await kitsu_slug_to_id(kitsu_id, media_kind)
+        if kitsu_id is None:
+            return None
+    other_id = await id_graph.get(media_kind, "kitsu", kitsu_id, destination)
+    if other_id is not None:
+        return other_id
+    try:
+        async with Kitsu() as kitsu:
+            mappings = await kitsu.get_mappings(kitsu_id, media_kind)
+    except ProviderHttpError:
+        return None
+    return mappings.get(destination)
 
 
 class MessageListen(ipy.Extension):
     """Listens for messages with links to supported sites."""
 
+    def __init__(self, bot: ipy.Client | ipy.AutoShardedClient):
+        """Load the auto-embed allowlist before the first message comes in."""
+        self.bot = bot
+        autoembed_allowlist.load()
+
     @ipy.listen(MessageCreate)
     async def on_message_create(self, event: MessageCreate) -> None:
         """Send a media embed if a supported link is sent."""
-        ctx = event.message
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            outcome = await self._handle_message(event.message)
+        finally:
+            metrics.messages.labels(outcome).observe(time.perf_counter() - started)
+
+    async def _handle_message(self, ctx: ipy.Message) -> str:
+        """
+        Send a media embed if the message has a supported link.
+
+        Each stage is a span, so traces of the listener break its latency down.
+
+        Args:
+            ctx (ipy.Message): The message
+
+        Returns:
+            str: What was done with the message, for the metrics
+        """
         if ctx.author.id == self.bot.user.id or ctx.author.bot:
-            return
+            return "bot"
 
         msg_content = ctx.content
         mentioned = msg_content.startswith(
             f'<@!{self.bot.user.id}>') or msg_content.startswith(f'<@{self.bot.user.id}>')
 
         # do not process if the message explicitly says not to
-        if re.search(r"no bot", msg_content, re.IGNORECASE) or msg_content.startswith("!!"):
-            return
+        if NO_BOT.search(msg_content) or msg_content.startswith("!!"):
+            return "opted_out"
 
         # if the message mentions the bot, send warning
         if mentioned and len(msg_content) <= 30:
@@ -101,193 +157,81 @@ Please use the slash command `/help` to see a list of commands available.
 
 If you can't see the slash commands, please re-invite the bot to your server, and make sure you have the `applications.commands` scope enabled."""
             )
-            return
-
-        if not os.path.exists(f"database/allowlist_autoembed/{ctx.author.id}"):
-            return
-
-        send_to: Literal["anilist", "mal", "simkl", "rawg"] | None = None
-        send_type: Literal["anime", "manga",
-                           "game", "movie", "tv"] | None = None
-        media_id: str | None = None
-        source: str | None = None
-        mdx: Manga | None = None
-
-        match regex_spm.search_in(msg_content):
-            case r"(?:https?://)?(?:www\.)?anilist\.co/anime/(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "anilist"
-            case r"(?:https?://)?(?:www\.)?anilist\.co/manga/(?P<mediaid>\d+)" as ids:
-                send_to = "anilist"
-                send_type = "manga"
-                media_id = ids["mediaid"]
-                source = "anilist"
-            case r"(?:https?://)?(?:www\.)?anidb\.net/(?:anime/|a)(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "anidb"
-            case r"(?:https?://)?(?:www\.)?anime-planet\.com/anime/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "animeplanet"
-            case r"(?:https?://)?(?:www\.)?anisearch\.com/anime/(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "anisearch"
-            case r"(?:https?://)?(?:en\.|www\.)?annict\.com/works/(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "annict"
-            case r"(?:https?://)?(?:www\.)?kaize\.io/anime/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "kaize"
-            case r"(?:https?://)?(?:www\.)?kitsu\.io/anime/(?P<mediaid>[\w\-]+)" as ids:
-                media_id: str = ids["mediaid"]
-                if not media_id.isdigit():
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(f"https://kitsu.io/api/edge/anime?filter[slug]={media_id}") as resp:
-                            if resp.status != 200:
-                                return
-                            data = await resp.json()
-                            media_id = data["data"][0]["id"]
-                send_to = "mal"
-                send_type = "anime"
-                source = "kitsu"
-            case r"(?:https?://)?(?:www\.)?kitsu\.io/manga/(?P<mediaid>[\w\-]+)" as ids:
-                # try find AniList ID on Kitsu GraphQL API
-                ids: dict[str, str]
-                media_id: str = ids["mediaid"]
-                anilist_id = await kitsu_id_to_other_id(media_id, "manga", "anilist")
-                if anilist_id is None:
-                    return
-                send_to = "anilist"
-                send_type = "manga"
-                media_id = anilist_id
-                source = "anilist"
-            case r"(?:https?://)?(?:www\.)?livechart\.me/anime/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "livechart"
-            case r"(?:https?://)?(?:www\.)?myanimelist\.net/anime/(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "myanimelist"
-            case r"(?:https?://)?(?:www\.)?myanimelist\.net/manga/(?P<mediaid>\d+)" as ids:
-                send_to = "anilist"
-                send_type = "manga"
-                media_id = ids["mediaid"]
-                source = "myanimelist"
-            case r"(?:https?://)?(?:www\.)?notify\.moe/anime/(?P<mediaid>[\w\-_]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "notify"
-            case r"(?:https?://)?(?:www\.)?otakotaku\.com/anime/view/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "otakotaku"
-            case r"(?:https?://)?(?:www\.)?rawg\.io/games/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "rawg"
-                send_type = "game"
-                media_id = ids["mediaid"]
-                source = "rawg"
-            case r"(?:https?://)?(?:www\.)?shikimori\.(one|me|org)/animes/(?P<mediaid>\d+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                if not media_id.isdigit():
-                    # remove prefix
-                    media_id = media_id[1:]
-                source = "myanimelist"
-            case r"(?:https?://)?(?:www\.)?shikimori\.(one|me|org)/ranobe/(?P<mediaid>\d+)" as ids:
-                send_to = "anilist"
-                send_type = "manga"
-                media_id = ids["mediaid"]
-                if not media_id.isdigit():
-                    # remove prefix
-                    media_id = media_id[1:]
-                source = "myanimelist"
-            case r"(?:https?://)?(?:www\.)?shikimori\.(one|me|org)/mangas/(?P<mediaid>\d+)" as ids:
-                send_to = "anilist"
-                send_type = "manga"
-                media_id = ids["mediaid"]
-                if not media_id.isdigit():
-                    # remove prefix
-                    media_id = media_id[1:]
-                source = "myanimelist"
-            case r"(?:https?://)?db.silveryasha\.web\.id/anime/(?P<mediaid>[\w\-]+)" as ids:
-                send_to = "mal"
-                send_type = "anime"
-                media_id = ids["mediaid"]
-                source = "silveryasha"
-            case r"(?:https?://)?(?:www\.)?simkl\.com/anime/(?P<mediaid>\d+)" as ids:
-                async with Simkl() as simkl:
-                    smk_dat = await simkl.get_title_ids(ids["mediaid"], "anime")
-                    media_id = smk_dat.mal
-                    send_to = "mal"
-                    send_type = "anime"
-                    source = "myanimelist"
-            case r"(?:https?://)?(?:www\.)?simkl\.com/movies/(?P<mediaid>\d+)" as ids:
-                send_to = "simkl"
-                send_type = "movie"
-                media_id = ids["mediaid"]
-                source = "simkl"
-            case r"(?:https?://)?(?:www\.)?simkl\.com/tv/(?P<mediaid>\d+)" as ids:
-                send_to = "simkl"
-                send_type = "tv"
-                media_id = ids["mediaid"]
-                source = "simkl"
-            # mangadex manga
-            case r"(?:https?://)?(?:www\.)?mangadex\.org/title/(?P<mediaid>[\w\-]+)" as ids:
-                async with Mangadex() as mdex:
-                    mdx = await mdex.get_manga(ids["mediaid"])
-                    send_to, send_type, media_id, source = intepret_mdx(mdx)
-            # mangadex chapter
-            case r"(?:https?://)?(?:www\.)?mangadex\.org/chapter/(?P<chapterid>[\w\-]+)" as ids:
-                async with Mangadex() as mdex:
-                    mdx = await mdex.get_manga_from_chapter(ids["chapterid"])
-                    send_to, send_type, media_id, source = intepret_mdx(mdx)
-            case _:
-                return
+            return "mention"
+
+        with span("allowlist", "cpu"):
+            allowed = ctx.author.id in autoembed_allowlist
+        if not allowed:
+            return "not_allowed"
+
+        with span("link match", "cpu"):
+            link = media_links.first(msg_content)
+        if link is None:
+            return "no_link"
+        send_to = link.route.send_to
+        send_type = link.route.send_type
+        media_id = link.media_id
+        source = link.route.source
+
+        async with span("resolve", route=link.route.name):
+            match link.route.name:
+                case "kitsu_anime":
+                    if not media_id.isdigit():
+                        media_id = await kitsu_slug_to_id(media_id, "anime")
+                        if media_id is None:
+                            return "unresolved"
+                case "kitsu_manga":
+                    # try find AniList ID on Kitsu GraphQL API
+                    media_id = await kitsu_id_to_other_id(media_id, "manga", "anilist")
+                    if media_id is None:
+                        return "unresolved"
+                case "simkl_anime":
+                    simkl_id = media_id
+                    media_id = await id_graph.get("anime", "simkl", simkl_id, "myanimelist")
+                    if media_id is None:
+                        async with Simkl() as simkl:
+                            smk_dat = await simkl.get_title_ids(simkl_id, "anime")
+                            media_id = smk_dat.mal
+                case "mangadex_title":
+                    mdx_id = media_id
+                    media_id, source = await mangadex_id_to_other_id(mdx_id)
+                    if media_id is None:
+                        async with Mangadex() as mdex:
+                            mdx = await mdex.get_manga(mdx_id)
+                        send_to, send_type, media_id, source = await intepret_mdx(mdx)
+                case "mangadex_chapter":
+                    async with Mangadex() as mdex:
+                        mdx = await mdex.get_manga_from_chapter(media_id)
+                    send_to, send_type, media_id, source = await intepret_mdx(mdx)
 
         if send_to is None or media_id is None or source is None:
-            return
+            return "unresolved"
 
         try:
-            match send_to:
-                case "anilist":
-                    reverse_lookup = source == "myanimelist"
-                    if source != "anilist":
-                        async with AniList() as als:
-                            aldat = await als.manga(media_id, reverse_lookup)
-                            media_id = aldat.id
-                    await anilist_submit(ctx, int(media_id))
-                case "mal":
-                    is_it_source = source == "myanimelist"
-                    if is_it_source is False:
-                        async with AnimeApi() as aapi:
-                            aadat = await aapi.get_relation(media_id, source)
-                            media_id = aadat.myanimelist
-                            if media_id is None:
-                                return
-                    await mal_submit(ctx, int(media_id))
-                case "simkl":
-                    await simkl_submit(ctx, media_id, send_type)
-                case "rawg":
-                    await rawg_submit(ctx, media_id)
-                case _:
-                    return
+            async with span("embed", send_to=send_to):
+                match send_to:
+                    case "anilist":
+                        reverse_lookup = source == "myanimelist"
+                        if source != "anilist":
+                            async with AniList() as als:
+                                aldat = await als.manga(media_id, reverse_lookup)
+                                media_id = aldat.id
+                        await anilist_submit(ctx, int(media_id))
+                    case "mal":
+                        is_it_source = source == "myanimelist"
+                        if is_it_source is False:
+                            async with AnimeApi() as aapi:
+                                aadat = await aapi.get_relation(media_id, source)
+                                media_id = aadat.myanimelist
+                                if media_id is None:
+                                    return "unresolved"
+                        await mal_submit(ctx, int(media_id))
+                    case "simkl":
+                        await simkl_submit(ctx, media_id, send_type)
+                    case "rawg":
+                        await rawg_submit(ctx, media_id)
+                    case _:
+                        return "unresolved"
         # pylint: disable=broad-exception-caught
         except Exception as err:
             save_traceback_to_file(
@@ -295,7 +239,8 @@ If you can't see the slash commands, please re-invite the bot to your server, an
                 ctx.author,
                 err
             )
-        return
+            return "failed"
+        return "embedded"
 
 
 def setup(bot: ipy.Client | ipy.AutoShardedClient) -> None:
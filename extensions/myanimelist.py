@@ -6,6 +6,7 @@ Contains:
   of a user on MyAnimeList directly on Discord
 """
 
+import asyncio
 from datetime import datetime as dtime
 from datetime import timezone as tz
 from typing import Any, Literal
@@ -16,7 +17,7 @@ import interactions as ipy
 from classes.database import DatabaseException, UserDatabase
 from classes.excepts import ProviderHttpError
 from classes.html.myanimelist import HtmlMyAnimeList
-from classes.jikan import JikanApi, JikanException
+from classes.jikan import JikanApi, JikanException, JikanUserStruct
 from classes.rss.myanimelist import MediaStatus
 from classes.rss.myanimelist import MyAnimeListRss as Rss
 from classes.rss.myanimelist import RssItem
@@ -139,14 +140,21 @@ Use `/register` to register, or use `/profile myanimelist mal_username:<username
             await ctx.send(embed=embed)
             return
 
-        try:
+        async def scrape_profile() -> JikanUserStruct:
             async with HtmlMyAnimeList() as html:
-                extended = await html.get_user(mal_username)
+                return await html.get_user(mal_username)
+
+        async def fetch_profile() -> JikanUserStruct:
+            async with JikanApi() as jikan:
+                return await jikan.get_user_data(mal_username.lower())
+
+        try:
             if embed_layout not in ["timeline", "timeline_title"]:
-                async with JikanApi() as jikan:
-                    user_data = await jikan.get_user_data(mal_username.lower())
+                # Both sources are independent, so the slower one sets the pace
+                extended, user_data = await asyncio.gather(
+                    scrape_profile(), fetch_profile())
             else:
-                user_data = extended
+                extended = user_data = await scrape_profile()
         except JikanException as error:
             embed = platform_exception_embed(
                 description="Jikan API returned an error",
@@ -294,12 +302,14 @@ Use `/register` to register, or use `/profile myanimelist mal_username:<username
                     ani_fav_top = ani_favs[:5]
                     # generate string
                     for index, ani in enumerate(ani_fav_top):
-                        if len(ani.title) >= 100:
-                            ani.title = ani.title[:97] + "..."
-                        split = ani.url.split("/")
+                        fav_title = ani.title
+                        if len(fav_title) >= 100:
+                            fav_title = fav_title[:97] + "..."
+                        fav_url = ani.url
+                        split = fav_url.split("/")
                         if split[-1].isdigit() is False:
-                            ani.url = "/".join(split[:-1])
-                        ani_fav_list += f"{index+1}. [{ani.title}]({ani.url})\n"
+                            fav_url = "/".join(split[:-1])
+                        ani_fav_list += f"{index+1}. [{fav_title}]({fav_url})\n"
                 embed.add_field(
                     name="🌟 Top 5 Favorite Anime",
                     value=ani_fav_list if ani_fav_list not in [
@@ -331,12 +341,14 @@ Use `/register` to register, or use `/profile myanimelist mal_username:<username
                 if len(man_favs) > 0:
                     man_fav_top = man_favs[:5]
                     for index, man in enumerate(man_fav_top):
-                        if len(man.title) >= 100:
-                            man.title = man.title[:97] + "..."
-                        split = man.url.split("/")
+                        fav_title = man.title
+                        if len(fav_title) >= 100:
+                            fav_title = fav_title[:97] + "..."
+                        fav_url = man.url
+                        split = fav_url.split("/")
                         if split[-1].isdigit() is False:
-                            man.url = "/".join(split[:-1])
-                        man_fav_list += f"{index+1}. [{man.title}]({man.url})\n"
+                            fav_url = "/".join(split[:-1])
+                        man_fav_list += f"{index+1}. [{fav_title}]({fav_url})\n"
                 embed.add_field(
                     name="🌟 Top 5 Favorite Manga",
                     value=man_fav_list if man_fav_list not in [
@@ -4,6 +4,7 @@ from interactions import (AutoShardedClient, Buckets, Client, Cooldown,
                           Extension, SlashCommand, SlashContext)
 
 from classes.nekomimidb import NekomimiGender
+from classes.randompick import nekomimi_images
 from modules.i18n import fetch_language_data, read_user_language
 from modules.nekomimidb import submit_nekomimi
 
@@ -11,6 +12,11 @@ from modules.nekomimidb import submit_nekomimi
 class Nekomimi(Extension):
     """NekomimiDB commands"""
 
+    def __init__(self, bot: Client | AutoShardedClient):
+        """Load the nekomimiDb images before the first pick."""
+        self.bot = bot
+        nekomimi_images.preload()
+
     base = SlashCommand(
         name="nekomimi",
         description="Get a character in cat ears art",
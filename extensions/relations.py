@@ -1,11 +1,14 @@
 import re
+from dataclasses import replace
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal, Mapping
 
 import interactions as ipy
 
 from classes.animeapi import AnimeApi, AnimeApiAnime
+from classes.enrichment import Resolver
 from classes.excepts import ProviderHttpError, SimklTypeError
+from classes.idgraph import id_graph
 from classes.kitsu import Kitsu
 from classes.simkl import Simkl, SimklMediaTypes, SimklRelations
 from classes.trakt import Trakt, TraktIdsStruct, TraktMediaStruct
@@ -14,6 +17,240 @@ from modules.const import EMOJI_UNEXPECTED_ERROR
 from modules.platforms import (get_platform_color, media_id_to_platform,
                                platforms_to_fields)
 
+RESOLVE_DEADLINE = 10.0
+"""Seconds /relations may spend resolving IDs before answering with what it found"""
+
+ANIME_API_PLATFORMS: list[str] = [
+    "myanimelist",
+    "anidb",
+    "anilist",
+    "kitsu",
+    "animeplanet",
+    "anisearch",
+    "annict",
+    "kaize",
+    "livechart",
+    "notify",
+    "otakotaku",
+    "shikimori",
+    "shoboi",
+    "silveryasha",
+]
+"""Platforms AnimeAPI can be queried with, in order of preference"""
+
+PROVIDER_NAMES: dict[str, str] = {
+    "animeapi": "AnimeAPI",
+    "kitsu": "Kitsu",
+    "simkl": "SIMKL",
+    "trakt": "Trakt",
+}
+"""Names of the providers behind resolver nodes, keyed by node name prefix"""
+
+
+def anime_api_facts(data: AnimeApiAnime) -> dict[str, Any]:
+    """
+    Turn an AnimeAPI relation into resolver facts
+
+    Args:
+        data (AnimeApiAnime): The relation
+
+    Returns:
+        dict[str, Any]: The relation and the IDs it has, empty if AnimeAPI doesn't know the title
+    """
+    ids = {platform: getattr(data, platform) for platform in ANIME_API_PLATFORMS}
+    if all(value is None for value in ids.values()):
+        return {}
+    facts: dict[str, Any] = {"animeapi": data, **ids}
+    if data.trakt is not None:
+        facts.update(
+            trakt=f"{data.trakt_type}/{data.trakt}/seasons/{data.trakt_season}",
+            trakt_type=data.trakt_type,
+            trakt_season=data.trakt_season,
+        )
+    return facts
+
+
+def anime_api_relation(platform: str):
+    """
+    Build a resolver node asking AnimeAPI for a relation
+
+    Args:
+        platform (str): Platform of the known ID
+
+    Returns:
+        Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]]: The node
+    """
+
+    async def lookup(facts: Mapping[str, Any]) -> dict[str, Any]:
+        async with AnimeApi() as api:
+            data = await api.get_relation(
+                media_id=f"{facts[platform]}", platform=platform)
+        return anime_api_facts(data)
+
+    return lookup
+
+
+async def anime_api_trakt(facts: Mapping[str, Any]) -> dict[str, Any]:
+    """Ask AnimeAPI for the relation of a Trakt season"""
+    media_id = f"{facts['trakt_type']}/{facts['trakt_slug']}/seasons/{facts['trakt_season']}"
+    async with AnimeApi() as api:
+        data = await api.get_relation(
+            media_id=media_id, platform=AnimeApi.AnimeApiPlatforms.TRAKT)
+    return anime_api_facts(data)
+
+
+async def kitsu_slug(facts: Mapping[str, Any]) -> dict[str, Any]:
+    """Resolve a Kitsu slug to its ID"""
+    kitsu_id = await id_graph.get("anime", "kitsu_slug", facts["kitsu_slug"], "kitsu")
+    if kitsu_id is not None:
+        return {"kitsu": kitsu_id}
+    async with Kitsu() as api:
+        data = await api.resolve_slug(
+            slug=facts["kitsu_slug"], media_type=api.MediaType.ANIME)
+    return {"kitsu": data["data"][0]["id"]} if data.get("data") else {}
+
+
+async def trakt_title(facts: Mapping[str, Any]) -> dict[str, Any]:
+    """Get the IDs of a Trakt title from its slug"""
+    async with Trakt() as api:
+        data = await api.get_title_data(
+            media_id=facts["trakt_slug"],
+            media_type=api.MediaType(f"{facts['trakt_type']}s"),
+        )
+    return {
+        "trakt_data": data,
+        "imdb": data.ids.imdb,
+        "tmdb": data.ids.tmdb,
+        "tvdb": data.ids.tvdb,
+        "media_type": facts["trakt_type"],
+    }
+
+
+def simkl_search(platform: str, provider: Simkl.Provider):
+    """
+    Build a resolver node searching a SIMKL ID from another ID
+
+    Args:
+        platform (str): Platform of the known ID
+        provider (Simkl.Provider): The same platform, as known by SIMKL
+
+    Returns:
+        Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]]: The node
+    """
+
+    async def lookup(facts: Mapping[str, Any]) -> dict[str, Any]:
+        if platform in ["myanimelist", "anidb"]:
+            simkl_id = await id_graph.get("anime", platform, facts[platform], "simkl")
+            if simkl_id is not None:
+                return {"simkl": simkl_id}
+        async with Simkl() as simkl:
+            entry: list[dict] | None = await simkl.search_by_id(
+                provider, facts[platform], media_type=facts.get("media_type")
+            )
+        if not entry:
+            raise SimklTypeError(
+                "Could not find any entry with the given ID",
+                expected_type=list[dict],
+            )
+        return {"simkl": entry[0]["ids"]["simkl"]}
+
+    return lookup
+
+
+async def simkl_title_ids(facts: Mapping[str, Any]) -> dict[str, Any]:
+    """Get the IDs of a SIMKL title"""
+    async with Simkl() as simkl:
+        data = await simkl.get_title_ids(
+            media_id=facts["simkl"], media_type=SimklMediaTypes.ANIME)
+    return {
+        "simkl_data": data,
+        "myanimelist": data.mal,
+        "anidb": data.anidb,
+        "anilist": data.anilist,
+        "kitsu": data.kitsu,
+        "imdb": data.imdb,
+        "tmdb": data.tmdb,
+        "tvdb": data.tvdb,
+    }
+
+
+def trakt_lookup(platform: Literal["imdb", "tmdb"]):
+    """
+    Build a resolver node looking a Trakt title up from another ID
+
+    Args:
+        platform (Literal["imdb", "tmdb"]): Platform of the known ID
+
+    Returns:
+        Callable[[Mapping[str, Any]], Awaitable[dict[str, Any]]]: The node
+    """
+
+    async def lookup(facts: Mapping[str, Any]) -> dict[str, Any]:
+        simkl_dat: SimklRelations = facts.get("simkl_data", SimklRelations())
+        if simkl_dat.anitype == "movie" or simkl_dat.type == "movie":
+            media_type = "movies"
+        elif simkl_dat.anitype in ["tv", "ona"] or simkl_dat.type == "tv":
+            media_type = "shows"
+        else:
+            media_type = "movies"
+        async with Trakt() as trakt:
+            data = await trakt.lookup(
+                media_id=facts[platform],
+                platform=trakt.Platform(platform),
+                media_type=trakt.MediaType(media_type),
+            )
+        media = data.show if data.type == "show" else data.movie
+        return {"trakt": media.ids.trakt, "trakt_type": data.type, "trakt_data": media}
+
+    return lookup
+
+
+def build_relation_resolver() -> Resolver:
+    """
+    Build the resolver of /relations
+
+    Season-accurate IDs (AnimeAPI, MyAnimeList, AniDB) are preferred. Show-wide
+    IDs (IMDb, TMDB, TVDB) are fallbacks, only used when nothing else led to
+    SIMKL or Trakt.
+
+    Returns:
+        Resolver: The resolver
+    """
+    resolver = Resolver(deadline=RESOLVE_DEADLINE)
+    resolver.add("kitsu_slug", kitsu_slug, ["kitsu_slug"], ["kitsu"])
+    resolver.add(
+        "trakt_title", trakt_title, ["trakt_slug", "trakt_type"], ["trakt_data"])
+    resolver.add(
+        "animeapi_trakt", anime_api_trakt,
+        ["trakt_slug", "trakt_type", "trakt_season"], ["animeapi"])
+    for platform in ANIME_API_PLATFORMS:
+        resolver.add(
+            f"animeapi_{platform}", anime_api_relation(platform), [platform], ["animeapi"])
+    resolver.add(
+        "simkl_myanimelist", simkl_search("myanimelist", Simkl.Provider.MYANIMELIST),
+        ["myanimelist"], ["simkl"])
+    resolver.add(
+        "simkl_anidb", simkl_search("anidb", Simkl.Provider.ANIDB), ["anidb"], ["simkl"])
+    resolver.add("simkl_ids", simkl_title_ids, ["simkl"], ["simkl_data"])
+    resolver.add(
+        "simkl_imdb", simkl_search("imdb", Simkl.Provider.IMDB),
+        ["imdb"], ["simkl"], fallback=True)
+    resolver.add(
+        "simkl_tmdb", simkl_search("tmdb", Simkl.Provider.TMDB),
+        ["tmdb", "media_type"], ["simkl"], fallback=True)
+    resolver.add(
+        "simkl_tvdb", simkl_search("tvdb", Simkl.Provider.TVDB),
+        ["tvdb"], ["simkl"], fallback=True)
+    resolver.add(
+        "trakt_imdb", trakt_lookup("imdb"), ["imdb"], ["trakt"], fallback=True)
+    resolver.add(
+        "trakt_tmdb", trakt_lookup("tmdb"), ["tmdb"], ["trakt"], fallback=True)
+    return resolver
+
+
+relation_resolver = build_relation_resolver()
+"""Resolver finding the IDs of a title on every supported site"""
+
 
 class ExtenalSitesRelations(ipy.Extension):
     """Extension class for /relations"""
@@ -28,64 +265,6 @@ class ExtenalSitesRelations(ipy.Extension):
         ),
     )
 
-    @staticmethod
-    async def search_simkl_id(
-        provider: Simkl.Provider,
-        media_id: str,
-        media_type: Simkl.TmdbMediaTypes | None = None,
-    ) -> dict:
-        """
-        Utility function to search for a title on SIMKL by ID
-
-        Args:
-            provider (Simkl.Provider): The provider to search on
-            media_id (str): The media ID
-            media_type (Simkl.TmdbMediaTypes | None, optional): The media type if it's TMDB. Defaults to None.
-        """
-        async with Simkl() as simkl:
-            entry: list[dict] | None = await simkl.search_by_id(
-                provider, media_id, media_type=media_type
-            )
-            if not entry:
-                raise SimklTypeError(
-                    "Could not find any entry with the given ID",
-                    expected_type=list[dict],
-                )
-            return entry[0]
-
-    @staticmethod
-    async def get_simkl_title_ids(simkl_id: int) -> SimklRelations:
-        """
-        Utility function to get the title IDs from SIMKL
-
-        Args:
-            simkl_id (int): SIMKL ID
-
-        Returns:
-            SimklRelations: SIMKL relations object
-        """
-        async with Simkl() as simkl:
-            return await simkl.get_title_ids(
-                media_id=simkl_id, media_type=SimklMediaTypes.ANIME
-            )
-
-    @staticmethod
-    async def get_anime_api_relation(
-        media_id: str, platform: AnimeApi.AnimeApiPlatforms
-    ) -> AnimeApiAnime:
-        """
-        Utility function to get the relation from Anime API
-
-        Args:
-            media_id (str): The media ID
-            platform (AnimeApi.AnimeApiPlatforms): The platform to get the relation from
-
-        Returns:
-            AnimeApiAnime: The Anime API relation object
-        """
-        async with AnimeApi() as api:
-            return await api.get_relation(media_id=f"{media_id}", platform=platform)
-
     @relations.subcommand(
         sub_cmd_name="shows",
         sub_cmd_description="Get external links relations of a show from one of the supported sites",
@@ -172,203 +351,63 @@ class ExtenalSitesRelations(ipy.Extension):
         ],
         media_type: Literal["show", "movie"] | None = None,
     ) -> None:
-        imdb_id = None
-        mal_id = None
-        tmdb_id = None
-        tvdb_id = None
-        trakt_id = None
-        trakt_season = None
-        trakt_type = None
-        simkl_dat = SimklRelations()
-        trakt_data = TraktMediaStruct("", 0, TraktIdsStruct(0, ""))
-
-        if (platform == "shikimori") and (not re.match(r"^\d+$", media_id)):
+        await ctx.defer()
+        known: dict[str, Any] = {"media_type": media_type}
+        if platform == "shikimori" and not re.match(r"^\d+$", media_id):
             media_id = re.search(r"^\d+", media_id).group(0)
-            anime_api = await self.get_anime_api_relation(
-                media_id=f"{media_id}", platform=AnimeApi.AnimeApiPlatforms.SHIKIMORI
-            )
-        elif platform == "simkl":
-            try:
-                simkl_dat = await self.get_simkl_title_ids(media_id)
-                simkl_id = media_id
-                mal_id = simkl_dat.mal
-                anime_api = (
-                    await self.get_anime_api_relation(
-                        f"{mal_id}", AnimeApi.AnimeApiPlatforms.MAL
-                    )
-                    if mal_id
-                    else AnimeApiAnime()
-                )
-            except ProviderHttpError as phe:
-                await ctx.send(
-                    f"❌ We couldn't find the title with the ID `{media_id}` on SIMKL! Error: `{phe}`"
-                )
-                save_traceback_to_file("relations_show", ctx.author, phe)
-        elif platform in ["tmdb", "tvdb", "imdb"]:
-            try:
-                if platform == "tmdb":
-                    media_id = media_id.split("/")[0]
-                if platform == "tmdb" and not media_type:
-                    await ctx.send(
-                        "❌ The media type is required for TMDB! Please use the `media_type` option to specify it!"
-                    )
-                    return
-                simkl_id = await self.search_simkl_id(
-                    Simkl.Provider(platform), media_id, media_type=media_type
-                )
-                simkl_id = simkl_id["ids"]["simkl"]
-                simkl_dat = await self.get_simkl_title_ids(simkl_id)
-                mal_id = simkl_dat.mal
-                anime_api = (
-                    await self.get_anime_api_relation(
-                        f"{mal_id}", AnimeApi.AnimeApiPlatforms.MAL
-                    )
-                    if mal_id
-                    else AnimeApiAnime()
-                )
-            except SimklTypeError:
+        if platform == "tmdb":
+            media_id = media_id.split("/")[0]
+            if not media_type:
                 await ctx.send(
-                    f"❌ We can't find the {platform.upper()} ID on SIMKL! It's possible that the show is not on SIMKL or that the ID is invalid!"
+                    "❌ The media type is required for TMDB! Please use the `media_type` option to specify it!"
                 )
-                save_traceback_to_file("relations_show", ctx.author, phe)
-            except ProviderHttpError as phe:
-                await ctx.send(
-                    f"❌ We can't connect to SIMKL to get data from {platform.upper()} ID! Please try again later!\nReason: `{phe}`"
-                )
-                save_traceback_to_file("relations_show", ctx.author, phe)
-        elif platform == "trakt":
-            try:
-                matching = re.match(
-                    r"^(?P<type>show|movie)s?/(?P<slug>[^/]+)(?:/seasons?/(?P<season>\d+))?$",
-                    media_id,
-                )
-                if matching:
-                    trakt_type = matching.group("type")
-                    trakt_id = matching.group("slug")
-                    trakt_season = matching.group("season")
-                    if trakt_season is None:
-                        trakt_season = 1
-                else:
-                    await ctx.send(
-                        "❌ The Trakt ID is invalid! Please use the format `<type>/<slug>/[seasons/<season>]`!"
-                    )
-                    return
-                async with Trakt() as api:
-                    trakt_data = await api.get_title_data(
-                        media_id=trakt_id,
-                        media_type=api.MediaType(f"{trakt_type}s"),
-                    )
-                    imdb_id = trakt_data.ids.imdb
-                    tmdb_id = trakt_data.ids.tmdb
-                    tvdb_id = trakt_data.ids.tvdb
-                anime_api = (
-                    await self.get_anime_api_relation(
-                        f"{trakt_type}/{trakt_id}/seasons/{trakt_season}",
-                        AnimeApi.AnimeApiPlatforms.TRAKT,
-                    )
-                    if trakt_id
-                    else AnimeApiAnime()
-                )
-                tmdb_media_type = None
-                if anime_api.myanimelist:
-                    mal_id = anime_api.myanimelist
-                    pfm = Simkl.Provider.MYANIMELIST
-                    search_id = mal_id
-                elif imdb_id:
-                    pfm = Simkl.Provider.IMDB
-                    search_id = imdb_id
-                elif tmdb_id:
-                    pfm = Simkl.Provider.TMDB
-                    tmdb_media_type = (
-                        Simkl.TmdbMediaTypes.MOVIE
-                        if trakt_type == "movie"
-                        else Simkl.TmdbMediaTypes.TV
-                    )
-                    search_id = tmdb_id
-                elif tvdb_id:
-                    pfm = Simkl.Provider.TVDB
-                    search_id = tvdb_id
-                try:
-                    simkl_id = await self.search_simkl_id(
-                        pfm, search_id, media_type=tmdb_media_type
-                    )
-                    simkl_id = simkl_id["ids"]["simkl"]
-                    simkl_dat = await self.get_simkl_title_ids(simkl_id)
-                except SimklTypeError:
-                    simkl_id = None
-            except ProviderHttpError as eht:
+                return
+        if platform == "trakt":
+            matching = re.match(
+                r"^(?P<type>show|movie)s?/(?P<slug>[^/]+)(?:/seasons?/(?P<season>\d+))?$",
+                media_id,
+            )
+            if not matching:
                 await ctx.send(
-                    f"❌ We can't connect to Trakt right now! Please try again later! Reason: {eht.message}"
+                    "❌ The Trakt ID is invalid! Please use the format `<type>/<slug>/[seasons/<season>]`!"
                 )
-                save_traceback_to_file("relations_show", ctx.author, phe)
-        elif platform == "kitsu":
-            if not re.match(r"^\d+$", media_id):
-                try:
-                    async with Kitsu() as api:
-                        kitsu_data = await api.resolve_slug(
-                            slug=media_id,
-                            media_type=api.MediaType.ANIME,
-                        )
-                        media_id = kitsu_data["data"][0]["id"]
-                except ProviderHttpError as phe:
-                    await ctx.send(
-                        f"❌ We unable to resolve the slug `{media_id}` to a Kitsu ID! Error: `{phe}`"
-                    )
-                    save_traceback_to_file("relations_show", ctx.author, phe)
-            anime_api = await self.get_anime_api_relation(
-                f"{media_id}", AnimeApi.AnimeApiPlatforms.KITSU
-            )
-        elif platform == "kaize":
-            anime_api = await self.get_anime_api_relation(
-                media_id, AnimeApi.AnimeApiPlatforms.KAIZE
-            )
-            if anime_api.kaize is None:
-                await ctx.send("❌ AnimeAPI can't find correlations for Kaize!")
                 return
+            known.update(
+                trakt=matching.group("slug"),
+                trakt_slug=matching.group("slug"),
+                trakt_type=matching.group("type"),
+                trakt_season=matching.group("season") or 1,
+            )
+        elif platform == "kitsu" and not re.match(r"^\d+$", media_id):
+            known["kitsu_slug"] = media_id
         else:
-            async with AnimeApi() as api:
-                anime_api = await api.get_relation(
-                    media_id=f"{media_id}",
-                    platform=AnimeApi.AnimeApiPlatforms(platform),
-                )
+            known[platform] = media_id
+
+        resolution = await relation_resolver.resolve(known)
+        for error in resolution.errors.values():
+            if not isinstance(error, (ProviderHttpError, SimklTypeError)):
+                save_traceback_to_file("relations_show", ctx.author, error)
+        facts = resolution.facts
+        anime_api: AnimeApiAnime = facts.get("animeapi", AnimeApiAnime())
+        simkl_dat: SimklRelations = facts.get("simkl_data", SimklRelations())
+        trakt_data: TraktMediaStruct = facts.get(
+            "trakt_data", TraktMediaStruct("", 0, TraktIdsStruct(0, "")))
+        simkl_id = facts.get("simkl")
+        imdb_id = facts.get("imdb")
+        tmdb_id = facts.get("tmdb")
+        tvdb_id = None
+        trakt_id = facts.get("trakt")
+        trakt_type = facts.get("trakt_type")
+        trakt_season = facts.get("trakt_season")
 
-        if platform not in [
-            "simkl",
-            "trakt",
-            "tmdb",
-            "tvdb",
-            "imdb",
-        ]:
-            pfm = (
-                anime_api.myanimelist
-                if anime_api.myanimelist
-                else anime_api.anidb
-                if anime_api.anidb
-                else None
-            )
-            if pfm:
-                try:
-                    simkl_id = await self.search_simkl_id(
-                        media_id=pfm,
-                        provider=Simkl.Provider.MYANIMELIST
-                        if anime_api.myanimelist
-                        else Simkl.Provider.ANIDB,
-                    )
-                    simkl_id = simkl_id["ids"]["simkl"]
-                    simkl_dat = await self.get_simkl_title_ids(simkl_id)
-                except SimklTypeError:
-                    simkl_id = None
-                    simkl_dat = SimklRelations()
+        if platform == "kaize" and anime_api.kaize is None:
+            await ctx.send("❌ AnimeAPI can't find correlations for Kaize!")
+            return
 
         # add fallbacks
         if simkl_dat.tvdbslug is None and simkl_dat.tvdbmslug is not None:
-            simkl_dat.tvdbslug = simkl_dat.tvdbmslug
-
-        if tmdb_id is None:
-            tmdb_id = simkl_dat.tmdb if platform != "tmdb" else media_id
-
-        if imdb_id is None:
-            imdb_id = simkl_dat.imdb if platform != "imdb" else media_id
+            # cached relations are shared, so keep them untouched
+            simkl_dat = replace(simkl_dat, tvdbslug=simkl_dat.tvdbmslug)
 
         title = (
             simkl_dat.title
@@ -376,38 +415,6 @@ class ExtenalSitesRelations(ipy.Extension):
             else anime_api.title
         )
 
-        if anime_api.trakt is not None and platform != "trakt":
-            trakt_type = anime_api.trakt_type
-            trakt_season = anime_api.trakt_season
-            trakt_id = f"{trakt_type}/{anime_api.trakt}/seasons/{trakt_season}"
-        elif (
-            anime_api.trakt is None
-            and (tmdb_id is not None or imdb_id is not None)
-            and platform != "trakt"
-        ):
-            try:
-                tid = imdb_id if imdb_id is not None else tmdb_id
-                platform_ = "imdb" if imdb_id is not None else "tmdb"
-                if simkl_dat.anitype == "movie" or simkl_dat.type == "movie":
-                    media_type_ = "movies"
-                elif simkl_dat.anitype in ["tv", "ona"] or simkl_dat.type == "tv":
-                    media_type_ = "shows"
-                else:
-                    media_type_ = "movies"
-                async with Trakt() as trakt:
-                    trakt_data = await trakt.lookup(
-                        media_id=tid,
-                        platform=trakt.Platform(platform_),
-                        media_type=trakt.MediaType(media_type_),
-                    )
-                trakt_type = trakt_data.type
-                trakt_data = (trakt_data.show if trakt_data.type ==
-                              "show" else trakt_data.movie)
-                trakt_id = trakt_data.ids.trakt
-            except ProviderHttpError:
-                # silence error
-                pass
-
         if simkl_dat.anitype is not None:
             tvtyp = "series" if simkl_dat.anitype == "tv" else "movies"
             tmtyp = "tv" if simkl_dat.anitype == "tv" else "movie"
@@ -497,7 +504,7 @@ class ExtenalSitesRelations(ipy.Extension):
         elif platform == "trakt":
             media_id = f"{trakt_type}/{trakt_id}"
         elif platform == "tmdb":
-            media_id = f"{tmtyp}/{id}"
+            media_id = f"{tmtyp}/{media_id}"
 
         pfs = media_id_to_platform(
             media_id=media_id, platform=platform, simkl_type=simkl_dat.type
@@ -539,9 +546,19 @@ class ExtenalSitesRelations(ipy.Extension):
             )
             dcEm.set_thumbnail(url=poster)
         else:
+            unreachable = [
+                (name, error) for name, error in resolution.errors.items()
+                if isinstance(error, ProviderHttpError)
+            ]
+            if unreachable:
+                name, error = unreachable[0]
+                provider = PROVIDER_NAMES[name.split("_")[0]]
+                description = f"We can't connect to {provider} to get relations from {pf} right now! Please try again later!\nReason: `{error}`"
+            else:
+                description = f"No relations found on {pf} with the following URL: <{uid}>!\nEither the anime is not in the database, or you have entered the wrong ID."
             dcEm = ipy.Embed(
                 title="Whoops!",
-                description=f"No relations found on {pf} with the following URL: <{uid}>!\nEither the anime is not in the database, or you have entered the wrong ID.",
+                description=description,
                 color=0xFF0000,
                 timestamp=datetime.utcnow(),
             )
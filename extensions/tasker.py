@@ -1,9 +1,13 @@
+import asyncio
 import os
 import time
 
 from interactions import (AutoShardedClient, Client, Extension,
                           IntervalTrigger, Task)
 
+from classes.animeapi import AnimeApi
+from classes.cache import (get_default_backend, get_default_objects,
+                           sweep_expired)
 from classes.excepts import ProviderHttpError
 from classes.stats.topgg import TopGG
 from modules.commons import save_traceback_to_file
@@ -19,15 +23,31 @@ class BotTasker(Extension):
         self.delete_cache.start()
         self.delete_error_logs.start()
         self.poll_stats.start()
+        self.update_relation_index.start()
         # pylint: enable=no-member
 
     @Task.create(IntervalTrigger(minutes=10))
     async def delete_cache(self) -> None:
-        """Automatically delete caches stored in the cache folder saved as JSON"""
-        print("[Tsk] [Cache] Deleting old cache files, if any")
+        """Automatically delete expired cache entries"""
+        print("[Tsk] [Cache] Deleting expired cache entries, if any")
+        reports = await sweep_expired()
+        if reports is None:
+            # The JSON file backend keeps no expiry index, walk the folders
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._purge_known_caches)
+        else:
+            for provider, report in sorted(reports.items()):
+                print(
+                    f"[Tsk] [Cache] Deleted {report.entries} {provider} entries, "
+                    f"reclaiming {report.bytes:,} bytes"
+                )
+        print("[Tsk] [Cache] Finished deleting expired cache entries")
+
+    @classmethod
+    def _purge_known_caches(cls) -> None:
+        """Delete cache files older than their provider's lifetime"""
         half_day = 43200
         a_day = half_day * 2
-        two_and_a_half_days = a_day * 2 + half_day
         a_week = a_day * 7
         a_month = a_day * 30
 
@@ -48,7 +68,6 @@ class BotTasker(Extension):
             "thecolorapi": a_week,
             "themoviedb": a_month,
             "trakt": a_day,
-            "usrbg": two_and_a_half_days,
             "verify": half_day,
         }
 
@@ -62,29 +81,29 @@ class BotTasker(Extension):
                 # Base folder
                 base_folder = os.path.join(cache_folder, cache_provider)
                 base_duration = durations.get("base", a_day)
-                self._delete_old_files(base_folder, base_duration)
+                cls._delete_old_files(base_folder, base_duration)
 
                 # User folder
                 user_folder = os.path.join(base_folder, "user")
                 user_duration = durations.get("user", half_day)
-                self._delete_old_files(user_folder, user_duration)
+                cls._delete_old_files(user_folder, user_duration)
 
                 # NSFW folder
                 nsfw_folder = os.path.join(base_folder, "nsfw")
                 nsfw_duration = durations.get("nsfw", a_week)
-                self._delete_old_files(nsfw_folder, nsfw_duration)
+                cls._delete_old_files(nsfw_folder, nsfw_duration)
             else:
                 # Single folder
                 folder_path = os.path.join(cache_folder, cache_provider)
                 duration = durations
-                self._delete_old_files(folder_path, duration)
-        print("[Tsk] [Cache] Finished deleting old cache files")
+                cls._delete_old_files(folder_path, duration)
 
     @Task.create(IntervalTrigger(hours=1))
     async def delete_error_logs(self) -> None:
-        """Automatically delete error logs stored in the error_logs folder"""
-        error_logs_folder = "errors"
-        self._delete_old_files(error_logs_folder, 172800)
+        """Automatically delete error logs written as text files by older versions"""
+        # Error log segments are rotated by the error log itself
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._delete_old_files, "errors", 172800)
 
     @Task.create(IntervalTrigger(minutes=30))
     async def poll_stats(self) -> None:
@@ -105,10 +124,23 @@ class BotTasker(Extension):
             print(f"[Tsk] [Stats] Failed to poll to Top.gg: {error}")
             save_traceback_to_file("tasker_topgg", self.bot.user, error)
 
+    @Task.create(IntervalTrigger(hours=6))
+    async def update_relation_index(self) -> None:
+        """Rebuild the offline AnimeAPI relation index when AnimeAPI is updated"""
+        try:
+            async with AnimeApi() as api:
+                rebuilt = await api.update_relation_index()
+            if rebuilt:
+                print("[Tsk] [AnimeAPI] Relation index was rebuilt")
+        except Exception as error:
+            print(f"[Tsk] [AnimeAPI] Failed to rebuild relation index: {error}")
+            save_traceback_to_file("tasker_animeapi", self.bot.user, error)
+
     @staticmethod
     def _delete_old_files(folder_path: str, duration: int) -> None:
         """
-        Delete .json files in a folder that are older than the specified duration
+        Delete .json/.txt files in a folder that are older than the specified duration.
+        Cache folders are purged through the cache backend instead
 
         Args:
             folder_path (str): The path to the folder
@@ -117,6 +149,13 @@ class BotTasker(Extension):
         Returns:
             None
         """
+        if folder_path.startswith("cache"):
+            get_default_objects().purge(folder_path, duration)
+            purged = get_default_backend().purge(folder_path, duration)
+            if purged:
+                print(f"[Tsk] [Utils] Deleted {purged} cache entries in {folder_path}")
+            return
+
         current_time = time.time()
 
         for root, _, files in os.walk(folder_path):
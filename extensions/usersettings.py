@@ -1,8 +1,7 @@
-import os
-
 import interactions as ipy
 from emoji import emojize
 
+from classes.settings import autoembed_allowlist
 from modules.commons import save_traceback_to_file
 from modules.const import EMOJI_FORBIDDEN, EMOJI_SUCCESS
 from modules.i18n import (paginate_language, search_language,
@@ -52,8 +51,7 @@ class UserSettings(ipy.Extension):
     )
     async def usersettings_autoembed(self, ctx: ipy.SlashContext, state: str):
         """Enable or disable autoembed"""
-        file_path = f"database/allowlist_autoembed/{ctx.author.id}"
-        path_exist = os.path.exists(file_path)
+        path_exist = ctx.author.id in autoembed_allowlist
         state_ = "true" == state
         if path_exist and state_ is True:
             await ctx.send("It seems you've enabled the feature already. If you wanted to disable, set `state` to `disable`", ephemeral=True)
@@ -63,8 +61,7 @@ class UserSettings(ipy.Extension):
             return
 
         if state_:
-            with open(file_path, "w", encoding="utf-8") as file:
-                file.write("")
+            autoembed_allowlist.add(ctx.author.id)
             await ctx.send("""Feature enabled, now Ryuusei will automatically respond to your message with supported sites.
 
 We currently support following sites
@@ -84,7 +81,7 @@ Upcoming: IMDb, TMDB, Trakt
 RAWG""", ephemeral=True)
             return
 
-        os.remove(file_path)
+        autoembed_allowlist.discard(ctx.author.id)
         await ctx.send("Feature disabled.", ephemeral=True)
 
     @usersettings_head.subcommand(
@@ -2,7 +2,8 @@
 A script to run first-time setup for a Discord bot.
 
 This script installs dependencies, prepares the database, fetches data from GitHub,
-indexes MyAnimeList data from AnimeAPI, builds a language index, and copies .env.example to .env.
+indexes MyAnimeList data from AnimeAPI, builds the AnimeAPI relation index,
+builds a language index, and copies .env.example to .env.
 
 Usage: python3 firstRun.py
 
@@ -14,6 +15,7 @@ import os
 import shlex
 import subprocess
 
+from classes.animeapi import AnimeApi
 from modules.oobe.commons import (check_termux, current_os, prepare_database,
                                   py_bin_path)
 from modules.oobe.getNekomimi import nk_run
@@ -103,7 +105,7 @@ async def first_run(py_bin: str = py_bin_path()):
             file.write("")
 
     # Prepare the database
-    print("Preparing the database as database.csv in tabbed format...")
+    print("Preparing the settings databases in tabbed format...")
     prepare_database()
 
     # Fetch data from GitHub
@@ -114,6 +116,11 @@ async def first_run(py_bin: str = py_bin_path()):
     print("Indexing MyAnimeList data from AnimeAPI...")
     await mal_run()
 
+    # Build the offline relation index from AnimeAPI
+    print("Building the relation index from AnimeAPI...")
+    async with AnimeApi() as api:
+        await api.update_relation_index(force=True)
+
     # Check if .env exists, if not, copy .env.example
     if not os.path.exists(".env"):
         print("Copying .env.example to .env...")
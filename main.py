@@ -9,8 +9,11 @@ import interactions as ipy
 from aiohttp import ClientConnectorError
 from interactions.client import const as ipy_const
 
+from classes.catalog import catalog
+from classes.metrics import MetricsServer
+from classes.session import session_manager
 from modules.commons import convert_float_to_time
-from modules.const import BOT_TOKEN, SENTRY_DSN, USER_AGENT
+from modules.const import BOT_TOKEN, METRICS_PORT, SENTRY_DSN, USER_AGENT
 from modules.oobe.commons import UnsupportedVersion
 
 py_ver = sys.version_info
@@ -69,6 +72,10 @@ async def main():
 
     This function will be run before the bot starts.
     """
+    # Parse every language file now, instead of on the first command
+    languages = catalog.load().languages
+    print(f"[Sys] Loaded {len(languages)} languages")
+
     print("[Ext] Loading core/bot extensions...")
     exts: list[str] = [
         "interactions.ext.sentry",
@@ -118,7 +125,15 @@ async def main():
             traceback.print_exc()
             print("[Cog] If this error shows up while restart the bot, ignore")
 
-    await bot.astart()
+    # Shared connection pool borrowed by every provider wrapper
+    await session_manager.start()
+    metrics_server = MetricsServer(port=METRICS_PORT)
+    await metrics_server.start()
+    try:
+        await bot.astart()
+    finally:
+        await metrics_server.close()
+        await session_manager.close()
 
 
 def uptime() -> None:
@@ -5,8 +5,7 @@ This module contains the common functions used by the other modules.
 """
 
 import re
-import traceback
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from enum import Enum
 from re import sub as rSub
 from typing import Any
@@ -17,6 +16,7 @@ from interactions import (Button, ButtonStyle, ClientUser, ComponentContext,
                           PartialEmoji, SlashContext, User)
 
 from classes.anilist import AniListTrailerStruct
+from classes.errorlog import error_log
 from modules.const import EMOJI_FORBIDDEN
 from modules.const import EMOJI_UNEXPECTED_ERROR as EUNER
 from modules.const import EMOJI_USER_ERROR, LANGUAGE_CODE
@@ -509,7 +509,7 @@ def save_traceback_to_file(
     mute_error: bool = False,
 ) -> None:
     """
-    Save traceback to a file.
+    Queue the traceback for the error log, deduplicated and written in the background.
 
     Args:
         command (str): Command name
@@ -522,17 +522,7 @@ def save_traceback_to_file(
     """
     if not isinstance(error, Exception):
         return
-    error_type = type(error).__name__
-    error_str = str(error)
-    error_traceback = "".join(
-        traceback.format_exception(type(error), error, error.__traceback__)
-    )
-    with open(
-        f"errors/{command}_{author.id}_{datetime.now(tz=timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')}.txt",
-        "w",
-        encoding="utf-8",
-    ) as file_:
-        file_.write(f"{error_type}: {error_str}\n\n{error_traceback}")
+    error_log.record(command, int(author.id) if author else None, error)
     if mute_error is False:
         # re-raise the error
         raise error
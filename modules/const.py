@@ -19,7 +19,7 @@ __version__: Final[str] = "1.0.0"
 
 ld()
 
-DATABASE_PATH = r"database/database.csv"
+DATABASE_PATH = r"database/database.db"
 
 
 ANILIST_CLIENT_ID: Final[str] = cast(str, ge("ANILIST_CLIENT_ID"))
@@ -100,6 +100,29 @@ EMOJI_USER_ERROR: Final[str] = cast(str, ge("EMOJI_USER_ERROR"))
 LANGUAGE_CODE: Final[str] = cast(str, ge("LANGUAGE_CODE"))
 """Default language code"""
 
+CACHE_BACKEND: Final[str] = cast(str, ge("CACHE_BACKEND") or "sqlite")
+"""Persistent cache backend, either "sqlite" (single file) or "json" (file per entry)"""
+CACHE_MEMORY_ENTRIES: Final[int] = int(ge("CACHE_MEMORY_ENTRIES") or 2048)
+"""Maximum number of cache entries kept in memory in front of the persistent backend"""
+CACHE_MEMORY_BYTES: Final[int] = int(ge("CACHE_MEMORY_BYTES") or 67108864)
+"""Maximum size in bytes of the cache entries kept in memory"""
+CACHE_SERIALIZER: Final[str] = cast(str, ge("CACHE_SERIALIZER") or "auto")
+"""Encoding of cache entries, "msgpack", "json", or "auto" to use msgpack when installed"""
+CACHE_COMPRESSION: Final[str] = cast(str, ge("CACHE_COMPRESSION") or "auto")
+"""Compression of large cache entries, "zstd", "zlib", "none", or "auto" to use zstd when installed"""
+CACHE_COMPRESS_THRESHOLD: Final[int] = int(ge("CACHE_COMPRESS_THRESHOLD") or 4096)
+"""Encoded size in bytes from which cache entries are compressed"""
+ENRICHMENT_DEADLINE: Final[float] = float(ge("ENRICHMENT_DEADLINE") or 2.5)
+"""Seconds a command waits for optional sources, such as extra posters, before sending its embed"""
+METRICS_PORT: Final[int] = int(ge("METRICS_PORT") or 9464)
+"""Local port serving Prometheus metrics, 0 disables the endpoint"""
+TRACE_SAMPLE_RATE: Final[float] = float(ge("TRACE_SAMPLE_RATE") or 0.1)
+"""Share of commands traced, from 0 to 1"""
+TRACE_SLOW_SECONDS: Final[float] = float(ge("TRACE_SLOW_SECONDS") or 3.0)
+"""Duration from which a traced command is printed as a waterfall"""
+TRACE_EXPORT: Final[str] = cast(str, ge("TRACE_EXPORT") or "")
+"""File path or collector URL receiving every traced command, empty to disable"""
+
 
 def get_git_revision_hash() -> str:
     """
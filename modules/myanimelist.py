@@ -7,27 +7,36 @@ This module contains modules that are related to MyAnimeList or Jikan API.
 import html
 import re
 from datetime import datetime, timezone
+from typing import Any
 from urllib.parse import quote
 from zoneinfo import ZoneInfo
 
-import pandas as pd
 from interactions import (Button, ButtonStyle, ComponentContext, Embed,
                           EmbedAuthor, EmbedField, EmbedFooter, Message,
                           SlashContext)
 
 from classes.anilist import AniList, AniListMediaStruct
 from classes.animeapi import AnimeApi, AnimeApiAnime
+from classes.enrichment import EnrichmentPlan
 from classes.excepts import MediaIsNsfw
 from classes.jikan import JikanApi
 from classes.kitsu import Kitsu
 from classes.myanimelist import MyAnimeList
+from classes.randompick import random_anime
 from classes.simkl import Simkl
 from modules.commons import (generate_commons_except_embed, generate_trailer,
-                             get_nsfw_status, get_random_seed,
-                             sanitize_markdown, save_traceback_to_file,
-                             trim_synopsis)
-from modules.const import (EMOJI_FORBIDDEN, MYANIMELIST_CLIENT_ID,
-                           SIMKL_CLIENT_ID, warnThreadCW)
+                             get_nsfw_status, sanitize_markdown,
+                             save_traceback_to_file, trim_synopsis)
+from modules.const import (EMOJI_FORBIDDEN, ENRICHMENT_DEADLINE,
+                           MYANIMELIST_CLIENT_ID, SIMKL_CLIENT_ID,
+                           warnThreadCW)
+
+KITSU_NO_IMAGES: dict = {
+    "data": {
+        "attributes": {
+            "posterImage": None,
+            "coverImage": None}}}
+"""Kitsu response used when Kitsu is not needed or unavailable"""
 
 
 def lookup_random_anime() -> int:
@@ -40,14 +49,7 @@ def lookup_random_anime() -> int:
     Returns:
         int: MAL ID of a random anime
     """
-    seed = get_random_seed()
-    # open database/mal.csv
-    dataframe = pd.read_csv("database/mal.csv", sep="\t")
-    # get random anime
-    rand_anime = dataframe.sample(n=1, random_state=seed)
-    # get anime id
-    rand_anime_id: int = rand_anime["mal_id"].values[0]
-    return rand_anime_id
+    return random_anime.pick()
 
 
 async def search_mal_anime(title: str) -> dict | list:
@@ -88,12 +90,86 @@ async def search_mal_anime(title: str) -> dict | list:
     return data["data"]
 
 
+async def fetch_mal_sources(
+    entry_id: int,
+    anilist_data: AniListMediaStruct | None = None,
+    anime_api: AnimeApiAnime | None = None,
+    deadline: float | None = ENRICHMENT_DEADLINE,
+) -> dict[str, Any]:
+    """
+    Fetch every source of an anime embed concurrently
+
+    Jikan is required. AnimeAPI, AniList, SIMKL and Kitsu only add IDs,
+    images and trailers, so they are dropped if they fail or miss the deadline.
+
+    Args:
+        entry_id (int): MAL ID
+        anilist_data (AniListMediaStruct | None, optional): AniList data, fetched if None. Defaults to None.
+        anime_api (AnimeApiAnime | None, optional): Anime API data, fetched if None. Defaults to None.
+        deadline (float | None, optional): Seconds to wait for optional sources. Defaults to ENRICHMENT_DEADLINE.
+
+    Returns:
+        dict[str, Any]: Results keyed by "jikan", "animeapi", "anilist", "simkl" and "kitsu"
+    """
+
+    async def jikan() -> Any:
+        async with JikanApi() as jkn:
+            return await jkn.get_anime_data(entry_id)
+
+    async def relation() -> AnimeApiAnime:
+        async with AnimeApi() as aniapi:
+            return await aniapi.get_relation(
+                media_id=entry_id, platform=aniapi.AnimeApiPlatforms.MYANIMELIST
+            )
+
+    async def anilist(aapi: AnimeApiAnime | None) -> AniListMediaStruct:
+        if aapi is None or aapi.anilist is None:
+            return AniListMediaStruct(id=0)
+        async with AniList() as als:
+            return await als.anime(media_id=aapi.anilist)
+
+    async def simkl() -> dict:
+        async with Simkl(SIMKL_CLIENT_ID) as sim:
+            sim_id = await sim.search_by_id(sim.Provider.MYANIMELIST, entry_id)
+            return await sim.get_anime(sim_id[0]["ids"]["simkl"])
+
+    async def kitsu(
+        aapi: AnimeApiAnime | None, alist: AniListMediaStruct, smk: dict
+    ) -> dict:
+        # Kitsu is only a fallback when AniList or SIMKL have no images
+        al_images = alist.bannerImage or (
+            alist.coverImage is not None and alist.coverImage.extraLarge)
+        smk_images = smk.get("poster") or smk.get("fanart")
+        if aapi is None or not aapi.kitsu or (al_images and smk_images):
+            return KITSU_NO_IMAGES
+        async with Kitsu() as kts:
+            return await kts.get_anime(aapi.kitsu)
+
+    plan = EnrichmentPlan(deadline)
+    plan.add("jikan", jikan)
+    if anime_api is not None:
+        plan.provide("animeapi", anime_api)
+    else:
+        plan.add("animeapi", relation, optional=True)
+    if anilist_data is not None:
+        plan.provide("anilist", anilist_data)
+    else:
+        plan.add("anilist", anilist, after=["animeapi"], optional=True,
+                 default=AniListMediaStruct(id=0))
+    plan.add("simkl", simkl, optional=True,
+             default={"poster": None, "fanart": None})
+    plan.add("kitsu", kitsu, after=["animeapi", "anilist", "simkl"],
+             optional=True, default=KITSU_NO_IMAGES)
+    return await plan.run()
+
+
 # old code taken from ipy/v4.3.4
 async def generate_mal(
     entry_id: int,
     is_nsfw: bool = False,
     anilist_data: AniListMediaStruct | None = None,
     anime_api: AnimeApiAnime | None = None,
+    sources: dict[str, Any] | None = None,
 ) -> list[Embed | list[Button]]:
     """
     Generate an embed for /anime with MAL via Jikan
@@ -103,6 +179,7 @@ async def generate_mal(
         is_nsfw (bool, optional): NSFW status. Defaults to False.
         anilist_data (AniListMediaStruct, optional): AniList data. Defaults to None.
         anime_api (dict, optional): Anime API data. Defaults to None.
+        sources (dict[str, Any] | None, optional): Result of `fetch_mal_sources`, fetched if None. Defaults to None.
 
     Raises:
         MediaIsNsfw: NSFW is not allowed
@@ -111,13 +188,10 @@ async def generate_mal(
         list[Embed | list[Button]]: Embed and button
     """
 
-    async with JikanApi() as jikan:
-        jk_dat = await jikan.get_anime_data(entry_id)
-
-    if anilist_data is not None:
-        alist: AniListMediaStruct = anilist_data
-    else:
-        alist: AniListMediaStruct = AniListMediaStruct(id=0)
+    if sources is None:
+        sources = await fetch_mal_sources(entry_id, anilist_data, anime_api)
+    jk_dat = sources["jikan"]
+    alist: AniListMediaStruct = sources["anilist"] or AniListMediaStruct(id=0)
 
     msg_for_thread = warnThreadCW if is_nsfw is not None else ""
 
@@ -168,31 +242,13 @@ async def generate_mal(
         al_post = alist.coverImage.extraLarge
     al_bg = alist.bannerImage
 
-    try:
-        async with Simkl(SIMKL_CLIENT_ID) as sim:
-            sim_id = await sim.search_by_id(sim.Provider.MYANIMELIST, mal_id)
-            smk = await sim.get_anime(sim_id[0]["ids"]["simkl"])
-    # pylint: disable=broad-except
-    except Exception:
-        smk = {"poster": None, "fanart": None}
-
+    smk = sources["simkl"]
     smk_post = smk.get("poster")
     smk_bg = smk.get("fanart")
     smk_post = f"https://simkl.in/posters/{smk_post}_m.webp" if smk_post else None
     smk_bg = f"https://simkl.in/fanart/{smk_bg}_w.webp" if smk_bg else None
 
-    if anime_api.kitsu and (
-            (not al_post and not al_bg) or (
-            not smk_post and not smk_bg)):
-        async with Kitsu() as kts:
-            kts = await kts.get_anime(anime_api.kitsu)
-    else:
-        kts = {
-            "data": {
-                "attributes": {
-                    "posterImage": None,
-                    "coverImage": None}}}
-
+    kts = sources["kitsu"]
     kts_post = kts["data"]["attributes"].get("posterImage")
     kts_post = kts_post.get("original") if kts_post else None
     kts_bg = kts["data"]["attributes"].get("coverImage")
@@ -493,22 +549,13 @@ async def mal_submit(ctx: SlashContext | ComponentContext | Message, ani_id: int
     trailer = []
 
     try:
-        async with AnimeApi() as aniapi:
-            animeapi = await aniapi.get_relation(
-                media_id=ani_id, platform=aniapi.AnimeApiPlatforms.MYANIMELIST
-            )
-
-        if animeapi.anilist is not None:
-            async with AniList() as anilist:
-                al_data: AniListMediaStruct = await anilist.anime(media_id=animeapi.anilist)
-
-                if al_data is not None and al_data.trailer is not None:
-                    trailer.append(generate_trailer(data=al_data.trailer))
-        else:
-            al_data = AniListMediaStruct(id=0)
+        sources = await fetch_mal_sources(ani_id)
+        al_data: AniListMediaStruct = sources["anilist"]
+        if al_data is not None and al_data.trailer is not None:
+            trailer.append(generate_trailer(data=al_data.trailer))
 
         embed, buttons = await generate_mal(
-            ani_id, is_nsfw=nsfw_bool, anilist_data=al_data, anime_api=animeapi
+            ani_id, is_nsfw=nsfw_bool, sources=sources
         )
         trailer.extend(buttons)  # type: ignore
         if isinstance(ctx, Message):
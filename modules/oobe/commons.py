@@ -83,35 +83,16 @@ def prepare_database():
     """
     Prepare the database files for storing user and server information.
 
-    This function checks if the `database/database.csv`, `database/member.csv`, and `database/server.csv` files exist.
+    This function checks if the `database/member.csv` and `database/server.csv` files exist.
     If not, it creates a new file with the corresponding header.
 
+    Registered users are stored in `database/database.db`, which is created
+    on first use by `classes.database.UserDatabase`.
+
     Returns:
         None
     """
-    database_cells = [
-        "discordId",
-        "discordUsername",
-        "discordJoined",
-        "malUsername",
-        "malId",
-        "malJoined",
-        "registeredAt",
-        "registeredGuildId",
-        "registeredBy",
-        "registeredGuildName",
-        "anilistUsername",
-        "anilistId",
-        "lastfmUsername",
-        "shikimoriId",
-        "shikimoriUsername",
-    ]
-    database_header = "\t".join(database_cells)
     files = [
-        {
-            "path": "database/database.csv",
-            "header": database_header,
-        },
         {"path": "database/member.csv", "header": "discordId\tlanguage"},
         {"path": "database/server.csv", "header": "guildId\tlanguage"},
     ]
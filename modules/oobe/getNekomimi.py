@@ -5,6 +5,8 @@ from time import time
 
 import aiohttp
 
+from classes.randompick import nekomimi_images, write_atomic
+
 MAIN_SITE = "https://raw.githubusercontent.com/nattadasu/nekomimiDb/main/index.tsv"
 
 
@@ -30,9 +32,9 @@ async def nk_get_data() -> None:
     except aiohttp.ClientError as e:
         print(f"Error fetching data: {e}")
         return
-    # save data to file
-    with open("database/nekomimiDb.tsv", "w") as f:
-        f.write(data)
+    # save data to file, and swap it in for running pickers
+    write_atomic("database/nekomimiDb.tsv", data)
+    await nekomimi_images.areload()
 
 
 async def nk_run() -> None:
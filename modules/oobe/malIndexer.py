@@ -7,6 +7,7 @@ import aiohttp
 import pandas as pd
 
 from classes.cache import Caching
+from classes.randompick import random_anime, write_atomic
 
 MAIN_SITE = "https://raw.githubusercontent.com/nattadasu/animeApi/v3/database/myanimelist.json"
 CACHE_PATH = "cache/"
@@ -26,7 +27,7 @@ async def mal_get_data() -> None:
         data = await response.text()
     # save data to json file
     data = json.loads(data)
-    Cache.write_cache(FILE_PATH, data)
+    await Cache.awrite_cache(FILE_PATH, data)
 
 
 def mal_load_data() -> dict[str, Any]:
@@ -53,4 +54,5 @@ async def mal_run() -> None:
     # sort by mal_id
     df.sort_values(by="mal_id", inplace=True)
     # save to csv file with utf-8 encoding and \t as delimiter
-    df.to_csv("database/mal.csv", encoding="utf-8", sep="\t", index=False)
+    write_atomic("database/mal.csv", df.to_csv(sep="\t", index=False))
+    await random_anime.areload()
@@ -338,17 +338,20 @@ async def simkl_submit(
     buttons = []
     l_ = fetch_language_data(code="en_US")
     try:
+        channel_nsfw = await get_nsfw_status(ctx)
         async with Simkl() as simkl:
             if media_type == "tv":
                 data: dict = await simkl.get_show(f"{media_id}")
             else:
                 data: dict = await simkl.get_movie(f"{media_id}")
 
+        # The media rating only matters in SFW channels
         tmdb_id = data.get("ids", {}).get("tmdb", None)
-        if tmdb_id is not None:
+        media_nsfw: bool = False
+        if tmdb_id is not None and channel_nsfw is False:
             try:
                 async with TheMovieDb() as tmdb:
-                    media_nsfw: bool = await tmdb.get_nsfw_status(
+                    media_nsfw = await tmdb.get_nsfw_status(
                         tmdb_id,
                         tmdb.MediaType.TV
                         if media_type == "tv"
@@ -356,10 +359,7 @@ async def simkl_submit(
                     )
             except ProviderHttpError:
                 media_nsfw = False
-        else:
-            media_nsfw = False
 
-        channel_nsfw = await get_nsfw_status(ctx)
         embed, button_2 = create_simkl_embed(
             data=data,
             media_type=media_type,
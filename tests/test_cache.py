@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+
+try:
+    from classes.cache import (CacheModel, Caching, JsonFileBackend,
+                               MemoryLruBackend, SqliteBackend, TieredBackend,
+                               sweep_expired)
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.cache import (CacheModel, Caching, JsonFileBackend,
+                               MemoryLruBackend, SqliteBackend, TieredBackend,
+                               sweep_expired)
+
+
+class CachingTest(unittest.TestCase):
+    """Caching backend test class"""
+
+    def setUp(self):
+        """Create a temporary cache directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "provider")
+        self.store = SqliteBackend(os.path.join(self.tmp.name, "cache.db"))
+        self.backend = TieredBackend(MemoryLruBackend(4), self.store)
+        self.cache = Caching(self.directory, 60, backend=self.backend)
+
+    def tearDown(self):
+        """Remove the temporary cache directory"""
+        self.backend.close()
+        self.tmp.cleanup()
+
+    def test_write_and_read(self):
+        """Test writing then reading an entry"""
+        path = self.cache.get_cache_path("anime/1.json")
+        self.cache.write_cache(path, {"id": 1})
+        self.assertEqual(self.cache.read_cache(path), {"id": 1})
+        self.assertFalse(os.path.exists(path))
+
+    def test_expired_entry(self):
+        """Test that an expired entry is not returned"""
+        path = self.cache.get_cache_path("anime/2.json")
+        self.cache.write_cache(path, {"id": 2})
+        self.assertIsNone(self.cache.read_cache(path, 0))
+
+    def test_memory_tier_is_isolated(self):
+        """Test that mutating returned data does not alter the cache"""
+        path = self.cache.get_cache_path("anime/3.json")
+        self.cache.write_cache(path, {"images": {"jpg": "a"}})
+        self.cache.read_cache(path)["images"]["jpg"] = "b"
+        self.assertEqual(self.cache.read_cache(path), {"images": {"jpg": "a"}})
+
+    def test_lru_eviction(self):
+        """Test that the memory tier is size-bounded"""
+        for i in range(8):
+            self.cache.write_cache(self.cache.get_cache_path(f"{i}.json"), i)
+        self.assertEqual(len(self.backend.memory), 4)
+        self.assertEqual(
+            self.cache.read_cache(self.cache.get_cache_path("0.json")), 0)
+
+    def test_memory_tier_byte_cap(self):
+        """Test that the memory tier is bounded by bytes and skips large entries"""
+        memory = MemoryLruBackend(16, max_bytes=1600)
+        for i in range(12):
+            memory.set(f"cache/{i}", CacheModel(time.time(), "x" * 150))
+        self.assertLessEqual(memory._bytes, 1600)  # pylint: disable=protected-access
+        self.assertLess(len(memory), 12)
+        self.assertIsNone(memory.get("cache/0"))
+        self.assertIsNotNone(memory.get("cache/11"))
+        memory.set("cache/large", CacheModel(time.time(), "x" * 400))
+        self.assertIsNone(memory.get("cache/large"))
+        memory.purge("cache", -1)
+        self.assertEqual(memory._bytes, 0)  # pylint: disable=protected-access
+
+    def test_large_entries_are_not_peeked(self):
+        """Test that only small entries are decoded on the event loop"""
+        memory = MemoryLruBackend(inline_bytes=64)
+        memory.set("small", CacheModel(time.time(), "x"))
+        memory.set("large", CacheModel(time.time(), "x" * 128))
+        self.assertEqual(memory.peek("small").data, "x")
+        self.assertIsNone(memory.peek("large"))
+        self.assertEqual(memory.get("large").data, "x" * 128)
+
+    def test_legacy_json_is_imported(self):
+        """Test that entries of the JSON file backend are still readable"""
+        path = self.cache.get_cache_path("legacy.json")
+        legacy = Caching(self.directory, 60, backend=JsonFileBackend())
+        legacy.write_cache(path, ["old"])
+        self.assertEqual(self.cache.read_cache(path), ["old"])
+        self.assertFalse(os.path.exists(path))
+
+    def test_legacy_text_rows_are_read(self):
+        """Test that entries stored as JSON text by older versions are still readable"""
+        path = self.cache.get_cache_path("anime/5.json")
+        self.store._conn.execute(  # pylint: disable=protected-access
+            "INSERT INTO cache (key, timestamp, data) VALUES (?, ?, ?)",
+            (os.path.normpath(path), time.time(), '{"id": 5}'))
+        self.assertEqual(self.cache.read_cache(path), {"id": 5})
+        self.cache.write_cache(path, {"id": 5, "title": "x" * 8192})
+        self.backend.memory.delete(os.path.normpath(path))
+        self.assertEqual(self.cache.read_cache(path)["title"], "x" * 8192)
+
+    def test_drop_and_purge(self):
+        """Test dropping and purging entries"""
+        path = self.cache.get_cache_path("user/a.json")
+        self.cache.write_cache(path, "a")
+        self.cache.drop_cache(path)
+        self.assertIsNone(self.cache.read_cache(path))
+        self.cache.write_cache(path, "a")
+        time.sleep(0.01)
+        self.assertEqual(self.backend.purge(self.directory, 0), 1)
+        self.assertIsNone(self.cache.read_cache(path))
+
+    def test_sweep_removes_due_entries(self):
+        """Test that a sweep deletes expired entries only, in bounded batches"""
+        kept = self.cache.get_cache_path("anime/kept.json")
+        forever = self.cache.get_cache_path("anime/forever.json")
+        self.cache.write_cache(kept, "kept")
+        self.cache.write_cache(forever, "kept", ttl=float("inf"))
+        for index in range(3):
+            self.cache.write_cache(
+                self.cache.get_cache_path(f"anime/{index}.json"), "x", ttl=0)
+        swept = self.backend.sweep(time.time(), 2)
+        self.assertEqual(len(swept), 2)
+        self.assertTrue(all(size > 0 for _, size in swept))
+        self.assertEqual(len(self.backend.sweep(time.time(), 10)), 1)
+        self.assertEqual(self.backend.sweep(time.time(), 10), [])
+        self.assertEqual(self.cache.read_cache(kept), "kept")
+        self.assertEqual(self.cache.read_cache(forever, float("inf")), "kept")
+
+    def test_expiry_index_migration(self):
+        """Test that databases written without an expiry index are migrated"""
+        database = os.path.join(self.tmp.name, "old.db")
+        conn = sqlite3.connect(database)
+        conn.execute(
+            "CREATE TABLE cache (key TEXT PRIMARY KEY, timestamp REAL NOT NULL, "
+            "data TEXT NOT NULL) WITHOUT ROWID")
+        conn.execute("INSERT INTO cache VALUES ('old', ?, '1')", (time.time() - 90000,))
+        conn.execute("INSERT INTO cache VALUES ('new', ?, '2')", (time.time(),))
+        conn.commit()
+        conn.close()
+        store = SqliteBackend(database)
+        self.assertEqual(store.sweep(time.time(), 10), [("old", 1)])
+        self.assertEqual(store.get("new").data, 2)
+        store.close()
+
+    def test_json_backend_has_no_expiry_index(self):
+        """Test that the JSON file backend can't be swept"""
+        self.assertIsNone(JsonFileBackend().sweep(time.time(), 10))
+
+
+class AsyncCachingTest(unittest.IsolatedAsyncioTestCase):
+    """Non-blocking Caching test class"""
+
+    async def asyncSetUp(self):
+        """Create a temporary cache directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = Caching(
+            os.path.join(self.tmp.name, "provider"), 60,
+            backend=JsonFileBackend())
+
+    async def asyncTearDown(self):
+        """Remove the temporary cache directory"""
+        self.tmp.cleanup()
+
+    async def test_async_write_and_read(self):
+        """Test writing then reading an entry asynchronously"""
+        path = self.cache.get_cache_path("anime/1.json")
+        await self.cache.awrite_cache(path, {"id": 1})
+        self.assertEqual(await self.cache.aread_cache(path), {"id": 1})
+        self.assertIsNone(await self.cache.aread_cache(path, 0))
+
+    async def test_atomic_write(self):
+        """Test that a failed write keeps the previous entry intact"""
+        path = self.cache.get_cache_path("anime/2.json")
+        await self.cache.awrite_cache(path, {"id": 2})
+        with self.assertRaises(TypeError):
+            await self.cache.awrite_cache(path, {"id": object()})
+        self.assertEqual(await self.cache.aread_cache(path), {"id": 2})
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["2.json"])
+
+    async def test_hydrated_model_is_shared(self):
+        """Test that a model is converted once and shared by later reads"""
+        path = self.cache.get_cache_path("anime/3.json")
+        calls = []
+
+        def hydrate(data):
+            calls.append(data)
+            return tuple(data)
+
+        written = await self.cache.awrite_model(path, [3], hydrate)
+        self.assertIs(await self.cache.aread_model(path, hydrate), written)
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(await self.cache.aread_model(path, hydrate, 0))
+
+    async def test_hydrated_model_is_invalidated(self):
+        """Test that writing or dropping an entry forgets its model"""
+        path = self.cache.get_cache_path("anime/4.json")
+        await self.cache.awrite_model(path, [4], tuple)
+        await self.cache.awrite_cache(path, [5])
+        self.assertEqual(await self.cache.aread_model(path, tuple), (5,))
+        self.cache.drop_cache(path)
+        self.assertIsNone(await self.cache.aread_model(path, tuple))
+        self.assertEqual(len(self.cache.objects), 0)
+
+    async def test_empty_model_is_a_hit(self):
+        """Test that an entry holding empty data is hydrated, not a miss"""
+        path = self.cache.get_cache_path("anime/6.json")
+        await self.cache.awrite_cache(path, [])
+        self.assertEqual(await self.cache.aread_model(path, tuple), ())
+        self.assertEqual(len(self.cache.objects), 1)
+
+
+class SweepTest(unittest.IsolatedAsyncioTestCase):
+    """Expired entry sweeper test class"""
+
+    async def asyncSetUp(self):
+        """Create a temporary cache database"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "cache")
+        self.backend = SqliteBackend(os.path.join(self.root, "cache.db"))
+
+    async def asyncTearDown(self):
+        """Remove the temporary cache database"""
+        self.backend.close()
+        self.tmp.cleanup()
+
+    async def test_reports_per_provider(self):
+        """Test that swept entries are counted per provider, across batches"""
+        for provider, count in (("jikan", 5), ("simkl", 2)):
+            cache = Caching(os.path.join(self.root, provider), 0, backend=self.backend)
+            for index in range(count):
+                cache.write_cache(cache.get_cache_path(f"{index}.json"), [index])
+        trakt = Caching(os.path.join(self.root, "trakt"), 60, backend=self.backend)
+        trakt.write_cache(trakt.get_cache_path("1.json"), [1])
+        reports = await sweep_expired(self.backend, batch_size=2)
+        self.assertEqual(
+            {provider: report.entries for provider, report in reports.items()},
+            {"jikan": 5, "simkl": 2})
+        self.assertGreater(reports["jikan"].bytes, 0)
+        self.assertEqual(await sweep_expired(self.backend), {})
+        self.assertIsNone(await sweep_expired(JsonFileBackend()))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.catalog import I18nCatalog
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.catalog import I18nCatalog
+
+
+class I18nCatalogTest(unittest.TestCase):
+    """I18nCatalog test class"""
+
+    def setUp(self):
+        """Create temporary language files"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._write("en_US", {"strings": {"hello": "Hello", "bye": "Bye"}})
+        self._write("id_ID", {"strings": {"hello": "Halo"}})
+        self._write("_index", [{"code": "en_US"}, {"code": "id_ID"}])
+        self.catalog = I18nCatalog(self.tmpdir.name, check_interval=0)
+
+    def tearDown(self):
+        """Remove the temporary language files"""
+        self.tmpdir.cleanup()
+
+    def _write(self, name: str, data) -> None:
+        """Write a language file"""
+        with open(os.path.join(self.tmpdir.name, f"{name}.json"), "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+    def test_fallback(self):
+        """Test that missing keys fall back to English"""
+        strings = self.catalog.language("id_ID")["strings"]
+        self.assertEqual(strings["hello"], "Halo")
+        self.assertEqual(strings["bye"], "Bye")
+        self.assertEqual(self.catalog.get("id_ID", "strings.bye"), "Bye")
+        self.assertIsNone(self.catalog.get("id_ID", "strings.missing"))
+        self.assertTrue(self.catalog.has("id_ID"))
+        self.assertFalse(self.catalog.has("ja_JP"))
+
+    def test_read_only(self):
+        """Test that the catalog can't be modified by callers"""
+        with self.assertRaises(TypeError):
+            self.catalog.language("en_US")["strings"]["hello"] = "Hi"  # type: ignore
+
+    def test_hot_reload(self):
+        """Test that a rebuild on disk is picked up"""
+        self.assertEqual(self.catalog.get("id_ID", "strings.hello"), "Halo")
+        self._write("id_ID", {"strings": {"hello": "Hai"}})
+        self._write("_index", [{"code": "en_US"}, {"code": "id_ID"}])
+        index_path = os.path.join(self.tmpdir.name, "_index.json")
+        os.utime(index_path, (0, 0))
+        self.assertEqual(self.catalog.get("id_ID", "strings.hello"), "Hai")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -1,5 +1,7 @@
+import json
 import os
 import sys
+import tempfile
 import unittest
 from asyncio import sleep
 from datetime import datetime, timezone
@@ -20,6 +22,66 @@ except ImportError:
     from classes.database import UserDatabase, UserDatabaseClass
 
 
+class LocalDatabaseTest(unittest.IsolatedAsyncioTestCase):
+    """SQLite database test class, without network access"""
+
+    async def asyncSetUp(self):
+        """Create a temporary database"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database_path = os.path.join(self.tmpdir.name, "database.db")
+
+    async def asyncTearDown(self):
+        """Remove the temporary database"""
+        self.tmpdir.cleanup()
+
+    async def test_roundtrip(self):
+        """Test saving, reading, updating and dropping a user"""
+        tmp = datetime.now(tz=timezone.utc)
+        async with UserDatabase(self.database_path) as ud:
+            await ud.save_to_database(
+                UserDatabaseClass(
+                    discord_id=Snowflake(1234567890),
+                    discord_username="nattadasu",
+                    mal_id=1234,
+                    mal_joined=tmp,
+                    mal_username="nattadasu",
+                    registered_at=tmp,
+                    registered_guild_id=Snowflake(1234567890),
+                    registered_by=Snowflake(1234567890),
+                )
+            )
+            self.assertTrue(await ud.check_if_registered(Snowflake(1234567890)))
+            self.assertTrue(await ud.update_user(Snowflake(1234567890), "anilistId", "42"))
+            data = await ud.get_user_data(Snowflake(1234567890))
+            self.assertEqual(data.mal_id, 1234)
+            self.assertEqual(data.anilist_id, 42)
+            self.assertIsNone(data.shikimori_id)
+            self.assertEqual(data.mal_joined, tmp.replace(microsecond=0))
+            exported = json.loads(await ud.export_user_data(1234567890))
+            self.assertEqual(exported["malUsername"], "nattadasu")
+            self.assertIsNone(exported["lastfmUsername"])
+            self.assertTrue(await ud.drop_user(Snowflake(1234567890)))
+
+    async def test_migrate_legacy(self):
+        """Test importing the legacy TSV database"""
+        legacy_path = os.path.join(self.tmpdir.name, "database.csv")
+        with open(legacy_path, "w", encoding="utf-8") as file:
+            file.write(
+                "discordId\tdiscordUsername\tdiscordJoined\tmalUsername\tmalId\t"
+                "malJoined\tregisteredAt\tregisteredGuildId\tregisteredBy\t"
+                "registeredGuildName\tanilistUsername\tanilistId\tlastfmUsername\t"
+                "shikimoriId\tshikimoriUsername\n"
+                "42\tnattadasu\t1420070400\tnattadasu\t1234\t1420070400\t"
+                "1420070400\t1\t42\tGuild\t\"\"\t\"\"\tnattadasu\t\"\"\t\"\"\n"
+            )
+        async with UserDatabase(self.database_path) as ud:
+            data = await ud.get_user_data(Snowflake(42))
+        self.assertEqual(data.lastfm_username, "nattadasu")
+        self.assertIsNone(data.anilist_username)
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + ".bak"))
+
+
 class DatabaseTest(unittest.IsolatedAsyncioTestCase):
     """Database test class"""
 
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+try:
+    from classes.enrichment import EnrichmentPlan, Resolver
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.enrichment import EnrichmentPlan, Resolver
+
+
+async def delayed(value, delay: float):
+    """Return a value after a delay"""
+    await asyncio.sleep(delay)
+    return value
+
+
+class EnrichmentPlanTest(unittest.IsolatedAsyncioTestCase):
+    """EnrichmentPlan test class"""
+
+    async def test_independent_steps_overlap(self):
+        """Test independent steps run concurrently"""
+        plan = EnrichmentPlan()
+        plan.add("a", lambda: delayed(1, 0.2))
+        plan.add("b", lambda: delayed(2, 0.2))
+        plan.add("c", lambda: delayed(3, 0.2))
+        started = time.monotonic()
+        results = await plan.run()
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(results, {"a": 1, "b": 2, "c": 3})
+
+    async def test_dependencies_receive_results(self):
+        """Test a step receives the results of the steps it depends on"""
+        plan = EnrichmentPlan()
+        plan.provide("base", 2)
+        plan.add("square", lambda base: delayed(base * base, 0), after=["base"])
+        plan.add(
+            "sum",
+            lambda base, square: delayed(base + square, 0),
+            after=["base", "square"])
+        results = await plan.run()
+        self.assertEqual(results["sum"], 6)
+
+    async def test_late_optional_step_dropped(self):
+        """Test a late optional step falls back to its default at the deadline"""
+        plan = EnrichmentPlan(deadline=0.1)
+        plan.add("main", lambda: delayed("main", 0))
+        plan.add("slow", lambda: delayed("slow", 1), optional=True, default="none")
+        started = time.monotonic()
+        results = await plan.run()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(results, {"main": "main", "slow": "none"})
+        self.assertEqual(plan.dropped, {"slow"})
+
+    async def test_failed_optional_step_dropped(self):
+        """Test a failing optional step falls back to its default"""
+
+        async def fail():
+            raise RuntimeError("provider down")
+
+        plan = EnrichmentPlan()
+        plan.add("broken", fail, optional=True, default={})
+        plan.add("next", lambda broken: delayed(broken, 0), after=["broken"])
+        results = await plan.run()
+        self.assertEqual(results, {"broken": {}, "next": {}})
+        self.assertIn("broken", plan.dropped)
+
+    async def test_failed_required_step_raises(self):
+        """Test a failing required step fails the plan"""
+
+        async def fail():
+            raise RuntimeError("provider down")
+
+        plan = EnrichmentPlan()
+        plan.add("broken", fail)
+        with self.assertRaises(RuntimeError):
+            await plan.run()
+
+    def test_unknown_dependency(self):
+        """Test steps can only depend on steps already in the plan"""
+        plan = EnrichmentPlan()
+        with self.assertRaises(ValueError):
+            plan.add("a", lambda b: delayed(b, 0), after=["b"])
+        plan.provide("b", 1)
+        with self.assertRaises(ValueError):
+            plan.provide("b", 2)
+
+
+def provider(delay: float, **found):
+    """Build a stub provider returning facts after a delay"""
+
+    async def lookup(facts):
+        await asyncio.sleep(delay)
+        return {name: value(facts) if callable(value) else value
+                for name, value in found.items()}
+
+    return lookup
+
+
+class ResolverTest(unittest.IsolatedAsyncioTestCase):
+    """Resolver test class"""
+
+    async def test_fixpoint(self):
+        """Test nodes run as their inputs become known, until nothing is left"""
+        resolver = Resolver()
+        resolver.add("search", provider(0, simkl=10), ["mal"], ["simkl"])
+        resolver.add("ids", provider(0, imdb="tt1", tvdb=5), ["simkl"], ["imdb", "tvdb"])
+        resolver.add("trakt", provider(0, trakt=lambda f: f"show/{f['imdb']}"), ["imdb"], ["trakt"])
+        resolution = await resolver.resolve({"mal": 1})
+        self.assertEqual(resolution.facts, {
+            "mal": 1, "simkl": 10, "imdb": "tt1", "tvdb": 5, "trakt": "show/tt1"})
+        self.assertEqual(resolution.ran, ["search", "ids", "trakt"])
+
+    async def test_independent_nodes_overlap(self):
+        """Test nodes sharing an input run concurrently"""
+        resolver = Resolver()
+        resolver.add("animeapi", provider(0.2, anidb=1), ["mal"], ["anidb"])
+        resolver.add("simkl", provider(0.2, simkl=2), ["mal"], ["simkl"])
+        started = time.monotonic()
+        resolution = await resolver.resolve({"mal": 1})
+        self.assertLess(time.monotonic() - started, 0.35)
+        self.assertEqual(set(resolution.ran), {"animeapi", "simkl"})
+
+    async def test_known_facts_skip_nodes(self):
+        """Test nodes are skipped when their facts are known or being found"""
+        resolver = Resolver()
+        resolver.add("by_mal", provider(0.05, simkl=1), ["mal"], ["simkl"])
+        resolver.add("by_anidb", provider(0, simkl=2), ["anidb"], ["simkl"])
+        resolver.add("given", provider(0, mal=99), [], ["mal"])
+        resolution = await resolver.resolve({"mal": 1, "anidb": 2})
+        self.assertEqual(resolution.facts["simkl"], 1)
+        self.assertEqual(resolution.facts["mal"], 1)
+        self.assertEqual(resolution.ran, ["by_mal"])
+
+    async def test_fallback_waits(self):
+        """Test fallbacks run one at a time, once nothing else can run"""
+        resolver = Resolver()
+        resolver.add("guess", provider(0, simkl=3), ["imdb"], ["simkl"], fallback=True)
+        resolver.add("lookup", provider(0, trakt=4), ["imdb"], ["trakt"], fallback=True)
+        resolver.add("animeapi", provider(0.05, simkl=1), ["imdb"], ["simkl"])
+        resolution = await resolver.resolve({"imdb": "tt1"})
+        self.assertEqual(resolution.facts["simkl"], 1)
+        self.assertEqual(resolution.ran, ["animeapi", "lookup"])
+
+    async def test_errors_are_isolated(self):
+        """Test a failing node doesn't stop the others"""
+
+        async def fail(facts):
+            raise RuntimeError("provider down")
+
+        resolver = Resolver()
+        resolver.add("broken", fail, ["mal"], ["simkl"])
+        resolver.add("backup", provider(0, simkl=2), ["mal"], ["simkl"], fallback=True)
+        resolution = await resolver.resolve({"mal": 1})
+        self.assertIsInstance(resolution.errors["broken"], RuntimeError)
+        self.assertEqual(resolution.facts["simkl"], 2)
+
+    async def test_deadline(self):
+        """Test a run returns what it found when the deadline passes"""
+        resolver = Resolver(deadline=0.1)
+        resolver.add("fast", provider(0, anidb=1), ["mal"], ["anidb"])
+        resolver.add("slow", provider(1, simkl=2), ["mal"], ["simkl"])
+        started = time.monotonic()
+        resolution = await resolver.resolve({"mal": 1})
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(resolution.facts, {"mal": 1, "anidb": 1})
+        self.assertEqual(resolution.pending, {"slow"})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
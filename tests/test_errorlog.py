@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.errorlog import ErrorLog, fingerprint
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.errorlog import ErrorLog, fingerprint
+
+
+def fail(value: int) -> ValueError:
+    """Raise and catch an error from the same frame every time"""
+    try:
+        raise ValueError(f"lookup {value} failed")
+    except ValueError as error:
+        return error
+
+
+class ErrorLogTest(unittest.TestCase):
+    """Error log test class"""
+
+    def setUp(self):
+        """Create a temporary error folder"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = ErrorLog(self.tmp.name, flush_interval=60)
+
+    def tearDown(self):
+        """Stop the writer and remove the temporary error folder"""
+        self.log.close()
+        self.tmp.cleanup()
+
+    def test_identical_tracebacks_are_deduplicated(self):
+        """Test that repeated tracebacks are written once with their count"""
+        for user_id in range(3):
+            self.log.record("anime", user_id, fail(user_id))
+        self.log.record("manga", 1, fail(1))
+        self.assertTrue(self.log.flush(5))
+        lines = self.log.read_segment(self.log.segments()[0])
+        self.assertEqual([line["count"] for line in lines], [3, 1])
+        self.assertEqual(lines[0]["message"], "lookup 2 failed")
+        self.assertIn("ValueError", lines[0]["traceback"])
+        self.assertEqual(self.log.recent("anime")[0].count, 3)
+        self.assertEqual([item.command for item in self.log.recent()], ["manga", "anime"])
+
+    def test_traceback_written_once_per_segment(self):
+        """Test that later flushes only carry the occurrence counts"""
+        self.log.record("anime", 1, fail(1))
+        self.log.flush(5)
+        self.log.record("anime", 1, fail(1))
+        self.log.flush(5)
+        lines = self.log.read_segment(self.log.segments()[0])
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn("traceback", lines[1])
+        self.assertEqual(self.log.recent()[0].count, 2)
+
+    def test_segments_are_rotated(self):
+        """Test that full segments are replaced and the oldest deleted"""
+        log = ErrorLog(self.tmp.name, segment_bytes=1, max_segments=2)
+        for index in range(4):
+            log.record(f"command{index}", 1, fail(index))
+            log.flush(5)
+        log.close()
+        segments = log.segments()
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(log.read_segment(segments[-1])[0]["command"], "command3")
+
+    def test_fingerprint_ignores_message(self):
+        """Test that fingerprints depend on the frames, not the message"""
+        self.assertEqual(fingerprint("anime", fail(1)), fingerprint("anime", fail(2)))
+        self.assertNotEqual(fingerprint("anime", fail(1)), fingerprint("manga", fail(1)))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import interactions as ipy
+from interactions.api.events import CommandCompletion, CommandError
+
+try:
+    from classes.tracing import current_span, tracer
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.tracing import current_span, tracer
+
+
+class FakeContext:
+    """Context of a slash command run"""
+
+    id = 1234567890123456789
+    invoke_target = "anime search"
+
+
+class BotEventsTest(unittest.IsolatedAsyncioTestCase):
+    """Tracing hooks of the events extension test class"""
+
+    async def asyncSetUp(self):
+        """Load the extension on a client"""
+        self.bot = ipy.Client()
+        self.request = self.bot.http.request
+        self.bot.load_extension("extensions.events")
+
+    async def asyncTearDown(self):
+        """Unload the extension"""
+        if "BotEvents" in self.bot.ext:
+            self.bot.unload_extension("extensions.events")
+
+    async def run_command(self) -> list:
+        """
+        Run a command through the client, as if it was invoked
+
+        Returns:
+            list: Span active in the callback
+        """
+        seen = []
+
+        async def callback() -> None:
+            seen.append(current_span())
+
+        # pylint: disable-next=protected-access
+        await self.bot._Client__dispatch_interaction(
+            ctx=FakeContext(), callback=callback(),
+            error_callback=CommandError, completion_callback=CommandCompletion)
+        return seen
+
+    async def test_command_starts_trace(self):
+        """Test that a sampled command runs inside a trace"""
+        with patch.object(tracer, "sample_rate", 1.0):
+            seen = await self.run_command()
+        self.assertIsNotNone(seen[0])
+        self.assertEqual(seen[0].name, "anime search")
+
+    async def test_reload_wraps_once(self):
+        """Test that reloading keeps one layer of wrapping, and unloading restores it"""
+        self.bot.reload_extension("extensions.events")
+        request = self.bot.http.request
+        wrapped = request.__closure__[0].cell_contents
+        self.assertEqual(wrapped, self.request)
+        self.bot.unload_extension("extensions.events")
+        self.assertEqual(self.bot.http.request, self.request)
+        self.assertFalse(self.bot.pre_run_callback)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.idgraph import IdGraph
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.idgraph import IdGraph
+
+
+class IdGraphTest(unittest.IsolatedAsyncioTestCase):
+    """IdGraph test class"""
+
+    async def asyncSetUp(self):
+        """Create an empty graph in a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.graph = IdGraph(os.path.join(self.tmpdir.name, "idgraph.db"))
+
+    async def asyncTearDown(self):
+        """Close and remove the graph"""
+        await self.graph.close()
+        self.tmpdir.cleanup()
+
+    async def test_record_and_get(self):
+        """Test every recorded ID answers for the others"""
+        self.graph.record(
+            "anime", "simkl", {"myanimelist": 1, "simkl": 37089, "anilist": 1, "kitsu": None})
+        self.assertEqual(await self.graph.get("anime", "myanimelist", 1, "simkl"), "37089")
+        self.assertEqual(await self.graph.get("anime", "simkl", "37089", "anilist"), "1")
+        self.assertIsNone(await self.graph.get("anime", "myanimelist", 1, "kitsu"))
+        self.assertIsNone(await self.graph.get("anime", "myanimelist", 2, "simkl"))
+
+    async def test_kinds_are_separate(self):
+        """Test IDs of a kind don't answer for another kind"""
+        self.graph.record("manga", "myanimelist", {"myanimelist": 1, "anilist": 30001})
+        self.assertIsNone(await self.graph.get("anime", "myanimelist", 1, "anilist"))
+        self.assertEqual(await self.graph.get("manga", "myanimelist", 1, "anilist"), "30001")
+
+    async def test_ambiguous(self):
+        """Test IDs shared by several titles get no answer"""
+        self.graph.record("anime", "myanimelist", {"myanimelist": 16498, "tvdb": 267440})
+        self.graph.record("anime", "myanimelist", {"myanimelist": 25777, "tvdb": 267440})
+        self.assertIsNone(await self.graph.get("anime", "tvdb", 267440, "myanimelist"))
+        self.assertEqual(await self.graph.get("anime", "myanimelist", 25777, "tvdb"), "267440")
+        self.assertEqual(
+            await self.graph.equivalents("anime", "myanimelist", 16498),
+            {"myanimelist": "16498", "tvdb": "267440"})
+        self.assertEqual(await self.graph.equivalents("anime", "tvdb", 267440), {})
+
+    async def test_remapped_id(self):
+        """Test IDs listed again by their owner replace the earlier ones"""
+        self.graph.record("anime", "simkl", {"simkl": 37089, "myanimelist": 1, "anilist": 1})
+        self.graph.record("anime", "simkl", {"simkl": 37089, "myanimelist": 5, "anilist": 5})
+        self.assertEqual(await self.graph.get("anime", "simkl", 37089, "myanimelist"), "5")
+        self.assertEqual(await self.graph.get("anime", "myanimelist", 5, "simkl"), "37089")
+        self.assertIsNone(await self.graph.get("anime", "myanimelist", 1, "simkl"))
+        self.assertEqual(
+            await self.graph.equivalents("anime", "simkl", 37089),
+            {"simkl": "37089", "myanimelist": "5", "anilist": "5"})
+
+    async def test_owner_wins(self):
+        """Test a title's own IDs win over a stale mapping from elsewhere"""
+        self.graph.record("anime", "kitsu", {"kitsu": 1, "myanimelist": 1})
+        self.graph.record("anime", "myanimelist", {"myanimelist": 2, "kitsu": 1})
+        self.assertEqual(await self.graph.get("anime", "kitsu", 1, "myanimelist"), "1")
+        self.assertEqual(await self.graph.get("anime", "myanimelist", 2, "kitsu"), "1")
+
+    async def test_expired(self):
+        """Test clusters older than max_age are ignored, then dropped"""
+        self.graph.record("show", "trakt", {"trakt": 1390, "imdb": "tt0944947"})
+        await self.graph.close()
+        graph = IdGraph(self.graph.database_path, max_age=0)
+        self.assertIsNone(await graph.get("show", "trakt", 1390, "imdb"))
+        await graph.close()
+
+    async def test_persistence(self):
+        """Test links survive reopening the graph"""
+        self.graph.record("show", "trakt", {"trakt": 1390, "imdb": "tt0944947"})
+        await self.graph.close()
+        graph = IdGraph(self.graph.database_path)
+        self.assertEqual(await graph.get("show", "imdb", "tt0944947", "trakt"), "1390")
+        await graph.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+
+try:
+    from classes.linkrouter import LinkRoute, LinkRouter, media_links
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.linkrouter import LinkRoute, LinkRouter, media_links
+
+
+class LinkRouterTest(unittest.TestCase):
+    """LinkRouter test class"""
+
+    def test_routes(self):
+        """Test that each supported site is routed with its ID"""
+        cases = {
+            "https://anilist.co/anime/21/ONE-PIECE": ("anilist_anime", "21"),
+            "https://anilist.co/manga/30013": ("anilist_manga", "30013"),
+            "https://anidb.net/a69": ("anidb_anime", "69"),
+            "https://en.annict.com/works/1234": ("annict_anime", "1234"),
+            "kitsu.io/anime/one-piece": ("kitsu_anime", "one-piece"),
+            "https://myanimelist.net/anime/21/One_Piece": ("myanimelist_anime", "21"),
+            "https://shikimori.me/animes/21-one-piece": ("shikimori_anime", "21"),
+            "https://db.silveryasha.web.id/anime/123": ("silveryasha_anime", "123"),
+            "https://simkl.com/tv/17465": ("simkl_tv", "17465"),
+            "https://mangadex.org/chapter/7f5c4e0e-1f36": ("mangadex_chapter", "7f5c4e0e-1f36"),
+        }
+        for url, (name, media_id) in cases.items():
+            with self.subTest(url=url):
+                link = media_links.first(f"look at this {url} !")
+                self.assertIsNotNone(link)
+                self.assertEqual((link.route.name, link.media_id), (name, media_id))
+
+    def test_find_all(self):
+        """Test that every link is extracted, in order"""
+        links = media_links.find_all(
+            "https://anilist.co/user/foo, then myanimelist.net/manga/2 and rawg.io/games/portal-2")
+        self.assertEqual(
+            [(link.route.name, link.media_id) for link in links],
+            [("myanimelist_manga", "2"), ("rawg_game", "portal-2")])
+
+    def test_no_link(self):
+        """Test that plain messages and unsupported links are skipped"""
+        self.assertIsNone(media_links.first("good morning"))
+        self.assertIsNone(media_links.first("https://www.youtube.com/watch?v=dQw4w9WgXcQ"))
+
+    def test_prefilter(self):
+        """Test that texts without a host name are skipped before the regex"""
+        self.assertIn("shikimori.", media_links._needles)  # pylint: disable=protected-access
+        self.assertFalse(media_links._may_contain("https://example.org"))  # pylint: disable=protected-access
+        router = LinkRouter([LinkRoute(
+            "example", r"(?:www\.)?example\.org", r"/(?P<mediaid>\d+)",
+            "mal", "anime", "example")])
+        self.assertIsNone(router._needles)  # pylint: disable=protected-access
+        self.assertEqual(router.first("www.example.org/1").media_id, "1")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+import os
+import socket
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.cache import Caching, JsonFileBackend
+    from classes.metrics import (MetricsRegistry, MetricsServer, metrics,
+                                 snowflake_time)
+    from classes.session import create_session
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.cache import Caching, JsonFileBackend
+    from classes.metrics import (MetricsRegistry, MetricsServer, metrics,
+                                 snowflake_time)
+    from classes.session import create_session
+
+
+def free_port() -> int:
+    """Find a local port nobody listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    """Metrics registry test class"""
+
+    def setUp(self):
+        """Create an empty registry"""
+        self.registry = MetricsRegistry()
+
+    def test_render_histogram(self):
+        """Test that histograms are rendered with cumulative buckets"""
+        child = self.registry.commands.labels("command", "anime search", "ok")
+        for value in (0.02, 0.2, 40):
+            child.observe(value)
+        text = self.registry.render()
+        self.assertIn("# TYPE ryuuzaki_command_duration_seconds histogram", text)
+        prefix = 'ryuuzaki_command_duration_seconds_bucket{kind="command",command="anime search",outcome="ok"'
+        self.assertIn(prefix + ',le="0.025"} 1', text)
+        self.assertIn(prefix + ',le="0.25"} 2', text)
+        self.assertIn(prefix + ',le="+Inf"} 3', text)
+        self.assertIn('_count{kind="command",command="anime search",outcome="ok"} 3', text)
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and backslashes in label values are escaped"""
+        self.registry.cache_reads.labels('a"b\\c', "hit").inc()
+        self.assertIn('provider="a\\"b\\\\c"', self.registry.render())
+
+    def test_label_count_is_checked(self):
+        """Test that a label set of the wrong size is refused"""
+        with self.assertRaises(ValueError):
+            self.registry.cache_reads.labels("jikan")
+
+    def test_quantile(self):
+        """Test that quantiles are interpolated inside their bucket"""
+        child = self.registry.messages.labels("no_link")
+        self.assertNotEqual(child.quantile(0.5), child.quantile(0.5))
+        for _ in range(10):
+            child.observe(0.3)
+        self.assertGreater(child.quantile(0.5), 0.25)
+        self.assertLessEqual(child.quantile(0.95), 0.5)
+
+    def test_summary(self):
+        """Test that the summary merges outcomes and computes hit ratios"""
+        self.registry.commands.labels("command", "ping", "ok").observe(0.1)
+        self.registry.commands.labels("command", "ping", "error").observe(0.1)
+        self.registry.provider_requests.labels("api.jikan.moe", "503", "1").observe(1)
+        self.registry.cache_reads.labels("jikan", "hit").inc(3)
+        self.registry.cache_reads.labels("jikan", "miss").inc()
+        summary = self.registry.summary()
+        self.assertIn("2 runs, 1 failed", summary["Commands"][0])
+        self.assertIn("1 failed, 1 retries", summary["Providers"][0])
+        self.assertIn("75% hits of 4 reads", summary["Cache"][0])
+        self.assertEqual(summary["Auto-embed"], [])
+
+    def test_rate_limit_summary(self):
+        """Test that queued, waiting and throttled requests are summarized per host"""
+        self.registry.ratelimit_queue.labels("api.jikan.moe").inc(2)
+        self.registry.ratelimit_queue.labels("api.jikan.moe").dec()
+        self.registry.ratelimit_wait.labels("api.jikan.moe").observe(0.3)
+        self.registry.ratelimit_throttled.labels("api.jikan.moe", 429).inc()
+        self.registry.ratelimit_throttled.labels("api.jikan.moe", 503).inc()
+        self.assertIn('ryuuzaki_ratelimit_queue_depth{host="api.jikan.moe"} 1',
+                      self.registry.render())
+        self.assertIn("2 throttled, 1 queued", self.registry.summary()["Rate limits"][0])
+
+    def test_snowflake_time(self):
+        """Test reading the creation time of a snowflake"""
+        self.assertEqual(snowflake_time(175928847299117063), 1462015105.796)
+
+
+class MetricsChokepointTest(unittest.IsolatedAsyncioTestCase):
+    """Instrumented chokepoints test class"""
+
+    async def asyncSetUp(self):
+        """Serve the shared metrics on a free local port"""
+        metrics.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = MetricsServer(port=free_port())
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        """Stop the endpoint"""
+        await self.server.close()
+        self.tmp.cleanup()
+        metrics.clear()
+
+    async def test_cache_reads_are_counted(self):
+        """Test that hits, misses and expired reads are counted per provider"""
+        cache = Caching(os.path.join(self.tmp.name, "jikan"), 60, backend=JsonFileBackend())
+        path = cache.get_cache_path("anime/1.json")
+        await cache.aread_cache(path)
+        await cache.awrite_cache(path, {"id": 1})
+        await cache.aread_cache(path)
+        await cache.aread_cache(path, 0)
+        counts = {result: child.value for (_, result), child in metrics.cache_reads.items()}
+        self.assertEqual(counts, {"hit": 1, "miss": 1, "expired": 1})
+
+    async def test_endpoint_serves_provider_requests(self):
+        """Test that requests of provider sessions are timed and served"""
+        url = f"http://127.0.0.1:{self.server.port}/metrics"
+        async with create_session() as session:
+            async with session.get(url, trace_request_ctx={"retry": 2}) as response:
+                self.assertEqual(response.status, 200)
+            async with session.get(url) as response:
+                text = await response.text()
+        self.assertIn('host="127.0.0.1",status="200",retry="2"', text)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.randompick import RandomIdPool, RandomRowPool, write_atomic
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.randompick import RandomIdPool, RandomRowPool, write_atomic
+
+NEKOMIMI = (
+    "id\timageUrl\tartist\tgirlOrBoy\tmediaSource\n"
+    "1\thttps://a/1.png\tA\tgirl\tK-On!\n"
+    "2\thttps://a/2.png\tB\tboy\t\n"
+    "3\thttps://a/3.png\tC\tgirl\n"
+)
+
+
+class RandomPickTest(unittest.TestCase):
+    """RandomIdPool and RandomRowPool test class"""
+
+    def setUp(self):
+        """Create temporary datasets"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.mal_path = os.path.join(self.tmpdir.name, "mal.csv")
+        self.neko_path = os.path.join(self.tmpdir.name, "nekomimiDb.tsv")
+        write_atomic(self.mal_path, "mal_id\ttitle\n1\tCowboy Bebop\n5\tCowboy Bebop: Tengoku no Tobira\n")
+        write_atomic(self.neko_path, NEKOMIMI)
+
+    def tearDown(self):
+        """Remove temporary datasets"""
+        self.tmpdir.cleanup()
+
+    def test_pick_id(self):
+        """Test picking a random ID"""
+        pool = RandomIdPool(self.mal_path, "mal_id")
+        self.assertEqual(len(pool), 2)
+        self.assertEqual({pool.pick() for _ in range(100)}, {1, 5})
+
+    def test_pick_partition(self):
+        """Test picking a random row of a partition"""
+        pool = RandomRowPool(self.neko_path, "girlOrBoy")
+        self.assertEqual(len(pool), 3)
+        self.assertEqual({pool.pick("girl")["id"] for _ in range(100)}, {"1", "3"})
+        self.assertEqual(pool.pick("boy")["mediaSource"], "")
+        self.assertEqual({pool.pick()["id"] for _ in range(200)}, {"1", "2", "3"})
+        with self.assertRaises(ValueError):
+            pool.pick("nb")
+
+    def test_reload_when_file_changes(self):
+        """Test a refreshed file is swapped in"""
+        pool = RandomIdPool(self.mal_path, "mal_id", check_interval=0)
+        self.assertEqual(len(pool), 2)
+        write_atomic(self.mal_path, "mal_id\ttitle\n6\tTrigun\n")
+        os.utime(self.mal_path, (0, 0))
+        self.assertEqual(pool.pick(), 6)
+        self.assertEqual(os.listdir(self.tmpdir.name).count("mal.csv.tmp"), 0)
+
+    def test_preload(self):
+        """Test preloading reads existing files only"""
+        pool = RandomIdPool(self.mal_path, "mal_id")
+        pool.preload()
+        os.remove(self.mal_path)
+        self.assertEqual(len(pool), 2)
+        missing = RandomIdPool(os.path.join(self.tmpdir.name, "missing.csv"), "mal_id")
+        missing.preload()
+        with self.assertRaises(FileNotFoundError):
+            missing.pick()
+
+
+class AsyncRandomPickTest(unittest.IsolatedAsyncioTestCase):
+    """Reloads of random pools inside an event loop test class"""
+
+    async def asyncSetUp(self):
+        """Create a temporary dataset"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.mal_path = os.path.join(self.tmpdir.name, "mal.csv")
+        write_atomic(self.mal_path, "mal_id\ttitle\n1\tCowboy Bebop\n")
+
+    async def asyncTearDown(self):
+        """Remove the temporary dataset"""
+        self.tmpdir.cleanup()
+
+    async def test_changed_file_is_read_in_background(self):
+        """Test a changed file is swapped in without blocking the pick"""
+        pool = RandomIdPool(self.mal_path, "mal_id", check_interval=0)
+        pool.preload()
+        write_atomic(self.mal_path, "mal_id\ttitle\n6\tTrigun\n")
+        os.utime(self.mal_path, (0, 0))
+        self.assertEqual(pool.pick(), 1)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if pool.pick() == 6:
+                break
+        self.assertEqual(pool.pick(), 6)
+
+    async def test_areload(self):
+        """Test an explicit reload in the executor"""
+        pool = RandomIdPool(self.mal_path, "mal_id")
+        pool.preload()
+        write_atomic(self.mal_path, "mal_id\ttitle\n6\tTrigun\n")
+        await pool.areload()
+        self.assertEqual(pool.pick(), 6)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
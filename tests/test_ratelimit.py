@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+from aiohttp import ClientSession, web
+
+try:
+    from classes.metrics import metrics
+    from classes.ratelimit import (HostLimiter, RateLimiter, TokenBucket,
+                                   parse_retry_after)
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.metrics import metrics
+    from classes.ratelimit import (HostLimiter, RateLimiter, TokenBucket,
+                                   parse_retry_after)
+
+
+class RateLimitTest(unittest.IsolatedAsyncioTestCase):
+    """Rate limiter test class"""
+
+    def setUp(self):
+        """Forget the metrics of other tests"""
+        metrics.clear()
+
+    def tearDown(self):
+        """Forget the metrics of this test"""
+        metrics.clear()
+
+    def test_parse_retry_after(self):
+        """Test that both Retry-After formats are understood"""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(
+            parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_token_bucket(self):
+        """Test that a drained bucket asks to wait"""
+        bucket = TokenBucket(2, 1)
+        bucket.consume()
+        bucket.consume()
+        self.assertGreater(bucket.delay(), 0)
+
+    async def test_pacing(self):
+        """Test that requests beyond the limit are queued"""
+        limiter = HostLimiter("example.org", [(2, 0.2)])
+        started = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(4)])
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertEqual(limiter.stats.requests, 4)
+        self.assertGreaterEqual(limiter.stats.delayed, 2)
+        self.assertEqual(limiter.stats.max_queue_depth, 2)
+        self.assertEqual(limiter.stats.queue_depth, 0)
+        self.assertEqual(metrics.ratelimit_wait.labels("example.org").count, 4)
+        self.assertEqual(metrics.ratelimit_queue.labels("example.org").value, 0)
+
+    async def test_retry_after(self):
+        """Test that a 429 with Retry-After pauses the host"""
+        limiter = RateLimiter({"example.org": [(100, 1)]})
+        limiter.observe("example.org", 429, {"Retry-After": "0.2"})
+        waited = await limiter.acquire("example.org")
+        self.assertGreaterEqual(waited, 0.15)
+        self.assertEqual(limiter.stats()["example.org"]["throttled"], 1)
+        self.assertEqual(
+            metrics.ratelimit_throttled.labels("example.org", 429).value, 1)
+
+    async def test_throttled_request_is_retried(self):
+        """Test that a 429 is sent once more after its Retry-After"""
+        statuses = [429, 429, 200, 429, 429]
+
+        async def handler(_request: web.Request) -> web.Response:
+            return web.Response(status=statuses.pop(0),
+                                headers={"Retry-After": "0.1"})
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        limiter = RateLimiter({"127.0.0.1": [(100, 1)]})
+        try:
+            async with ClientSession(
+                middlewares=(limiter.retry_middleware,),
+                trace_configs=[limiter.trace_config()],
+            ) as session:
+                url = f"http://127.0.0.1:{port}/"
+                async with session.get(url) as response:
+                    self.assertEqual(response.status, 429)
+                async with session.get(url) as response:
+                    self.assertEqual(response.status, 200)
+                started = time.monotonic()
+                async with session.get(url) as response:
+                    self.assertEqual(response.status, 429)
+                self.assertGreaterEqual(time.monotonic() - started, 0.08)
+        finally:
+            await runner.cleanup()
+        self.assertEqual(statuses, [])
+        self.assertEqual(limiter.stats()["127.0.0.1"]["throttled"], 4)
+
+    async def test_unknown_host(self):
+        """Test that hosts without known limits are not paced"""
+        limiter = RateLimiter({})
+        self.assertEqual(await limiter.acquire("example.org"), 0.0)
+        self.assertEqual(limiter.stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
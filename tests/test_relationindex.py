@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.animeapi import AnimeApiAnime
+    from classes.relationindex import RelationIndex
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.animeapi import AnimeApiAnime
+    from classes.relationindex import RelationIndex
+
+COLUMNS = ["title", "anidb", "anilist", "kitsu", "myanimelist", "notify", "trakt"]
+
+RECORDS = [
+    {"title": "Cowboy Bebop", "anidb": 23, "anilist": 1, "kitsu": 1,
+     "myanimelist": 1, "notify": "Tk3ccKimg", "trakt": 30857},
+    {"title": "Trigun", "anidb": 2, "anilist": 6, "kitsu": 7,
+     "myanimelist": 6, "notify": None, "extra": "ignored"},
+]
+
+
+class RelationIndexTest(unittest.IsolatedAsyncioTestCase):
+    """RelationIndex test class"""
+
+    async def asyncSetUp(self):
+        """Create an empty index in a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = RelationIndex(
+            os.path.join(self.tmpdir.name, "relations.db"), COLUMNS)
+
+    async def asyncTearDown(self):
+        """Close and remove the index"""
+        await self.index.close()
+        self.tmpdir.cleanup()
+
+    async def test_missing_index(self):
+        """Test lookups without an index built yet"""
+        self.assertIsNone(await self.index.lookup("myanimelist", 1))
+        self.assertIsNone(await self.index.updated())
+
+    async def test_lookup(self):
+        """Test lookups by any indexed platform"""
+        await self.index.rebuild(RECORDS, 1000)
+        by_mal = await self.index.lookup("myanimelist", 1)
+        by_notify = await self.index.lookup("notify", "Tk3ccKimg")
+        by_anidb = await self.index.lookup("anidb", "2")
+        self.assertEqual(by_mal, by_notify)
+        self.assertEqual(by_mal["title"], "Cowboy Bebop")
+        self.assertEqual(by_anidb["anilist"], 6)
+        self.assertEqual(AnimeApiAnime(**by_anidb).title, "Trigun")
+        self.assertIsNone(await self.index.lookup("myanimelist", 999))
+        self.assertEqual(await self.index.updated(), 1000)
+
+    async def test_unindexed_platform(self):
+        """Test platforms not indexed are left to the HTTP API"""
+        await self.index.rebuild(RECORDS, 1000)
+        self.assertIsNone(await self.index.lookup("trakt", 30857))
+        self.assertIsNone(await self.index.lookup("imdb", "tt0213338"))
+
+    async def test_rebuild_swaps_index(self):
+        """Test a rebuild replaces the index served to lookups"""
+        await self.index.rebuild(RECORDS, 1000)
+        self.assertIsNotNone(await self.index.lookup("myanimelist", 6))
+        await self.index.rebuild(RECORDS[:1], 2000)
+        self.assertIsNone(await self.index.lookup("myanimelist", 6))
+        self.assertEqual(await self.index.updated(), 2000)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["relations.db"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from aiohttp import ClientError
+
+try:
+    from classes.animeapi import AnimeApi
+    from classes.cache import MemoryLruBackend, set_default_backend
+    from classes.jikan import JikanApi
+    from classes.replay import (Exchange, Recording, ReplayResponse,
+                                ReplayServer)
+    from classes.session import create_session
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.animeapi import AnimeApi
+    from classes.cache import MemoryLruBackend, set_default_backend
+    from classes.jikan import JikanApi
+    from classes.replay import (Exchange, Recording, ReplayResponse,
+                                ReplayServer)
+    from classes.session import create_session
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "replay")
+"""Recorded provider responses"""
+
+
+class ReplayProviderTest(unittest.IsolatedAsyncioTestCase):
+    """Provider wrappers served from recordings test class"""
+
+    async def asyncSetUp(self):
+        """Replay the fixtures on an empty cache"""
+        set_default_backend(MemoryLruBackend())
+        self.server = ReplayServer.from_directory(FIXTURES, latency_scale=0)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        """Stop replaying and restore the shared cache"""
+        await self.server.close()
+        set_default_backend(None)
+
+    async def test_jikan_anime(self):
+        """Test that Jikan anime data is served from the recording"""
+        async with JikanApi() as jikan:
+            anime = await jikan.get_anime_data(52991)
+        self.assertEqual(anime.title, "Sousou no Frieren")
+        self.assertEqual(self.server.misses, [])
+
+    async def test_hardcoded_urls_are_rerouted(self):
+        """Test that URLs not built from base_url are rerouted too"""
+        async with AnimeApi() as aniapi:
+            relation = await aniapi.get_relation(52991, "myanimelist")
+        self.assertEqual(relation.anilist, 154587)
+
+
+class ReplayServerTest(unittest.IsolatedAsyncioTestCase):
+    """Replay server test class"""
+
+    async def asyncSetUp(self):
+        """Serve a recording of a flaky provider"""
+        recording = Recording("flaky.test", [
+            Exchange("GET", "/items", {"page": "2"}, responses=[
+                ReplayResponse(429, {"Retry-After": "0"}, {"error": "slow down"}),
+                ReplayResponse(200, data={"page": 2}, latency=0.05),
+            ]),
+            Exchange("GET", "/broken", responses=[
+                ReplayResponse(error="disconnect")]),
+        ])
+        self.server = ReplayServer([recording])
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        """Stop the server"""
+        await self.server.close()
+
+    async def test_responses_are_served_in_order(self):
+        """Test that a 429 is followed by the slow success, which repeats"""
+        async with create_session() as session:
+            url = "https://flaky.test/items?page=2&client_id=secret"
+            async with session.get(url) as response:
+                self.assertEqual(response.status, 429)
+                self.assertEqual(response.headers["Retry-After"], "0")
+            started = time.perf_counter()
+            for _ in range(2):
+                async with session.get(url) as response:
+                    self.assertEqual(await response.json(), {"page": 2})
+            self.assertGreaterEqual(time.perf_counter() - started, 0.1)
+        self.assertEqual(self.server.served, 3)
+
+    async def test_disconnect(self):
+        """Test that a recorded disconnect drops the connection"""
+        async with create_session() as session:
+            with self.assertRaises(ClientError):
+                async with session.get("https://flaky.test/broken") as response:
+                    await response.read()
+
+    async def test_unmatched_requests_are_reported(self):
+        """Test that requests without a recording are refused and listed"""
+        async with create_session() as session:
+            async with session.get("https://flaky.test/items?page=3") as response:
+                self.assertEqual(response.status, 501)
+        self.assertEqual(self.server.misses, ["GET flaky.test/items?page=3"])
+
+    async def test_record_mode(self):
+        """Test that forwarded exchanges are recorded in order, without secrets"""
+        upstream = f"{self.server.host}:{self.server.port}"
+        recorder = ReplayServer(record=True, upstream_scheme="http")
+        await recorder.start()
+        try:
+            async with create_session() as session:
+                url = f"https://{upstream}/flaky.test/items?page=2&client_id=secret"
+                for status in (429, 200):
+                    async with session.get(url) as response:
+                        self.assertEqual(response.status, status)
+        finally:
+            await recorder.close()
+        with tempfile.TemporaryDirectory() as directory:
+            paths = recorder.save(directory)
+            recording = Recording.load(paths[0])
+        exchange = recording.exchanges[0]
+        self.assertEqual(exchange.query, {"page": "2"})
+        self.assertEqual([item.status for item in exchange.responses], [429, 200])
+        self.assertEqual(exchange.responses[1].data, {"page": 2})
+        self.assertGreaterEqual(exchange.responses[1].latency, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
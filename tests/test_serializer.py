@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import unittest
+
+try:
+    from classes.serializer import (Serializer, UnsupportedPayloadError,
+                                    available_codecs, available_compressions)
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.serializer import (Serializer, UnsupportedPayloadError,
+                                    available_codecs, available_compressions)
+
+PAYLOAD = {
+    "mal_id": 1,
+    "title": "カウボーイビバップ",
+    "score": 8.75,
+    "airing": False,
+    "genres": [{"name": "Action"}, {"name": "Sci-Fi"}] * 200,
+    "background": None,
+}
+
+
+class SerializerTest(unittest.TestCase):
+    """Serializer test class"""
+
+    def test_round_trip(self):
+        """Test every installed codec and compression round trip"""
+        for codec in available_codecs():
+            for compression in available_compressions():
+                with self.subTest(codec=codec, compression=compression):
+                    serializer = Serializer(codec, compression, threshold=0)
+                    self.assertEqual(serializer.loads(serializer.dumps(PAYLOAD)), PAYLOAD)
+
+    def test_threshold(self):
+        """Test that only payloads above the threshold are compressed"""
+        serializer = Serializer("json", "zlib", threshold=1024)
+        small = serializer.dumps({"id": 1})
+        large = serializer.dumps(PAYLOAD)
+        self.assertEqual(small[4], 0)
+        self.assertEqual(large[4], 1)
+        self.assertLess(len(large), len(json.dumps(PAYLOAD)))
+
+    def test_reads_other_configurations(self):
+        """Test that payloads are decoded whatever the current configuration"""
+        written = Serializer("json", "zlib", threshold=0).dumps(PAYLOAD)
+        self.assertEqual(Serializer("json", "none").loads(written), PAYLOAD)
+
+    def test_legacy_json(self):
+        """Test that entries without a header are read as JSON text"""
+        serializer = Serializer()
+        self.assertEqual(serializer.loads(json.dumps(PAYLOAD)), PAYLOAD)
+        self.assertEqual(serializer.loads(json.dumps(PAYLOAD).encode()), PAYLOAD)
+
+    def test_unsupported_payload(self):
+        """Test that unknown header versions and formats are rejected"""
+        serializer = Serializer("json", "none")
+        with self.assertRaises(UnsupportedPayloadError):
+            serializer.loads(b"RC\x02\x00\x00{}")
+        with self.assertRaises(UnsupportedPayloadError):
+            serializer.loads(b"RC\x01\x09\x00{}")
+        with self.assertRaises(UnsupportedPayloadError):
+            Serializer("json", "brotli")  # type: ignore
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
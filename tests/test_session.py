@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+try:
+    from classes.session import SessionManager
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.session import SessionManager
+
+
+class SessionManagerTest(unittest.IsolatedAsyncioTestCase):
+    """SessionManager test class"""
+
+    async def test_standalone_session(self):
+        """Test that a session owns its connector before the pool starts"""
+        manager = SessionManager()
+        async with manager.create_session() as session:
+            self.assertIsNot(session.connector, manager.connector)
+        self.assertTrue(session.closed)
+
+    async def test_borrowed_session(self):
+        """Test that sessions borrow the shared connector once started"""
+        manager = SessionManager(limit_per_host=2)
+        await manager.start()
+        try:
+            async with manager.create_session(headers={"X-Test": "1"}) as session:
+                self.assertIs(session.connector, manager.connector)
+            self.assertFalse(manager.connector.closed)
+            self.assertEqual(manager.connector.limit_per_host, 2)
+        finally:
+            await manager.close()
+        self.assertFalse(manager.started)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.settings import LanguageSettings, MemberAllowlist
+    from modules.const import LANGUAGE_CODE
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.settings import LanguageSettings, MemberAllowlist
+    from modules.const import LANGUAGE_CODE
+
+
+class LanguageSettingsTest(unittest.TestCase):
+    """LanguageSettings test class"""
+
+    def setUp(self):
+        """Create temporary settings files"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.member_path = os.path.join(self.tmpdir.name, "member.csv")
+        self.server_path = os.path.join(self.tmpdir.name, "server.csv")
+        with open(self.member_path, "w", encoding="utf-8") as file:
+            file.write("discordId\tlanguage\n1\tid_ID\n")
+        with open(self.server_path, "w", encoding="utf-8") as file:
+            file.write("serverId\tlanguage\n10\tja_JP\n")
+        self.settings = LanguageSettings(
+            self.member_path, self.server_path, check_interval=0)
+
+    def tearDown(self):
+        """Remove the temporary settings files"""
+        self.tmpdir.cleanup()
+
+    def test_resolve(self):
+        """Test resolving from member, then server, then default"""
+        self.assertEqual(self.settings.resolve(1, 10), "id_ID")
+        self.assertEqual(self.settings.resolve(2, 10), "ja_JP")
+        self.assertEqual(self.settings.resolve(2, None), LANGUAGE_CODE)
+
+    def test_write_through(self):
+        """Test that changes are saved and survive a reload"""
+        self.settings.set_member(2, "en_US")
+        self.settings.set_server(20, "id_ID")
+        self.assertTrue(self.settings.drop_member(1))
+        fresh = LanguageSettings(self.member_path, self.server_path)
+        self.assertEqual(fresh.get_member(2), "en_US")
+        self.assertIsNone(fresh.get_member(1))
+        self.assertEqual(fresh.get_server(20), "id_ID")
+        with open(self.server_path, "r", encoding="utf-8") as file:
+            self.assertTrue(file.readline().startswith("serverId\t"))
+
+    def test_reload_on_change(self):
+        """Test that edits made on disk are picked up"""
+        self.assertIsNone(self.settings.get_member(3))
+        with open(self.member_path, "a", encoding="utf-8") as file:
+            file.write("3\tja_JP\n")
+        os.utime(self.member_path, (0, 0))
+        self.assertEqual(self.settings.get_member(3), "ja_JP")
+
+
+class MemberAllowlistTest(unittest.TestCase):
+    """MemberAllowlist test class"""
+
+    def setUp(self):
+        """Create a legacy allowlist directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "autoembed.csv")
+        self.legacy = os.path.join(self.tmpdir.name, "allowlist_autoembed")
+        os.makedirs(self.legacy)
+        open(os.path.join(self.legacy, "1"), "w", encoding="utf-8").close()
+
+    def tearDown(self):
+        """Remove the temporary files"""
+        self.tmpdir.cleanup()
+
+    def test_legacy_import(self):
+        """Test that members of the legacy directory are imported"""
+        allowlist = MemberAllowlist(self.path, self.legacy)
+        self.assertIn(1, allowlist)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_toggle(self):
+        """Test that toggling is saved and survives a reload"""
+        allowlist = MemberAllowlist(self.path, self.legacy)
+        self.assertTrue(allowlist.add(2))
+        self.assertFalse(allowlist.add(2))
+        self.assertTrue(allowlist.discard(1))
+        fresh = MemberAllowlist(self.path, self.legacy)
+        self.assertIn(2, fresh)
+        self.assertNotIn(1, fresh)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
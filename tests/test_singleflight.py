@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import unittest
+
+try:
+    from classes.metrics import metrics
+    from classes.singleflight import SingleFlight
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.metrics import metrics
+    from classes.singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    """SingleFlight test class"""
+
+    async def asyncSetUp(self):
+        """Create a fresh single-flight group"""
+        metrics.clear()
+        self.flight = SingleFlight()
+        self.upstream_calls = 0
+
+    async def asyncTearDown(self):
+        """Forget the metrics of this test"""
+        metrics.clear()
+
+    async def _fetch(self) -> dict:
+        """Pretend to be a slow upstream request"""
+        self.upstream_calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def test_coalesce(self):
+        """Test that concurrent callers share one upstream request"""
+        results = await asyncio.gather(
+            *[self.flight.do(("jikan", "anime", 1), self._fetch) for _ in range(5)]
+        )
+        self.assertEqual(self.upstream_calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(
+            self.flight.stats()["jikan"],
+            {"hits": 0, "misses": 1, "coalesced": 4})
+        self.assertEqual(self.flight.in_flight, 0)
+        self.assertEqual(
+            {result: child.value
+             for (_, result), child in metrics.flight_lookups.items()},
+            {"miss": 1, "coalesced": 4})
+        self.assertEqual(metrics.flights_in_flight.labels().value, 0)
+        self.assertIn("4 coalesced, 1 upstream of 5 lookups",
+                      metrics.summary()["Coalescing"][0])
+
+    async def test_cache_hit(self):
+        """Test that a cache hit skips the upstream request"""
+
+        async def lookup() -> dict:
+            """Pretend to be a cache hit"""
+            return {"id": 2}
+
+        result = await self.flight.do(("anilist", "anime", 2), self._fetch, lookup)
+        self.assertEqual(result, {"id": 2})
+        self.assertEqual(self.upstream_calls, 0)
+        self.assertEqual(self.flight.stats()["anilist"]["hits"], 1)
+
+    async def test_error_is_shared(self):
+        """Test that an upstream error reaches every coalesced caller"""
+
+        async def failing() -> None:
+            """Pretend to be a failing upstream request"""
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(
+            *[self.flight.do("animeapi", failing) for _ in range(3)],
+            return_exceptions=True,
+        )
+        self.assertTrue(all(isinstance(res, ValueError) for res in results))
+        self.assertEqual(self.flight.in_flight, 0)
+
+    async def test_leader_cancelled(self):
+        """Test that followers take over when only the leader is cancelled"""
+        key = ("simkl", "anime", 3)
+        leader = asyncio.create_task(self.flight.do(key, self._fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(self.flight.do(key, self._fetch))
+                     for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        self.assertTrue(leader.cancelled())
+        self.assertFalse(any(follower.cancelled() for follower in followers))
+        self.assertEqual(results, [{"id": 1}, {"id": 1}])
+        self.assertEqual(self.upstream_calls, 2)
+        self.assertEqual(self.flight.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
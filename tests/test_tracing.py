@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import unittest
+
+try:
+    from classes.metrics import MetricsServer
+    from classes.session import create_session
+    from classes.tracing import (FileExporter, Tracer, current_span,
+                                 render_waterfall, span)
+except ImportError:
+    # add the path to the 'modules' directory to the system path
+    sys.path.insert(
+        0,
+        os.path.abspath(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..")))
+    from classes.metrics import MetricsServer
+    from classes.session import create_session
+    from classes.tracing import (FileExporter, Tracer, current_span,
+                                 render_waterfall, span)
+
+
+class TracingTest(unittest.IsolatedAsyncioTestCase):
+    """Span tracing test class"""
+
+    async def asyncSetUp(self):
+        """Create a tracer sampling every trace and keeping its output"""
+        self.printed: list[str] = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+        self.tracer = Tracer(1.0, 0.0, FileExporter(self.path), self.printed.append)
+
+    async def asyncTearDown(self):
+        """Remove the exported traces"""
+        self.tmp.cleanup()
+
+    async def test_span_outside_trace(self):
+        """Test that spans do nothing outside a sampled trace"""
+        with span("cache read", "cache") as item:
+            self.assertIsNone(item)
+        self.assertIsNone(current_span())
+        self.assertIsNone(Tracer(0.0).start("anime search"))
+
+    async def test_spans_nest_across_tasks(self):
+        """Test that spans opened by spawned tasks nest under the opener"""
+        root = self.tracer.start("anime search")
+
+        async def call(name: str) -> None:
+            async with span(name):
+                with span(f"parse {name}", "cpu"):
+                    await asyncio.sleep(0)
+
+        with span("enrich", "cpu") as enrich:
+            await asyncio.gather(call("jikan"), call("simkl"))
+        await self.tracer.finish(root)
+        spans = {item.name: item for item in root.trace.spans}
+        self.assertIs(spans["jikan"].parent, enrich)
+        self.assertIs(spans["parse simkl"].parent, spans["simkl"])
+        self.assertIs(current_span(), None)
+
+    async def test_waterfall_flags_serial_calls(self):
+        """Test that sibling provider calls made one after another are flagged"""
+        root = self.tracer.start("myanimelist profile")
+        async with span("GET myanimelist.net/profile/nattadasu"):
+            await asyncio.sleep(0.01)
+        async with span("GET api.jikan.moe/v4/users/nattadasu/full"):
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*(self._sleep_span(f"GET {i}") for i in range(2)))
+        await self.tracer.finish(root)
+        waterfall = render_waterfall(root.trace)
+        lines = waterfall.splitlines()
+        self.assertIn("myanimelist profile took", lines[0])
+        self.assertIn("serial after GET myanimelist.net", lines[3])
+        self.assertEqual(sum("serial after GET 0" in line for line in lines), 0)
+        self.assertEqual(self.printed, [waterfall])
+
+    @staticmethod
+    async def _sleep_span(name: str) -> None:
+        """Open a provider span for a while"""
+        async with span(name):
+            await asyncio.sleep(0.01)
+
+    async def test_export_and_provider_requests(self):
+        """Test that provider requests open spans and traces are exported"""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = MetricsServer(port=port)
+        await server.start()
+        root = self.tracer.start("ping", interaction_id="1")
+        try:
+            async with create_session() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    await response.read()
+        finally:
+            await server.close()
+        await self.tracer.finish(root)
+        with open(self.path, encoding="utf-8") as file:
+            exported = [json.loads(line) for line in file]
+        self.assertEqual(len(exported), 1)
+        request = exported[0]["spans"][1]
+        self.assertEqual(request["name"], "GET 127.0.0.1/metrics")
+        self.assertEqual(request["attributes"]["status"], 200)
+        self.assertEqual(request["parent_id"], exported[0]["spans"][0]["span_id"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
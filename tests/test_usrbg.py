@@ -5,7 +5,7 @@ import unittest
 from interactions import Snowflake
 
 try:
-    from classes.usrbg import UserBackground, UserBackgroundStruct
+    from classes.usrbg import UserBackground, UserBackgroundStruct, UsrbgIndex
 except ImportError:
     # add the path to the 'modules' directory to the system path
     sys.path.insert(
@@ -14,7 +14,7 @@ except ImportError:
             os.path.join(
                 os.path.dirname(__file__),
                 "..")))
-    from classes.usrbg import UserBackground, UserBackgroundStruct
+    from classes.usrbg import UserBackground, UserBackgroundStruct, UsrbgIndex
 
 
 class UserBackgroundTest(unittest.IsolatedAsyncioTestCase):
@@ -29,5 +29,33 @@ class UserBackgroundTest(unittest.IsolatedAsyncioTestCase):
             self.assertIsInstance(res, UserBackgroundStruct)
 
 
+class UsrbgIndexTest(unittest.TestCase):
+    """UsrbgIndex test class"""
+
+    def test_lookup(self):
+        """Test looking banners up from a loaded dataset"""
+        index = UsrbgIndex()
+        index.load({
+            "etag": '"abc"',
+            "entries": [
+                {"_id": "1", "uid": "384089845527478272",
+                    "img": "https://i.imgur.com/a.png", "orientation": "center"},
+                {"_id": "2", "uid": "1", "img": "", "orientation": "center"},
+            ],
+        })
+        res = index.lookup(Snowflake(384089845527478272))
+        self.assertEqual(res.img, "https://i.imgur.com/a.png")
+        self.assertIsNone(index.lookup(1))
+        self.assertIsNone(index.lookup(2))
+        self.assertEqual(index.etag, '"abc"')
+
+    def test_legacy_list(self):
+        """Test loading a dataset cached as a bare list"""
+        index = UsrbgIndex()
+        index.load([{"_id": "1", "uid": "5", "img": "x", "orientation": "top"}])
+        self.assertEqual(index.lookup("5").orientation, "top")
+        self.assertIsNone(index.etag)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)